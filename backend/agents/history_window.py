@@ -0,0 +1,269 @@
+"""
+Incremental, token-budgeted history window for the orchestrator.
+
+The orchestrator's history processor runs before every model request — once
+per tool round trip. It used to rescan the whole message list each time,
+reclassify system prompts and rebuild the transformed window (assistant
+messages without thinking → user context text, orphaned tool results → text)
+from scratch, keeping a fixed ``MAX_HISTORY_MESSAGES = 50``.
+
+``HistoryWindow`` keeps per-conversation state instead:
+
+- Each message is classified, transformed and token-counted once, when it is
+  first appended. Pydantic AI writes the processed history back into the run,
+  so the next call's input starts with the list we returned last time; only
+  the messages after that watermark are new.
+- The window is the longest suffix of conversation messages whose estimated
+  tokens (``len(text) // 4``) fit in ``HISTORY_TOKEN_BUDGET``. As the thread
+  grows the window only slides forward, so dropped messages are popped from
+  the front of a deque in O(1).
+- Until something has to be dropped the history is returned untouched, as
+  before.
+
+State is keyed by thread id and bounded to ``HISTORY_CACHE_CONVERSATIONS``
+conversations (LRU). A history that doesn't extend the cached one — a new run
+rebuilt from the database, an edited thread — simply rebuilds that state.
+"""
+
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Hashable, List, Optional, Set
+
+from pydantic_ai.messages import (
+    ModelMessage,
+    ModelRequest,
+    ModelResponse,
+    SystemPromptPart,
+    TextPart,
+    ThinkingPart,
+    ToolCallPart,
+    ToolReturnPart,
+    UserPromptPart,
+)
+
+logger = logging.getLogger(__name__)
+
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "80000"))
+HISTORY_CACHE_CONVERSATIONS = int(os.getenv("HISTORY_CACHE_CONVERSATIONS", "256"))
+
+# Per-message overhead (role, separators) on top of the content estimate
+_MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(msg: ModelMessage) -> int:
+    """Approximate token count of a message (4 chars per token)."""
+    chars = 0
+    for part in msg.parts:
+        for attr in ("content", "args"):
+            value = getattr(part, attr, None)
+            if value is None:
+                continue
+            if isinstance(value, str):
+                chars += len(value)
+            else:
+                try:
+                    chars += len(json.dumps(value, default=str))
+                except (TypeError, ValueError):
+                    chars += len(str(value))
+    return chars // 4 + _MESSAGE_OVERHEAD_TOKENS
+
+
+def _tool_returns_to_text(msg: ModelRequest, convert_ids: Optional[Set[str]]) -> ModelRequest:
+    """Replace tool returns (all, or those in ``convert_ids``) with context text."""
+    filtered_parts = []
+    context_descriptions = []
+    for part in msg.parts:
+        if isinstance(part, ToolReturnPart) and (
+            convert_ids is None or part.tool_call_id in convert_ids
+        ):
+            # Convert to descriptive text instead
+            tool_result = str(part.content)[:200]  # Limit length
+            context_descriptions.append(f"[Tool result]: {tool_result}...")
+            logger.debug(f"Converted orphaned tool result {part.tool_call_id} to context")
+        else:
+            filtered_parts.append(part)
+
+    if not context_descriptions:
+        return msg
+    filtered_parts.append(UserPromptPart(content="\n".join(context_descriptions)))
+    return ModelRequest(parts=filtered_parts)
+
+
+def transform_message(msg: ModelMessage, removed_tool_call_ids: Set[str]) -> Optional[ModelMessage]:
+    """
+    Make one conversation message safe to send once the window is truncated.
+
+    Claude with extended thinking requires earlier assistant turns to carry their
+    thinking blocks, so assistant messages without them become user context
+    text, and their tool calls are recorded in ``removed_tool_call_ids`` so the
+    matching tool results are converted too (no orphaned tool_result blocks).
+    """
+    if isinstance(msg, ModelRequest):
+        if not any(isinstance(part, ToolReturnPart) for part in msg.parts):
+            return msg
+        transformed = _tool_returns_to_text(msg, removed_tool_call_ids)
+        return transformed if transformed.parts else None
+
+    if not isinstance(msg, ModelResponse):
+        return msg
+
+    if any(isinstance(part, ThinkingPart) for part in msg.parts):
+        # Keep assistant messages that have thinking blocks
+        return msg
+
+    # Convert assistant message without thinking into user context message
+    text_parts = []
+    tool_descriptions = []
+    for part in msg.parts:
+        if isinstance(part, TextPart):
+            text_parts.append(part.content)
+        elif isinstance(part, ToolCallPart):
+            removed_tool_call_ids.add(part.tool_call_id)
+            tool_descriptions.append(
+                f"  - Called tool '{part.tool_name}' with args: {part.args}"
+            )
+
+    assistant_text = "".join(text_parts) if text_parts else "[no content]"
+
+    context_lines = ["[Context from previous exchange]"]
+    if assistant_text:
+        context_lines.append(f"Assistant said: {assistant_text}")
+    if tool_descriptions:
+        context_lines.append("Assistant called tools:")
+        context_lines.extend(tool_descriptions)
+
+    return ModelRequest(parts=[UserPromptPart(content="\n".join(context_lines))])
+
+
+@dataclass
+class _Entry:
+    original: ModelMessage
+    transformed: Optional[ModelMessage]
+    tokens: int
+
+
+@dataclass
+class _ConversationWindow:
+    system: List[ModelMessage] = field(default_factory=list)
+    window: Deque[_Entry] = field(default_factory=deque)
+    window_tokens: int = 0
+    removed_tool_call_ids: Set[str] = field(default_factory=set)
+    dropped: int = 0
+    last_output: List[ModelMessage] = field(default_factory=list)
+
+    def append(self, msg: ModelMessage, budget: int) -> None:
+        if isinstance(msg, ModelRequest) and any(
+            isinstance(part, SystemPromptPart) for part in msg.parts
+        ):
+            self.system.append(msg)
+            return
+        entry = _Entry(msg, transform_message(msg, self.removed_tool_call_ids), estimate_tokens(msg))
+        self.window.append(entry)
+        self.window_tokens += entry.tokens
+        # Keep at least the newest message, whatever its size
+        while self.window_tokens > budget and len(self.window) > 1:
+            self.window_tokens -= self.window.popleft().tokens
+            self.dropped += 1
+
+    def render(self) -> List[ModelMessage]:
+        if not self.dropped:
+            return self.system + [e.original for e in self.window]
+        transformed = [e.transformed for e in self.window if e.transformed is not None]
+        # A tool result whose call fell out of the window would be orphaned
+        if transformed and isinstance(transformed[0], ModelRequest):
+            transformed[0] = _tool_returns_to_text(transformed[0], None)
+        return self.system + transformed
+
+
+class HistoryWindow:
+    """LRU of per-conversation windows, extended incrementally."""
+
+    def __init__(
+        self,
+        token_budget: int = HISTORY_TOKEN_BUDGET,
+        max_conversations: int = HISTORY_CACHE_CONVERSATIONS,
+    ):
+        self.token_budget = token_budget
+        self.max_conversations = max_conversations
+        self._windows: "OrderedDict[Hashable, _ConversationWindow]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.rebuilds = 0
+
+    def process(self, messages: List[ModelMessage], key: Optional[Hashable] = None) -> List[ModelMessage]:
+        if not messages:
+            logger.warning("History processor received empty messages list")
+            return messages
+
+        with self._lock:
+            state = self._windows.get(key) if key is not None else None
+            if state is not None and self._extends(messages, state.last_output):
+                new_messages = messages[len(state.last_output):]
+                self._windows.move_to_end(key)
+                self.hits += 1
+            else:
+                state = _ConversationWindow()
+                new_messages = messages
+                self.rebuilds += 1
+                if key is not None:
+                    self._windows[key] = state
+                    while len(self._windows) > self.max_conversations:
+                        self._windows.popitem(last=False)
+
+            dropped_before = state.dropped
+            for msg in new_messages:
+                state.append(msg, self.token_budget)
+
+            if not state.dropped:
+                result = messages
+            else:
+                result = state.render()
+
+            # SAFETY CHECK: Claude API requires at least one message in the history
+            if not result:
+                fallback_count = min(5, len(messages))
+                logger.error(
+                    f"History processor produced empty message list! "
+                    f"Original: {len(messages)} messages; "
+                    f"using fallback: returning last {fallback_count} messages"
+                )
+                result = messages[-fallback_count:]
+
+            state.last_output = list(result)
+
+        if state.dropped > dropped_before:
+            logger.info(
+                f"Context window truncated: {len(messages)} messages → {len(result)} messages "
+                f"({len(state.system)} system + {len(state.window)} conversation, "
+                f"~{state.window_tokens:,}/{self.token_budget:,} tokens, "
+                f"{len(state.removed_tool_call_ids)} tool calls converted to context)"
+            )
+        return result
+
+    @staticmethod
+    def _extends(messages: List[ModelMessage], prefix: List[ModelMessage]) -> bool:
+        if not prefix or len(messages) < len(prefix):
+            return False
+        return all(a is b for a, b in zip(messages, prefix))
+
+    def clear(self, key: Optional[Hashable] = None) -> None:
+        with self._lock:
+            if key is None:
+                self._windows.clear()
+            else:
+                self._windows.pop(key, None)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "conversations": len(self._windows),
+            "hits": self.hits,
+            "rebuilds": self.rebuilds,
+            "token_budget": self.token_budget,
+        }
+
+
+HISTORY_WINDOW = HistoryWindow()
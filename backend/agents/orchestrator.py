@@ -15,6 +15,7 @@ import json
 import logging
 import os
 import re
+import shlex
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
@@ -29,16 +30,13 @@ from pydantic_ai.messages import (
     ModelMessage,
     ModelRequest,
     ModelResponse,
-    SystemPromptPart,
-    TextPart,
-    ThinkingPart,
     ToolCallPart,
-    ToolReturnPart,
     UserPromptPart,
 )
 from services.scratchpad_db import ScratchpadDB
 
 from .base_agent import AgentConfig, IntelligentBaseAgent
+from .history_window import HISTORY_WINDOW
 
 # Logfire for observability
 try:
@@ -50,180 +48,112 @@ except Exception:
 
 logger = logging.getLogger(__name__)
 
+# Auto-cache metadata for bash results, by CLI name. ``fresh`` marks read-only
+# tools whose identical repeat calls may be answered from the thread's tool
+# cache within NF_FRESH_SECONDS (never set it on tools that place orders or
+# otherwise mutate state).
+NF_FRESH_SECONDS = float(os.getenv("TOOL_CACHE_NF_FRESH_SECONDS", "30"))
+
+_BASH_CACHE_PATTERNS: Dict[str, Dict[str, Any]] = {
+    # Trading CLI tools
+    "nf-quote": {
+        "tool_name": "nf_quote",
+        "invalidation_triggers": [],
+        "summary_template": "Stock quote data",
+        "fresh": True,
+    },
+    "nf-analyze": {
+        "tool_name": "nf_analyze",
+        "invalidation_triggers": [],
+        "summary_template": "Technical analysis results",
+        "fresh": True,
+    },
+    "nf-portfolio": {
+        "tool_name": "nf_portfolio",
+        "invalidation_triggers": ["order_placed"],
+        "summary_template": "Portfolio data",
+    },
+    "nf-watchlist": {
+        "tool_name": "nf_watchlist",
+        "invalidation_triggers": ["watchlist_update"],
+        "summary_template": "Watchlist data",
+    },
+    "nf-order": {
+        "tool_name": "nf_order",
+        "invalidation_triggers": ["order_placed"],
+        "summary_template": "Order data",
+    },
+    "nf-gtt": {
+        "tool_name": "nf_gtt",
+        "invalidation_triggers": ["order_placed"],
+        "summary_template": "GTT order data",
+    },
+    "nf-margin": {
+        "tool_name": "nf_margin",
+        "invalidation_triggers": [],
+        "summary_template": "Margin calculation",
+        "fresh": True,
+    },
+}
+
+
+def _bash_cache_parameters(command: str) -> Dict[str, Any]:
+    """Cache parameters for a bash command (the command, plus --query if any)."""
+    parameters: Dict[str, Any] = {"command": command}
+
+    # Try to extract query/search terms for better cache lookup
+    query_match = re.search(
+        r'--query\s+["\']([^"\']+)["\']|--query\s+(\S+)', command
+    )
+    if query_match:
+        parameters["query"] = query_match.group(1) or query_match.group(2)
+    return parameters
+
+
+# Anything that could chain, redirect or substitute a second command.
+_SHELL_COMPOSITION = re.compile(r"[;&|<>`()\n]|\$\(")
+
+
+def _fresh_cache_info(command: str) -> Optional[Dict[str, Any]]:
+    """Cache metadata when ``command`` is exactly one call of a ``fresh`` nf-* tool.
+
+    Only a lone invocation may be answered from cache: ``nf-quote X && nf-order
+    ...`` must run (and be audited) in full, so any chaining, piping,
+    redirection or substitution — or a first token that isn't the cached
+    tool itself — disqualifies the command.
+    """
+    if _SHELL_COMPOSITION.search(command):
+        return None
+    try:
+        tokens = shlex.split(command)
+    except ValueError:
+        return None
+    if not tokens:
+        return None
+    info = _BASH_CACHE_PATTERNS.get(os.path.basename(tokens[0]))
+    return info if info and info.get("fresh") else None
+
 
 def sliding_window_history_processor(
-    messages: list[ModelMessage],
+    ctx: RunContext[Any], messages: list[ModelMessage]
 ) -> list[ModelMessage]:
     """
     Context window management for orchestrator model.
 
-    Keeps last N messages to avoid hitting token limits while preserving:
-    - System prompts (always kept)
-    - Recent conversation history (last 50 messages = ~25 exchanges)
+    Keeps the most recent conversation messages that fit HISTORY_TOKEN_BUDGET
+    (system prompts always kept). Once older messages are dropped, assistant
+    messages without thinking blocks are converted into user context messages
+    (and their tool results into text), since Claude with extended thinking
+    requires previous assistant turns to carry their thinking blocks.
 
-    IMPORTANT: When using Claude models with extended thinking, assistant messages
-    from previous turns must include thinking blocks. To avoid this complexity,
-    we filter out old assistant messages and keep only recent exchanges.
+    The work is incremental per thread: see agents/history_window.py.
 
     This follows Pydantic AI's recommended pattern for managing token usage.
     See: https://docs.pydantic.dev/pydantic-ai/agents/#processing-message-history
     """
-    MAX_HISTORY_MESSAGES = 50  # Keep last 25 exchanges (user + assistant pairs)
-
-    # Early return if messages list is empty to avoid processing
-    if not messages:
-        logger.warning("History processor received empty messages list")
-        return messages
-
-    if len(messages) <= MAX_HISTORY_MESSAGES:
-        return messages
-
-    # Separate system prompts from conversation messages
-    system_messages = []
-    conversation_messages = []
-
-    for msg in messages:
-        if isinstance(msg, ModelRequest):
-            # Check if this request contains system prompts
-            has_system_prompt = any(
-                isinstance(part, SystemPromptPart) for part in msg.parts
-            )
-            if has_system_prompt:
-                system_messages.append(msg)
-            else:
-                conversation_messages.append(msg)
-        else:
-            conversation_messages.append(msg)
-
-    # Keep only the most recent conversation messages
-    recent_messages = conversation_messages[-MAX_HISTORY_MESSAGES:]
-
-    # CRITICAL FIX for Claude thinking mode:
-    # Convert assistant messages without thinking blocks into user context messages
-    # Also handle tool calls/results to prevent orphaned tool_result errors
-    # This preserves ALL conversation context while satisfying Claude's API requirements
-    transformed_messages = []
-    removed_tool_call_ids = set()  # Track tool calls we've converted to text
-
-    for msg in recent_messages:
-        # For user/system messages, filter out tool results that reference removed tool calls
-        if isinstance(msg, ModelRequest):
-            # Check if this message contains tool returns
-            has_tool_returns = any(
-                isinstance(part, ToolReturnPart) for part in msg.parts
-            )
-
-            if has_tool_returns:
-                # Filter out tool returns for removed tool calls, convert to context text
-                filtered_parts = []
-                context_descriptions = []
-
-                for part in msg.parts:
-                    if isinstance(part, ToolReturnPart):
-                        # Check if this tool result references a removed tool call
-                        if part.tool_call_id in removed_tool_call_ids:
-                            # Convert to descriptive text instead
-                            tool_result = str(part.content)[:200]  # Limit length
-                            context_descriptions.append(
-                                f"[Tool result]: {tool_result}..."
-                            )
-                            logger.debug(
-                                f"Converted orphaned tool result {part.tool_call_id} to context"
-                            )
-                        else:
-                            # Keep this tool return as-is (has valid tool_use)
-                            filtered_parts.append(part)
-                    else:
-                        # Keep other parts as-is
-                        filtered_parts.append(part)
-
-                # If we converted any tool results, add them as context text
-                if context_descriptions:
-                    filtered_parts.append(
-                        UserPromptPart(content="\n".join(context_descriptions))
-                    )
-
-                # Create new request with filtered parts
-                if filtered_parts:
-                    transformed_messages.append(ModelRequest(parts=filtered_parts))
-            else:
-                # No tool returns, keep message as-is
-                transformed_messages.append(msg)
-
-        # For assistant messages (ModelResponse), check if they have thinking parts
-        elif isinstance(msg, ModelResponse):
-            has_thinking = any(isinstance(part, ThinkingPart) for part in msg.parts)
-
-            if has_thinking:
-                # Keep assistant messages that have thinking blocks
-                transformed_messages.append(msg)
-            else:
-                # Convert assistant message without thinking into user context message
-                # Extract all content (text and tool calls)
-                text_parts = []
-                tool_descriptions = []
-
-                for part in msg.parts:
-                    if isinstance(part, TextPart):
-                        text_parts.append(part.content)
-                    elif isinstance(part, ToolCallPart):
-                        # Track this tool call ID as removed
-                        removed_tool_call_ids.add(part.tool_call_id)
-                        # Describe the tool call
-                        tool_descriptions.append(
-                            f"  - Called tool '{part.tool_name}' with args: {part.args}"
-                        )
-
-                assistant_text = "".join(text_parts) if text_parts else "[no content]"
-
-                # Build context message with both text and tool call descriptions
-                context_lines = ["[Context from previous exchange]"]
-                if assistant_text:
-                    context_lines.append(f"Assistant said: {assistant_text}")
-                if tool_descriptions:
-                    context_lines.append("Assistant called tools:")
-                    context_lines.extend(tool_descriptions)
-
-                context_content = "\n".join(context_lines)
-
-                # Create a new user message with context
-                transformed_messages.append(
-                    ModelRequest(parts=[UserPromptPart(content=context_content)])
-                )
-
-                logger.debug(
-                    f"Converted assistant message without thinking into context "
-                    f"({len(assistant_text)} chars, {len(tool_descriptions)} tools)"
-                )
-
-    # Reconstruct: system prompts + transformed conversation messages
-    result = system_messages + transformed_messages
-
-    # SAFETY CHECK: Ensure we always have at least one message
-    # Claude API requires at least one message in the history
-    if not result:
-        logger.error(
-            f"History processor produced empty message list! "
-            f"Original: {len(messages)} messages, "
-            f"System: {len(system_messages)}, "
-            f"Conversation: {len(conversation_messages)}, "
-            f"Recent: {len(recent_messages)}, "
-            f"Transformed: {len(transformed_messages)}"
-        )
-        # Fallback: Keep at least the last few messages regardless of thinking blocks
-        # This prevents empty message list but may trigger thinking block errors
-        # (which is better than "no messages" error)
-        fallback_count = min(5, len(messages))
-        logger.warning(f"Using fallback: returning last {fallback_count} messages")
-        return messages[-fallback_count:] if messages else []
-
-    logger.info(
-        f"Context window truncated: {len(messages)} messages → {len(result)} messages "
-        f"({len(system_messages)} system + {len(transformed_messages)} conversation, "
-        f"{len(removed_tool_call_ids)} tool calls converted to context)"
-    )
-
-    return result
+    state = getattr(getattr(ctx, "deps", None), "state", None)
+    thread_id = getattr(state, "thread_id", None)
+    return HISTORY_WINDOW.process(messages, key=thread_id)
 
 
 class OrchestratorDeps(BaseModel):
@@ -614,9 +544,13 @@ OUTPUT ONLY: "VALID" or "FAKE: <one-line reason>" """
         from tools.native.tool_cache import ToolCache
 
         # Map script names to invalidation triggers
-        # Trading CLI tools don't currently need cache invalidation,
-        # but the map is kept for future use (e.g., order placement invalidating portfolio cache)
-        invalidation_map: Dict[str, list] = {}
+        # Order placement invalidates cached portfolio/order views so a fresh
+        # repeat of those calls can't serve pre-order state.
+        invalidation_map: Dict[str, list] = {
+            "nf-order": ["order_placed"],
+            "nf-gtt": ["order_placed"],
+            "nf-watchlist": ["watchlist_update"],
+        }
 
         # Extract script name from command
         script_name = None
@@ -644,6 +578,32 @@ OUTPUT ONLY: "VALID" or "FAKE: <one-line reason>" """
                     f"invalidated {invalidated_count} entries"
                 )
 
+    def _fresh_cached_result(self, command: str, thread_id: str) -> Optional[str]:
+        """
+        Return the cached output of an identical read-only nf-* call made in
+        this thread within NF_FRESH_SECONDS, or None to run the command.
+        """
+        info = _fresh_cache_info(command)
+        if info is None or NF_FRESH_SECONDS <= 0:
+            return None
+
+        from tools.native.tool_cache import ToolCache
+
+        try:
+            entry = ToolCache(thread_id).find_fresh(
+                info["tool_name"], _bash_cache_parameters(command), NF_FRESH_SECONDS
+            )
+        except Exception as e:
+            logger.warning(f"Tool cache freshness check failed: {e}")
+            return None
+        if not entry:
+            return None
+        logger.info(
+            f"Served {info['tool_name']} from cache {entry['cache_id']} "
+            f"(identical call within {NF_FRESH_SECONDS:.0f}s)"
+        )
+        return entry["result"]
+
     async def _auto_cache_result(
         self, command: str, result: str, execution_time_ms: int, thread_id: str
     ):
@@ -663,50 +623,10 @@ OUTPUT ONLY: "VALID" or "FAKE: <one-line reason>" """
         if result_tokens < 10:
             return
 
-        # Map script patterns to cache metadata
-        cache_patterns = {
-            # Trading CLI tools
-            "nf-quote": {
-                "tool_name": "nf_quote",
-                "invalidation_triggers": [],
-                "summary_template": "Stock quote data",
-            },
-            "nf-analyze": {
-                "tool_name": "nf_analyze",
-                "invalidation_triggers": [],
-                "summary_template": "Technical analysis results",
-            },
-            "nf-portfolio": {
-                "tool_name": "nf_portfolio",
-                "invalidation_triggers": ["order_placed"],
-                "summary_template": "Portfolio data",
-            },
-            "nf-watchlist": {
-                "tool_name": "nf_watchlist",
-                "invalidation_triggers": ["watchlist_update"],
-                "summary_template": "Watchlist data",
-            },
-            "nf-order": {
-                "tool_name": "nf_order",
-                "invalidation_triggers": ["order_placed"],
-                "summary_template": "Order data",
-            },
-            "nf-gtt": {
-                "tool_name": "nf_gtt",
-                "invalidation_triggers": ["order_placed"],
-                "summary_template": "GTT order data",
-            },
-            "nf-margin": {
-                "tool_name": "nf_margin",
-                "invalidation_triggers": [],
-                "summary_template": "Margin calculation",
-            },
-        }
-
         # Find matching pattern
         cache_info = None
         script_name = None
-        for pattern, info in cache_patterns.items():
+        for pattern, info in _BASH_CACHE_PATTERNS.items():
             if pattern in command:
                 cache_info = info
                 script_name = pattern
@@ -734,15 +654,7 @@ OUTPUT ONLY: "VALID" or "FAKE: <one-line reason>" """
                 }
                 script_name = "bash_command"
 
-        # Extract parameters from command
-        parameters = {"command": command}
-
-        # Try to extract query/search terms for better cache lookup
-        query_match = re.search(
-            r'--query\s+["\']([^"\']+)["\']|--query\s+(\S+)', command
-        )
-        if query_match:
-            parameters["query"] = query_match.group(1) or query_match.group(2)
+        parameters = _bash_cache_parameters(command)
 
         # Generate summary with searchable keywords
         summary = cache_info["summary_template"]
@@ -2211,6 +2123,25 @@ Permissions vary by user. Always read the **CURRENT USER** block injected dynami
                                     f"Could not fetch help for {script_name}: {help_error}"
                                 )
 
+                # Identical read-only nf-* call moments ago: answer from cache
+                cached_result = self._fresh_cached_result(command, thread_id)
+                if cached_result is not None:
+                    for event_type, content in (
+                        ("command", command),
+                        ("complete", "Served from tool cache (identical recent call)"),
+                    ):
+                        await bash_streamer.emit(
+                            BashOutputEvent(
+                                thread_id=thread_id,
+                                tool_call_id=tool_call_id,
+                                event_type=event_type,
+                                content=content,
+                                timestamp=datetime.now(),
+                                exit_code=0 if event_type == "complete" else None,
+                            )
+                        )
+                    return cached_result
+
                 # Emit command event
                 await bash_streamer.emit(
                     BashOutputEvent(
@@ -3296,16 +3227,13 @@ Available agents: {allowed_agents}
             For simple file reading when you know the path, use read_docs() instead.
             """
             try:
-                import openai
+                from memory.embedding_service import get_embedding_service
 
                 # Generate embedding for query
-                client = openai.AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
                 logger.info(f"Generating embedding for query: {query[:100]}...")
-
-                embedding_response = await client.embeddings.create(
-                    model="text-embedding-3-large", input=query
-                )
-                query_embedding = embedding_response.data[0].embedding
+                query_embedding = (
+                    await get_embedding_service().get_embedding(query)
+                ).embedding
 
                 # Search documentation
                 from database.operations import DocsOps
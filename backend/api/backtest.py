@@ -2,7 +2,6 @@
 
 import asyncio
 import logging
-from collections import defaultdict
 from datetime import datetime, timedelta, timezone
 from typing import Literal, Optional
 
@@ -12,7 +11,7 @@ from pydantic import BaseModel
 
 from auth import User, get_current_user
 from strategies.templates import list_templates, get_template
-from backtesting.engine import BacktestEngine, run_backtest_for_day
+from backtesting.candle_frame import CandleFrame
 from backtesting.fno_engine import run_fno_backtest, LegTrade
 from backtesting.metrics import compute_metrics, plausibility_warnings
 from backtesting.scalp_equity import (
@@ -24,6 +23,7 @@ from backtesting.scalp_options import (
     run_scalp_options_backtest,
     ScalpOptionsBacktestResult,
 )
+from backtesting.template_days import run_template_days
 from monitor.scalp_models import ScalpSessionConfig, SessionMode
 from services import backtest_jobs
 
@@ -103,86 +103,9 @@ class ScalpBacktestRequest(BaseModel):
 # Helpers
 # ---------------------------------------------------------------------------
 
-def _split_by_day(candles: list[dict]) -> dict[str, list[dict]]:
-    """Split candles into per-day groups."""
-    days: dict[str, list[dict]] = defaultdict(list)
-    for c in candles:
-        ts = BacktestEngine._parse_timestamp(c["timestamp"])
-        day_key = ts.strftime("%Y-%m-%d")
-        days[day_key].append(c)
-    return dict(sorted(days.items()))
-
-
-def _build_rules_for_day(
-    template,
-    symbol: str,
-    day_candles: list[dict],
-    params: dict,
-    strategy_name: str,
-) -> list:
-    """Build strategy rules for a single day, auto-deriving per-day params.
-
-    Each strategy needs certain price-based params that vary daily.  When users
-    backtest, they can't supply a fixed ``entry`` or ``sl`` — we derive them
-    from the day's opening candles so the backtest is realistic.
-    """
-    if not day_candles:
-        return []
-
-    day_params = dict(params)
-    day_open = day_candles[0]["open"]
-    day_high = day_candles[0]["high"]
-    day_low = day_candles[0]["low"]
-    sl_pct = float(day_params.get("sl_pct", day_params.get("risk_percent", 2.0)))
-
-    if strategy_name == "orb":
-        # Use first candle as the opening range
-        if "range_high" not in day_params or "range_low" not in day_params:
-            day_params["range_high"] = day_high
-            day_params["range_low"] = day_low
-
-    elif strategy_name == "breakout":
-        # Derive entry/sl from opening candle + percentage offsets
-        if "entry" not in day_params or "sl" not in day_params:
-            entry_pct = float(day_params.get("entry_pct", 0.5))
-            day_params["entry"] = round(day_open * (1 + entry_pct / 100), 2)
-            day_params["sl"] = round(day_params["entry"] * (1 - sl_pct / 100), 2)
-
-    elif strategy_name == "mean-reversion":
-        # SL derived from open price + percentage
-        if "sl" not in day_params:
-            side = day_params.get("side", "long")
-            if side == "short":
-                day_params["sl"] = round(day_open * (1 + sl_pct / 100), 2)
-            else:
-                day_params["sl"] = round(day_open * (1 - sl_pct / 100), 2)
-
-    elif strategy_name == "vwap-bounce":
-        # Approximate VWAP as open price; derive SL from percentage
-        if "vwap" not in day_params:
-            # Compute simple VWAP from available candles (sum of hlc/3 * vol / sum vol)
-            total_vol = sum(c["volume"] for c in day_candles)
-            if total_vol > 0:
-                day_params["vwap"] = round(
-                    sum(((c["high"] + c["low"] + c["close"]) / 3) * c["volume"] for c in day_candles) / total_vol, 2
-                )
-            else:
-                day_params["vwap"] = round(day_open, 2)
-        if "sl" not in day_params:
-            day_params["sl"] = round(day_open * (1 - sl_pct / 100), 2)
-
-    elif strategy_name == "scalp":
-        # Derive entry/sl from opening price + percentage
-        if "entry" not in day_params or "sl" not in day_params:
-            entry_pct = float(day_params.get("entry_pct", 0.3))
-            day_params["entry"] = round(day_open * (1 + entry_pct / 100), 2)
-            day_params["sl"] = round(day_params["entry"] * (1 - sl_pct / 100), 2)
-
-    try:
-        plan = template.plan(symbol, day_params)
-        return plan.rules
-    except ValueError:
-        return []
+def _split_by_day(candles: list[dict] | CandleFrame) -> dict[str, CandleFrame]:
+    """Split candles into per-day groups (sorted sub-frames, date order)."""
+    return CandleFrame.from_candles(candles).split_days()
 
 
 _IST = timezone(timedelta(hours=5, minutes=30))
@@ -309,18 +232,8 @@ async def api_run_backtest(
     if not ohlcv_list:
         raise HTTPException(status_code=404, detail=f"No historical data for {body.symbol}")
 
-    # Convert to dicts
-    candles = [
-        {
-            "timestamp": c.timestamp,
-            "open": c.open,
-            "high": c.high,
-            "low": c.low,
-            "close": c.close,
-            "volume": c.volume,
-        }
-        for c in ohlcv_list
-    ]
+    # Parse once; every per-day engine run reads the same frame
+    candles = CandleFrame.from_candles(ohlcv_list)
 
     # Set default params — use `or` to also override empty strings / None / 0
     params = dict(body.params)
@@ -338,21 +251,8 @@ async def api_run_backtest(
     capital = params.get("capital", 100_000)
 
     def _run_all_days() -> list:
-        trades: list = []
-        for day_key, day_candles in day_groups.items():
-            if len(day_candles) < 2:
-                continue
-            rules = _build_rules_for_day(
-                template, body.symbol, day_candles, params, body.template,
-            )
-            if not rules:
-                continue
-            sim_candles = day_candles[1:] if body.template == "orb" else day_candles
-            result = run_backtest_for_day(
-                sim_candles, rules, body.symbol, body.template, capital,
-            )
-            trades.extend(result.trades)
-        return trades
+        # Days are independent — sharded across the backtest day pool
+        return run_template_days(body.template, body.symbol, day_groups, params, capital)
 
     all_trades = await asyncio.to_thread(_run_all_days)
 
@@ -560,11 +460,13 @@ async def fetch_with_warmup(client, underlying: str, interval: str, days: int,
                             instrument_key: str | None = None):
     """Fetch ``days`` of candles PLUS a warm-up prefix.
 
-    Returns ``(ohlcv, warmup_bars)`` where ``warmup_bars`` is the count of
-    leading candles that fall before the requested ``days`` window (now-anchored
-    in IST, matching how get_historical_data builds its from_date). Pass
-    ``warmup_bars`` to the engine so it computes indicators over the full series
-    but only trades within the requested window.
+    Returns ``(candles, warmup_bars)`` where ``candles`` is a ``CandleFrame``
+    (parsed once here, then shared by the planner and the replay) and
+    ``warmup_bars`` is the count of leading candles that fall before the
+    requested ``days`` window (now-anchored in IST, matching how
+    get_historical_data builds its from_date). Pass ``warmup_bars`` to the
+    engine so it computes indicators over the full series but only trades
+    within the requested window.
     """
     from datetime import datetime, timedelta, timezone
     ist = timezone(timedelta(hours=5, minutes=30))
@@ -574,14 +476,8 @@ async def fetch_with_warmup(client, underlying: str, interval: str, days: int,
     )
     if not ohlcv:
         return ohlcv, 0
-    cutoff = datetime.now(ist) - timedelta(days=days)
-
-    def _ts(c):
-        t = c.timestamp
-        return datetime.fromisoformat(t) if isinstance(t, str) else t
-
-    warmup_bars = sum(1 for c in ohlcv if _ts(c) < cutoff)
-    return ohlcv, warmup_bars
+    frame = CandleFrame.from_candles(ohlcv)
+    return frame, frame.searchsorted(datetime.now(ist) - timedelta(days=days))
 
 
 # ---------------------------------------------------------------------------
@@ -750,15 +646,10 @@ def _is_expired_instrument_key(instrument_key: str) -> bool:
     return instrument_key.count("|") >= 2
 
 
-def _replay_dates(underlying_candles: list[dict], warmup_bars: int) -> list[str]:
+def _replay_dates(underlying_candles: list[dict] | CandleFrame, warmup_bars: int) -> list[str]:
     """Sorted unique ISO dates of the post-warmup (tradable) underlying candles."""
-    from backtesting.scalp_equity import _parse_candle_ts
-
-    dates: set[str] = set()
-    for c in underlying_candles[warmup_bars:]:
-        ts = _parse_candle_ts(c["timestamp"])
-        dates.add(ts.date().isoformat())
-    return sorted(dates)
+    frame = CandleFrame.from_candles(underlying_candles)
+    return [d.isoformat() for d in frame[warmup_bars:].day_dates]
 
 
 def _live_cache_contracts(underlying: str, expiry: str) -> list[dict]:
@@ -819,7 +710,7 @@ async def _build_rolling_expiry_data(
         front_expiry_for_date,
         get_expired_contracts,
         get_expiries,
-        _today_iso,
+        today_iso,
     )
     from backtesting.scalp_options import RollingExpiryData
 
@@ -829,7 +720,7 @@ async def _build_rolling_expiry_data(
         {front_expiry_for_date(d, expiries) for d in dates} - {None}
     )
 
-    today = _today_iso()
+    today = today_iso()
     past_needed = [e for e in needed if e < today]
     live_needed = [e for e in needed if e >= today]
 
@@ -898,6 +789,47 @@ async def _fetch_rolling_leg(
         return instrument_key, []
 
 
+async def _fetch_rolling_legs(
+    token: str,
+    client,
+    underlying: str,
+    plans,
+    interval: str,
+    window_start: str | None,
+    days: int,
+) -> dict[str, list[dict] | CandleFrame]:
+    """Fetch every planned leg's candles for a rolling-expiry replay.
+
+    Expired-format keys go through the local expired-candle archive (keyed
+    by the plan's underlying/expiry/strike/type + interval) in one bounded
+    bulk prefetch, so a repeat backtest reads them from disk. Live keys (the
+    current front weekly) take ``_fetch_rolling_leg``'s live path.
+    """
+    from services.expired_candle_archive import ContractKey, LegRequest, prefetch
+
+    archived: list = []
+    live: list = []
+    for ik in dict.fromkeys(p.instrument_key for p in plans):
+        _from, leg_expiry = _plan_leg_dates(plans, ik)
+        from_date = window_start or _from
+        to_date = leg_expiry or _from
+        if _is_expired_instrument_key(ik) and leg_expiry:
+            plan = next(p for p in plans if p.instrument_key == ik)
+            key = ContractKey(underlying, leg_expiry, float(plan.strike), plan.option_type, interval)
+            archived.append(LegRequest(key, ik, from_date, to_date))
+        else:
+            live.append((ik, from_date, to_date))
+
+    from_archive, fetched_live = await asyncio.gather(
+        prefetch(token, archived),
+        asyncio.gather(*[
+            _fetch_rolling_leg(token, client, underlying, ik, interval, f, t, days)
+            for ik, f, t in live
+        ]),
+    )
+    return {**from_archive, **dict(fetched_live)}
+
+
 def _plan_leg_dates(plans, instrument_key: str) -> tuple[str | None, str | None]:
     """(earliest plan date, leg expiry date) for one instrument_key across the
     plan list. The leg's candles never exist past its expiry, so we clamp
@@ -956,11 +888,7 @@ async def _run_options_scalp_sync(
     if not ohlcv:
         raise HTTPException(status_code=404, detail=f"No historical data for {underlying}")
 
-    underlying_candles = [
-        {"timestamp": c.timestamp, "open": c.open, "high": c.high,
-         "low": c.low, "close": c.close, "volume": c.volume}
-        for c in ohlcv
-    ]
+    underlying_candles = CandleFrame.from_candles(ohlcv)
 
     rolling_mode = _is_rolling_expiry(body.expiry)
     rolling = None
@@ -1021,27 +949,18 @@ async def _run_options_scalp_sync(
                     symbol=underlying, interval=body.interval, days=body.days,
                     instrument_key=ik,
                 )
-                return ik, [
-                    {"timestamp": c.timestamp, "open": c.open, "high": c.high,
-                     "low": c.low, "close": c.close, "volume": c.volume}
-                    for c in leg_ohlcv
-                ]
+                return ik, CandleFrame.from_candles(leg_ohlcv)
             except Exception as e:
                 logger.warning("options scalp: fetch failed for %s: %s", ik, e)
                 return ik, []
 
-        async def _fetch_leg_rolling(ik: str) -> tuple[str, list[dict]]:
-            _from, leg_expiry = _plan_leg_dates(plans, ik)
-            from_date = window_start or _from
-            to_date = leg_expiry or _from
-            return await _fetch_rolling_leg(
-                token, client, underlying, ik, body.interval,
-                from_date, to_date, body.days,
+        if rolling_mode:
+            leg_candles_by_key = await _fetch_rolling_legs(
+                token, client, underlying, plans, body.interval, window_start, body.days,
             )
-
-        fetcher = _fetch_leg_rolling if rolling_mode else _fetch_leg
-        fetched = await asyncio.gather(*[fetcher(ik) for ik in unique_keys])
-        leg_candles_by_key = {ik: data for ik, data in fetched}
+        else:
+            fetched = await asyncio.gather(*[_fetch_leg(ik) for ik in unique_keys])
+            leg_candles_by_key = {ik: data for ik, data in fetched}
 
     try:
         result = await asyncio.to_thread(
@@ -1106,13 +1025,7 @@ async def api_run_scalp_backtest(
     if not ohlcv:
         raise HTTPException(status_code=404, detail=f"No historical data for {body.symbol}")
 
-    candles = [
-        {
-            "timestamp": c.timestamp, "open": c.open, "high": c.high,
-            "low": c.low, "close": c.close, "volume": c.volume,
-        }
-        for c in ohlcv
-    ]
+    candles = CandleFrame.from_candles(ohlcv)
 
     # Build config
     tf = body.indicator_timeframe or _INTERVAL_TO_TIMEFRAME[body.interval]
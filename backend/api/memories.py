@@ -9,6 +9,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 
 from database import DatabaseManager, MemoryOps, MessageOps, ConversationOps
+from database.memory_index import MEMORY_INDEX
 from memory.embedding_service import get_embedding_service
 from agents.memory_extractor import get_memory_extractor
 from agents.memory_extractor_langextract import get_langextract_memory_extractor
@@ -206,6 +207,7 @@ async def delete_memory(
         delete(Memory).where(Memory.id == memory_id)
     )
     await db.commit()
+    MEMORY_INDEX.note_removed(user.email, [memory_id])
 
     return {"status": "success"}
 
@@ -266,6 +268,7 @@ async def bulk_delete_memories(
         delete(Memory).where(Memory.id.in_(valid_ids))
     )
     await db.commit()
+    MEMORY_INDEX.note_removed(user.email, valid_ids)
 
     logger.info(f"Successfully deleted {len(valid_ids)} memories")
     return {"status": "success", "deleted_count": len(valid_ids)}
@@ -0,0 +1,331 @@
+"""CandleFrame — one columnar candle type shared by every backtest engine.
+
+Each engine used to take ``list[dict]`` candles and re-derive the same facts
+per bar: ``BacktestEngine`` strptime'd every timestamp (twice, plus once more
+to count days), the scalp engines ``fromisoformat``'d it into an aware
+datetime, the F&O engine and the API split days by parsing again, and
+``compute_indicator_series`` rebuilt a DataFrame from the dicts on every call.
+A sweep runs dozens of combos over the same fetch, so that work repeated per
+combo, not per fetch.
+
+``CandleFrame`` does it once, when the candles arrive:
+
+- ``ts_ns`` — contiguous int64 epoch nanoseconds, sorted ascending (stable).
+- ``open/high/low/close/volume`` — contiguous float64 arrays.
+- ``session_day`` (int32 days since 1970-01-01) and ``tod_seconds`` (int32
+  seconds since midnight) — both in IST, the exchange's session clock.
+- ``day_offsets`` — int64 ``[start_0, start_1, ..., n]``; day ``d`` is rows
+  ``day_offsets[d]:day_offsets[d + 1]``.
+
+Timestamps are IST: aware values are converted to IST, naive values are taken
+as IST wall-clock (which is what Upstox, the only candle source, returns).
+
+The frame also behaves like the old list: ``len``, iteration and ``frame[i]``
+yield the candle dicts (the caller's own dicts when built from dicts, built
+once otherwise) and ``frame[a:b]`` is a sub-frame, so code that still walks
+dicts keeps working while the hot paths read the arrays.
+"""
+from __future__ import annotations
+
+from datetime import date, datetime, time as dtime, timedelta, timezone
+from typing import Any, Iterable, Iterator
+
+import numpy as np
+import pandas as pd
+
+IST = timezone(timedelta(hours=5, minutes=30))
+
+# Epoch-ns / IST day-number arithmetic, shared with the other columnar modules
+# (trade tables, portfolio replay, scan score, candle archive).
+NS_PER_SECOND = 1_000_000_000
+NS_PER_DAY = 86_400 * NS_PER_SECOND
+IST_OFFSET_NS = 19_800 * NS_PER_SECOND
+EPOCH_DATE = date(1970, 1, 1)
+
+
+def ist_day(ts_ns):
+    """IST session day number (days since 1970-01-01) of epoch-ns timestamps.
+
+    Works on a scalar or an int64 array.
+    """
+    return (ts_ns + IST_OFFSET_NS) // NS_PER_DAY
+
+
+def day_to_date(day: int) -> date:
+    """The date of an IST day number."""
+    return EPOCH_DATE + timedelta(days=int(day))
+
+
+def date_to_day(d: date) -> int:
+    """The IST day number of a date."""
+    return (d - EPOCH_DATE).days
+
+# strptime fallbacks tried before fromisoformat (the formats the backtest
+# engine has always accepted)
+_STRPTIME_FORMATS = (
+    "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S%z",
+    "%Y-%m-%dT%H:%M:%S.%f", "%Y-%m-%dT%H:%M:%S.%f%z",
+)
+
+
+def _to_datetime(value: Any) -> datetime:
+    """A candle timestamp (str, datetime or date) as a datetime."""
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime.combine(value, dtime())
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            for fmt in _STRPTIME_FORMATS:
+                try:
+                    return datetime.strptime(value, fmt)
+                except ValueError:
+                    continue
+    raise ValueError(f"Unrecognised candle timestamp: {value!r}")
+
+
+def timestamps_to_ns(values: Iterable[Any]) -> np.ndarray:
+    """Epoch nanoseconds for candle timestamps (naive values are IST)."""
+    walls: list[datetime] = []
+    offsets: list[int] = []
+    for value in values:
+        dt = _to_datetime(value)
+        offset = dt.utcoffset()
+        walls.append(dt.replace(tzinfo=None))
+        offsets.append(19_800 if offset is None else int(offset.total_seconds()))
+    if not walls:
+        return np.empty(0, dtype=np.int64)
+    wall_ns = np.array(walls, dtype="datetime64[us]").astype(np.int64) * 1_000
+    return wall_ns - np.asarray(offsets, dtype=np.int64) * NS_PER_SECOND
+
+
+def _row(c: Any) -> tuple[dict, Any, float, float, float, float, float]:
+    """(candle dict, timestamp, o, h, l, c, v) for one dict/OHLCVData/tuple."""
+    if isinstance(c, dict):
+        return (c, c["timestamp"], c["open"], c["high"], c["low"], c["close"],
+                c.get("volume", 0))
+    if hasattr(c, "timestamp"):
+        d = {
+            "timestamp": c.timestamp,
+            "open": c.open,
+            "high": c.high,
+            "low": c.low,
+            "close": c.close,
+            "volume": getattr(c, "volume", 0),
+        }
+    elif isinstance(c, (list, tuple)) and len(c) >= 6:
+        d = {
+            "timestamp": c[0],
+            "open": float(c[1]),
+            "high": float(c[2]),
+            "low": float(c[3]),
+            "close": float(c[4]),
+            "volume": int(c[5]),
+        }
+    else:
+        raise ValueError(f"Unrecognised candle format: {type(c).__name__}")
+    return (d, d["timestamp"], d["open"], d["high"], d["low"], d["close"], d["volume"])
+
+
+class CandleFrame:
+    """Sorted, columnar OHLCV candles with precomputed IST session columns.
+
+    Build with ``from_candles`` (any candle list, an ``OHLCVColumns`` or a
+    frame — frames pass through untouched) or ``from_columns``. The
+    constructor expects already-sorted data.
+    """
+
+    def __init__(
+        self,
+        ts_ns: np.ndarray,
+        open: np.ndarray,
+        high: np.ndarray,
+        low: np.ndarray,
+        close: np.ndarray,
+        volume: np.ndarray,
+        labels: list | None = None,
+        records: list[dict] | None = None,
+    ):
+        self.ts_ns = np.ascontiguousarray(ts_ns, dtype=np.int64)
+        self.open = np.ascontiguousarray(open, dtype=np.float64)
+        self.high = np.ascontiguousarray(high, dtype=np.float64)
+        self.low = np.ascontiguousarray(low, dtype=np.float64)
+        self.close = np.ascontiguousarray(close, dtype=np.float64)
+        self.volume = np.ascontiguousarray(volume, dtype=np.float64)
+
+        local = self.ts_ns + IST_OFFSET_NS
+        self.session_day = (local // NS_PER_DAY).astype(np.int32)
+        self.tod_seconds = ((local % NS_PER_DAY) // NS_PER_SECOND).astype(np.int32)
+        n = len(self.ts_ns)
+        starts = np.flatnonzero(np.diff(self.session_day)) + 1
+        self.day_offsets = np.concatenate(([0], starts, [n])).astype(np.int64) if n \
+            else np.zeros(1, dtype=np.int64)
+
+        # Original timestamp values (what the candle dicts carry), when known
+        self._labels = labels
+        self._records = records
+        self._datetimes: list[datetime] | None = None
+        self._naive_datetimes: list[datetime] | None = None
+        self._series_cache: dict[tuple, list] = {}
+
+    # ── Construction ────────────────────────────────────────────────────
+
+    @classmethod
+    def from_candles(cls, candles: Any) -> "CandleFrame":
+        """Build from candle dicts, OHLCVData, tuples or ``OHLCVColumns``.
+
+        Order doesn't matter — rows are stably sorted by timestamp. A
+        ``CandleFrame`` is returned as-is, so engines can call this on
+        whatever they were handed.
+        """
+        if isinstance(candles, CandleFrame):
+            return candles
+        if hasattr(candles, "to_frame"):
+            return candles.to_frame()
+        rows = [_row(c) for c in candles]
+        if not rows:
+            return cls.empty()
+        records, labels, o, h, lo, c, v = (list(col) for col in zip(*rows))
+        return cls._sorted(timestamps_to_ns(labels), o, h, lo, c, v, labels, records)
+
+    @classmethod
+    def from_columns(
+        cls,
+        timestamps: list,
+        open: Any,
+        high: Any,
+        low: Any,
+        close: Any,
+        volume: Any,
+    ) -> "CandleFrame":
+        """Build from parallel columns (e.g. the Upstox SDK rows, unzipped)."""
+        return cls._sorted(timestamps_to_ns(timestamps), open, high, low, close,
+                           volume, list(timestamps), None)
+
+    @classmethod
+    def empty(cls) -> "CandleFrame":
+        e = np.empty(0)
+        return cls(np.empty(0, dtype=np.int64), e, e, e, e, e, [], [])
+
+    @classmethod
+    def _sorted(cls, ts_ns, o, h, lo, c, v, labels, records) -> "CandleFrame":
+        arrays = [np.asarray(a, dtype=np.float64) for a in (o, h, lo, c, v)]
+        if len(ts_ns) > 1 and np.any(np.diff(ts_ns) < 0):
+            order = np.argsort(ts_ns, kind="stable")
+            ts_ns = ts_ns[order]
+            arrays = [a[order] for a in arrays]
+            labels = [labels[i] for i in order]
+            records = [records[i] for i in order] if records is not None else None
+        return cls(ts_ns, *arrays, labels=labels, records=records)
+
+    # ── Sequence protocol (candle dicts) ────────────────────────────────
+
+    def __len__(self) -> int:
+        return len(self.ts_ns)
+
+    def __iter__(self) -> Iterator[dict]:
+        return iter(self.records)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return self._slice(key)
+        return self.records[key]
+
+    def __bool__(self) -> bool:
+        return len(self.ts_ns) > 0
+
+    def _slice(self, key: slice) -> "CandleFrame":
+        sub = CandleFrame(
+            self.ts_ns[key], self.open[key], self.high[key], self.low[key],
+            self.close[key], self.volume[key],
+            labels=self._labels[key] if self._labels is not None else None,
+            records=self._records[key] if self._records is not None else None,
+        )
+        if self._datetimes is not None:
+            sub._datetimes = self._datetimes[key]
+        if self._naive_datetimes is not None:
+            sub._naive_datetimes = self._naive_datetimes[key]
+        return sub
+
+    @property
+    def labels(self) -> list:
+        """The original timestamp values (ISO strings when built from arrays)."""
+        if self._labels is None:
+            self._labels = [dt.isoformat() for dt in self.datetimes]
+        return self._labels
+
+    @property
+    def records(self) -> list[dict]:
+        """Engine candle dicts, built once per frame."""
+        if self._records is None:
+            self._records = [
+                {"timestamp": t, "open": o, "high": h, "low": lo, "close": c, "volume": v}
+                for t, o, h, lo, c, v in zip(
+                    self.labels, self.open.tolist(), self.high.tolist(),
+                    self.low.tolist(), self.close.tolist(),
+                    self.volume.astype(np.int64).tolist(),
+                )
+            ]
+        return self._records
+
+    # ── Time columns ────────────────────────────────────────────────────
+
+    @property
+    def naive_datetimes(self) -> list[datetime]:
+        """Per-bar IST wall-clock datetimes (no tzinfo), built once."""
+        if self._naive_datetimes is None:
+            local = (self.ts_ns + IST_OFFSET_NS).astype("datetime64[ns]").astype("datetime64[us]")
+            self._naive_datetimes = local.tolist()
+        return self._naive_datetimes
+
+    @property
+    def datetimes(self) -> list[datetime]:
+        """Per-bar IST-aware datetimes, built once."""
+        if self._datetimes is None:
+            self._datetimes = [dt.replace(tzinfo=IST) for dt in self.naive_datetimes]
+        return self._datetimes
+
+    @property
+    def n_days(self) -> int:
+        return len(self.day_offsets) - 1
+
+    @property
+    def day_dates(self) -> list[date]:
+        """The IST session date of each day in the frame, ascending."""
+        first_days = self.session_day[self.day_offsets[:-1]]
+        return [day_to_date(d) for d in first_days]
+
+    @property
+    def session_dates(self) -> list[date]:
+        """The IST session date of every bar."""
+        counts = np.diff(self.day_offsets).tolist()
+        return [d for d, k in zip(self.day_dates, counts) for _ in range(k)]
+
+    def iter_days(self) -> Iterator[tuple[date, int, int]]:
+        """Yield ``(session_date, start, end)`` row ranges, one per day."""
+        offsets = self.day_offsets.tolist()
+        for d, start, end in zip(self.day_dates, offsets[:-1], offsets[1:]):
+            yield d, start, end
+
+    def split_days(self) -> dict[str, "CandleFrame"]:
+        """``{"YYYY-MM-DD": day sub-frame}`` in date order."""
+        return {d.isoformat(): self[start:end] for d, start, end in self.iter_days()}
+
+    def searchsorted(self, when: datetime) -> int:
+        """Number of bars strictly before ``when`` (naive = IST)."""
+        return int(np.searchsorted(self.ts_ns, timestamps_to_ns([when])[0], side="left"))
+
+    # ── Indicator input ─────────────────────────────────────────────────
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """The sorted OHLCV frame the indicator series functions consume."""
+        return pd.DataFrame({
+            "timestamp": self.labels,
+            "open": self.open,
+            "high": self.high,
+            "low": self.low,
+            "close": self.close,
+            "volume": self.volume,
+        })
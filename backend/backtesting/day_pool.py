@@ -0,0 +1,182 @@
+"""Day-parallel execution for per-day backtests.
+
+Template (ORB, breakout, ...) and F&O backtests replay every trading day with
+fresh rule state — nothing carries from one day to the next — yet they ran
+the days one after another in a single thread. ``map_days`` shards the days
+across a process pool instead:
+
+- Days are cut into contiguous shards (a few per worker, so progress and
+  cancel stay responsive) and each shard runs ``fn(*args)`` for its days in
+  a worker process.
+- Results come back in day order, so concatenating them gives exactly the
+  sequential output.
+- ``progress_cb(days_done, days_total)`` fires as shards complete and
+  ``cancel_check()`` is polled between completions. A cancelled run returns
+  the results of the leading days that finished — the same chronological
+  prefix a cancelled sequential run returns.
+
+``fn`` must be a module-level function and its arguments picklable (candle
+frames, RuleSpecs and trades all are). Short runs — fewer than
+``BACKTEST_PARALLEL_MIN_DAYS`` days, or a single worker — run in-process,
+since pool dispatch would cost more than it saves.
+
+Workers are spawned (not forked — the server process has threads and an
+event loop) once and reused across runs.
+"""
+from __future__ import annotations
+
+import atexit
+import logging
+import math
+import multiprocessing
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Sequence
+
+logger = logging.getLogger(__name__)
+
+# 0 = one worker per CPU; 1 = always sequential
+BACKTEST_DAY_WORKERS = int(os.getenv("BACKTEST_DAY_WORKERS", "0"))
+BACKTEST_PARALLEL_MIN_DAYS = int(os.getenv("BACKTEST_PARALLEL_MIN_DAYS", "20"))
+
+# Shards per worker: more shards → finer progress/cancel, more dispatch overhead
+_SHARDS_PER_WORKER = 4
+
+_pools: dict[int, ProcessPoolExecutor] = {}
+_pools_lock = threading.Lock()
+
+
+def resolve_workers(workers: int | None = None) -> int:
+    """Worker count for a run: explicit, else the env default (0 → CPUs)."""
+    n = BACKTEST_DAY_WORKERS if workers is None else workers
+    if n <= 0:
+        n = os.cpu_count() or 1
+    return max(1, n)
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            pool = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+            )
+            _pools[workers] = pool
+        return pool
+
+
+def _discard_pool(workers: int) -> None:
+    with _pools_lock:
+        pool = _pools.pop(workers, None)
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_day_pools() -> None:
+    """Stop every worker pool (server shutdown / interpreter exit)."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+atexit.register(shutdown_day_pools)
+
+
+def _run_shard(fn: Callable[..., Any], shard: Sequence[tuple]) -> list:
+    return [fn(*args) for args in shard]
+
+
+def _run_sequential(
+    fn: Callable[..., Any],
+    items: Sequence[tuple],
+    progress_cb: Callable[[int, int], None] | None,
+    cancel_check: Callable[[], bool] | None,
+) -> list:
+    results: list = []
+    total = len(items)
+    for idx, args in enumerate(items):
+        if cancel_check is not None:
+            try:
+                if cancel_check():
+                    break
+            except Exception:
+                pass
+        if progress_cb is not None:
+            try:
+                progress_cb(idx, total)
+            except Exception:
+                pass
+        results.append(fn(*args))
+    return results
+
+
+def map_days(
+    fn: Callable[..., Any],
+    items: Sequence[tuple],
+    *,
+    workers: int | None = None,
+    progress_cb: Callable[[int, int], None] | None = None,
+    cancel_check: Callable[[], bool] | None = None,
+) -> list:
+    """Run ``fn(*args)`` for each day's ``args`` in ``items``; results in day order.
+
+    Progress/cancel callbacks follow the engines' contract: exceptions in
+    them are swallowed, and the final ``progress_cb(total, total)`` is left
+    to the caller.
+    """
+    n_workers = min(resolve_workers(workers), len(items))
+    if n_workers <= 1 or len(items) < BACKTEST_PARALLEL_MIN_DAYS:
+        return _run_sequential(fn, items, progress_cb, cancel_check)
+
+    size = math.ceil(len(items) / (n_workers * _SHARDS_PER_WORKER))
+    shards = [items[i:i + size] for i in range(0, len(items), size)]
+    try:
+        pool = _get_pool(n_workers)
+        futures = {pool.submit(_run_shard, fn, shard): idx for idx, shard in enumerate(shards)}
+    except BrokenProcessPool:
+        _discard_pool(n_workers)
+        logger.warning("Backtest day pool unavailable — running days sequentially")
+        return _run_sequential(fn, items, progress_cb, cancel_check)
+
+    done_results: dict[int, list] = {}
+    days_done = 0
+    pending = set(futures)
+    cancelled = False
+    try:
+        while pending:
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                idx = futures[fut]
+                done_results[idx] = fut.result()
+                days_done += len(shards[idx])
+            if progress_cb is not None:
+                try:
+                    progress_cb(days_done, len(items))
+                except Exception:
+                    pass
+            if cancel_check is not None and pending:
+                try:
+                    cancelled = bool(cancel_check())
+                except Exception:
+                    cancelled = False
+                if cancelled:
+                    for fut in pending:
+                        fut.cancel()
+                    break
+    except BrokenProcessPool:
+        for fut in pending:
+            fut.cancel()
+        _discard_pool(n_workers)
+        logger.warning("Backtest day pool crashed — rerunning days sequentially")
+        return _run_sequential(fn, items, progress_cb, cancel_check)
+
+    results: list = []
+    for idx in range(len(shards)):
+        if idx not in done_results:
+            break  # cancelled: keep the finished chronological prefix only
+        results.extend(done_results[idx])
+    return results
@@ -5,6 +5,7 @@ from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Any
 
+from backtesting.candle_frame import CandleFrame
 from backtesting.metrics import compute_metrics
 from backtesting.simulator import Trade, TradeSimulator
 from monitor.indicator_engine import compute_indicator
@@ -81,7 +82,8 @@ class BacktestEngine:
     """Simulates candle-by-candle execution of strategy rules against historical data.
 
     Args:
-        candles: list of dicts with keys: timestamp, open, high, low, close, volume
+        candles: list of dicts with keys: timestamp, open, high, low, close, volume,
+            or a ``CandleFrame`` (timestamps then come pre-parsed)
         rules: list of RuleSpec from a StrategyPlan
         symbol: trading symbol name
         strategy_name: name of the strategy template
@@ -90,7 +92,7 @@ class BacktestEngine:
 
     def __init__(
         self,
-        candles: list[dict],
+        candles: list[dict] | CandleFrame,
         rules: list[RuleSpec],
         symbol: str,
         strategy_name: str = "",
@@ -98,7 +100,8 @@ class BacktestEngine:
         progress_cb=None,
         cancel_check=None,
     ):
-        self.candles = sorted(candles, key=lambda c: c["timestamp"])
+        self.frame = CandleFrame.from_candles(candles)
+        self.candles = self.frame.records
         self.symbol = symbol
         self.strategy_name = strategy_name
         self.initial_capital = initial_capital
@@ -123,6 +126,8 @@ class BacktestEngine:
         """Run the backtest candle by candle."""
         candle_history: list[dict] = []
         total = len(self.candles)
+        # IST wall-clock per bar, parsed once when the frame was built
+        timestamps = self.frame.naive_datetimes
         _PROGRESS_BATCH = 200
 
         for i, candle in enumerate(self.candles):
@@ -139,7 +144,7 @@ class BacktestEngine:
                     pass
 
             candle_history.append(candle)
-            ts = self._parse_timestamp(candle["timestamp"])
+            ts = timestamps[i]
 
             # Evaluate all rules against this candle
             fired_rules = self._evaluate_candle(candle, candle_history, ts, i)
@@ -166,25 +171,18 @@ class BacktestEngine:
         # Close any remaining open position at last candle's close
         if not self._sim.is_flat and self.candles:
             last = self.candles[-1]
-            ts = self._parse_timestamp(last["timestamp"])
-            self._sim.close_position(last["close"], ts, "end_of_data")
+            self._sim.close_position(last["close"], timestamps[-1], "end_of_data")
 
         trades = self._sim.trades
         metrics = compute_metrics(trades, self.initial_capital)
 
-        # Count unique days
-        day_set = set()
-        for c in self.candles:
-            t = self._parse_timestamp(c["timestamp"])
-            day_set.add(t.date())
-
         return BacktestResult(
             symbol=self.symbol,
             strategy=self.strategy_name,
             trades=trades,
             metrics=metrics,
             candle_count=len(self.candles),
-            days=len(day_set),
+            days=self.frame.n_days,
         )
 
     def _evaluate_candle(
@@ -254,7 +252,7 @@ class BacktestEngine:
         key = (indicator, tuple(sorted((params or {}).items())))
         cached = self._indicator_cache.get(key)
         if cached is None:
-            cached = compute_indicator_series(indicator, self.candles, params or {})
+            cached = compute_indicator_series(indicator, self.frame, params or {})
             self._indicator_cache[key] = cached
         return cached
 
@@ -523,25 +521,9 @@ class BacktestEngine:
             return "squareoff"
         return "rule"
 
-    @staticmethod
-    def _parse_timestamp(ts: str | datetime) -> datetime:
-        """Parse a timestamp string to datetime."""
-        if isinstance(ts, datetime):
-            return ts
-        # Try common formats
-        for fmt in ("%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S%z",
-                     "%Y-%m-%dT%H:%M:%S.%f", "%Y-%m-%dT%H:%M:%S.%f%z"):
-            try:
-                dt = datetime.strptime(ts, fmt)
-                return dt.replace(tzinfo=None)  # strip tz for consistency
-            except ValueError:
-                continue
-        # Last resort
-        return datetime.fromisoformat(ts.replace("Z", "+00:00")).replace(tzinfo=None)
-
 
 def run_backtest_for_day(
-    day_candles: list[dict],
+    day_candles: list[dict] | CandleFrame,
     rules: list[RuleSpec],
     symbol: str,
     strategy_name: str,
@@ -6,12 +6,15 @@ Charges are computed per-leg using F&O-specific rates.
 """
 from __future__ import annotations
 
+import copy
 import logging
 from collections import defaultdict
 from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Any
 
+from backtesting.candle_frame import CandleFrame
+from backtesting.day_pool import map_days
 from backtesting.engine import BacktestEngine
 from backtesting.simulator import Trade
 from strategies.fno_utils import estimate_leg_charges
@@ -70,7 +73,7 @@ class FnOBacktestResult:
 # Per-leg engine (wraps BacktestEngine for one instrument)
 # ---------------------------------------------------------------------------
 
-def _set_day_sl_prices(rules: list[RuleSpec], day_candles: list[dict]) -> None:
+def _set_day_sl_prices(rules: list[RuleSpec], day_candles: list[dict] | CandleFrame) -> None:
     """Set SL trigger prices from the day's first candle (entry premium proxy).
 
     For rules with price=0 and condition gte/lte, derive SL from entry premium.
@@ -96,7 +99,7 @@ def _set_day_sl_prices(rules: list[RuleSpec], day_candles: list[dict]) -> None:
 
 
 def _run_leg_backtest(
-    candles: list[dict],
+    candles: list[dict] | CandleFrame,
     rules: list[RuleSpec],
     instrument_key: str,
     label: str,
@@ -148,27 +151,62 @@ def _run_leg_backtest(
     return leg_trades
 
 
+def _run_fno_day(
+    day_key: str,
+    legs: list[tuple[str, CandleFrame, list[RuleSpec], str]],
+) -> FnODayResult | None:
+    """Run every leg for one day; ``legs`` is ``(inst_key, day_candles, rules, label)``.
+
+    Module-level so the day pool can ship it to worker processes.
+    """
+    day_legs: list[LegTrade] = []
+    for inst_key, day_c, leg_rules, label in legs:
+        # Deep-copy rules for this day so SL prices are independent
+        inst_rules = copy.deepcopy(leg_rules)
+
+        # Set per-day SL prices from the day's first candle
+        _set_day_sl_prices(inst_rules, day_c)
+
+        day_legs.extend(_run_leg_backtest(day_c, inst_rules, inst_key, label))
+
+    if not day_legs:
+        return None
+    gross = sum(lt.gross_pnl for lt in day_legs)
+    charges = sum(lt.charges["total"] for lt in day_legs)
+    net = sum(lt.net_pnl for lt in day_legs)
+    return FnODayResult(
+        date=day_key,
+        leg_trades=day_legs,
+        gross_pnl=round(gross, 2),
+        total_charges=round(charges, 2),
+        net_pnl=round(net, 2),
+    )
+
+
 # ---------------------------------------------------------------------------
 # Main F&O backtest function
 # ---------------------------------------------------------------------------
 
 def run_fno_backtest(
-    leg_candles: dict[str, list[dict]],
+    leg_candles: dict[str, list[dict] | CandleFrame],
     rules: list[RuleSpec],
     strategy_name: str,
     underlying: str,
     initial_capital: float,
     progress_cb=None,
     cancel_check=None,
+    workers: int | None = None,
 ) -> FnOBacktestResult:
     """Run multi-leg F&O backtest across multiple days.
 
     Args:
-        leg_candles: {instrument_key: [candle_dicts]} for each option leg.
+        leg_candles: {instrument_key: [candle_dicts] or CandleFrame} for each
+            option leg.
         rules: All RuleSpecs from the strategy template.
         strategy_name: e.g. "straddle", "iron-condor".
         underlying: e.g. "NIFTY", "BANKNIFTY".
         initial_capital: Starting capital for metrics.
+        workers: Day-pool size (None = ``BACKTEST_DAY_WORKERS``, 1 = in-process).
 
     Returns:
         FnOBacktestResult with per-day breakdown and aggregate metrics.
@@ -191,69 +229,36 @@ def run_fno_backtest(
         logger.error("No matching instruments between rules and candle data")
         return _empty_result(strategy_name, underlying, initial_capital)
 
-    # Split candles by day for each instrument
-    day_candles_by_inst: dict[str, dict[str, list[dict]]] = {}
+    # Split candles by day for each instrument. Each day is a sub-frame of
+    # the leg's frame, so the per-day engines never re-parse timestamps.
+    day_candles_by_inst: dict[str, dict[str, CandleFrame]] = {}
     all_days: set[str] = set()
     for inst_key in instruments:
-        by_day: dict[str, list[dict]] = defaultdict(list)
-        for c in leg_candles[inst_key]:
-            ts = BacktestEngine._parse_timestamp(c["timestamp"])
-            day_key = ts.strftime("%Y-%m-%d")
-            by_day[day_key].append(c)
-            all_days.add(day_key)
-        day_candles_by_inst[inst_key] = dict(by_day)
-
-    # Run per-day
-    day_results: list[FnODayResult] = []
-    all_leg_trades: list[LegTrade] = []
+        by_day = CandleFrame.from_candles(leg_candles[inst_key]).split_days()
+        all_days.update(by_day)
+        day_candles_by_inst[inst_key] = by_day
 
+    # Run per-day. Days are independent (rules are re-copied per day), so
+    # they're sharded across the day pool; results come back in day order.
+    # Progress + cancel fire between shards.
     sorted_days = sorted(all_days)
-    for day_idx, day_key in enumerate(sorted_days):
-        # Progress + cancel between days. Per-leg per-day work is fast
-        # post-cache (one BacktestEngine per leg) so checking once per
-        # day is plenty.
-        if cancel_check is not None:
-            try:
-                if cancel_check():
-                    break
-            except Exception:
-                pass
-        if progress_cb is not None:
-            try:
-                progress_cb(day_idx, len(sorted_days))
-            except Exception:
-                pass
-
-        day_legs: list[LegTrade] = []
-
+    day_items = []
+    for day_key in sorted_days:
+        legs = []
         for inst_key in instruments:
             day_c = day_candles_by_inst.get(inst_key, {}).get(day_key, [])
             if len(day_c) < 2:
                 continue
-
-            # Deep-copy rules for this day so SL prices are independent
-            import copy
-            inst_rules = copy.deepcopy(rules_by_inst[inst_key])
-
-            # Set per-day SL prices from the day's first candle
-            _set_day_sl_prices(inst_rules, day_c)
-
-            label = label_by_inst.get(inst_key, inst_key)
-            trades = _run_leg_backtest(day_c, inst_rules, inst_key, label)
-            day_legs.extend(trades)
-
-        if day_legs:
-            gross = sum(lt.gross_pnl for lt in day_legs)
-            charges = sum(lt.charges["total"] for lt in day_legs)
-            net = sum(lt.net_pnl for lt in day_legs)
-            day_results.append(FnODayResult(
-                date=day_key,
-                leg_trades=day_legs,
-                gross_pnl=round(gross, 2),
-                total_charges=round(charges, 2),
-                net_pnl=round(net, 2),
-            ))
-            all_leg_trades.extend(day_legs)
+            legs.append((inst_key, day_c, rules_by_inst[inst_key],
+                         label_by_inst.get(inst_key, inst_key)))
+        day_items.append((day_key, legs))
+
+    day_results: list[FnODayResult] = [
+        dr for dr in map_days(_run_fno_day, day_items, workers=workers,
+                              progress_cb=progress_cb, cancel_check=cancel_check)
+        if dr is not None
+    ]
+    all_leg_trades: list[LegTrade] = [lt for dr in day_results for lt in dr.leg_trades]
 
     # Compute aggregate metrics
     metrics = _compute_fno_metrics(day_results, initial_capital)
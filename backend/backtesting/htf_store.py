@@ -0,0 +1,156 @@
+"""Persistent daily-trend store for the HTF entry gates.
+
+Every sweep used to refetch each symbol's DAILY candles (window + 120 days)
+just to rebuild the same ``htf_trend.compute_daily_trend`` maps — one network
+call per symbol per sweep for data that changes once a day. This store keeps,
+per symbol, the daily closes and the trend map of every variant asked for,
+keyed by the as-of date the trend serves:
+
+  <STORE_DIR>/<SYMBOL>.json
+    {"version", "covers_from", "checked_on",
+     "closes": {iso_date: close},
+     "trend":  {variant: {iso_date: "up"|"down"|"flat"}}}
+
+- The broker is asked at most once per IST day per symbol (``checked_on``).
+  A later day fetches only the days since the last stored close (plus a small
+  overlap, so a close stored mid-session is overwritten by the final one).
+- A request reaching further back than ``covers_from`` refetches the whole
+  range once.
+- Trend maps are rebuilt from the stored closes whenever they change. The
+  indicators are causal and each date only sees prior closes, so appending
+  days never changes an existing date's trend.
+- A failed fetch falls back to the stored data (with a warning) when there
+  is any; otherwise the error propagates and the caller skips the gate.
+
+Writes are atomic (temp file + rename); a corrupt or old-version file is
+treated as empty.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+from backtesting.candle_frame import CandleFrame
+from backtesting.htf_trend import compute_daily_trend
+
+logger = logging.getLogger(__name__)
+
+# Module-level so tests can repoint it at tmp_path. Env var overrides the default.
+STORE_DIR: Path = Path(
+    os.environ.get(
+        "NF_HTF_TREND_STORE_DIR",
+        str(Path(__file__).resolve().parent.parent / "cli-tools" / ".backtest-cache" / "htf-trend"),
+    )
+)
+
+# Days re-requested before the last stored close on an incremental update.
+REFRESH_OVERLAP_DAYS = 3
+
+_STORE_VERSION = 1
+_IST = timezone(timedelta(hours=5, minutes=30))
+
+
+def _today() -> date:
+    """Today's IST date (module-level so tests can pin it)."""
+    return datetime.now(_IST).date()
+
+
+def _path(symbol: str) -> Path:
+    return STORE_DIR / f"{symbol.upper()}.json"
+
+
+def _load(symbol: str) -> dict:
+    empty = {"version": _STORE_VERSION, "covers_from": None, "checked_on": None,
+             "closes": {}, "trend": {}}
+    path = _path(symbol)
+    if not path.exists():
+        return empty
+    try:
+        with path.open("r", encoding="utf-8") as fh:
+            loaded = json.load(fh)
+        if loaded.get("version") == _STORE_VERSION:
+            return loaded
+    except (json.JSONDecodeError, OSError, ValueError, AttributeError) as exc:
+        logger.warning("htf_store: corrupt store %s (%s); rebuilding", path, exc)
+    return empty
+
+
+def _save(symbol: str, entry: dict) -> None:
+    """Write ``entry`` atomically; failures are non-fatal."""
+    try:
+        STORE_DIR.mkdir(parents=True, exist_ok=True)
+        path = _path(symbol)
+        tmp = path.with_suffix(".json.tmp")
+        with tmp.open("w", encoding="utf-8") as fh:
+            json.dump(entry, fh, sort_keys=True)
+        os.replace(tmp, path)
+    except OSError as exc:
+        logger.warning("htf_store: failed to write %s (%s)", symbol, exc)
+
+
+def _trend_map(closes: dict[str, float], variant: str) -> dict[str, str]:
+    daily = [{"timestamp": d, "close": c} for d, c in closes.items()]
+    return {d.isoformat(): t for d, t in compute_daily_trend(daily, variant).items()}
+
+
+async def daily_trends(
+    client,
+    symbol: str,
+    variants: list[str],
+    *,
+    fetch_days: int,
+) -> dict[str, dict[date, str]]:
+    """``compute_daily_trend`` maps for ``variants``, served from the store.
+
+    ``fetch_days`` is how far back the closes must reach (what a direct
+    ``get_historical_data(symbol, interval="day", days=fetch_days)`` would
+    return). Returns ``{variant: {date: trend}}``; empty when the symbol has
+    no daily candles at all.
+    """
+    today = _today()
+    need_from = today - timedelta(days=fetch_days)
+    entry = _load(symbol)
+    closes: dict[str, float] = entry["closes"]
+    covers_from = entry["covers_from"]
+
+    changed = False
+    if entry["checked_on"] != today.isoformat() or covers_from is None \
+            or covers_from > need_from.isoformat():
+        if closes and covers_from is not None and covers_from <= need_from.isoformat():
+            last = date.fromisoformat(max(closes))
+            days = max(1, (today - last).days + REFRESH_OVERLAP_DAYS)
+        else:
+            days = fetch_days
+        try:
+            daily = await client.get_historical_data(symbol, interval="day", days=days)
+        except Exception as exc:
+            if not closes:
+                raise
+            logger.warning("htf_store: daily fetch for %s failed (%s); using stored closes "
+                           "through %s", symbol, exc, max(closes))
+        else:
+            frame = CandleFrame.from_candles(daily or [])
+            fresh = {d.isoformat(): c for d, c in zip(frame.session_dates, frame.close.tolist())}
+            closes = dict(sorted({**closes, **fresh}.items()))
+            entry["closes"] = closes
+            entry["checked_on"] = today.isoformat()
+            if days == fetch_days:
+                entry["covers_from"] = min(filter(None, [covers_from, need_from.isoformat()]))
+            changed = True
+
+    stored = entry["trend"]
+    for variant in variants:
+        if changed or variant not in stored:
+            stored[variant] = _trend_map(closes, variant)
+            changed = True
+    if changed:
+        _save(symbol, entry)
+    if not closes:
+        return {}
+    return {
+        v: {date.fromisoformat(d): t for d, t in stored[v].items()}
+        for v in variants
+    }
@@ -26,14 +26,25 @@ Variants (deliberately just three — this is a hypothesis test, not a zoo):
 Insufficient history for a variant's indicator → "flat" (which the gate treats
 as block-both — conservative: no detected regime, no trade).
 
-PURE module: no I/O, no network, stdlib only. Sibling of ``ranking.py``.
+Gates come in two forms: ``make_entry_gate`` (a per-entry callable) and
+``entry_gate_mask`` (long/short boolean arrays on an intraday bar grid, read by
+index in the scalp engine — built once per frame, so a gated combo replays as
+cheaply as an ungated one). Both apply the same rule and agree bar for bar.
+
+PURE module: no I/O, no network. Sibling of ``ranking.py``; the persistent
+daily-trend store lives in ``htf_store.py``.
 """
 from __future__ import annotations
 
 from bisect import bisect_right
+from dataclasses import dataclass
 from datetime import date, datetime, timedelta
 from typing import Callable
 
+import numpy as np
+
+from backtesting.candle_frame import CandleFrame
+
 # The variants the sweep/CLI may request. Keep this the single source of truth.
 HTF_VARIANTS = ["daily_ema20", "daily_ema20_50", "daily_mom3"]
 
@@ -134,13 +145,16 @@ def compute_daily_trend(daily_candles: list[dict], variant: str) -> dict[date, s
     value instead of a one-day-stale one. Still zero lookahead: the ghost value
     only ever uses closes strictly before the dates it serves.
 
-    Accepts dict candles ({"timestamp", "close"}) or attribute-style OHLCV
-    objects. Duplicate dates keep the last close seen. Raises ValueError on an
-    unknown variant.
+    Accepts dict candles ({"timestamp", "close"}), attribute-style OHLCV
+    objects or a ``CandleFrame`` (its session dates and close column are read
+    directly). Duplicate dates keep the last close seen. Raises ValueError on
+    an unknown variant.
     """
-    rows = sorted(
-        {(_candle_date(c)): _candle_close(c) for c in daily_candles}.items()
-    )
+    if hasattr(daily_candles, "session_dates"):
+        by_date = dict(zip(daily_candles.session_dates, daily_candles.close.tolist()))
+    else:
+        by_date = {(_candle_date(c)): _candle_close(c) for c in daily_candles}
+    rows = sorted(by_date.items())
     if not rows:
         # Still validate the variant so a typo fails loudly, not as an
         # all-flat (block-everything) gate.
@@ -158,6 +172,15 @@ def compute_daily_trend(daily_candles: list[dict], variant: str) -> dict[date, s
     return trend
 
 
+def _trend_on(trend_by_date: dict[date, str], keys: list[date], d: date) -> str:
+    """The trend for ``d``, else the most recent PRIOR key's, else "flat"."""
+    trend = trend_by_date.get(d)
+    if trend is None:
+        idx = bisect_right(keys, d) - 1
+        trend = trend_by_date[keys[idx]] if idx >= 0 else "flat"
+    return trend
+
+
 def make_entry_gate(
     trend_by_date: dict[date, str], mode: str = "align"
 ) -> Callable[[datetime, str], bool]:
@@ -180,10 +203,7 @@ def make_entry_gate(
 
     def gate(ts: datetime, side: str) -> bool:
         d = ts.date() if isinstance(ts, datetime) else ts
-        trend = trend_by_date.get(d)
-        if trend is None:
-            idx = bisect_right(keys, d) - 1
-            trend = trend_by_date[keys[idx]] if idx >= 0 else "flat"
+        trend = _trend_on(trend_by_date, keys, d)
         if side == "long":
             return trend == "up"
         if side == "short":
@@ -191,3 +211,48 @@ def make_entry_gate(
         return False  # unknown side: block (defensive)
 
     return gate
+
+
+@dataclass(frozen=True)
+class EntryGateMask:
+    """Per-bar entry permissions on one ``CandleFrame``'s bar grid."""
+
+    long: np.ndarray     # bool: a long entry may fill on this bar
+    short: np.ndarray    # bool: a short entry may fill on this bar
+
+    def __len__(self) -> int:
+        return len(self.long)
+
+    def prefix(self, n_bars: int) -> "EntryGateMask":
+        """The mask for the frame's first ``n_bars`` bars."""
+        return EntryGateMask(self.long[:n_bars], self.short[:n_bars])
+
+    def allows(self, i: int, side: str) -> bool:
+        if side == "long":
+            return bool(self.long[i])
+        if side == "short":
+            return bool(self.short[i])
+        return False
+
+
+def entry_gate_mask(
+    trend_by_date: dict[date, str],
+    candles: list[dict] | CandleFrame,
+    mode: str = "align",
+) -> EntryGateMask:
+    """``make_entry_gate``'s decisions for every bar of ``candles``, precomputed.
+
+    The trend is looked up once per session day (same missing-date fallback
+    as the callable) and repeated over that day's bars. Pass the mask as the
+    scalp engine's ``entry_gate_mask`` with the same candles.
+    """
+    if mode != "align":
+        raise ValueError(f"unknown entry-gate mode: {mode!r} (only 'align' exists)")
+    frame = CandleFrame.from_candles(candles)
+    keys = sorted(trend_by_date)
+    day_trend = [_trend_on(trend_by_date, keys, d) for d in frame.day_dates]
+    counts = np.diff(frame.day_offsets)
+    return EntryGateMask(
+        np.repeat(np.array([t == "up" for t in day_trend], dtype=bool), counts),
+        np.repeat(np.array([t == "down" for t in day_trend], dtype=bool), counts),
+    )
@@ -1,15 +1,19 @@
-"""Compute backtest performance metrics from a list of completed trades."""
+"""Compute backtest performance metrics from a list of completed trades.
+
+Both entry points also take a ``TradeTable`` and compute the same dict with
+NumPy reductions instead of Python loops over ``Trade`` objects.
+"""
 from __future__ import annotations
 
 import math
-from backtesting.simulator import Trade
 
-# Exit reasons that are time-driven rather than signal-driven (shared by both
-# the rule-based engine and the scalp state machine).
-_TIME_EXIT_REASONS = {"squareoff", "end_of_data"}
+import numpy as np
+
+from backtesting.simulator import Trade
+from backtesting.trade_table import TIME_EXIT_REASONS, TradeTable, sequential_sum
 
 
-def plausibility_warnings(trades: list[Trade], metrics: dict) -> list[str]:
+def plausibility_warnings(trades: list[Trade] | TradeTable, metrics: dict) -> list[str]:
     """Heuristic red flags for backtest results that look too good — or too
     mechanical — to be real.
 
@@ -44,7 +48,19 @@ def plausibility_warnings(trades: list[Trade], metrics: dict) -> list[str]:
             "Verify losing trades are actually possible before acting."
         )
 
-    time_exits = sum(1 for t in trades if t.exit_reason in _TIME_EXIT_REASONS)
+    if isinstance(trades, TradeTable):
+        time_exits = int(np.count_nonzero(trades.time_exit))
+        zero_dur = int(np.count_nonzero(trades.holding_minutes == 0))
+        winner_holds = trades.holding_minutes[trades.pnl > 0]
+        n_winners = len(winner_holds)
+        holds = set(np.unique(winner_holds).tolist()) if n_winners >= 5 else set()
+    else:
+        time_exits = sum(1 for t in trades if t.exit_reason in TIME_EXIT_REASONS)
+        zero_dur = sum(1 for t in trades if t.holding_minutes == 0)
+        winners = [t for t in trades if t.pnl > 0]
+        n_winners = len(winners)
+        holds = {t.holding_minutes for t in winners}
+
     if total >= 4 and time_exits / total > 0.5:
         pct = round(100 * time_exits / total)
         warnings.append(
@@ -53,16 +69,13 @@ def plausibility_warnings(trades: list[Trade], metrics: dict) -> list[str]:
             "window, not repeatable strategy edge."
         )
 
-    zero_dur = sum(1 for t in trades if t.holding_minutes == 0)
     if zero_dur:
         warnings.append(
             f"{zero_dur} zero-duration trade(s) (entry and exit on the same "
             "bar) — possible same-bar fill artifact; inspect those trades."
         )
 
-    winners = [t for t in trades if t.pnl > 0]
-    if len(winners) >= 5:
-        holds = {t.holding_minutes for t in winners}
+    if n_winners >= 5:
         if len(holds) == 1:
             warnings.append(
                 f"every winner exits after exactly {holds.pop()} min — "
@@ -73,17 +86,17 @@ def plausibility_warnings(trades: list[Trade], metrics: dict) -> list[str]:
     return warnings
 
 
-def compute_metrics(trades: list[Trade], initial_capital: float) -> dict:
+def compute_metrics(trades: list[Trade] | TradeTable, initial_capital: float) -> dict:
     """Compute backtest performance metrics.
 
     Args:
-        trades: List of completed Trade objects.
+        trades: List of completed Trade objects, or a ``TradeTable`` of them.
         initial_capital: Starting capital for return calculation.
 
     Returns:
         Dict of performance metrics.
     """
-    if not trades:
+    if not len(trades):
         return {
             "total_trades": 0,
             "winners": 0,
@@ -103,6 +116,9 @@ def compute_metrics(trades: list[Trade], initial_capital: float) -> dict:
             "expectancy": 0.0,
         }
 
+    if isinstance(trades, TradeTable):
+        return _compute_metrics_table(trades, initial_capital)
+
     winners = [t for t in trades if t.pnl > 0]
     losers = [t for t in trades if t.pnl < 0]
     # Break-even trades (pnl == 0) are neither — counting them as losers gave
@@ -178,3 +194,68 @@ def compute_metrics(trades: list[Trade], initial_capital: float) -> dict:
         "worst_trade": round(worst, 2),
         "expectancy": round(expectancy, 2),
     }
+
+
+def _compute_metrics_table(table: TradeTable, initial_capital: float) -> dict:
+    """``compute_metrics`` over a non-empty ``TradeTable``.
+
+    Sums run left to right (``sequential_sum`` / ``cumsum``) in the list
+    version's order, so the rounded figures match it.
+    """
+    pnl = table.pnl
+    total = len(pnl)
+    win = pnl[pnl > 0]
+    loss = pnl[pnl < 0]
+
+    win_rate = (len(win) / total) * 100
+    gross_profit = sequential_sum(win)
+    gross_loss = abs(sequential_sum(loss))
+    avg_winner = gross_profit / len(win) if len(win) else 0.0
+    avg_loser = sequential_sum(loss) / len(loss) if len(loss) else 0.0
+    profit_factor = gross_profit / gross_loss if gross_loss > 0 else float("inf") if gross_profit > 0 else 0.0
+
+    net_pnl = sequential_sum(pnl)
+    return_pct = (net_pnl / initial_capital) * 100 if initial_capital else 0.0
+
+    # Max drawdown on the equity curve: capital, then after each trade
+    equity = np.cumsum(np.concatenate(([float(initial_capital)], pnl)))
+    peak = np.maximum.accumulate(equity)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dd = np.where(peak > 0, (peak - equity) / peak, 0.0)
+    max_dd = max(float(dd[1:].max()), 0.0)
+
+    if total >= 2:
+        mean_pnl = net_pnl / total
+        variance = sequential_sum((pnl - mean_pnl) ** 2) / (total - 1)
+        std_pnl = math.sqrt(variance) if variance > 0 else 0.0
+        sharpe = (mean_pnl / std_pnl) * math.sqrt(252) if std_pnl > 0 else 0.0
+    else:
+        sharpe = 0.0
+
+    # Longest run of losing trades
+    is_loss = np.concatenate(([0], (pnl < 0).astype(np.int8), [0]))
+    edges = np.flatnonzero(np.diff(is_loss))
+    max_consec = int((edges[1::2] - edges[::2]).max()) if len(edges) else 0
+
+    avg_holding = sequential_sum(table.holding_minutes.astype(np.float64)) / total
+    wr = win_rate / 100
+    expectancy = (wr * avg_winner) - ((1 - wr) * abs(avg_loser))
+
+    return {
+        "total_trades": total,
+        "winners": len(win),
+        "losers": len(loss),
+        "win_rate": round(win_rate, 1),
+        "avg_winner": round(avg_winner, 2),
+        "avg_loser": round(avg_loser, 2),
+        "profit_factor": round(profit_factor, 2) if profit_factor != float("inf") else "inf",
+        "max_drawdown_pct": round(max_dd * 100, 1),
+        "net_pnl": round(net_pnl, 2),
+        "return_pct": round(return_pct, 1),
+        "sharpe_ratio": round(sharpe, 2),
+        "max_consecutive_losses": max_consec,
+        "avg_holding_minutes": round(avg_holding, 1),
+        "best_trade": round(float(pnl.max()), 2),
+        "worst_trade": round(float(pnl.min()), 2),
+        "expectancy": round(expectancy, 2),
+    }
@@ -0,0 +1,320 @@
+"""Multi-symbol portfolio backtest — deploy a set of scalp configs together.
+
+``nf-backtest-scan`` / ``nf-backtest-matrix`` rank every symbol on its own, as
+if each had unlimited capital. Deploying the recommended set means the
+symbols compete for one account: a shared capital/margin budget, a cap on
+concurrent positions, and a daily loss limit that stops new entries for the
+rest of the day. This module replays that; ``nf-backtest-matrix --portfolio``
+runs it over the matrix's deployment plan (``sweep.portfolio_replay``).
+
+Two phases, so the cost scales with trades, not with symbols × bars:
+
+1. **Signal streams.** Each symbol runs through ``run_scalp_equity_backtest``
+   with its own ``ScalpSessionConfig`` — independently, so symbols shard
+   across the backtest day pool. Each run's trades become a candidate stream.
+2. **Allocation.** Every stream's entries and exits are flattened into
+   columnar event arrays, interleaved on one clock (a stable argsort of entry
+   time) and walked once: an entry is taken only if a position slot, enough
+   free margin and the day's loss budget are all available. Exits that
+   happen at or before an entry free their slot and margin first.
+
+The combined equity curve, drawdown and per-day P&L are then NumPy
+reductions over the accepted trades' exit-ordered P&L.
+
+Approximation: a skipped entry doesn't change the symbol's later signals.
+Live, the session would have stayed flat and could have entered on a later
+flip the unconstrained stream took while still holding; the allocator can
+only choose among the trades the stream actually made.
+"""
+from __future__ import annotations
+
+import heapq
+from dataclasses import dataclass
+from datetime import date
+from typing import Callable
+
+import numpy as np
+
+from backtesting.candle_frame import CandleFrame, day_to_date, ist_day, timestamps_to_ns
+from backtesting.day_pool import map_days
+from backtesting.htf_trend import entry_gate_mask
+from backtesting.metrics import compute_metrics
+from backtesting.scalp_equity import run_scalp_equity_backtest
+from backtesting.simulator import Trade
+from monitor.scalp_models import ScalpSessionConfig
+
+
+@dataclass
+class PortfolioSymbol:
+    """One symbol in the portfolio: its candles and the config it would deploy with."""
+
+    symbol: str
+    candles: list[dict] | CandleFrame
+    config: ScalpSessionConfig
+    interval: str
+    warmup_bars: int = 0
+    # Optional HTF trend map for the sweep's "align" entry gate (kept as
+    # data, not a callable, so the symbol can be shipped to a worker).
+    trend_by_date: dict[date, str] | None = None
+
+
+@dataclass
+class PortfolioLimits:
+    """Account-level constraints shared by every symbol."""
+
+    capital: float
+    max_positions: int = 5
+    # Margin blocked per open position as % of entry notional (100 = cash;
+    # 20 ≈ 5x intraday leverage).
+    margin_pct: float = 100.0
+    # Stop NEW entries for the rest of the day once the day's realised net
+    # P&L is at or below -daily_loss_cap. None = no cap.
+    daily_loss_cap: float | None = None
+
+
+@dataclass
+class PortfolioBacktestResult:
+    """Result of a portfolio backtest run."""
+
+    symbols: list[str]
+    limits: dict
+    trades: list[Trade]                       # accepted, in exit order
+    metrics: dict                             # compute_metrics on the accepted trades
+    equity_curve: list[float]                 # capital, then after each exit
+    drawdown_pct: list[float]                 # per equity_curve point
+    daily: list[dict]                         # {date, net_pnl, equity, drawdown_pct}
+    per_symbol: dict[str, dict]               # {candidates, taken, net_pnl}
+    candidate_trades: int
+    max_positions_blocks: int = 0             # entries skipped: no free slot
+    margin_blocks: int = 0                    # entries skipped: not enough free margin
+    daily_loss_blocks: int = 0                # entries skipped: day's loss cap hit
+    peak_positions: int = 0
+    peak_margin_used: float = 0.0
+
+
+# ---------------------------------------------------------------------------
+# Phase 1 — per-symbol signal streams
+# ---------------------------------------------------------------------------
+
+def _symbol_stream(
+    symbol: str,
+    candles: list[dict] | CandleFrame,
+    config: ScalpSessionConfig,
+    interval: str,
+    warmup_bars: int,
+    trend_by_date: dict[date, str] | None,
+    slippage_bps: float,
+) -> list[Trade]:
+    """One symbol's unconstrained trades (net of costs). Module-level for the pool."""
+    candles = CandleFrame.from_candles(candles)
+    mask = entry_gate_mask(trend_by_date, candles) if trend_by_date is not None else None
+    result = run_scalp_equity_backtest(
+        candles, config, symbol=symbol, interval=interval,
+        slippage_bps=slippage_bps, warmup_bars=warmup_bars, entry_gate_mask=mask,
+    )
+    return result.trades
+
+
+@dataclass
+class _Events:
+    """Candidate trades as columns, sorted by entry time (ties: input order)."""
+
+    trades: list[Trade]
+    sym_idx: np.ndarray                       # int32 index into the symbol list
+    entry_ns: np.ndarray                      # int64 epoch ns
+    exit_ns: np.ndarray                       # int64 epoch ns
+    margin: np.ndarray                        # float64 margin blocked while open
+    pnl: np.ndarray                           # float64 net P&L booked at exit
+    exit_day: np.ndarray                      # int64 IST session day of the exit
+
+
+def _build_events(streams: list[list[Trade]], margin_pct: float) -> _Events:
+    trades = [t for stream in streams for t in stream]
+    sym_idx = np.repeat(np.arange(len(streams), dtype=np.int32), [len(s) for s in streams])
+    entry_ns = timestamps_to_ns(t.entry_time for t in trades)
+    exit_ns = timestamps_to_ns(t.exit_time for t in trades)
+    notional = np.fromiter((t.entry_price * t.quantity for t in trades), np.float64, len(trades))
+    pnl = np.fromiter((t.pnl for t in trades), np.float64, len(trades))
+
+    order = np.lexsort((sym_idx, entry_ns))
+    return _Events(
+        trades=[trades[i] for i in order],
+        sym_idx=sym_idx[order],
+        entry_ns=entry_ns[order],
+        exit_ns=exit_ns[order],
+        margin=notional[order] * (margin_pct / 100.0),
+        pnl=pnl[order],
+        exit_day=ist_day(exit_ns[order]),
+    )
+
+
+# ---------------------------------------------------------------------------
+# Phase 2 — allocation on the shared clock
+# ---------------------------------------------------------------------------
+
+def _allocate(events: _Events, limits: PortfolioLimits) -> tuple[np.ndarray, dict]:
+    """Walk entries in time order; return the accepted mask and block counters.
+
+    One pass over the candidate trades with a heap of open positions keyed by
+    exit time — O(trades · log positions), independent of the bar count.
+    """
+    n = len(events.trades)
+    accepted = np.zeros(n, dtype=bool)
+    entry_ns = events.entry_ns.tolist()
+    exit_ns = events.exit_ns.tolist()
+    margin = events.margin.tolist()
+    pnl = events.pnl.tolist()
+    exit_day = events.exit_day.tolist()
+    entry_day = ist_day(events.entry_ns).tolist()
+
+    open_heap: list[tuple[int, int]] = []     # (exit_ns, event index)
+    realised = 0.0
+    margin_used = 0.0
+    day_pnl: dict[int, float] = {}
+    cap = limits.daily_loss_cap
+    stats = {
+        "max_positions_blocks": 0, "margin_blocks": 0, "daily_loss_blocks": 0,
+        "peak_positions": 0, "peak_margin_used": 0.0,
+    }
+
+    for i in range(n):
+        # Book every exit at or before this entry: frees slot + margin.
+        while open_heap and open_heap[0][0] <= entry_ns[i]:
+            _, j = heapq.heappop(open_heap)
+            realised += pnl[j]
+            margin_used -= margin[j]
+            day_pnl[exit_day[j]] = day_pnl.get(exit_day[j], 0.0) + pnl[j]
+
+        if cap is not None and day_pnl.get(entry_day[i], 0.0) <= -cap:
+            stats["daily_loss_blocks"] += 1
+            continue
+        if len(open_heap) >= limits.max_positions:
+            stats["max_positions_blocks"] += 1
+            continue
+        if margin_used + margin[i] > limits.capital + realised + 1e-9:
+            stats["margin_blocks"] += 1
+            continue
+
+        accepted[i] = True
+        heapq.heappush(open_heap, (exit_ns[i], i))
+        margin_used += margin[i]
+        stats["peak_positions"] = max(stats["peak_positions"], len(open_heap))
+        stats["peak_margin_used"] = max(stats["peak_margin_used"], margin_used)
+
+    stats["peak_margin_used"] = round(stats["peak_margin_used"], 2)
+    return accepted, stats
+
+
+def _equity_and_drawdown(capital: float, pnl: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Equity after each P&L (leading ``capital``) and its % drawdown from peak."""
+    equity = capital + np.concatenate(([0.0], np.cumsum(pnl)))
+    peak = np.maximum.accumulate(equity)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dd = np.where(peak > 0, (peak - equity) / peak * 100.0, 0.0)
+    return equity, dd
+
+
+def _daily_rows(capital: float, exit_day: np.ndarray, pnl: np.ndarray) -> list[dict]:
+    """Per-IST-day net P&L, closing equity and drawdown (exit-ordered inputs)."""
+    if not len(pnl):
+        return []
+    days, starts = np.unique(exit_day, return_index=True)
+    day_pnl = np.add.reduceat(pnl, starts)
+    equity, dd = _equity_and_drawdown(capital, day_pnl)
+    return [
+        {
+            "date": day_to_date(d).isoformat(),
+            "net_pnl": round(float(p), 2),
+            "equity": round(float(e), 2),
+            "drawdown_pct": round(float(x), 2),
+        }
+        for d, p, e, x in zip(days, day_pnl, equity[1:], dd[1:])
+    ]
+
+
+# ---------------------------------------------------------------------------
+# Entry point
+# ---------------------------------------------------------------------------
+
+def run_portfolio_backtest(
+    symbols: list[PortfolioSymbol],
+    limits: PortfolioLimits,
+    *,
+    slippage_bps: float = 0.0,
+    workers: int | None = None,
+    progress_cb: Callable[[int, int], None] | None = None,
+    cancel_check: Callable[[], bool] | None = None,
+) -> PortfolioBacktestResult:
+    """Backtest ``symbols`` together under the shared ``limits``.
+
+    Args:
+        symbols: one ``PortfolioSymbol`` per symbol (candles + config).
+            Order breaks ties between entries on the same bar — earlier
+            symbols get the slot first, so pass them in priority order
+            (e.g. the ranking's order).
+        limits: shared capital / margin / position / daily-loss limits.
+        slippage_bps: applied to every fill, as in the single-symbol engine.
+        workers: day-pool size for the per-symbol runs (None = env default).
+        progress_cb / cancel_check: ``(symbols_done, symbols_total)`` and
+            ``() -> bool``, polled between symbol shards. A cancelled run
+            allocates over the symbols that finished.
+
+    Returns:
+        PortfolioBacktestResult with the accepted trades, combined equity /
+        drawdown / daily P&L and how many entries each limit blocked.
+    """
+    if limits.max_positions < 1:
+        raise ValueError("limits.max_positions must be >= 1")
+    if limits.capital <= 0:
+        raise ValueError("limits.capital must be > 0")
+
+    items = [
+        (s.symbol, s.candles, s.config, s.interval, s.warmup_bars, s.trend_by_date, slippage_bps)
+        for s in symbols
+    ]
+    streams = map_days(_symbol_stream, items, workers=workers,
+                       progress_cb=progress_cb, cancel_check=cancel_check)
+    names = [s.symbol for s in symbols[:len(streams)]]
+
+    events = _build_events(streams, limits.margin_pct)
+    accepted, stats = _allocate(events, limits)
+
+    # Accepted trades in exit order — the order P&L lands in the account.
+    idx = np.flatnonzero(accepted)
+    idx = idx[np.argsort(events.exit_ns[idx], kind="stable")]
+    pnl = events.pnl[idx]
+    equity, dd = _equity_and_drawdown(limits.capital, pnl)
+    trades = [events.trades[i] for i in idx]
+
+    n_syms = len(names)
+    candidates = np.bincount(events.sym_idx, minlength=n_syms)
+    taken = np.bincount(events.sym_idx[idx], minlength=n_syms)
+    sym_pnl = np.bincount(events.sym_idx[idx], weights=pnl, minlength=n_syms)
+    per_symbol = {
+        name: {"candidates": int(c), "taken": int(t), "net_pnl": round(float(p), 2)}
+        for name, c, t, p in zip(names, candidates, taken, sym_pnl)
+    }
+
+    if progress_cb is not None:
+        try:
+            progress_cb(len(symbols), len(symbols))
+        except Exception:
+            pass
+
+    return PortfolioBacktestResult(
+        symbols=names,
+        limits={
+            "capital": limits.capital,
+            "max_positions": limits.max_positions,
+            "margin_pct": limits.margin_pct,
+            "daily_loss_cap": limits.daily_loss_cap,
+        },
+        trades=trades,
+        metrics=compute_metrics(trades, limits.capital),
+        equity_curve=np.round(equity, 2).tolist(),
+        drawdown_pct=np.round(dd, 2).tolist(),
+        daily=_daily_rows(limits.capital, events.exit_day[idx], pnl),
+        per_symbol=per_symbol,
+        candidate_trades=len(events.trades),
+        **stats,
+    )
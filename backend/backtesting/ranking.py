@@ -31,8 +31,10 @@ Plus a grid-level ``plateau_flags`` that warns when a winner is a lone spike on
 parameter axis (its neighbours are net-negative) — a robust edge sits on a plateau,
 not a spike.
 
-PURE module: no I/O, no network, stdlib ``statistics``/``math`` only. Every
-function operates on per-trade NET P&L — which is exactly what ``Trade.pnl`` holds
+PURE module: no I/O, no network. Every trade-taking function accepts either a
+``list[Trade]`` (stdlib ``statistics``/``math``) or a ``TradeTable`` (NumPy
+reductions over its columns — what the sweep passes, one table per combo) and
+returns the same result for both. Every function operates on per-trade NET P&L — which is exactly what ``Trade.pnl`` holds
 on a ``ScalpBacktestResult.trades`` list (``_apply_costs`` mutates ``trade.pnl`` in
 place to subtract charges, and slippage is already baked into the fill prices). No
 gross/net reconstruction is needed here.
@@ -45,10 +47,14 @@ from __future__ import annotations
 import math
 import statistics
 from datetime import date, datetime
-from typing import Any, Iterable
+from typing import Any, Callable, Iterable
 
+import numpy as np
+
+from backtesting.candle_frame import day_to_date
 from backtesting.metrics import plausibility_warnings
 from backtesting.simulator import Trade
+from backtesting.trade_table import TradeTable, sequential_sum
 
 
 # ---------------------------------------------------------------------------
@@ -69,8 +75,10 @@ def _pf_to_float(pf: Any) -> float:
 # Small internals
 # ---------------------------------------------------------------------------
 
-def _pnls(trades: Iterable[Trade]) -> list[float]:
+def _pnls(trades: Iterable[Trade] | TradeTable) -> list[float] | np.ndarray:
     """Per-trade NET P&L series (Trade.pnl is already net of charges+slippage)."""
+    if isinstance(trades, TradeTable):
+        return trades.pnl
     return [float(t.pnl) for t in trades]
 
 
@@ -94,11 +102,30 @@ def _group_by_day(trades: Iterable[Trade]) -> dict[date, list[Trade]]:
     return out
 
 
+def _day_pnls(trades: Iterable[Trade] | TradeTable) -> tuple[list[date], list[float] | np.ndarray]:
+    """(entry dates, summed net P&L per date), in first-seen order."""
+    if isinstance(trades, TradeTable):
+        days, sums = trades.day_pnls()
+        return [day_to_date(d) for d in days.tolist()], sums
+    by_day = _group_by_day(trades)
+    return list(by_day), [sum(t.pnl for t in day_trades) for day_trades in by_day.values()]
+
+
+def _sum(pnls: list[float] | np.ndarray) -> float:
+    return sequential_sum(pnls) if isinstance(pnls, np.ndarray) else sum(pnls)
+
+
+def _mean(pnls: list[float] | np.ndarray) -> float:
+    if not len(pnls):
+        return 0.0
+    return float(np.mean(pnls)) if isinstance(pnls, np.ndarray) else statistics.fmean(pnls)
+
+
 # ---------------------------------------------------------------------------
 # Layer 2a — t-statistic
 # ---------------------------------------------------------------------------
 
-def tstat(pnls: list[float]) -> float:
+def tstat(pnls: list[float] | np.ndarray) -> float:
     """One-sample t-statistic of a per-trade P&L series against a zero mean.
 
     ``mean / std(ddof=1) × sqrt(n)`` — the standard signal-to-noise ratio for
@@ -112,6 +139,11 @@ def tstat(pnls: list[float]) -> float:
     n = len(pnls)
     if n < 2:
         return 0.0
+    if isinstance(pnls, np.ndarray):
+        std = float(np.std(pnls, ddof=1))
+        if std == 0:
+            return 0.0
+        return (float(np.mean(pnls)) / std) * math.sqrt(n)
     mean = statistics.fmean(pnls)
     std = statistics.stdev(pnls)  # ddof=1
     if std == 0:
@@ -123,7 +155,7 @@ def tstat(pnls: list[float]) -> float:
 # Layer 2b — day consistency
 # ---------------------------------------------------------------------------
 
-def day_consistency(trades: list[Trade]) -> dict:
+def day_consistency(trades: list[Trade] | TradeTable) -> dict:
     """Per-trading-day consistency of a combo's NET P&L.
 
     A combo that nets ₹X off one monster day and bleeds the rest is far more
@@ -135,15 +167,19 @@ def day_consistency(trades: list[Trade]) -> dict:
 
     Reported alongside tstat, never folded into it.
     """
-    if not trades:
+    if not len(trades):
         return {"profitable_day_fraction": 0.0, "median_day_pnl": 0.0, "n_days": 0}
-    by_day = _group_by_day(trades)
-    day_pnls = [sum(t.pnl for t in day_trades) for day_trades in by_day.values()]
+    _, day_pnls = _day_pnls(trades)
     n_days = len(day_pnls)
-    profitable_days = sum(1 for p in day_pnls if p > 0)
+    if isinstance(day_pnls, np.ndarray):
+        profitable_days = int(np.count_nonzero(day_pnls > 0))
+        median = float(np.median(day_pnls))
+    else:
+        profitable_days = sum(1 for p in day_pnls if p > 0)
+        median = statistics.median(day_pnls)
     return {
         "profitable_day_fraction": round(profitable_days / n_days, 4),
-        "median_day_pnl": round(statistics.median(day_pnls), 2),
+        "median_day_pnl": round(median, 2),
         "n_days": n_days,
     }
 
@@ -152,7 +188,7 @@ def day_consistency(trades: list[Trade]) -> dict:
 # Layer 2c — combined score (components kept separate, NOT collapsed)
 # ---------------------------------------------------------------------------
 
-def combo_score(trades: list[Trade]) -> dict:
+def combo_score(trades: list[Trade] | TradeTable) -> dict:
     """Score one combo. Primary sort key = ``tstat``; day-consistency reported
     alongside so the ranking is interpretable, not an opaque number.
 
@@ -165,7 +201,7 @@ def combo_score(trades: list[Trade]) -> dict:
     """
     pnls = _pnls(trades)
     dc = day_consistency(trades)
-    net = round(sum(pnls), 2)
+    net = round(_sum(pnls), 2)
     n = len(pnls)
     return {
         "tstat": round(tstat(pnls), 4),
@@ -183,7 +219,7 @@ def combo_score(trades: list[Trade]) -> dict:
 # ---------------------------------------------------------------------------
 
 def apply_gates(
-    trades: list[Trade],
+    trades: list[Trade] | TradeTable,
     metrics_net: dict,
     *,
     min_trades: int = 10,
@@ -226,9 +262,12 @@ def apply_gates(
 
     # Single-trade dominance: best winner vs total gross profit.
     pnls = _pnls(trades)
-    gross_profit = sum(p for p in pnls if p > 0)
-    if pnls:
-        best = max(pnls)
+    if isinstance(pnls, np.ndarray):
+        gross_profit = sequential_sum(pnls[pnls > 0])
+    else:
+        gross_profit = sum(p for p in pnls if p > 0)
+    if len(pnls):
+        best = float(np.max(pnls))
         if best > 0 and gross_profit > 0 and best > max_single_trade_share * gross_profit:
             share = best / gross_profit
             reasons.append(
@@ -239,8 +278,9 @@ def apply_gates(
 
     # Daily loss cap: a day the live force-squareoff would have truncated.
     if daily_loss_cap is not None:
-        for d, day_trades in _group_by_day(trades).items():
-            day_pnl = sum(t.pnl for t in day_trades)
+        days, day_pnls = _day_pnls(trades)
+        for d, day_pnl in zip(days, day_pnls):
+            day_pnl = float(day_pnl)
             if day_pnl < -abs(daily_loss_cap):
                 reasons.append(
                     f"daily loss cap breached on {d.isoformat()}: net "
@@ -252,13 +292,69 @@ def apply_gates(
     # Non-positive net.
     net_pnl = metrics_net.get("net_pnl")
     if net_pnl is None:
-        net_pnl = sum(pnls)
+        net_pnl = _sum(pnls)
     if net_pnl <= 0:
         reasons.append(f"net P&L ₹{net_pnl:,.2f} ≤ 0 — not profitable")
 
     return reasons
 
 
+# ---------------------------------------------------------------------------
+# Layer 1b — early abort (the gates, checked while the replay is running)
+# ---------------------------------------------------------------------------
+
+def early_abort_check(
+    *,
+    min_trades: int = 10,
+    max_trades_per_day: int | None = None,
+    daily_loss_cap: float | None = None,
+    tstat_floor: float | None = None,
+) -> Callable[[list[Trade], int], str | None]:
+    """Build the scalp engine's ``early_abort`` hook for one combo run.
+
+    The engine calls it at each session boundary with the trades closed so
+    far and the number of session days still to replay; a non-None return
+    (the reason) stops the replay there. It fires when the combo can no
+    longer pass the gates:
+
+    * ``min_trades`` — even ``max_trades_per_day`` trades on every remaining
+      day can't reach the floor (intraday: each session takes at most
+      ``max_trades`` round-trips). Skipped when there's no per-day cap.
+    * ``daily_loss_cap`` — a completed day already breached it; that gate
+      can't un-fail.
+
+    Both are exact: the full replay would have failed the same gate. The
+    opt-in ``tstat_floor`` is a heuristic bound on top — once ``min_trades``
+    trades have closed, a running t-stat below the floor stops the combo
+    (it may have recovered; the sweep gates it as aborted either way).
+    """
+    day_pnl: dict[date, float] = {}
+    seen = 0
+
+    def check(trades: list[Trade], days_left: int) -> str | None:
+        nonlocal seen
+        for t in trades[seen:]:
+            d = _trade_date(t)
+            day_pnl[d] = day_pnl.get(d, 0.0) + float(t.pnl)
+        seen = len(trades)
+        n = len(trades)
+
+        if daily_loss_cap is not None:
+            for d, pnl in day_pnl.items():
+                if pnl < -abs(daily_loss_cap):
+                    return f"daily loss cap breached on {d.isoformat()}"
+        if max_trades_per_day and n + days_left * max_trades_per_day < min_trades:
+            return (f"cannot reach {min_trades} trades ({n} so far, at most "
+                    f"{days_left * max_trades_per_day} in the {days_left} days left)")
+        if tstat_floor is not None and n >= max(min_trades, 2):
+            t = tstat([float(x.pnl) for x in trades])
+            if t < tstat_floor:
+                return f"running t-stat {t:.2f} < {tstat_floor:g} after {n} trades"
+        return None
+
+    return check
+
+
 # ---------------------------------------------------------------------------
 # Gate-reason categorization (for sweep-level summaries)
 # ---------------------------------------------------------------------------
@@ -273,6 +369,8 @@ _GATE_REASON_PREFIXES = [
     ("single-trade dominance", "single_trade_dominance"),
     ("daily loss cap breached", "daily_loss_cap"),
     ("net P&L", "net_pnl<=0"),
+    ("early abort:", "early_abort"),
+    ("halving:", "halving"),
 ]
 
 
@@ -280,7 +378,7 @@ def categorize_gate_reason(reason: str) -> str:
     """Collapse one ``apply_gates`` failure reason to its category key.
 
     Categories: ``min_trades``, ``plausibility``, ``single_trade_dominance``,
-    ``daily_loss_cap``, ``net_pnl<=0`` — with ``other`` as a forward-compat
+    ``daily_loss_cap``, ``net_pnl<=0``, ``early_abort``, ``halving`` — with ``other`` as a forward-compat
     fallback for reasons added later without a prefix entry here.
     """
     for prefix, category in _GATE_REASON_PREFIXES:
@@ -311,14 +409,17 @@ def gate_summary(reason_lists: Iterable[list[str]]) -> dict[str, int]:
 # ---------------------------------------------------------------------------
 
 def split_trades(
-    trades: list[Trade], split_date: date
-) -> tuple[list[Trade], list[Trade]]:
+    trades: list[Trade] | TradeTable, split_date: date
+) -> tuple[list[Trade], list[Trade]] | tuple[TradeTable, TradeTable]:
     """Partition trades by entry date into (train, validate).
 
     A trade opened *before* ``split_date`` goes to TRAIN; on or after → VALIDATE.
     Partitioning by date (not trade index) keeps whole trading days on one side,
-    so an in-day sequence is never split across the boundary.
+    so an in-day sequence is never split across the boundary. A table splits
+    into two tables.
     """
+    if isinstance(trades, TradeTable):
+        return trades.split(split_date)
     train: list[Trade] = []
     validate: list[Trade] = []
     for t in trades:
@@ -329,12 +430,14 @@ def split_trades(
     return train, validate
 
 
-def _side_stats(trades: list[Trade]) -> dict:
+def _side_stats(trades: list[Trade] | TradeTable) -> dict:
     """net_pnl, n_trades, tstat, expectancy_per_day for one slice."""
     pnls = _pnls(trades)
-    net = round(sum(pnls), 2)
-    by_day = _group_by_day(trades)
-    n_days = len(by_day)
+    net = round(_sum(pnls), 2)
+    if isinstance(trades, TradeTable):
+        n_days = len(np.unique(trades.entry_day))
+    else:
+        n_days = len(_group_by_day(trades))
     return {
         "net_pnl": net,
         "n_trades": len(pnls),
@@ -344,7 +447,9 @@ def _side_stats(trades: list[Trade]) -> dict:
     }
 
 
-def validate_combo(train_trades: list[Trade], validate_trades: list[Trade]) -> dict:
+def validate_combo(
+    train_trades: list[Trade] | TradeTable, validate_trades: list[Trade] | TradeTable,
+) -> dict:
     """Walk-forward confirmation. The combo was SELECTED on ``train_trades``;
     we confirm it holds out-of-sample on ``validate_trades``.
 
@@ -359,10 +464,8 @@ def validate_combo(train_trades: list[Trade], validate_trades: list[Trade]) -> d
     train = _side_stats(train_trades)
     validation = _side_stats(validate_trades)
 
-    train_pnls = _pnls(train_trades)
-    val_pnls = _pnls(validate_trades)
-    train_mean = statistics.fmean(train_pnls) if train_pnls else 0.0
-    val_mean = statistics.fmean(val_pnls) if val_pnls else 0.0
+    train_mean = _mean(_pnls(train_trades))
+    val_mean = _mean(_pnls(validate_trades))
 
     same_sign = (train_mean > 0 and val_mean > 0) or (train_mean < 0 and val_mean < 0)
     confirmed = bool(validation["net_pnl"] > 0 and same_sign)
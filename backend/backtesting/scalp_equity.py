@@ -25,11 +25,15 @@ Key differences from the live engine:
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from datetime import datetime, time as dtime, timedelta, timezone
-from typing import Any, Callable, Literal
+from datetime import datetime, time as dtime, timedelta
+from functools import lru_cache
+from typing import Callable, Literal
 
+from backtesting.candle_frame import CandleFrame
+from backtesting.htf_trend import EntryGateMask
 from backtesting.metrics import compute_metrics
 from backtesting.simulator import Trade, TradeSimulator
+from backtesting.trade_table import TradeTable
 from monitor.indicator_engine import compute_indicator
 from monitor.indicator_series import compute_indicator_series
 from monitor.scalp_models import ScalpSessionConfig, SessionMode
@@ -105,6 +109,11 @@ class ScalpBacktestResult:
     post_cutoff_blocks: int = 0              # intraday flips rejected for being at/after squareoff cutoff
     entry_side_blocks: int = 0               # flips rejected by entry_side (long/short-only) gate
     entry_gate_blocks: int = 0               # flips rejected by the caller's entry_gate hook
+    early_abort_reason: str | None = None    # why the early_abort hook stopped the replay
+    bars_saved: int = 0                      # in-window bars left unreplayed by that stop
+    # Columnar view of ``trades`` for the metric/ranking layers (None only
+    # on empty results).
+    trade_table: TradeTable | None = None
 
 
 @dataclass
@@ -131,46 +140,6 @@ class _PositionState:
         return self.side is None
 
 
-def _parse_candle_ts(ts: Any) -> datetime:
-    """Normalize a candle timestamp (str or datetime) to aware UTC datetime."""
-    if isinstance(ts, datetime):
-        return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
-    # Upstox returns "2026-04-15T09:15:00+05:30" — fromisoformat handles this.
-    return datetime.fromisoformat(ts)
-
-
-def _candles_to_frame(candles: list[dict]) -> list[dict]:
-    """Ensure candles are dicts compatible with compute_indicator (needs
-    timestamp/open/high/low/close/volume keys). Passes through if already OK."""
-    normalized: list[dict] = []
-    for c in candles:
-        if isinstance(c, dict):
-            normalized.append(c)
-            continue
-        # OHLCVData pydantic or bare tuple
-        if hasattr(c, "timestamp"):
-            normalized.append({
-                "timestamp": c.timestamp,
-                "open": c.open,
-                "high": c.high,
-                "low": c.low,
-                "close": c.close,
-                "volume": getattr(c, "volume", 0),
-            })
-        elif isinstance(c, (list, tuple)) and len(c) >= 6:
-            normalized.append({
-                "timestamp": c[0],
-                "open": float(c[1]),
-                "high": float(c[2]),
-                "low": float(c[3]),
-                "close": float(c[4]),
-                "volume": int(c[5]),
-            })
-        else:
-            raise ValueError(f"Unrecognised candle format: {type(c).__name__}")
-    return normalized
-
-
 def _bullish_direction_for_mode(mode: str) -> str | None:
     if mode == SessionMode.EQUITY_INTRADAY.value:
         return "long"
@@ -220,6 +189,13 @@ def _confirm_agrees_at(
     return True, val
 
 
+@lru_cache(maxsize=None)
+def _tod(seconds: int) -> dtime:
+    """Time of day for seconds since midnight (a session has few distinct values)."""
+    seconds %= 86_400
+    return dtime(seconds // 3600, seconds // 60 % 60, seconds % 60)
+
+
 def _parse_squareoff(ts_str: str) -> dtime:
     hour, minute = (int(p) for p in ts_str.split(":"))
     return dtime(hour=hour, minute=minute)
@@ -253,7 +229,7 @@ def _bar_close_ts(ts: datetime, offset: timedelta) -> datetime:
 
 
 def run_scalp_equity_backtest(
-    candles: list[dict],
+    candles: list[dict] | CandleFrame,
     config: ScalpSessionConfig,
     *,
     symbol: str,
@@ -263,12 +239,17 @@ def run_scalp_equity_backtest(
     cancel_check=None,
     warmup_bars: int = 0,
     entry_gate: Callable[[datetime, str], bool] | None = None,
+    early_abort: Callable[[list[Trade], int], str | None] | None = None,
+    entry_gate_mask: EntryGateMask | None = None,
 ) -> ScalpBacktestResult:
     """Run a scalp-style bar-replay backtest.
 
     Args:
-        candles: list of candle dicts/tuples with OHLCV + timestamp. Order
-            does not matter — will be sorted ascending by timestamp.
+        candles: list of candle dicts/tuples with OHLCV + timestamp, or a
+            ``CandleFrame``. Order does not matter — will be sorted ascending
+            by timestamp. Pass a frame when running many configs over the
+            same candles: timestamps are parsed and indicator series
+            computed once per frame instead of once per run.
         config: a ScalpSessionConfig. Only session_mode in
             ``equity_intraday`` or ``equity_swing`` is supported; options
             modes raise ValueError.
@@ -294,6 +275,19 @@ def run_scalp_equity_backtest(
             position state. Used by the backtest sweep's higher-timeframe
             trend gate. Default None = no behavior change. EXITS are
             never gated — only fresh entries.
+        entry_gate_mask: the same gate precomputed per bar
+            (``htf_trend.entry_gate_mask`` over these candles, warm-up
+            included) and read by bar index — no per-entry callback. Must
+            have one entry per candle. Applied in the entry_gate slot;
+            blocks count in ``entry_gate_blocks``.
+        early_abort: optional callback ``(closed_trades, days_left) -> str |
+            None`` consulted at each session boundary while flat, with the
+            net trades so far and the session days left to replay (the new
+            one included). A non-None reason stops the replay there: the
+            result holds the trades so far, ``early_abort_reason`` and
+            ``bars_saved``. The sweep builds it with
+            ``ranking.early_abort_check`` to drop combos that can no longer
+            pass its gates. Default None = replay every bar.
 
     Returns:
         ScalpBacktestResult with trades + gross/net metrics + diagnostics.
@@ -319,10 +313,13 @@ def run_scalp_equity_backtest(
         )
 
     # ── Normalise candle data ──────────────────────────────────────────
-    normalised = _candles_to_frame(candles)
-    normalised.sort(key=lambda c: _parse_candle_ts(c["timestamp"]))
-    if not normalised:
+    frame = CandleFrame.from_candles(candles)
+    if not frame:
         return _empty_result(symbol, config, interval)
+    if entry_gate_mask is not None and len(entry_gate_mask) != len(frame):
+        raise ValueError(
+            f"entry_gate_mask has {len(entry_gate_mask)} bars, candles have {len(frame)}"
+        )
 
     is_intraday = mode == SessionMode.EQUITY_INTRADAY.value
     squareoff_cutoff = _parse_squareoff(config.squareoff_time) if is_intraday else None
@@ -352,6 +349,8 @@ def run_scalp_equity_backtest(
     entry_side_blocks = 0
     entry_gate_blocks = 0
     slippage_total = 0.0
+    early_abort_reason: str | None = None
+    bars_saved = 0
 
     session_days: set = set()
 
@@ -365,12 +364,12 @@ def run_scalp_equity_backtest(
     # once not per-bar-twice. Parity with compute_indicator is enforced
     # by tests/monitor/test_indicator_series_parity.py.
     primary_series = compute_indicator_series(
-        config.primary_indicator, normalised, config.primary_params or {}
+        config.primary_indicator, frame, config.primary_params or {}
     )
     confirm_series: list[float | None] | None = None
     if config.confirm_indicator:
         confirm_series = compute_indicator_series(
-            config.confirm_indicator, normalised, config.confirm_params or {}
+            config.confirm_indicator, frame, config.confirm_params or {}
         )
 
     # Warm-up buffer: the indicator series above was computed over the full
@@ -379,18 +378,29 @@ def run_scalp_equity_backtest(
     # cover the requested window — but seed prev_primary from the last warm-up
     # bar so the first in-window flip is detected against a CONVERGED value, not
     # a cold start. (ATR-family indicators like UTBot need ~150 bars to settle.)
-    if warmup_bars > 0 and normalised:
-        warmup_bars = min(warmup_bars, len(normalised))
+    if warmup_bars > 0 and frame:
+        warmup_bars = min(warmup_bars, len(frame))
         if warmup_bars >= 1:
             prev_primary = primary_series[warmup_bars - 1]
-        normalised = normalised[warmup_bars:]
+        frame = frame[warmup_bars:]
         primary_series = primary_series[warmup_bars:]
+        if entry_gate_mask is not None:
+            entry_gate_mask = EntryGateMask(entry_gate_mask.long[warmup_bars:],
+                                            entry_gate_mask.short[warmup_bars:])
         if confirm_series is not None:
             confirm_series = confirm_series[warmup_bars:]
-        if not normalised:
+        if not frame:
             return _empty_result(symbol, config, interval)
 
+    # Per-bar columns, all derived once when the frame was built — no
+    # timestamp parsing inside the loop.
+    normalised = frame.records
+    bar_times = frame.datetimes
+    bar_dates = frame.session_dates
+    tod_seconds = frame.tod_seconds.tolist()
+    disp_seconds = int(disp_off.total_seconds())
     total_bars = len(normalised)
+    n_session_days = frame.n_days
     # Progress / cancel cadence. Once every ~200 bars is plenty: at 16k
     # bars/sec post-cache that's ~80 progress updates per second worst
     # case, well below SSE consumer's poll rate.
@@ -409,9 +419,9 @@ def run_scalp_equity_backtest(
             except Exception:
                 pass
 
-        ts = _parse_candle_ts(bar["timestamp"])
-        bar_date = ts.date()
-        bar_tod = ts.timetz().replace(tzinfo=None)
+        ts = bar_times[i]
+        bar_date = bar_dates[i]
+        bar_tod = _tod(tod_seconds[i])
         # Bar CLOSE time-of-day. Squareoff/entry-cutoff are evaluated against
         # the bar's close, not its open, with a strict `>` so the squareoff
         # fires on the first bar that would carry the position PAST the cutoff
@@ -419,7 +429,7 @@ def run_scalp_equity_backtest(
         # This matches the live session's `now >= cutoff` in bar space. On a
         # 15-min grid a 15:09 cutoff squares off on the 15:00–15:15 bar (out by
         # ~15:15) instead of the 15:15–15:30 bar (the old open-based 15:30).
-        bar_close_tod = (ts + disp_off).time() if disp_off else bar_tod
+        bar_close_tod = _tod(tod_seconds[i] + disp_seconds) if disp_off else bar_tod
         session_days.add(bar_date)
 
         # ── Session boundary (intraday only) ──────────────────────────
@@ -438,6 +448,16 @@ def run_scalp_equity_backtest(
                 squareoff_exits += 1
             trade_count = 0
             last_exit_time = None
+        # Early abort: only between sessions and only while flat, so the
+        # trades so far are exactly the ones a full replay starts with.
+        if (early_abort is not None and current_day is not None
+                and bar_date != current_day and pos.is_flat):
+            early_abort_reason = early_abort(
+                sim.trades, n_session_days - len(session_days) + 1,
+            )
+            if early_abort_reason:
+                bars_saved = total_bars - i
+                break
         current_day = bar_date
         # Track the last processed bar (updated here, before the guards' early
         # `continue`s, so the boundary close above always has the prior bar).
@@ -562,6 +582,10 @@ def run_scalp_equity_backtest(
                 entry_gate_blocks += 1
                 prev_primary = primary_val
                 continue
+            if entry_gate_mask is not None and not entry_gate_mask.allows(i, direction):
+                entry_gate_blocks += 1
+                prev_primary = primary_val
+                continue
 
             # Open at this bar's close with slippage. Slippage is paid by the
             # taker: long entry pays slippage upward, short entry pays downward.
@@ -593,7 +617,7 @@ def run_scalp_equity_backtest(
     # of bars before squareoff cutoff).
     if not pos.is_flat:
         last_bar = normalised[-1]
-        last_ts = _parse_candle_ts(last_bar["timestamp"])
+        last_ts = bar_times[-1]
         trade = _close(sim, pos, last_bar["close"], _bar_close_ts(last_ts, disp_off),
                        "end_of_data", slip_frac, is_intraday)
         if trade:
@@ -610,7 +634,8 @@ def run_scalp_equity_backtest(
 
     notional = config.quantity * (trades[0].entry_price if trades else 0) or 1
     metrics_gross = compute_metrics(gross_trades, initial_capital=notional)
-    metrics_net = compute_metrics(trades, initial_capital=notional)
+    trade_table = TradeTable.from_trades(trades)
+    metrics_net = compute_metrics(trade_table, initial_capital=notional)
 
     return ScalpBacktestResult(
         symbol=symbol,
@@ -634,6 +659,9 @@ def run_scalp_equity_backtest(
         post_cutoff_blocks=post_cutoff_blocks,
         entry_side_blocks=entry_side_blocks,
         entry_gate_blocks=entry_gate_blocks,
+        early_abort_reason=early_abort_reason,
+        bars_saved=bars_saved,
+        trade_table=trade_table,
     )
 
 
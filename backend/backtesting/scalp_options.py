@@ -38,14 +38,14 @@ from dataclasses import dataclass, field
 from datetime import datetime, time as dtime, timezone
 from typing import Any
 
+from backtesting.candle_frame import CandleFrame
 from backtesting.metrics import compute_metrics
 from backtesting.scalp_equity import (
     _INTERVAL_TO_TIMEFRAME,
-    _candles_to_frame,
     _confirm_agrees_at,
     _interval_offset,
-    _parse_candle_ts,
     _parse_squareoff,
+    _tod,
 )
 from backtesting.simulator import Trade
 from monitor.indicator_series import compute_indicator_series
@@ -203,7 +203,7 @@ class _OptionPositionState:
 # ──────────────────────────────────────────────────────────────────────
 
 def plan_atm_legs(
-    underlying_candles: list[dict],
+    underlying_candles: list[dict] | CandleFrame,
     config: ScalpSessionConfig,
     interval: str,
     warmup_bars: int = 0,
@@ -238,18 +238,19 @@ def plan_atm_legs(
             f"interval {interval!r} (expected {expected_tf!r})."
         )
 
-    normalised = _candles_to_frame(underlying_candles)
-    normalised.sort(key=lambda c: _parse_candle_ts(c["timestamp"]))
-    if not normalised:
+    frame = CandleFrame.from_candles(underlying_candles)
+    if not frame:
         return []
+    normalised = frame.records
+    bar_dates = frame.session_dates
 
     primary_series = compute_indicator_series(
-        config.primary_indicator, normalised, config.primary_params or {}
+        config.primary_indicator, frame, config.primary_params or {}
     )
     confirm_series: list[float | None] | None = None
     if config.confirm_indicator:
         confirm_series = compute_indicator_series(
-            config.confirm_indicator, normalised, config.confirm_params or {}
+            config.confirm_indicator, frame, config.confirm_params or {}
         )
 
     plans: list[LegFetchPlan] = []
@@ -294,8 +295,7 @@ def plan_atm_legs(
 
         # Resolve ATM at this bar's underlying close (same anchor live uses).
         underlying_price = float(bar["close"])
-        ts = _parse_candle_ts(bar["timestamp"])
-        day = ts.date().isoformat()
+        day = bar_dates[i].isoformat()
 
         if rolling is not None:
             # Rolling front-weekly: resolve against the contract front-of-book
@@ -363,8 +363,8 @@ def plan_atm_legs(
 # ──────────────────────────────────────────────────────────────────────
 
 def run_scalp_options_backtest(
-    underlying_candles: list[dict],
-    leg_candles_by_key: dict[str, list[dict]],
+    underlying_candles: list[dict] | CandleFrame,
+    leg_candles_by_key: dict[str, list[dict] | CandleFrame],
     config: ScalpSessionConfig,
     *,
     interval: str,
@@ -377,9 +377,10 @@ def run_scalp_options_backtest(
     """Bar-replay the options scalp state machine.
 
     Args:
-        underlying_candles: OHLCV candles for the underlying index/symbol.
-            Order is not required — sorted ascending internally.
-        leg_candles_by_key: pre-fetched OHLCV by ``instrument_key``. The
+        underlying_candles: OHLCV candles (or a ``CandleFrame``) for the
+            underlying index/symbol. Order is not required — sorted
+            ascending internally.
+        leg_candles_by_key: pre-fetched OHLCV (or frames) by ``instrument_key``. The
             planner (``plan_atm_legs``) tells the API which legs to fetch.
             Missing legs cause ``missing_leg_blocks`` to increment instead
             of raising.
@@ -407,9 +408,8 @@ def run_scalp_options_backtest(
             f"interval {interval!r} (expected {expected_tf!r})."
         )
 
-    normalised = _candles_to_frame(underlying_candles)
-    normalised.sort(key=lambda c: _parse_candle_ts(c["timestamp"]))
-    if not normalised:
+    frame = CandleFrame.from_candles(underlying_candles)
+    if not frame:
         return _empty_result(config, interval)
 
     # Lot-aware sizing — option legs trade in multiples of lot_size. Pass the
@@ -426,16 +426,13 @@ def run_scalp_options_backtest(
         lot_size = get_lot_size(config.underlying)
     quantity = int(config.lots) * lot_size
 
-    # Build per-leg timestamp index for O(1) lookup. The replay aligns
-    # underlying and option bars by timestamp; mismatches drop to
-    # missing_leg_blocks rather than fail loudly.
-    leg_ts_index: dict[str, dict[datetime, dict]] = {}
+    # Build per-leg timestamp index for O(1) lookup, keyed by epoch ns. The
+    # replay aligns underlying and option bars by timestamp; mismatches drop
+    # to missing_leg_blocks rather than fail loudly.
+    leg_ts_index: dict[str, dict[int, dict]] = {}
     for ik, candles in leg_candles_by_key.items():
-        idx: dict[datetime, dict] = {}
-        for c in _candles_to_frame(candles):
-            t = _parse_candle_ts(c["timestamp"])
-            idx[t] = c
-        leg_ts_index[ik] = idx
+        leg = CandleFrame.from_candles(candles)
+        leg_ts_index[ik] = dict(zip(leg.ts_ns.tolist(), leg.records))
 
     squareoff_cutoff = _parse_squareoff(config.squareoff_time)
     # Bar duration — used to evaluate the squareoff/entry cutoff against each
@@ -447,12 +444,12 @@ def run_scalp_options_backtest(
     # Precompute primary + confirm series on the underlying. Same trick as
     # scalp_equity: O(n) once instead of O(n²) per-bar.
     primary_series = compute_indicator_series(
-        config.primary_indicator, normalised, config.primary_params or {}
+        config.primary_indicator, frame, config.primary_params or {}
     )
     confirm_series: list[float | None] | None = None
     if config.confirm_indicator:
         confirm_series = compute_indicator_series(
-            config.confirm_indicator, normalised, config.confirm_params or {}
+            config.confirm_indicator, frame, config.confirm_params or {}
         )
 
     # Cache of (date, type) → strike list for ATM resolution at flip. Keys
@@ -469,6 +466,7 @@ def run_scalp_options_backtest(
     trade_count = 0
     last_exit_time: datetime | None = None
     prev_ts: datetime | None = None                # last processed bar ts (prior-day squareoff)
+    prev_key: int | None = None                    # ...and its epoch ns (leg lookup)
 
     intra_bar_ambiguity = 0
     primary_flips = 0
@@ -491,17 +489,25 @@ def run_scalp_options_backtest(
     # detected against a converged value. Only the UNDERLYING is sliced — leg
     # candles are keyed by timestamp and only consumed when a position is held
     # (entries are in-window), so leg_ts_index is unaffected.
-    if warmup_bars > 0 and normalised:
-        warmup_bars = min(warmup_bars, len(normalised))
+    if warmup_bars > 0 and frame:
+        warmup_bars = min(warmup_bars, len(frame))
         if warmup_bars >= 1:
             prev_primary = primary_series[warmup_bars - 1]
-        normalised = normalised[warmup_bars:]
+        frame = frame[warmup_bars:]
         primary_series = primary_series[warmup_bars:]
         if confirm_series is not None:
             confirm_series = confirm_series[warmup_bars:]
-        if not normalised:
+        if not frame:
             return _empty_result(config, interval)
 
+    # Per-bar columns from the frame — no timestamp parsing in the loop.
+    normalised = frame.records
+    bar_times = frame.datetimes
+    bar_keys = frame.ts_ns.tolist()
+    bar_dates = frame.session_dates
+    tod_seconds = frame.tod_seconds.tolist()
+    disp_seconds = int(disp_off.total_seconds())
+
     slip_frac = slippage_bps / 10_000.0
     total_bars = len(normalised)
     _PROGRESS_BATCH = 200
@@ -519,8 +525,9 @@ def run_scalp_options_backtest(
             except Exception:
                 pass
 
-        ts = _parse_candle_ts(bar["timestamp"])
-        bar_date = ts.date()
+        ts = bar_times[i]
+        ts_key = bar_keys[i]
+        bar_date = bar_dates[i]
         session_days.add(bar_date)
 
         # Day boundary — squareoff any open leg. With the past-cutoff entry
@@ -530,8 +537,8 @@ def run_scalp_options_backtest(
         # Reset trade_count + cooldown anchor.
         if current_day is not None and bar_date != current_day and not pos.is_flat:
             prior_opt_bar = (
-                leg_ts_index.get(pos.instrument_key, {}).get(prev_ts)
-                if prev_ts is not None else None
+                leg_ts_index.get(pos.instrument_key, {}).get(prev_key)
+                if prev_key is not None else None
             )
             exit_price = prior_opt_bar["close"] if prior_opt_bar else pos.entry_price
             tr = _close_options(
@@ -550,11 +557,11 @@ def run_scalp_options_backtest(
 
         # Time-based squareoff guard within the day. Mirrors scalp_session
         # check_time_squareoff but driven by bar timestamps.
-        bar_tod = ts.timetz().replace(tzinfo=None)
-        bar_close_tod = (ts + disp_off).time() if disp_off else bar_tod
-        prev_ts = ts  # track for the prior-day boundary close (before continues)
+        bar_tod = _tod(tod_seconds[i])
+        bar_close_tod = _tod(tod_seconds[i] + disp_seconds) if disp_off else bar_tod
+        prev_ts, prev_key = ts, ts_key  # prior-day boundary close (before continues)
         if not pos.is_flat and bar_close_tod > squareoff_cutoff:
-            opt_bar = leg_ts_index.get(pos.instrument_key, {}).get(ts)
+            opt_bar = leg_ts_index.get(pos.instrument_key, {}).get(ts_key)
             # Exit at this bar's close — the premium at the cutoff boundary.
             exit_price = opt_bar["close"] if opt_bar else pos.entry_price
             tr = _close_options(
@@ -581,7 +588,7 @@ def run_scalp_options_backtest(
 
         # Premium-side checks (SL / target / trail) on the held leg's bar.
         if not pos.is_flat:
-            opt_bar = leg_ts_index.get(pos.instrument_key, {}).get(ts)
+            opt_bar = leg_ts_index.get(pos.instrument_key, {}).get(ts_key)
             if opt_bar is not None:
                 exit_info = _check_premium_exits(pos, opt_bar, config)
                 if exit_info:
@@ -605,7 +612,7 @@ def run_scalp_options_backtest(
                 bullish_state = pos.option_type == "CE"
                 bearish_state = pos.option_type == "PE"
                 if (bullish_state and bearish_flip) or (bearish_state and bullish_flip):
-                    rev_opt_bar = leg_ts_index.get(pos.instrument_key, {}).get(ts)
+                    rev_opt_bar = leg_ts_index.get(pos.instrument_key, {}).get(ts_key)
                     rev_exit_price = (
                         rev_opt_bar["close"] if rev_opt_bar else pos.entry_price
                     )
@@ -727,9 +734,9 @@ def run_scalp_options_backtest(
                 missing_leg_blocks += 1
                 prev_primary = primary_val
                 continue
-            next_ts = _parse_candle_ts(normalised[i + 1]["timestamp"])
+            next_ts = bar_times[i + 1]
             # Guard: don't carry an entry across day boundary.
-            if next_ts.date() != bar_date:
+            if bar_dates[i + 1] != bar_date:
                 missing_leg_blocks += 1
                 prev_primary = primary_val
                 continue
@@ -740,15 +747,12 @@ def run_scalp_options_backtest(
             # session forbids. Block when the fill bar is the one live at the
             # cutoff (or later) — evaluated against its close, consistent with
             # the held-leg squareoff above.
-            fill_close_tod = (
-                (next_ts + disp_off).time() if disp_off
-                else next_ts.timetz().replace(tzinfo=None)
-            )
+            fill_close_tod = _tod(tod_seconds[i + 1] + disp_seconds)
             if fill_close_tod > squareoff_cutoff:
                 post_cutoff_blocks += 1
                 prev_primary = primary_val
                 continue
-            fill_bar = leg_ts_index.get(instrument_key, {}).get(next_ts)
+            fill_bar = leg_ts_index.get(instrument_key, {}).get(bar_keys[i + 1])
             if fill_bar is None:
                 missing_leg_blocks += 1
                 prev_primary = primary_val
@@ -784,9 +788,8 @@ def run_scalp_options_backtest(
 
     # Close any still-open leg on the last bar for accounting completeness.
     if not pos.is_flat:
-        last_bar = normalised[-1]
-        last_ts = _parse_candle_ts(last_bar["timestamp"])
-        opt_bar = leg_ts_index.get(pos.instrument_key, {}).get(last_ts)
+        last_ts = bar_times[-1]
+        opt_bar = leg_ts_index.get(pos.instrument_key, {}).get(bar_keys[-1])
         exit_price = opt_bar["close"] if opt_bar else pos.entry_price
         tr = _close_options(pos, exit_price, last_ts, "end_of_data", slip_frac)
         if tr:
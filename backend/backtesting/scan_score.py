@@ -0,0 +1,231 @@
+"""Scan-score backtest — nf-morning-scan's score at several times of day, replayed.
+
+For each symbol, each complete trading day and each eval time T the score is
+rebuilt from the bars that had CLOSED strictly before T (gap, relative
+strength vs Nifty, RSI, session VWAP, RVOL-T, volume expansion) and paired
+with the forward return over the next ``horizon_min`` minutes, net of Nifty's
+return over the same window. ``scripts/scan_score_backtest.py`` drives it over
+a universe and reports the per-time information coefficients.
+
+The old driver rebuilt pandas frames from candle lists for every (day, T) —
+RSI over the whole history, a groupby for the RVOL-T profile — and scanned
+the index bars linearly per lookup. ``score_symbol`` scores every (day, T)
+of a symbol in one pass instead:
+
+- Bars closed before T are ``searchsorted`` row ranges of the symbol's
+  ``CandleFrame``; the index lookups are the same searches on
+  ``IndexSeries``, built once per run and shared by every symbol.
+- RSI(14) is computed once over the full close series (ta's Wilder EWM is
+  causal, so its value at bar i is what ``compute_rsi`` gives for bars ≤ i).
+- VWAP is a per-day running sum on a (day × bar-of-day) grid; RVOL-T and
+  volume expansion read prefix sums over a (day × time-of-day) cumulative
+  volume profile, so "the average over prior days" is one subtraction.
+- Scores come from ``services.scan_engine``'s vectorized ``phase1_scores`` /
+  ``phase2_scores`` (pinned to the CLI's scalar functions by its tests).
+
+Inputs and skip rules match the scalar scan functions row for row
+(tests/backtesting/test_scan_score.py).
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import time as dtime
+
+import numpy as np
+import pandas as pd
+import ta as ta_lib
+
+from backtesting.candle_frame import (
+    IST_OFFSET_NS, NS_PER_DAY, NS_PER_SECOND, CandleFrame, day_to_date,
+)
+from services.scan_engine import RSI_WINDOW, phase1_scores, phase2_scores
+
+EVAL_TIMES = (dtime(9, 30), dtime(11, 30), dtime(13, 30), dtime(14, 30))
+
+# First-30-minute momentum (Gao et al 2018) is known once the 09:30 bar closes
+FIRST30_END = dtime(9, 45)
+
+# Days with fewer 15-min bars than this are partial sessions — not evaluated
+MIN_DAY_BARS = 6
+
+RECORD_COLUMNS = [
+    "symbol", "date", "eval_time", "score", "p1", "p2", "gap_abs", "rel_strength",
+    "rsi", "above_vwap", "rvol", "first30", "alpha_fwd", "raw_fwd",
+]
+
+
+def _tod_ns(t: dtime) -> int:
+    return (t.hour * 3600 + t.minute * 60 + t.second) * NS_PER_SECOND
+
+
+def _nonzero(x: np.ndarray) -> np.ndarray:
+    """Python truthiness of a float array (NaN stands in for None)."""
+    return ~np.isnan(x) & (x != 0)
+
+
+@dataclass
+class IndexSeries:
+    """Index closes for closed-bar lookups: bars plus each session's previous close."""
+
+    ts_ns: np.ndarray           # int64 epoch ns, ascending
+    close: np.ndarray
+    session_day: np.ndarray     # int32 IST day per bar
+    days: np.ndarray            # int32 IST day per session, ascending
+    prev_close: np.ndarray      # prior session's last close (NaN for the first)
+
+    @classmethod
+    def from_frame(cls, frame: CandleFrame) -> "IndexSeries":
+        starts = frame.day_offsets[:-1]
+        prev_close = np.full(len(starts), np.nan)
+        prev_close[1:] = frame.close[starts[1:] - 1]
+        return cls(frame.ts_ns, frame.close, frame.session_day,
+                   frame.session_day[starts], prev_close)
+
+    def close_before(self, session_day: np.ndarray, when_ns: np.ndarray) -> np.ndarray:
+        """Last close of ``session_day`` that closed strictly before ``when_ns`` (else NaN)."""
+        if not len(self.ts_ns):
+            return np.full(len(when_ns), np.nan)
+        j = np.searchsorted(self.ts_ns, when_ns, side="left") - 1
+        jc = np.maximum(j, 0)
+        return np.where((j >= 0) & (self.session_day[jc] == session_day), self.close[jc], np.nan)
+
+    def prev_close_for(self, session_day: np.ndarray) -> np.ndarray:
+        """The previous session's close for each ``session_day`` (NaN when unknown)."""
+        if not len(self.days):
+            return np.full(len(session_day), np.nan)
+        kc = np.minimum(np.searchsorted(self.days, session_day), len(self.days) - 1)
+        return np.where(self.days[kc] == session_day, self.prev_close[kc], np.nan)
+
+
+def _day_grid(frame: CandleFrame, values: np.ndarray) -> np.ndarray:
+    """(day × bar-of-day) running sums of ``values``, zero-padded per day.
+
+    Each day accumulates from its own first bar, in bar order — the same
+    additions a per-day pandas ``cumsum`` makes.
+    """
+    counts = np.diff(frame.day_offsets)
+    grid = np.zeros((frame.n_days, int(counts.max())))
+    day_of_bar = np.repeat(np.arange(frame.n_days), counts)
+    pos = np.arange(len(frame)) - frame.day_offsets[day_of_bar]
+    grid[day_of_bar, pos] = values
+    return np.cumsum(grid, axis=1)
+
+
+def score_symbol(
+    symbol: str,
+    frame: CandleFrame,
+    index: IndexSeries,
+    horizon_min: int,
+    test_days: int,
+    eval_times: tuple[dtime, ...] = EVAL_TIMES,
+) -> pd.DataFrame:
+    """One row per evaluated (day, eval time), in day then eval-time order.
+
+    The last ``test_days`` days are evaluated (every day after the first
+    when ``test_days`` covers the whole window — the earlier days are RSI /
+    volume-baseline warm-up).
+    """
+    n_days = frame.n_days
+    offs = frame.day_offsets
+    first = n_days - test_days if 0 < test_days < n_days else 1
+    days = np.arange(max(first, 1), n_days)
+    days = days[np.diff(offs)[days] >= MIN_DAY_BARS]
+    if not len(days):
+        return pd.DataFrame(columns=RECORD_COLUMNS)
+
+    n_eval = len(eval_times)
+    day_no = frame.session_day[offs[days]].astype(np.int64)
+    midnight = day_no * NS_PER_DAY - IST_OFFSET_NS          # IST midnight, epoch ns
+    d = np.repeat(days, n_eval)
+    sess = np.repeat(day_no, n_eval)
+    eval_ns = np.repeat(midnight, n_eval) + np.tile([_tod_ns(t) for t in eval_times], len(days))
+    start, stop = offs[d], offs[d + 1]
+
+    # Bars closed strictly before T: today's are [start, end), history is [0, end)
+    end = np.searchsorted(frame.ts_ns, eval_ns, side="left")
+    last = np.maximum(end - 1, 0)
+    close, open_ = frame.close, frame.open
+    ltp = close[last]
+    prev_close = close[start - 1]
+    today_open = open_[start]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        stock_pct = (ltp - prev_close) / prev_close * 100
+        keep = (end > start) & (prev_close > 0) & (stock_pct != 0)
+
+        # Phase 1 — compute_gap / compute_relative_strength vs the index
+        idx_prev = index.prev_close_for(sess)
+        idx_now = index.close_before(sess, eval_ns)
+        nifty_pct = np.where(_nonzero(idx_prev) & _nonzero(idx_now),
+                             (idx_now - idx_prev) / idx_prev * 100, 0.0)
+        gap = np.where(_nonzero(today_open), np.round((today_open - prev_close) / prev_close * 100, 2), 0.0)
+        rel = np.round(stock_pct - nifty_pct, 2)
+        p1 = phase1_scores(gap, rel, stock_pct)
+
+        # RSI(14) over all bars up to T (compute_rsi: None below 15 candles)
+        rsi_series = ta_lib.momentum.RSIIndicator(pd.Series(close), window=RSI_WINDOW).rsi().to_numpy()
+        rsi = np.where(end >= RSI_WINDOW + 1, np.round(rsi_series[last], 1), np.nan)
+
+        # Session VWAP over today's closed bars
+        k = end - start - 1
+        kc = np.maximum(k, 0)
+        typical = (frame.high + frame.low + close) / 3
+        day_vol = _day_grid(frame, frame.volume)[d, kc]
+        day_tpv = _day_grid(frame, typical * frame.volume)[d, kc]
+        vwap = np.where(day_vol > 0, np.round(day_tpv / day_vol, 2), np.nan)
+
+        # RVOL-T: today's volume vs the prior days' average cumulative volume
+        # up to the same time of day (days with none are left out).
+        tods, slot = np.unique(frame.tod_seconds, return_inverse=True)
+        profile = np.zeros((n_days, len(tods)))
+        np.add.at(profile, (np.repeat(np.arange(n_days), np.diff(offs)), slot), frame.volume)
+        profile = np.cumsum(profile, axis=1)
+        traded = profile > 0
+        prior_sum = np.vstack([np.zeros(len(tods)), np.cumsum(np.where(traded, profile, 0.0), axis=0)])
+        prior_n = np.vstack([np.zeros(len(tods)), np.cumsum(traded, axis=0)])
+        s = slot[last]
+        avg_tod = prior_sum[d, s] / prior_n[d, s]
+        rvol = np.where((prior_n[d, s] > 0) & (avg_tod != 0), np.round(day_vol / avg_tod, 2), np.nan)
+
+        # Volume expansion: today's volume vs the prior days' average total
+        prior_total = np.concatenate(([0.0], np.cumsum(profile[:, -1])))
+        avg_day = prior_total[d] / d
+        volx = np.where(avg_day > 0, np.round(day_vol / avg_day, 2), np.nan)
+
+        p2 = phase2_scores(rsi, vwap, ltp, rvol, volx)
+
+        # Forward return: last bar of the day closed before T + horizon
+        fwd_ns = eval_ns + horizon_min * 60 * NS_PER_SECOND
+        fwd_row = np.minimum(np.searchsorted(frame.ts_ns, fwd_ns, side="left"), stop) - 1
+        raw_fwd = (close[fwd_row] - ltp) / ltp * 100
+        idx_fwd = index.close_before(sess, fwd_ns)
+        nifty_fwd = np.where(_nonzero(idx_now) & _nonzero(idx_fwd),
+                             (idx_fwd - idx_now) / idx_now * 100, 0.0)
+
+        # First-30-minute return, null before it is known (no lookahead)
+        f30_ns = np.repeat(midnight + _tod_ns(FIRST30_END), n_eval)
+        f30_end = np.searchsorted(frame.ts_ns, f30_ns, side="left")
+        f30_ok = (f30_end > start) & _nonzero(today_open) & (eval_ns >= f30_ns)
+        first30 = np.where(f30_ok, (close[np.maximum(f30_end - 1, 0)] - today_open) / today_open * 100,
+                           np.nan)
+
+    vol = np.where(np.isnan(rvol), volx, rvol)
+    dates = np.array([day_to_date(x).isoformat() for x in day_no])
+    labels = np.array([t.strftime("%H:%M") for t in eval_times])
+    out = pd.DataFrame({
+        "symbol": symbol,
+        "date": np.repeat(dates, n_eval),
+        "eval_time": np.tile(labels, len(days)),
+        "score": p1 + p2,
+        "p1": p1,
+        "p2": p2,
+        "gap_abs": np.abs(gap),
+        "rel_strength": np.abs(rel),
+        "rsi": rsi,
+        "above_vwap": (_nonzero(vwap) & (ltp > vwap)).astype(int),
+        "rvol": np.where(vol == 0, np.nan, vol),
+        "first30": first30,
+        "alpha_fwd": raw_fwd - nifty_fwd,     # market-neutralized forward return (the target)
+        "raw_fwd": raw_fwd,
+    })
+    return out[keep].reset_index(drop=True)
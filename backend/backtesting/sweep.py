@@ -15,6 +15,13 @@ Warm-up handling, candle fetch, quantity sizing, and the on-disk cache mirror
 ``nf-backtest-scan`` (and, transitively, ``api/backtest.py``). Keep
 ``_WARMUP_TARGET_BARS`` / ``_TF_BARS_PER_DAY`` in sync with those if they change.
 
+Results stream: ``stream_sweep`` yields each combo row as it completes across
+all symbols (the CLI's ``--ndjson``), and ``sweep_symbol`` is the collected
+per-symbol form. With ``early_abort`` a combo stops replaying as soon as it can
+no longer pass the hard gates. ``search="halving"`` swaps the exhaustive grid
+for successive halving over the train days, so much larger grids fit the same
+CPU budget; rows keep the same shape either way.
+
 KEY INVARIANT: one engine run per combo over the FULL candle window. Train/validate
 is a *partition of the resulting trades* by entry date (``ranking.split_trades``),
 NOT two separate engine runs — so the validation slice sees the exact same fills
@@ -29,15 +36,19 @@ import os
 import sys
 import time
 from datetime import date, datetime, timedelta, timezone
-from typing import Any, Callable
+from typing import Any, AsyncIterator, Callable
 
-from backtesting.htf_trend import compute_daily_trend, make_entry_gate
+from backtesting.candle_frame import CandleFrame
+from backtesting import htf_store
+from backtesting.htf_trend import EntryGateMask, entry_gate_mask
 from backtesting.metrics import plausibility_warnings
+from backtesting.portfolio import PortfolioLimits, PortfolioSymbol, run_portfolio_backtest
 from backtesting.ranking import (
     _pf_to_float,
     apply_gates,
     combo_score,
     confidence_label,
+    early_abort_check,
     gate_summary,
     plateau_flags,
     split_trades,
@@ -45,6 +56,7 @@ from backtesting.ranking import (
 )
 from backtesting.scalp_equity import run_scalp_equity_backtest
 from backtesting.simulator import Trade
+from backtesting.trade_table import TradeTable
 from monitor.scalp_models import ScalpSessionConfig
 
 # ---------------------------------------------------------------------------
@@ -106,6 +118,9 @@ async def fetch_candles_with_warmup(client, symbol: str, interval: str, days: in
                                      end_offset_days: int = 0):
     """Return (candles, warmup_bars). Mirrors nf-backtest-scan / api.backtest.
 
+    ``candles`` is a ``CandleFrame``: timestamps are parsed here, once, and
+    every combo run over this fetch reuses them (and its indicator series).
+
     ``end_offset_days`` shifts the whole window back in time: the window becomes
     [now - offset - days, now - offset]. This is what makes a true replication
     test possible — rerun a winning grid on the *prior* N days, a window the
@@ -123,23 +138,12 @@ async def fetch_candles_with_warmup(client, symbol: str, interval: str, days: in
     window_end = datetime.now(IST) - timedelta(days=end_offset_days)
     cutoff = window_end - timedelta(days=days)
 
-    def _ts(c):
-        t = c.timestamp
-        return datetime.fromisoformat(t) if isinstance(t, str) else t
-
+    candles = CandleFrame.from_candles(ohlcv)
     if end_offset_days:
-        ohlcv = [c for c in ohlcv if _ts(c) < window_end]
-        if not ohlcv:
+        candles = candles[:candles.searchsorted(window_end)]
+        if not candles:
             return [], 0
-    warmup_bars = sum(1 for c in ohlcv if _ts(c) < cutoff)
-    candles = [
-        {
-            "timestamp": c.timestamp, "open": c.open, "high": c.high,
-            "low": c.low, "close": c.close, "volume": c.volume,
-        }
-        for c in ohlcv
-    ]
-    return candles, warmup_bars
+    return candles, candles.searchsorted(cutoff)
 
 
 # ---------------------------------------------------------------------------
@@ -203,23 +207,16 @@ def expand_grid(
 # Walk-forward split date from the candle window
 # ---------------------------------------------------------------------------
 
-def _in_window_dates(candles: list[dict], warmup_bars: int) -> list[date]:
+def _in_window_dates(candles: list[dict] | CandleFrame, warmup_bars: int) -> list[date]:
     """Distinct trading dates present AFTER the warm-up prefix, sorted ascending.
 
     These are the dates trades can actually fire on (warm-up bars are compute-only),
     so the train/validate split must be computed from them — not the raw fetch.
     """
-    tail = candles[warmup_bars:] if warmup_bars else candles
-
-    def _d(c):
-        t = c["timestamp"]
-        dt = datetime.fromisoformat(t) if isinstance(t, str) else t
-        return dt.date()
-
-    return sorted({_d(c) for c in tail})
+    return CandleFrame.from_candles(candles)[warmup_bars:].day_dates
 
 
-def compute_split_date(candles: list[dict], warmup_bars: int) -> date | None:
+def compute_split_date(candles: list[dict] | CandleFrame, warmup_bars: int) -> date | None:
     """The walk-forward split date: start of the last ~1/3 of in-window trading
     days. Trades on dates < this → train; on/after → validate.
 
@@ -237,8 +234,47 @@ def compute_split_date(candles: list[dict], warmup_bars: int) -> date | None:
 # Single combo run (CPU-bound; callers wrap in asyncio.to_thread)
 # ---------------------------------------------------------------------------
 
+def combo_config(
+    symbol: str,
+    combo: dict,
+    *,
+    quantity: int,
+    squareoff: str = "15:15",
+    max_trades: int = 3,
+    cooldown: int = 60,
+) -> ScalpSessionConfig:
+    """The equity-intraday ``ScalpSessionConfig`` a combo (or a result row) runs with."""
+    return ScalpSessionConfig(
+        name=f"matrix-{symbol}-{combo['primary']}",
+        session_mode="equity_intraday",
+        underlying=symbol,
+        indicator_timeframe=_INTERVAL_TO_TIMEFRAME[combo["interval"]],
+        primary_indicator=combo["primary"],
+        primary_params=None,
+        confirm_indicator=combo.get("confirm"),
+        confirm_params=None,
+        sl_points=combo.get("sl_points"),
+        target_points=combo.get("target_points"),
+        trail_percent=combo.get("trail_percent"),
+        squareoff_time=squareoff,
+        max_trades=max_trades,
+        cooldown_seconds=cooldown,
+        entry_side=combo["entry_side"],
+        quantity=quantity,
+    )
+
+
+def _quantity_for(candles: list[dict] | CandleFrame, quantity: int | None,
+                  capital_per_trade: float) -> int:
+    """Fixed ``quantity``, or sized from capital / the last close."""
+    if quantity is not None:
+        return quantity
+    last_close = candles[-1]["close"]
+    return max(1, int(capital_per_trade / last_close) if last_close else 1)
+
+
 def run_combo(
-    candles: list[dict],
+    candles: list[dict] | CandleFrame,
     warmup_bars: int,
     symbol: str,
     combo: dict,
@@ -252,15 +288,27 @@ def run_combo(
     max_single_trade_share: float = 0.5,
     daily_loss_cap: float | None = None,
     entry_gate: Callable[[datetime, str], bool] | None = None,
+    entry_gate_mask: EntryGateMask | None = None,
+    early_abort: bool = False,
+    abort_tstat_floor: float | None = None,
 ) -> dict:
     """Run ONE combo through the scalp engine over the full window, then evaluate
     it with the ranking layers. ONE engine run; train/validate is a partition of
     its trades, not a second run.
 
-    ``entry_gate`` is the materialized callable for the combo's ``htf_gate``
-    variant (built once per symbol by ``sweep_symbol``); the engine consults it
-    on every would-be entry, and the row reports ``entry_gate_blocks`` so the
-    output shows how many entries the regime gate vetoed.
+    ``entry_gate_mask`` is the combo's ``htf_gate`` variant precomputed on
+    ``candles``' bar grid (built once per symbol and interval by
+    ``stream_symbol``); the engine reads it by bar index on every would-be
+    entry, and the row reports ``entry_gate_blocks`` so the output shows how
+    many entries the regime gate vetoed. ``entry_gate`` is the equivalent
+    per-entry callable (``htf_trend.make_entry_gate``).
+
+    ``early_abort=True`` stops the replay at the first session boundary where
+    the combo can no longer pass the min-trades / daily-loss-cap gates
+    (``ranking.early_abort_check``); ``abort_tstat_floor`` (implies it) also
+    stops it once its running t-stat falls below the floor. An aborted combo
+    is gated with an ``early abort:`` reason, and the row reports
+    ``bars_saved`` — the in-window bars the stop skipped.
 
     Returns a row dict carrying: the combo spec, raw net metrics, the gate result
     (``gated`` bool + ``gate_reasons``), the in-sample ``score``, and the
@@ -270,31 +318,23 @@ def run_combo(
     the honest figure.
     """
     interval = combo["interval"]
-    tf = _INTERVAL_TO_TIMEFRAME[interval]
-    cfg = ScalpSessionConfig(
-        name=f"matrix-{symbol}-{combo['primary']}",
-        session_mode="equity_intraday",
-        underlying=symbol,
-        indicator_timeframe=tf,
-        primary_indicator=combo["primary"],
-        primary_params=None,
-        confirm_indicator=combo.get("confirm"),
-        confirm_params=None,
-        sl_points=combo.get("sl_points"),
-        target_points=combo.get("target_points"),
-        trail_percent=combo.get("trail_percent"),
-        squareoff_time=squareoff,
-        max_trades=max_trades,
-        cooldown_seconds=cooldown,
-        entry_side=combo["entry_side"],
-        quantity=quantity,
-    )
+    cfg = combo_config(symbol, combo, quantity=quantity, squareoff=squareoff,
+                       max_trades=max_trades, cooldown=cooldown)
+    abort_hook = None
+    if early_abort or abort_tstat_floor is not None:
+        abort_hook = early_abort_check(
+            min_trades=min_trades, max_trades_per_day=max_trades,
+            daily_loss_cap=daily_loss_cap, tstat_floor=abort_tstat_floor,
+        )
     result = run_scalp_equity_backtest(
         candles, cfg, symbol=symbol, interval=interval,
         slippage_bps=slippage_bps, warmup_bars=warmup_bars,
-        entry_gate=entry_gate,
+        entry_gate=entry_gate, entry_gate_mask=entry_gate_mask, early_abort=abort_hook,
     )
-    trades = result.trades
+    # The columnar table — every layer below runs vectorized over it.
+    trades = result.trade_table
+    if trades is None:
+        trades = TradeTable.from_trades(result.trades)
     mn = result.metrics_net
 
     # ── Layer 1: hard gates ────────────────────────────────────────────
@@ -304,6 +344,8 @@ def run_combo(
         max_single_trade_share=max_single_trade_share,
         daily_loss_cap=daily_loss_cap,
     )
+    if result.early_abort_reason:
+        gate_reasons.append(f"early abort: {result.early_abort_reason}")
     gated = bool(gate_reasons)
 
     # ── Layer 2: in-sample score (components kept separate) ────────────
@@ -339,6 +381,8 @@ def run_combo(
         "total_pnl": round(mn.get("net_pnl", 0.0), 2),
         "total_trades": mn.get("total_trades", 0),
         "entry_gate_blocks": result.entry_gate_blocks,
+        "bars_replayed": result.candle_count - result.bars_saved,
+        "bars_saved": result.bars_saved,
         "split_date": split_date.isoformat() if split_date else None,
         # evaluation layers
         "gated": gated,
@@ -428,11 +472,120 @@ def _cache_write(symbol: str, combo: dict, fp: str, row: dict):
         pass  # caching is best-effort; never fail the sweep over it
 
 
+# ---------------------------------------------------------------------------
+# Successive halving (``search="halving"``)
+# ---------------------------------------------------------------------------
+
+SEARCH_MODES = ("grid", "halving")
+
+
+def halving_schedule(train_days: int, *, eta: int = 3, min_days: int = 3) -> list[int]:
+    """Rung windows, in leading TRAIN days, raced before the full-window run.
+
+    ``min_days, min_days·eta, min_days·eta², …`` while shorter than the train
+    slice; each rung keeps the best ``1/eta`` of its combos. Rungs only ever
+    see train days, so the held-out validation slice stays out-of-sample for
+    the survivors' walk-forward check. Empty when the train slice is no
+    longer than ``min_days`` (plain grid).
+    """
+    eta = max(2, int(eta))
+    rungs: list[int] = []
+    n_days = max(1, int(min_days))
+    while n_days < train_days:
+        rungs.append(n_days)
+        n_days *= eta
+    return rungs
+
+
+def halving_cost(n_combos: int, window_days: int, *, eta: int = 3, min_days: int = 3) -> float:
+    """Estimated engine cost of a halving search, in full-window combo runs.
+
+    Rungs are charged by their share of the window; the survivors of the
+    last rung pay a full run each. The full runs of the survivors' plateau
+    neighbours (at most two per swept exit axis each) are not counted. A
+    plain grid costs ``n_combos``.
+    """
+    eta = max(2, int(eta))
+    train_days = window_days - max(1, round(window_days * _VALIDATION_DAY_FRACTION))
+    cost, alive = 0.0, n_combos
+    for n_days in halving_schedule(train_days, eta=eta, min_days=min_days):
+        cost += alive * n_days / window_days
+        alive = max(1, -(-alive // eta))
+    return cost + alive
+
+
+def _train_day_count(candles: list[dict] | CandleFrame, warmup_bars: int) -> int:
+    """In-window trading days before the walk-forward split date."""
+    split = compute_split_date(candles, warmup_bars)
+    if split is None:
+        return 0
+    return sum(1 for d in _in_window_dates(candles, warmup_bars) if d < split)
+
+
+def _leading_days(candles: list[dict] | CandleFrame, warmup_bars: int, n_days: int) -> CandleFrame:
+    """The warm-up prefix plus the first ``n_days`` in-window trading days."""
+    frame = CandleFrame.from_candles(candles)
+    window = frame[warmup_bars:]
+    if n_days >= window.n_days:
+        return frame
+    return frame[:warmup_bars + int(window.day_offsets[n_days])]
+
+
+def _halved_row(row: dict, rung: int, n_days: int) -> dict:
+    """Mark a rung row as eliminated: gated, never confirmed.
+
+    Its metrics cover only the rung's leading ``n_days`` train days, so it
+    carries no walk-forward block and ``net_pnl`` is the rung's net.
+    """
+    tstat_ = row["score"]["tstat"]
+    return {
+        **row,
+        "split_date": None,
+        "walk_forward": {"confirmed": False, "train": None, "validation": None},
+        "confidence": "low",
+        "validation_per_day": 0.0,
+        "net_pnl": row["total_pnl"],
+        "gated": True,
+        # The rung's own gate results say nothing about the full window
+        "gate_reasons": [
+            f"halving: eliminated at rung {rung + 1} (t={tstat_} over the first {n_days} days)"
+        ],
+        "confirmed": False,
+        "halving": {"rung": rung + 1, "days": n_days, "tstat": tstat_},
+    }
+
+
+def _combo_key(combo: dict) -> tuple:
+    return tuple(sorted(combo.items()))
+
+
+def _plateau_neighbours(combos: list[dict], centres: list[dict]) -> set[tuple]:
+    """Keys of the ``combos`` next to a centre on one ``PLATEAU_AXES`` axis.
+
+    A neighbour equals a centre on every other key and holds the adjacent
+    value present on that axis. Halving runs these alongside its survivors
+    so ``plateau_flags`` compares full-window rows, as it does for a grid.
+    """
+    centre_keys = {_combo_key(c) for c in centres}
+    out: set[tuple] = set()
+    for axis in PLATEAU_AXES:
+        lines: dict[tuple, list[dict]] = {}
+        for combo in combos:
+            rest = tuple(sorted((k, v) for k, v in combo.items() if k != axis))
+            lines.setdefault(rest, []).append(combo)
+        for line in lines.values():
+            line.sort(key=lambda c: (1, 0.0) if c.get(axis) is None else (0, float(c[axis])))
+            for i, combo in enumerate(line):
+                if _combo_key(combo) in centre_keys:
+                    out.update(_combo_key(n) for n in line[max(0, i - 1):i + 2])
+    return out - centre_keys
+
+
 # ---------------------------------------------------------------------------
 # Per-symbol orchestration
 # ---------------------------------------------------------------------------
 
-async def sweep_symbol(
+async def stream_symbol(
     client,
     symbol: str,
     combos: list[dict],
@@ -453,16 +606,37 @@ async def sweep_symbol(
     scan_date: str,
     end_offset_days: int = 0,
     verbose: bool = False,
-) -> dict | None:
-    """Run every combo for one symbol. Candles are fetched ONCE per (symbol,
-    interval) and reused across all combos on that interval.
-
-    Returns ``{"symbol": ..., "rows": [...]}`` or None if no candles fetched.
+    early_abort: bool = False,
+    abort_tstat_floor: float | None = None,
+    search: str = "grid",
+    halving_eta: int = 3,
+    halving_min_days: int = 3,
+) -> AsyncIterator[dict]:
+    """Run every combo for one symbol, yielding each row as it completes.
+
+    Candles are fetched ONCE per (symbol, interval) and reused across all
+    combos on that interval. Yields ``{"type": "row", "symbol", "row"}`` per
+    finished combo (cache hits included), then one closing
+    ``{"type": "symbol_done", "symbol", "rows", "fetched"}`` — ``fetched`` is
+    False when no interval returned candles.
+
+    ``search="halving"`` runs successive halving (``halving_schedule``)
+    instead of a full-window run per combo: only the last rung's survivors
+    get ``run_combo`` over the whole window, together with their plateau-axis
+    neighbours (``_plateau_neighbours``) so the spike check still has
+    full-window rows either side; the rest yield gated rows with a
+    ``halving:`` reason. Combos with a cached full-window row skip the
+    rungs. ``halving_eta`` must be at least 2. Every combo still yields
+    exactly one row.
     """
+    if search not in SEARCH_MODES:
+        raise ValueError(f"unknown search mode {search!r} (expected one of {SEARCH_MODES})")
+    if search == "halving" and halving_eta < 2:
+        raise ValueError(f"halving_eta must be at least 2, got {halving_eta}")
     async with sem:
         # Group combos by interval so we fetch each interval's candles once.
         intervals = sorted({c["interval"] for c in combos})
-        candle_cache: dict[str, tuple[list[dict], int]] = {}
+        candle_cache: dict[str, tuple[CandleFrame, int]] = {}
         for interval in intervals:
             try:
                 candles, warmup = await fetch_candles_with_warmup(
@@ -479,37 +653,39 @@ async def sweep_symbol(
         if not candle_cache:
             if verbose:
                 print(f"  [{symbol}] no candles for any interval", file=sys.stderr)
-            return None
-
-        # HTF trend gates: when any combo asks for one, fetch DAILY candles
-        # ONCE per symbol and build each needed variant's per-date trend map.
-        # The fetch reaches past the (possibly offset-shifted) window start by
+            yield {"type": "symbol_done", "symbol": symbol, "rows": 0, "fetched": False}
+            return
+
+        # HTF trend gates: when any combo asks for one, read each needed
+        # variant's per-date trend map from the daily-trend store (which hits
+        # the broker at most once a day per symbol) and lay it onto every
+        # interval's bar grid ONCE — combos then read the mask by bar index.
+        # The closes reach past the (possibly offset-shifted) window start by
         # _HTF_DAILY_EXTRA_DAYS so EMA50 is converged at the window's first
-        # trade; fetching up to *now* is fine even with end_offset_days — the
+        # trade; closes up to *now* are fine even with end_offset_days — the
         # map is keyed by date and each date only ever sees PRIOR days'
         # closes, so later candles can't leak into the shifted window.
         needed_variants = sorted(
             {c.get("htf_gate") for c in combos if c.get("htf_gate")}
         )
-        entry_gates: dict[str, Callable] = {}
+        gate_masks: dict[tuple[str, str], EntryGateMask] = {}
         if needed_variants:
             try:
-                daily = await client.get_historical_data(
-                    symbol, interval="day",
-                    days=days + end_offset_days + _HTF_DAILY_EXTRA_DAYS,
+                trends = await htf_store.daily_trends(
+                    client, symbol, needed_variants,
+                    fetch_days=days + end_offset_days + _HTF_DAILY_EXTRA_DAYS,
                 )
             except Exception as e:
-                daily = None
+                trends = {}
                 if verbose:
                     print(f"  [{symbol}] daily fetch for HTF gate failed: {e}",
                           file=sys.stderr)
-            if daily:
-                for variant in needed_variants:
-                    entry_gates[variant] = make_entry_gate(
-                        compute_daily_trend(daily, variant)
-                    )
+            for variant, trend in trends.items():
+                for interval, (candles, _) in candle_cache.items():
+                    gate_masks[(interval, variant)] = entry_gate_mask(trend, candles)
 
-        rows: list[dict] = []
+        # Resolve each combo's candles, sizing and cache fingerprint up front.
+        jobs: list[tuple[dict, CandleFrame, int, dict, str]] = []
         for combo in combos:
             cc = candle_cache.get(combo["interval"])
             if cc is None:
@@ -520,18 +696,14 @@ async def sweep_symbol(
             # not silently run ungated — an unlabelled ungated row would be
             # indistinguishable from the gated one it claims to be.
             hg = combo.get("htf_gate")
-            if hg and hg not in entry_gates:
+            if hg and (combo["interval"], hg) not in gate_masks:
                 if verbose:
                     print(f"  [{symbol}/{combo['primary']}] skipped: HTF gate "
                           f"'{hg}' unavailable (daily fetch failed)",
                           file=sys.stderr)
                 continue
 
-            # Quantity: fixed, or sized from capital / last close.
-            last_close = candles[-1]["close"]
-            qty = quantity if quantity is not None else max(
-                1, int(capital_per_trade / last_close) if last_close else 1
-            )
+            qty = _quantity_for(candles, quantity, capital_per_trade)
             sizing = {
                 "quantity": qty, "squareoff": squareoff, "max_trades": max_trades,
                 "cooldown": cooldown, "slippage_bps": slippage_bps, "days": days,
@@ -540,39 +712,150 @@ async def sweep_symbol(
                 "max_single_trade_share": max_single_trade_share,
                 "daily_loss_cap": daily_loss_cap,
             }
-            fp = _combo_fingerprint(combo, sizing, scan_date)
-
-            if use_cache:
-                cached = _cache_read(symbol, combo, fp, cache_ttl_hours)
-                if cached is not None:
-                    rows.append(cached)
-                    continue
+            if early_abort or abort_tstat_floor is not None:
+                # Aborted rows differ from full ones; plain runs keep their keys.
+                sizing["early_abort"] = {"tstat_floor": abort_tstat_floor}
+            jobs.append((combo, candles, warmup, sizing, _combo_fingerprint(combo, sizing, scan_date)))
 
+        async def _run(combo, candles, warmup, sizing, *, full: bool = True) -> dict | None:
+            hg = combo.get("htf_gate")
+            mask = gate_masks[(combo["interval"], hg)].prefix(len(candles)) if hg else None
             try:
-                row = await asyncio.to_thread(
+                return await asyncio.to_thread(
                     run_combo, candles, warmup, symbol, combo,
-                    quantity=qty, squareoff=squareoff, max_trades=max_trades,
+                    quantity=sizing["quantity"], squareoff=squareoff, max_trades=max_trades,
                     cooldown=cooldown, slippage_bps=slippage_bps,
                     min_trades=min_trades,
                     max_single_trade_share=max_single_trade_share,
                     daily_loss_cap=daily_loss_cap,
-                    entry_gate=entry_gates.get(hg) if hg else None,
+                    entry_gate_mask=mask,
+                    early_abort=early_abort and full,
+                    abort_tstat_floor=abort_tstat_floor if full else None,
                 )
             except Exception as e:
                 if verbose:
                     print(f"  [{symbol}/{combo['primary']}/{combo.get('confirm')}] "
                           f"backtest failed: {e}", file=sys.stderr)
-                continue
+                return None
+
+        n_rows = 0
 
+        # Full-window cache hits are served before any racing: a cached combo
+        # already has its real row, so it neither spends rung runs nor takes
+        # a survivor slot from the combos that still need one.
+        if use_cache:
+            uncached = []
+            for job in jobs:
+                combo, _, _, _, fp = job
+                cached = _cache_read(symbol, combo, fp, cache_ttl_hours)
+                if cached is None:
+                    uncached.append(job)
+                    continue
+                n_rows += 1
+                yield {"type": "row", "symbol": symbol, "row": cached}
+            jobs = uncached
+
+        # Successive halving: race every combo on short leading windows of
+        # the TRAIN days, keep the best 1/eta per rung, and give only the
+        # survivors (and their plateau-axis neighbours) the full-window run
+        # below. The other losers get a gated row carrying their rung result.
+        if search == "halving":
+            raced_jobs = jobs
+            losers = []
+            train_days = min(_train_day_count(c, w) for c, w in candle_cache.values())
+            for rung, n_days in enumerate(halving_schedule(
+                    train_days, eta=halving_eta, min_days=halving_min_days)):
+                rung_frames = {
+                    iv: _leading_days(c, w, n_days) for iv, (c, w) in candle_cache.items()
+                }
+                raced = []
+                for job in jobs:
+                    combo, _, warmup, sizing, _ = job
+                    row = await _run(combo, rung_frames[combo["interval"]], warmup,
+                                     sizing, full=False)
+                    if row is not None:
+                        raced.append((job, row))
+                keep = max(1, -(-len(raced) // halving_eta))
+                raced.sort(key=lambda jr: (jr[1]["score"]["tstat"], jr[1]["net_pnl"]),
+                           reverse=True)
+                losers.extend((job, row, rung, n_days) for job, row in raced[keep:])
+                jobs = [job for job, _ in raced[:keep]]
+
+            neighbours = _plateau_neighbours([j[0] for j in raced_jobs], [j[0] for j in jobs])
+            for job, row, rung, n_days in losers:
+                if _combo_key(job[0]) in neighbours:
+                    jobs.append(job)
+                    continue
+                n_rows += 1
+                yield {"type": "row", "symbol": symbol, "row": _halved_row(row, rung, n_days)}
+
+        for combo, candles, warmup, sizing, fp in jobs:
+            row = await _run(combo, candles, warmup, sizing)
+            if row is None:
+                continue
             if use_cache:
                 _cache_write(symbol, combo, fp, row)
-            rows.append(row)
+            n_rows += 1
+            yield {"type": "row", "symbol": symbol, "row": row}
 
         if verbose:
             # stderr, never stdout — stdout must stay clean for --json output.
-            print(f"  [{symbol}] {len(rows)}/{len(combos)} combos done",
+            print(f"  [{symbol}] {n_rows}/{len(combos)} combos done",
                   file=sys.stderr)
-        return {"symbol": symbol, "rows": rows}
+        yield {"type": "symbol_done", "symbol": symbol, "rows": n_rows, "fetched": True}
+
+
+async def sweep_symbol(client, symbol: str, combos: list[dict], **kwargs) -> dict | None:
+    """Run every combo for one symbol (``stream_symbol``, collected).
+
+    Returns ``{"symbol": ..., "rows": [...]}`` or None if no candles fetched.
+    """
+    rows: list[dict] = []
+    async for event in stream_symbol(client, symbol, combos, **kwargs):
+        if event["type"] == "row":
+            rows.append(event["row"])
+        elif not event["fetched"]:
+            return None
+    return {"symbol": symbol, "rows": rows}
+
+
+async def stream_sweep(
+    client, symbols: list[str], combos: list[dict], **kwargs,
+) -> AsyncIterator[dict]:
+    """Sweep several symbols concurrently, yielding events as they happen.
+
+    Merges every symbol's ``stream_symbol`` events in completion order (the
+    ``sem`` in ``kwargs`` bounds how many symbols run at once), so a consumer
+    sees each combo row as soon as it's done instead of after the slowest
+    symbol. A symbol whose sweep raises closes with a ``symbol_done`` event
+    carrying ``error`` and ``fetched=False`` — any rows it already streamed
+    are an incomplete grid and must not be ranked. Stopping iteration early
+    cancels the remaining work.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def _pump(symbol: str) -> None:
+        n_rows = 0
+        try:
+            async for event in stream_symbol(client, symbol, combos, **kwargs):
+                n_rows += event["type"] == "row"
+                await queue.put(event)
+        except Exception as e:
+            await queue.put({"type": "symbol_done", "symbol": symbol, "rows": n_rows,
+                             "fetched": False, "error": str(e)})
+
+    tasks = [asyncio.create_task(_pump(sym)) for sym in symbols]
+    try:
+        pending = len(tasks)
+        while pending:
+            event = await queue.get()
+            if event["type"] == "symbol_done":
+                pending -= 1
+            yield event
+    finally:
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
 
 
 # ---------------------------------------------------------------------------
@@ -608,6 +891,8 @@ def assemble_symbol(
 
     # Plateau check runs across ALL surviving rows (so neighbours exist on each
     # axis even if some neighbours weren't confirmed). Annotates in place.
+    # Rows eliminated by successive halving are gated and stay out: their net
+    # covers only a rung's few train days, not comparable to a full window.
     plateau_flags(survived, PLATEAU_AXES)
 
     confirmed.sort(key=lambda r: r["validation_per_day"], reverse=True)
@@ -629,3 +914,116 @@ def assemble_symbol(
         block["gated_combos"] = gated_rows
         block["failed_validation_combos"] = failed_val_rows
     return block
+
+
+# ---------------------------------------------------------------------------
+# Portfolio replay of the deployment plan
+# ---------------------------------------------------------------------------
+
+async def portfolio_replay(
+    client,
+    plan: list[dict],
+    limits: PortfolioLimits,
+    *,
+    days: int,
+    quantity: int | None,
+    capital_per_trade: float,
+    squareoff: str,
+    max_trades: int,
+    cooldown: int,
+    slippage_bps: float,
+    end_offset_days: int = 0,
+    verbose: bool = False,
+) -> dict:
+    """Replay the deployment plan's combos together as ONE account.
+
+    Each plan row (the best confirmed combo of a symbol) becomes a
+    ``PortfolioSymbol``: candles fetched and sized as ``stream_symbol`` does,
+    and an ``htf_gate`` row gets its trend map from the daily-trend store.
+    Plan order is the allocator's tie-break priority. A symbol whose candles
+    or gate can't be rebuilt is listed under ``skipped``, never replayed
+    ungated. ``run_portfolio_backtest`` then allocates the symbols' trades
+    under the shared ``limits``.
+
+    Returns a JSON-ready block. The replay covers the whole window — the
+    train days the combos were selected on included — so unlike the plan's
+    validation ₹/day it is not an out-of-sample figure.
+    """
+    members: list[PortfolioSymbol] = []
+    skipped: list[str] = []
+    for row in plan:
+        symbol, interval = row["symbol"], row["interval"]
+        try:
+            candles, warmup = await fetch_candles_with_warmup(
+                client, symbol, interval, days, end_offset_days=end_offset_days,
+            )
+        except Exception as e:
+            candles, warmup = None, 0
+            if verbose:
+                print(f"  [{symbol}/{interval}] portfolio fetch failed: {e}", file=sys.stderr)
+        if not candles:
+            skipped.append(symbol)
+            continue
+
+        trend = None
+        hg = row.get("htf_gate")
+        if hg:
+            try:
+                trends = await htf_store.daily_trends(
+                    client, symbol, [hg],
+                    fetch_days=days + end_offset_days + _HTF_DAILY_EXTRA_DAYS,
+                )
+            except Exception as e:
+                trends = {}
+                if verbose:
+                    print(f"  [{symbol}] daily fetch for HTF gate failed: {e}", file=sys.stderr)
+            trend = trends.get(hg)
+            if trend is None:
+                skipped.append(symbol)
+                continue
+
+        cfg = combo_config(
+            symbol, row, quantity=_quantity_for(candles, quantity, capital_per_trade),
+            squareoff=squareoff, max_trades=max_trades, cooldown=cooldown,
+        )
+        members.append(PortfolioSymbol(
+            symbol=symbol, candles=candles, config=cfg, interval=interval,
+            warmup_bars=warmup, trend_by_date=trend,
+        ))
+
+    block: dict[str, Any] = {
+        "symbols": [m.symbol for m in members],
+        "skipped": skipped,
+        "limits": {
+            "capital": limits.capital,
+            "max_positions": limits.max_positions,
+            "margin_pct": limits.margin_pct,
+            "daily_loss_cap": limits.daily_loss_cap,
+        },
+    }
+    if not members:
+        return block
+
+    result = await asyncio.to_thread(
+        run_portfolio_backtest, members, limits, slippage_bps=slippage_bps,
+    )
+    m = result.metrics
+    block.update({
+        "candidate_trades": result.candidate_trades,
+        "trades_taken": len(result.trades),
+        "blocked": {
+            "max_positions": result.max_positions_blocks,
+            "margin": result.margin_blocks,
+            "daily_loss": result.daily_loss_blocks,
+        },
+        "peak_positions": result.peak_positions,
+        "peak_margin_used": round(result.peak_margin_used, 2),
+        "net_pnl": round(m.get("net_pnl", 0.0), 2),
+        "return_pct": round(m.get("return_pct", 0.0), 2),
+        "win_rate": round(m.get("win_rate", 0.0) / 100.0, 4),
+        "profit_factor": _pf_for_json(m.get("profit_factor", 0.0)),
+        "max_drawdown_pct": max(result.drawdown_pct),
+        "per_symbol": result.per_symbol,
+        "daily": result.daily,
+    })
+    return block
@@ -0,0 +1,135 @@
+"""Per-day template backtests (ORB, breakout, mean-reversion, ...).
+
+Template strategies are intraday: each trading day gets its own rules —
+price levels derived from that day's opening candles — and a fresh
+``BacktestEngine``, with nothing carried across days. ``run_template_days``
+runs a whole window through ``backtesting.day_pool.map_days`` so long
+windows spread over CPU cores; the trades come back in day order, identical
+to a sequential replay.
+"""
+from __future__ import annotations
+
+from typing import Callable
+
+from backtesting.candle_frame import CandleFrame
+from backtesting.day_pool import map_days
+from backtesting.engine import run_backtest_for_day
+from backtesting.simulator import Trade
+from strategies.templates import get_template
+
+
+def build_rules_for_day(
+    template,
+    symbol: str,
+    day_candles: list[dict] | CandleFrame,
+    params: dict,
+    strategy_name: str,
+) -> list:
+    """Build strategy rules for a single day, auto-deriving per-day params.
+
+    Each strategy needs certain price-based params that vary daily.  When users
+    backtest, they can't supply a fixed ``entry`` or ``sl`` — we derive them
+    from the day's opening candles so the backtest is realistic.
+    """
+    if not day_candles:
+        return []
+
+    day_params = dict(params)
+    day_open = day_candles[0]["open"]
+    day_high = day_candles[0]["high"]
+    day_low = day_candles[0]["low"]
+    sl_pct = float(day_params.get("sl_pct", day_params.get("risk_percent", 2.0)))
+
+    if strategy_name == "orb":
+        # Use first candle as the opening range
+        if "range_high" not in day_params or "range_low" not in day_params:
+            day_params["range_high"] = day_high
+            day_params["range_low"] = day_low
+
+    elif strategy_name == "breakout":
+        # Derive entry/sl from opening candle + percentage offsets
+        if "entry" not in day_params or "sl" not in day_params:
+            entry_pct = float(day_params.get("entry_pct", 0.5))
+            day_params["entry"] = round(day_open * (1 + entry_pct / 100), 2)
+            day_params["sl"] = round(day_params["entry"] * (1 - sl_pct / 100), 2)
+
+    elif strategy_name == "mean-reversion":
+        # SL derived from open price + percentage
+        if "sl" not in day_params:
+            side = day_params.get("side", "long")
+            if side == "short":
+                day_params["sl"] = round(day_open * (1 + sl_pct / 100), 2)
+            else:
+                day_params["sl"] = round(day_open * (1 - sl_pct / 100), 2)
+
+    elif strategy_name == "vwap-bounce":
+        # Approximate VWAP as open price; derive SL from percentage
+        if "vwap" not in day_params:
+            # Compute simple VWAP from available candles (sum of hlc/3 * vol / sum vol)
+            total_vol = sum(c["volume"] for c in day_candles)
+            if total_vol > 0:
+                day_params["vwap"] = round(
+                    sum(((c["high"] + c["low"] + c["close"]) / 3) * c["volume"] for c in day_candles) / total_vol, 2
+                )
+            else:
+                day_params["vwap"] = round(day_open, 2)
+        if "sl" not in day_params:
+            day_params["sl"] = round(day_open * (1 - sl_pct / 100), 2)
+
+    elif strategy_name == "scalp":
+        # Derive entry/sl from opening price + percentage
+        if "entry" not in day_params or "sl" not in day_params:
+            entry_pct = float(day_params.get("entry_pct", 0.3))
+            day_params["entry"] = round(day_open * (1 + entry_pct / 100), 2)
+            day_params["sl"] = round(day_params["entry"] * (1 - sl_pct / 100), 2)
+
+    try:
+        plan = template.plan(symbol, day_params)
+        return plan.rules
+    except ValueError:
+        return []
+
+
+def run_template_day(
+    strategy_name: str,
+    symbol: str,
+    day_candles: CandleFrame,
+    params: dict,
+    capital: float,
+) -> list[Trade]:
+    """Build one day's rules and replay it. Module-level so workers can run it."""
+    if len(day_candles) < 2:
+        return []
+    template = get_template(strategy_name)
+    if template is None:
+        return []
+    rules = build_rules_for_day(template, symbol, day_candles, params, strategy_name)
+    if not rules:
+        return []
+    # ORB's first candle IS the opening range — trade from the next one
+    sim_candles = day_candles[1:] if strategy_name == "orb" else day_candles
+    result = run_backtest_for_day(sim_candles, rules, symbol, strategy_name, capital)
+    return result.trades
+
+
+def run_template_days(
+    strategy_name: str,
+    symbol: str,
+    day_groups: dict[str, CandleFrame],
+    params: dict,
+    capital: float,
+    *,
+    workers: int | None = None,
+    progress_cb: Callable[[int, int], None] | None = None,
+    cancel_check: Callable[[], bool] | None = None,
+) -> list[Trade]:
+    """Replay every day in ``day_groups`` (date order); return all trades in order."""
+    items = [
+        (strategy_name, symbol, day_candles, params, capital)
+        for day_candles in day_groups.values()
+    ]
+    per_day = map_days(
+        run_template_day, items,
+        workers=workers, progress_cb=progress_cb, cancel_check=cancel_check,
+    )
+    return [t for trades in per_day for t in trades]
@@ -0,0 +1,109 @@
+"""TradeTable — completed trades as columns, for the metric and ranking layers.
+
+``compute_metrics``, ``plausibility_warnings`` and the ``ranking`` layers each
+walk a ``list[Trade]`` in Python, and a sweep calls several of them per combo
+(plus again per train/validate slice). ``TradeTable`` extracts the fields they
+read once, into NumPy arrays:
+
+- ``pnl`` — float64 per-trade P&L (net, on scalp results).
+- ``entry_ns`` / ``exit_ns`` — int64 epoch nanoseconds.
+- ``side`` — int8, +1 long / -1 short.
+- ``holding_minutes`` — int64.
+- ``time_exit`` — bool, exit was time-driven (squareoff / end_of_data).
+- ``entry_day`` — int32 IST session day of the entry (days since 1970-01-01),
+  the day the ranking layers group by.
+
+Every metric/ranking function that takes a trade list also accepts a table
+and returns the same dict; the table path is the vectorized one. Rows keep
+the order of the trade list they were built from, and ``trades`` keeps the
+list itself for callers that still need the objects.
+"""
+from __future__ import annotations
+
+from datetime import date
+from typing import Iterable
+
+import numpy as np
+
+from backtesting.candle_frame import date_to_day, ist_day, timestamps_to_ns
+from backtesting.simulator import Trade
+
+# Exit reasons that are time-driven rather than signal-driven (shared by both
+# the rule-based engine and the scalp state machine).
+TIME_EXIT_REASONS = frozenset({"squareoff", "end_of_data"})
+
+
+class TradeTable:
+    """Columnar view of a list of completed trades (row order preserved)."""
+
+    def __init__(
+        self,
+        trades: list[Trade],
+        pnl: np.ndarray,
+        entry_ns: np.ndarray,
+        exit_ns: np.ndarray,
+        side: np.ndarray,
+        holding_minutes: np.ndarray,
+        time_exit: np.ndarray,
+    ):
+        self.trades = trades
+        self.pnl = pnl
+        self.entry_ns = entry_ns
+        self.exit_ns = exit_ns
+        self.side = side
+        self.holding_minutes = holding_minutes
+        self.time_exit = time_exit
+        self.entry_day = ist_day(entry_ns).astype(np.int32)
+
+    @classmethod
+    def from_trades(cls, trades: Iterable[Trade]) -> "TradeTable":
+        trades = list(trades)
+        n = len(trades)
+        return cls(
+            trades,
+            pnl=np.fromiter((t.pnl for t in trades), np.float64, n),
+            entry_ns=timestamps_to_ns(t.entry_time for t in trades),
+            exit_ns=timestamps_to_ns(t.exit_time for t in trades),
+            side=np.fromiter((1 if t.side == "long" else -1 for t in trades), np.int8, n),
+            holding_minutes=np.fromiter((t.holding_minutes for t in trades), np.int64, n),
+            time_exit=np.fromiter((t.exit_reason in TIME_EXIT_REASONS for t in trades), bool, n),
+        )
+
+    def __len__(self) -> int:
+        return len(self.pnl)
+
+    def take(self, rows: np.ndarray) -> "TradeTable":
+        """Sub-table of ``rows`` (a boolean mask or an index array)."""
+        idx = np.flatnonzero(rows) if rows.dtype == bool else rows
+        return TradeTable(
+            [self.trades[i] for i in idx.tolist()],
+            self.pnl[idx], self.entry_ns[idx], self.exit_ns[idx], self.side[idx],
+            self.holding_minutes[idx], self.time_exit[idx],
+        )
+
+    def split(self, split_date: date) -> tuple["TradeTable", "TradeTable"]:
+        """(entries before ``split_date``, entries on/after it)."""
+        before = self.entry_day < date_to_day(split_date)
+        return self.take(before), self.take(~before)
+
+    def day_pnls(self) -> tuple[np.ndarray, np.ndarray]:
+        """``(entry_days, summed pnl)`` per distinct entry day, first-seen order.
+
+        Sums accumulate in row order, as summing each day's trades in a loop
+        would.
+        """
+        if not len(self):
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float64)
+        days, first, inverse = np.unique(self.entry_day, return_index=True, return_inverse=True)
+        sums = np.bincount(inverse, weights=self.pnl, minlength=len(days))
+        order = np.argsort(first, kind="stable")
+        return days[order], sums[order]
+
+
+def sequential_sum(values: np.ndarray) -> float:
+    """Left-to-right float sum, in the order the list-based metrics add.
+
+    ``np.sum`` uses pairwise summation, which can differ in the last bit and
+    occasionally flip a rounded cent against the list path.
+    """
+    return float(np.cumsum(values)[-1]) if len(values) else 0.0
@@ -307,7 +307,6 @@ async def extract_session_memories(thread_id: str, user_email: str) -> None:
         from database.operations import ConversationOps, MemoryOps
         from database.session import AsyncSessionLocal
         from agents.memory_extractor import get_memory_extractor
-        import openai
 
         print("\n🧠 Extracting memories from this session...")
 
@@ -340,16 +339,14 @@ async def extract_session_memories(thread_id: str, user_email: str) -> None:
             )
 
             if extraction_result.memories and len(extraction_result.memories) > 0:
-                # Save memories with embeddings
-                openai_client = openai.AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-                for extracted_memory in extraction_result.memories:
-                    # Generate embedding
-                    embedding_response = await openai_client.embeddings.create(
-                        model="text-embedding-3-large",
-                        input=extracted_memory.fact
-                    )
-                    embedding = embedding_response.data[0].embedding
+                # Save memories with embeddings (one batched, cached request)
+                from memory.embedding_service import get_embedding_service
+                embedded = await get_embedding_service().get_embeddings_batch(
+                    [m.fact for m in extraction_result.memories]
+                )
+
+                for extracted_memory, emb in zip(extraction_result.memories, embedded):
+                    embedding = emb.embedding
 
                     # Save to database using add_memory (not create_memory)
                     await MemoryOps.add_memory(
@@ -664,7 +661,6 @@ async def search_docs_command(args):
     print("="*70 + "\n")
 
     try:
-        import openai
         from database.operations import DocsOps
         from database.session import AsyncSessionLocal
 
@@ -673,12 +669,8 @@ async def search_docs_command(args):
         print(f"Threshold: {args.threshold}\n")
 
         # Generate embedding for query
-        client = openai.AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        embedding_response = await client.embeddings.create(
-            model="text-embedding-3-large",
-            input=args.query
-        )
-        query_embedding = embedding_response.data[0].embedding
+        from memory.embedding_service import get_embedding_service
+        query_embedding = (await get_embedding_service().get_embedding(args.query)).embedding
 
         # Search documentation
         async with AsyncSessionLocal() as session:
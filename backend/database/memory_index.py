@@ -0,0 +1,261 @@
+"""Per-user in-memory vector index for semantic memory retrieval.
+
+Without pgvector, ``MemoryOps._search_memories_python_fallback`` loads every
+Memory row for the user, ``json.loads`` each 3072-float embedding and scores
+them one at a time — on every chat message. This keeps each user's live
+(non-archived) embeddings as one contiguous, L2-normalized float32 matrix with
+parallel id / importance arrays, so top-k retrieval is a single matrix-vector
+product plus ``argpartition``.
+
+Indexes load lazily on first search (one narrow SELECT, JSON decoded once) and
+are evicted LRU across users under a user-count and byte budget. In-process
+writers keep them current through the ``note_*`` hooks (add, update, delete,
+fade, archive); ``MEMORY_INDEX_TTL_S`` bounds staleness from writers in other
+processes (the daily extraction script, CLI).
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+import numpy as np
+from sqlalchemy import and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import Memory
+
+logger = logging.getLogger(__name__)
+
+MAX_USERS = int(os.getenv("MEMORY_INDEX_MAX_USERS", "64"))
+MAX_BYTES = int(os.getenv("MEMORY_INDEX_MAX_MB", "256")) * (1 << 20)
+TTL_S = float(os.getenv("MEMORY_INDEX_TTL_S", "900"))
+
+
+def _as_vector(raw) -> Optional[list]:
+    if isinstance(raw, str):
+        try:
+            raw = json.loads(raw)
+        except (json.JSONDecodeError, TypeError):
+            return None
+    return raw or None
+
+
+def _normalize(mat: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(mat, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return mat / norms
+
+
+class UserMemoryIndex:
+    """One user's live memory embeddings as a normalized matrix.
+
+    ``importance`` holds ``importance_score`` with NULL already mapped to 1.0,
+    mirroring the pgvector ranking (threshold on raw cosine, rank by
+    cosine * importance).
+    """
+
+    __slots__ = ("ids", "vectors", "importance", "loaded_at")
+
+    def __init__(self, ids: np.ndarray, vectors: np.ndarray, importance: np.ndarray):
+        self.ids = ids
+        self.vectors = vectors
+        self.importance = importance
+        self.loaded_at = time.monotonic()
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[tuple]) -> "UserMemoryIndex":
+        """Build from (id, embedding, importance_score) rows.
+
+        Rows whose dimension differs from the majority (embeddings left over
+        from an older model) are dropped — they can't be compared anyway.
+        """
+        ids, vecs, imps = [], [], []
+        for mem_id, raw, importance in rows:
+            vec = _as_vector(raw)
+            if vec is None:
+                continue
+            ids.append(mem_id)
+            vecs.append(vec)
+            imps.append(1.0 if importance is None else importance)
+        if not ids:
+            return cls(np.empty(0, np.int64), np.empty((0, 0), np.float32), np.empty(0, np.float32))
+        dims = np.fromiter((len(v) for v in vecs), np.int64, len(vecs))
+        dim = int(np.bincount(dims).argmax())
+        keep = np.flatnonzero(dims == dim)
+        if len(keep) < len(vecs):
+            logger.warning(
+                "[MemoryIndex] dropped %d embedding(s) not %d-dimensional",
+                len(vecs) - len(keep), dim,
+            )
+        mat = np.array([vecs[i] for i in keep], dtype=np.float32)
+        return cls(
+            np.array([ids[i] for i in keep], dtype=np.int64),
+            _normalize(mat),
+            np.array([imps[i] for i in keep], dtype=np.float32),
+        )
+
+    @property
+    def dims(self) -> int:
+        return self.vectors.shape[1] if self.vectors.ndim == 2 else 0
+
+    @property
+    def nbytes(self) -> int:
+        return self.ids.nbytes + self.vectors.nbytes + self.importance.nbytes
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def search(
+        self, query, limit: int, similarity_threshold: float,
+    ) -> Optional[list[tuple[int, float]]]:
+        """Top ``limit`` (memory_id, cosine) by cosine * importance.
+
+        Returns None when the query dimension doesn't match the index, so the
+        caller can fall back to the row-by-row path.
+        """
+        q = np.asarray(query, dtype=np.float32)
+        if not len(self.ids):
+            return []
+        if q.shape != (self.dims,):
+            return None
+        norm = np.linalg.norm(q)
+        if norm == 0:
+            return []
+        sims = self.vectors @ (q / norm)
+        cand = np.flatnonzero(sims >= similarity_threshold)
+        if not len(cand):
+            return []
+        scores = sims[cand] * self.importance[cand]
+        if len(cand) > limit:
+            top = np.argpartition(-scores, limit - 1)[:limit]
+            cand, scores = cand[top], scores[top]
+        order = np.argsort(-scores, kind="stable")
+        return [(int(self.ids[i]), float(sims[i])) for i in cand[order]]
+
+    # ── In-place maintenance ─────────────────────────────────────────
+
+    def upsert(self, memory_id: int, embedding, importance: Optional[float] = None) -> bool:
+        """Add or replace one memory. False if its dimension doesn't fit."""
+        vec = _as_vector(embedding)
+        if vec is None:
+            self.remove((memory_id,))
+            return True
+        row = _normalize(np.asarray(vec, dtype=np.float32)[None, :])
+        if len(self.ids) and row.shape[1] != self.dims:
+            return False
+        imp = np.float32(1.0 if importance is None else importance)
+        hit = np.flatnonzero(self.ids == memory_id)
+        if len(hit):
+            self.vectors[hit[0]] = row[0]
+            if importance is not None:
+                self.importance[hit[0]] = imp
+            return True
+        self.ids = np.append(self.ids, np.int64(memory_id))
+        self.vectors = row if not len(self.vectors) else np.vstack([self.vectors, row])
+        self.importance = np.append(self.importance, imp)
+        return True
+
+    def remove(self, memory_ids: Iterable[int]) -> None:
+        drop = np.isin(self.ids, np.fromiter(memory_ids, np.int64))
+        if drop.any():
+            keep = ~drop
+            self.ids = self.ids[keep]
+            self.vectors = self.vectors[keep]
+            self.importance = self.importance[keep]
+
+    def set_importance(self, scores: dict[int, float]) -> None:
+        if not scores or not len(self.ids):
+            return
+        pos = {int(m): i for i, m in enumerate(self.ids)}
+        for mem_id, score in scores.items():
+            i = pos.get(int(mem_id))
+            if i is not None:
+                self.importance[i] = 1.0 if score is None else score
+
+
+class MemoryIndexCache:
+    """LRU of per-user indexes under a user-count and byte budget."""
+
+    def __init__(self, max_users: int = MAX_USERS, max_bytes: int = MAX_BYTES,
+                 ttl_s: float = TTL_S) -> None:
+        self._indexes: "OrderedDict[str, UserMemoryIndex]" = OrderedDict()
+        self._max_users = max_users
+        self._max_bytes = max_bytes
+        self._ttl_s = ttl_s
+        self.loads = 0
+        self.hits = 0
+        self.evictions = 0
+
+    async def get(self, session: AsyncSession, user_id: str) -> UserMemoryIndex:
+        """The user's index, loading it from the DB on a miss or after TTL."""
+        idx = self._indexes.get(user_id)
+        if idx is not None and time.monotonic() - idx.loaded_at < self._ttl_s:
+            self._indexes.move_to_end(user_id)
+            self.hits += 1
+            return idx
+        result = await session.execute(
+            select(Memory.id, Memory.embedding, Memory.importance_score).where(
+                and_(
+                    Memory.user_id == user_id,
+                    Memory.embedding.isnot(None),
+                    Memory.archived.is_(False),
+                )
+            )
+        )
+        idx = UserMemoryIndex.from_rows(result.all())
+        self.loads += 1
+        self._indexes[user_id] = idx
+        self._indexes.move_to_end(user_id)
+        self._evict()
+        return idx
+
+    def _evict(self) -> None:
+        total = sum(i.nbytes for i in self._indexes.values())
+        while len(self._indexes) > 1 and (
+            len(self._indexes) > self._max_users or total > self._max_bytes
+        ):
+            _, old = self._indexes.popitem(last=False)
+            total -= old.nbytes
+            self.evictions += 1
+
+    # ── Write hooks (no-ops for users not currently indexed) ─────────
+
+    def note_upsert(self, user_id: str, memory_id: int, embedding,
+                    importance: Optional[float] = None) -> None:
+        idx = self._indexes.get(user_id)
+        if idx is not None and not idx.upsert(memory_id, embedding, importance):
+            self.invalidate(user_id)
+
+    def note_removed(self, user_id: str, memory_ids: Iterable[int]) -> None:
+        """Deleted or archived memories."""
+        idx = self._indexes.get(user_id)
+        if idx is not None:
+            idx.remove(memory_ids)
+
+    def note_importance(self, user_id: str, scores: dict[int, float]) -> None:
+        idx = self._indexes.get(user_id)
+        if idx is not None:
+            idx.set_importance(scores)
+
+    def invalidate(self, user_id: Optional[str] = None) -> None:
+        if user_id is None:
+            self._indexes.clear()
+        else:
+            self._indexes.pop(user_id, None)
+
+    def stats(self) -> dict:
+        return {
+            "users": len(self._indexes),
+            "memories": sum(len(i) for i in self._indexes.values()),
+            "bytes": sum(i.nbytes for i in self._indexes.values()),
+            "loads": self.loads,
+            "hits": self.hits,
+            "evictions": self.evictions,
+        }
+
+
+MEMORY_INDEX = MemoryIndexCache()
@@ -440,6 +440,11 @@ class DocChunk(Base):
     # Vector embedding for semantic search
     embedding = Column(JSON, nullable=True)
 
+    # Incremental indexing (services/doc_index_pipeline.py): hash of the whole
+    # source file and of this chunk's text; unchanged ones are not re-embedded.
+    file_hash = Column(Text, nullable=True)
+    chunk_hash = Column(Text, nullable=True)
+
     created_at = Column(DateTime, default=utc_now, nullable=False)
     updated_at = Column(DateTime, default=utc_now, onupdate=utc_now, nullable=False)
 
@@ -808,6 +813,8 @@ class MonitorRule(Base):
     __table_args__ = (
         Index('idx_monitor_rules_user_enabled', 'user_id', 'enabled'),
         Index('idx_monitor_rules_instrument', 'instrument_token'),
+        # Change-feed high-water-mark scan (monitor/rule_changes.py).
+        Index('idx_monitor_rules_updated_at', 'updated_at'),
     )
 
 
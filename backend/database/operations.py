@@ -9,10 +9,11 @@ from datetime import datetime, timedelta, timezone
 from utils.datetime_utils import utc_now_naive
 from sqlalchemy import select, update, delete, and_, or_, func
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import defer, selectinload
 import numpy as np
 
 from .models import Conversation, Message, Memory, UserPreference, DocChunk
+from .memory_index import MEMORY_INDEX
 
 logger = logging.getLogger(__name__)
 
@@ -671,6 +672,7 @@ class MemoryOps:
             session.add(memory)
             await session.commit()
             await session.refresh(memory)
+            MEMORY_INDEX.note_upsert(user_id, memory.id, embedding)
             logger.info(f"[MemoryJudge] Inserted new memory: {memory.id}")
             return (memory, "INSERT", decision.reasoning)
 
@@ -696,6 +698,7 @@ class MemoryOps:
                 select(Memory).where(Memory.id == decision.memory_id)
             )
             memory = result.scalar_one()
+            MEMORY_INDEX.note_upsert(user_id, memory.id, embedding)
             logger.info(f"[MemoryJudge] Updated memory {memory.id}: {decision.reasoning}")
             return (memory, "UPDATE", decision.reasoning)
 
@@ -719,6 +722,7 @@ class MemoryOps:
                 select(Memory).where(Memory.id == decision.memory_id)
             )
             memory = result.scalar_one()
+            MEMORY_INDEX.note_upsert(user_id, memory.id, embedding)
             logger.info(f"[MemoryJudge] Consolidated into memory {memory.id}: {decision.reasoning}")
             return (memory, "CONSOLIDATE", decision.reasoning)
 
@@ -871,6 +875,7 @@ class MemoryOps:
         session.add(memory)
         await session.commit()
         await session.refresh(memory)
+        MEMORY_INDEX.note_upsert(user_id, memory.id, embedding)
         return (memory, False)  # Not a duplicate
 
     @staticmethod
@@ -1056,6 +1061,37 @@ class MemoryOps:
         )
         return memories_with_scores[:limit]
 
+    @staticmethod
+    async def _search_memories_index(
+        session: AsyncSession,
+        user_id: str,
+        embedding: List[float],
+        limit: int,
+        similarity_threshold: float
+    ) -> Optional[List[tuple[Memory, float]]]:
+        """Search the user's in-memory vector index (database/memory_index.py).
+
+        Scoring matches the other backends (threshold on cosine, rank by
+        cosine * importance); only the top hits are fetched from the DB, with
+        the embedding column deferred. Returns None if the query dimension
+        doesn't match the index so the caller can use the row-by-row path.
+        """
+        index = await MEMORY_INDEX.get(session, user_id)
+        hits = index.search(embedding, limit, similarity_threshold)
+        if not hits:
+            return hits
+        result = await session.execute(
+            select(Memory)
+            .options(defer(Memory.embedding))
+            .where(Memory.id.in_([mid for mid, _ in hits]))
+        )
+        rows = {m.id: m for m in result.scalars().all()}
+        stale = [mid for mid, _ in hits if mid not in rows or rows[mid].archived]
+        if stale:
+            # Deleted/archived by another process since the index loaded.
+            MEMORY_INDEX.note_removed(user_id, stale)
+        return [(rows[mid], sim) for mid, sim in hits if mid not in stale]
+
     @staticmethod
     async def search_memories_semantic(
         session: AsyncSession,
@@ -1094,12 +1130,19 @@ class MemoryOps:
                     # Some other error, re-raise
                     raise
 
-        # Use Python fallback if pgvector is not available
+        # Without pgvector, search the in-memory vector index; the row-by-row
+        # Python path only remains for embeddings the index can't compare.
         if _pgvector_available is False:
-            memories_with_scores = await MemoryOps._search_memories_python_fallback(
+            memories_with_scores = await MemoryOps._search_memories_index(
                 session, user_id, embedding, limit, similarity_threshold
             )
-            logger.debug(f"Python fallback search returned {len(memories_with_scores)} memories")
+            if memories_with_scores is None:
+                memories_with_scores = await MemoryOps._search_memories_python_fallback(
+                    session, user_id, embedding, limit, similarity_threshold
+                )
+                logger.debug(f"Python fallback search returned {len(memories_with_scores)} memories")
+            else:
+                logger.debug(f"Vector index search returned {len(memories_with_scores)} memories")
 
         # Update access count for retrieved memories
         if memories_with_scores:
@@ -2,9 +2,11 @@
 """Memory consolidation job — merge near-duplicate memories into one.
 
 Ported from EspressoBot's `jobs/memory_distillation.py` (Part A). Per user:
-greedily cluster active memories by semantic similarity (pgvector halfvec cosine
-distance), then merge each cluster of 2+ into a single comprehensive memory via
-an LLM, archiving the source memories (`category='_archived'`, reversible).
+greedily cluster active memories by semantic similarity (cosine distance over
+the user's embedding matrix, computed in memory from one read), then merge
+each cluster of 2+ into a single comprehensive memory via an LLM, archiving
+the source memories (`category='_archived'`, reversible). All inserts and
+archives for a user go out in one batch and one commit.
 
 The merged memory is inserted with only the `embedding` JSON column set; the
 `memory_embedding_sync` DB trigger backfills `embedding_halfvec` automatically.
@@ -35,23 +37,25 @@ from typing import Optional
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+import numpy as np
 from openai import AsyncOpenAI
 from sqlalchemy import text
 
+from database.memory_index import MEMORY_INDEX, UserMemoryIndex
 from database.session import AsyncSessionLocal
+from memory.embedding_service import get_embedding_service
 
 logger = logging.getLogger(__name__)
 
 # Cheap/fast near-frontier model for batch merges (OpenRouter).
 LLM_MODEL = "deepseek/deepseek-v4-flash"
-EMBEDDING_MODEL = "text-embedding-3-large"  # matches NS memory embeddings
 
 CLUSTER_DISTANCE_THRESHOLD = 0.3   # cosine distance < 0.3 (≈ similarity > 0.7) = same cluster
 MIN_CLUSTER_SIZE = 2               # pairs are the most common duplicate pattern
 MAX_CLUSTERS_PER_USER = 25         # bound LLM calls per run
+SIMILARITY_BLOCK = 1024            # rows per similarity-matrix block (~12 MB at 3072-d x 1k)
 
 _llm_client: Optional[AsyncOpenAI] = None
-_openai_client: Optional[AsyncOpenAI] = None
 
 
 def _llm() -> AsyncOpenAI:
@@ -64,13 +68,6 @@ def _llm() -> AsyncOpenAI:
     return _llm_client
 
 
-def _openai() -> AsyncOpenAI:
-    global _openai_client
-    if _openai_client is None:
-        _openai_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-    return _openai_client
-
-
 async def _get_users(session) -> list[str]:
     result = await session.execute(
         text("SELECT DISTINCT user_id FROM memories WHERE archived = FALSE")
@@ -78,58 +75,75 @@ async def _get_users(session) -> list[str]:
     return [row[0] for row in result.fetchall()]
 
 
+def greedy_clusters(
+    vectors: np.ndarray,
+    distance_threshold: float = CLUSTER_DISTANCE_THRESHOLD,
+    min_size: int = MIN_CLUSTER_SIZE,
+    block: int = SIMILARITY_BLOCK,
+) -> list[list[int]]:
+    """Greedy seed clustering over L2-normalized row vectors. Returns row indices.
+
+    Same rule the per-seed pgvector queries used: walk seeds in row order; each
+    unused seed collects every other unused row within ``distance_threshold``
+    (nearest first); keep the group if it reaches ``min_size``, else retire the
+    seed alone. The thresholded similarity graph is built ``block`` rows at a
+    time so memory stays O(block * n) rather than O(n^2).
+    """
+    n = len(vectors)
+    if n < min_size:
+        return []
+    min_sim = np.float32(1.0 - distance_threshold)
+    neighbors: list[np.ndarray] = []
+    for start in range(0, n, block):
+        sims = vectors[start:start + block] @ vectors.T
+        for r, row in enumerate(sims):
+            hit = np.flatnonzero(row > min_sim)
+            hit = hit[hit != start + r]
+            # Nearest first; ties by row order, like ORDER BY distance.
+            neighbors.append(hit[np.argsort(-row[hit], kind="stable")])
+
+    used = np.zeros(n, dtype=bool)
+    clusters: list[list[int]] = []
+    for seed in range(n):
+        if used[seed]:
+            continue
+        nb = neighbors[seed]
+        members = [seed] + nb[~used[nb]].tolist()
+        if len(members) >= min_size:
+            clusters.append(members)
+            used[members] = True
+        else:
+            used[seed] = True
+    return clusters
+
+
 async def find_clusters(session, user_id: str) -> list[list[dict]]:
-    """Greedy semantic clustering across categories. Returns clusters of 2+ non-consolidated memories."""
+    """Greedy semantic clustering across categories. Returns clusters of 2+ non-consolidated memories.
+
+    One read per user: the embeddings come back with the rows and the
+    similarity graph is computed in memory (see ``greedy_clusters``).
+    """
     result = await session.execute(
         text("""
-            SELECT id, fact, category, confidence
+            SELECT id, fact, category, confidence, embedding
             FROM memories
             WHERE user_id = :uid
               AND archived = FALSE
               AND is_consolidated = FALSE
-              AND embedding_halfvec IS NOT NULL
+              AND embedding IS NOT NULL
             ORDER BY created_at DESC
         """),
         {"uid": user_id},
     )
-    pool = [{"id": r[0], "fact": r[1], "category": r[2], "confidence": r[3]} for r in result.fetchall()]
-    if len(pool) < MIN_CLUSTER_SIZE:
+    rows = result.fetchall()
+    if len(rows) < MIN_CLUSTER_SIZE:
         return []
-
-    clusters: list[list[dict]] = []
-    used_ids: set[int] = set()
-
-    for seed in pool:
-        if seed["id"] in used_ids:
-            continue
-        used_list = list(used_ids) if used_ids else [0]
-        neighbors = await session.execute(
-            text("""
-                SELECT m.id, m.fact, m.category, m.confidence,
-                       (m.embedding_halfvec <=> s.embedding_halfvec) AS distance
-                FROM memories m, memories s
-                WHERE s.id = :seed_id
-                  AND m.user_id = :uid
-                  AND m.archived = FALSE
-                  AND m.is_consolidated = FALSE
-                  AND m.id != :seed_id
-                  AND m.id != ALL(:used)
-                  AND m.embedding_halfvec IS NOT NULL
-                  AND (m.embedding_halfvec <=> s.embedding_halfvec) < :threshold
-                ORDER BY distance ASC
-            """),
-            {"seed_id": seed["id"], "uid": user_id, "threshold": CLUSTER_DISTANCE_THRESHOLD, "used": used_list},
-        )
-        cluster = [seed] + [
-            {"id": r[0], "fact": r[1], "category": r[2], "confidence": r[3]} for r in neighbors.fetchall()
-        ]
-        if len(cluster) >= MIN_CLUSTER_SIZE:
-            clusters.append(cluster)
-            used_ids.update(m["id"] for m in cluster)
-        else:
-            used_ids.add(seed["id"])
-
-    return clusters
+    pool = {r[0]: {"id": r[0], "fact": r[1], "category": r[2], "confidence": r[3]} for r in rows}
+    index = UserMemoryIndex.from_rows((r[0], r[4], None) for r in rows)
+    return [
+        [pool[int(index.ids[i])] for i in members]
+        for members in greedy_clusters(index.vectors)
+    ]
 
 
 import re
@@ -204,13 +218,12 @@ include any preamble, reasoning, explanation, markdown headers, or labels like
         return None
 
 
-async def _generate_embedding(fact: str) -> Optional[list[float]]:
+async def _generate_embeddings(facts: list[str]) -> list[Optional[list[float]]]:
     try:
-        resp = await _openai().embeddings.create(model=EMBEDDING_MODEL, input=fact)
-        return resp.data[0].embedding
+        return [r.embedding for r in await get_embedding_service().get_embeddings_batch(facts)]
     except Exception as e:
         logger.error("embedding generation failed: %s", e)
-        return None
+        return [None] * len(facts)
 
 
 async def run_consolidation(dry_run: bool = False, only_user: str | None = None) -> dict:
@@ -227,51 +240,61 @@ async def run_consolidation(dry_run: bool = False, only_user: str | None = None)
             if not clusters:
                 continue
 
+            merges: list[tuple[list[dict], str, str]] = []
             for cluster in clusters[:MAX_CLUSTERS_PER_USER]:
                 stats["clusters_found"] += 1
-                source_ids = [m["id"] for m in cluster]
                 dominant = Counter(m["category"] for m in cluster).most_common(1)[0][0]
 
                 if dry_run:
                     stats["clusters"].append({
                         "user": uid, "size": len(cluster), "category": dominant,
-                        "ids": source_ids, "facts": [m["fact"][:70] for m in cluster],
+                        "ids": [m["id"] for m in cluster], "facts": [m["fact"][:70] for m in cluster],
                     })
                     continue
 
                 merged = await consolidate_cluster(cluster, dominant)
-                if not merged:
-                    continue
-                embedding = await _generate_embedding(merged)
-                max_conf = max((m["confidence"] or 1.0) for m in cluster)
-
-                # Insert merged memory — trigger backfills embedding_halfvec from embedding.
-                await session.execute(
-                    text("""
-                        INSERT INTO memories
-                            (user_id, fact, category, confidence, embedding,
-                             is_consolidated, consolidated_from, created_at, last_accessed,
-                             access_count, used_count)
-                        VALUES
-                            (:uid, :fact, :cat, :conf, :embedding,
-                             TRUE, :sources, NOW(), NOW(), 0, 0)
-                    """),
-                    {
-                        "uid": uid, "fact": merged, "cat": dominant, "conf": max_conf,
-                        "embedding": json.dumps(embedding) if embedding else None,
-                        "sources": json.dumps(source_ids),
-                    },
-                )
-                # Archive sources (non-lossy + reversible — category preserved).
-                await session.execute(
-                    text("UPDATE memories SET archived = TRUE, archived_at = NOW() WHERE id = ANY(:ids)"),
-                    {"ids": source_ids},
-                )
+                if merged:
+                    merges.append((cluster, dominant, merged))
+
+            if dry_run or not merges:
+                continue
+
+            # One write per user: insert every merged memory, archive every source.
+            embeddings = await _generate_embeddings([merged for _, _, merged in merges])
+            inserts = []
+            archived_ids: list[int] = []
+            for (cluster, dominant, merged), embedding in zip(merges, embeddings):
+                source_ids = [m["id"] for m in cluster]
+                inserts.append({
+                    "uid": uid, "fact": merged, "cat": dominant,
+                    "conf": max((m["confidence"] or 1.0) for m in cluster),
+                    "embedding": json.dumps(embedding) if embedding else None,
+                    "sources": json.dumps(source_ids),
+                })
+                archived_ids.extend(source_ids)
                 stats["memories_consolidated"] += len(cluster)
                 logger.info("  merged %d (%s): -> %s", len(cluster), dominant, merged[:70])
 
-            if not dry_run:
-                await session.commit()
+            # Insert merged memories — trigger backfills embedding_halfvec from embedding.
+            await session.execute(
+                text("""
+                    INSERT INTO memories
+                        (user_id, fact, category, confidence, embedding,
+                         is_consolidated, consolidated_from, created_at, last_accessed,
+                         access_count, used_count)
+                    VALUES
+                        (:uid, :fact, :cat, :conf, :embedding,
+                         TRUE, :sources, NOW(), NOW(), 0, 0)
+                """),
+                inserts,
+            )
+            # Archive sources (non-lossy + reversible — category preserved).
+            await session.execute(
+                text("UPDATE memories SET archived = TRUE, archived_at = NOW() WHERE id = ANY(:ids)"),
+                {"ids": archived_ids},
+            )
+            await session.commit()
+            MEMORY_INDEX.invalidate(uid)
 
     elapsed = (datetime.now(timezone.utc) - start).total_seconds()
     logger.info(
@@ -40,6 +40,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from sqlalchemy import text
 
+from database.memory_index import MEMORY_INDEX
 from database.session import AsyncSessionLocal
 
 logger = logging.getLogger(__name__)
@@ -125,6 +126,7 @@ async def update_importance_scores(session, user_id: str, dry_run: bool = False)
     now = datetime.now(timezone.utc).replace(tzinfo=None)
     scored = 0
     would_archive: list[dict] = []
+    scores: dict[int, float] = {}
 
     for row in rows:
         mem_id, last_used_at, used_count, confidence, category, created_at, fact = row
@@ -139,6 +141,7 @@ async def update_importance_scores(session, user_id: str, dry_run: bool = False)
             used_count=used_count or 0,
         )
 
+        scores[mem_id] = score
         mem_age_days = (now - (created_at or now)).total_seconds() / 86400.0
         archive = score < ARCHIVE_IMPORTANCE_THRESHOLD and mem_age_days > ARCHIVE_MIN_AGE_DAYS
 
@@ -160,7 +163,7 @@ async def update_importance_scores(session, user_id: str, dry_run: bool = False)
                 )
         scored += 1
 
-    return {"scored": scored, "would_archive": would_archive}
+    return {"scored": scored, "would_archive": would_archive, "scores": scores}
 
 
 async def run_memory_fade(dry_run: bool = False, only_user: str | None = None) -> dict:
@@ -172,14 +175,20 @@ async def run_memory_fade(dry_run: bool = False, only_user: str | None = None) -
         users = [only_user] if only_user else await _get_users(session)
         stats["users"] = len(users)
 
+        per_user: dict[str, dict] = {}
         for uid in users:
             res = await update_importance_scores(session, uid, dry_run=dry_run)
+            per_user[uid] = res
             stats["scored"] += res["scored"]
             stats["would_archive"].extend(res["would_archive"])
             if not dry_run:
                 stats["archived"] += len(res["would_archive"])
         if not dry_run:
             await session.commit()
+            # Keep loaded retrieval indexes in step with the new scores.
+            for uid, res in per_user.items():
+                MEMORY_INDEX.note_importance(uid, res["scores"])
+                MEMORY_INDEX.note_removed(uid, [m["id"] for m in res["would_archive"]])
 
     stats["archived"] = len(stats["would_archive"]) if dry_run else stats["archived"]
     elapsed = (datetime.now(timezone.utc) - start).total_seconds()
@@ -8,7 +8,8 @@ import logging
 import asyncio
 import re
 import mimetypes
-from typing import Optional, Dict, Any, List, Union
+from typing import Optional, Dict, Any, List, Tuple, Union
+from collections import OrderedDict
 from contextlib import asynccontextmanager
 from datetime import datetime, timezone
 from pathlib import Path
@@ -26,6 +27,7 @@ from dotenv import load_dotenv
 from agents.orchestrator import OrchestratorAgent, OrchestratorDeps
 from agents.web_search_agent import WebSearchAgent, WebSearchDeps
 from agents.vision_agent import vision_agent
+from services.mcp_manager import MCP_POOL
 from models.state import ConversationState, MessageRole
 from pydantic_ai.messages import BinaryContent
 from config.models import is_vision_capable
@@ -152,16 +154,13 @@ async def get_user_memories_for_context(
         async with db_manager.async_session() as db:
             # If we have a current message, use semantic search
             if current_message and current_message.strip():
-                # Get embedding for current message
-                import openai
-                openai_client = openai.AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+                # Get embedding for current message (shared client + cache)
+                from memory.embedding_service import get_embedding_service
 
                 try:
-                    embedding_response = await openai_client.embeddings.create(
-                        model="text-embedding-3-large",
-                        input=current_message
-                    )
-                    query_embedding = embedding_response.data[0].embedding
+                    query_embedding = (
+                        await get_embedding_service().get_embedding(current_message)
+                    ).embedding
 
                     # Search for semantically similar memories
                     memories_with_scores = await MemoryOps.search_memories_semantic(
@@ -587,6 +586,9 @@ class ConversationData(BaseModel):
 # Global agents (initialized on startup)
 orchestrator: Optional[OrchestratorAgent] = None  # Default orchestrator
 orchestrator_cache: Dict[str, OrchestratorAgent] = {}  # Cache orchestrators by model ID
+# Orchestrators for users with MCP servers, keyed by (model ID, user ID, MCP config hash)
+USER_ORCHESTRATOR_CACHE_SIZE = int(os.getenv("USER_ORCHESTRATOR_CACHE_SIZE", "32"))
+user_orchestrator_cache: "OrderedDict[Tuple[str, int, str], OrchestratorAgent]" = OrderedDict()
 web_search_agent: Optional[WebSearchAgent] = None
 vision_agent_instance: Optional[Any] = None  # Vision agent (imported as function)
 
@@ -595,12 +597,61 @@ conversation_states: Dict[str, ConversationState] = {}
 conversation_messages: Dict[str, List[ConversationMessage]] = {}
 
 
+def _build_orchestrator(model_id: str, ai_model: Optional[Any], user_mcp_toolsets: Optional[List[Any]] = None) -> OrchestratorAgent:
+    """Construct an orchestrator for a model (DB row or config fallback) and register sub-agents."""
+    from agents.vision_agent import vision_agent as va
+
+    if not ai_model:
+        logger.error(f"Model {model_id} not found in database, falling back to config")
+        # Fallback to config.models if not in database (backward compatibility)
+        new_orchestrator = OrchestratorAgent(model_id=model_id, user_mcp_toolsets=user_mcp_toolsets)
+    else:
+        logger.info(f"Creating new orchestrator for model: {model_id} (slug: {ai_model.slug}, provider: {ai_model.provider})")
+        use_openrouter = ai_model.provider == "openrouter"
+        # Gateway models use OpenAI-compatible API (not OpenRouter)
+        if ai_model.provider == "gateway":
+            use_openrouter = False
+            logger.info(f"Using Pydantic AI Gateway for model: {ai_model.slug}")
+        # Resolve thinking_effort: DB column > supports_thinking fallback
+        db_thinking = getattr(ai_model, 'thinking_effort', None)
+        if db_thinking is None and ai_model.supports_thinking:
+            db_thinking = "high"  # Backward compat for old DB entries
+        new_orchestrator = OrchestratorAgent(
+            model_id=model_id,
+            model_slug=ai_model.slug,
+            use_openrouter=use_openrouter,
+            user_mcp_toolsets=user_mcp_toolsets,
+            thinking_effort=db_thinking,
+        )
+
+    # Register domain-specific agents (same for all orchestrators)
+    new_orchestrator.register_agent("web_search", web_search_agent)
+    new_orchestrator.register_agent("vision", va)  # Use locally imported vision_agent
+    return new_orchestrator
+
+
+def invalidate_user_orchestrators(user_id: int) -> int:
+    """Drop cached MCP orchestrators for a user (their MCP settings changed)."""
+    stale = [key for key in user_orchestrator_cache if key[1] == user_id]
+    for key in stale:
+        del user_orchestrator_cache[key]
+    if stale:
+        logger.info(f"Invalidated {len(stale)} cached orchestrator(s) for user {user_id}")
+    return len(stale)
+
+
+MCP_POOL.add_invalidation_listener(invalidate_user_orchestrators)
+
+
 async def get_orchestrator_for_model(model_id: str, user_id: Optional[int] = None) -> OrchestratorAgent:
     """
     Get or create an orchestrator for the specified model.
 
-    If user_id is provided and user has MCP servers configured, creates a fresh
-    orchestrator with user-specific MCP toolsets (not cached).
+    If user_id is provided and user has MCP servers configured, returns an
+    orchestrator cached per (model, user, MCP config hash) — LRU-bounded by
+    USER_ORCHESTRATOR_CACHE_SIZE — whose MCP servers come from the shared
+    connection pool. Any change to the user's MCP config or OAuth tokens
+    changes the hash; routes/mcp_servers.py also invalidates explicitly.
 
     Otherwise, returns cached orchestrator for the model.
 
@@ -611,7 +662,6 @@ async def get_orchestrator_for_model(model_id: str, user_id: Optional[int] = Non
     Returns:
         OrchestratorAgent instance
     """
-    from agents.vision_agent import vision_agent as va
     from database.models import AIModel
     from sqlalchemy import select
     global orchestrator_cache, web_search_agent, vision_agent_instance
@@ -636,17 +686,22 @@ async def get_orchestrator_for_model(model_id: str, user_id: Optional[int] = Non
         logger.debug(f"✅ Model {model_id} has excellent function calling reliability ({reliability:.2f}/1.0)")
 
     # If user_id provided, check if user has MCP servers configured
-    user_mcp_servers = []
     if user_id is not None:
         async with db_manager.async_session() as db:
             from services.mcp_manager import MCPManager
             mcp_manager = MCPManager(db)
 
-            # Spawn user MCP servers
-            user_mcp_servers = await mcp_manager.spawn_user_mcp_servers(user_id)
+            # Pooled user MCP servers (reused connections) + config hash
+            config_hash, user_mcp_servers = await mcp_manager.load_user_mcp_servers(user_id)
 
             if user_mcp_servers:
-                # User has MCP servers - create fresh orchestrator (don't use cache)
+                cache_key = (model_id, user_id, config_hash)
+                cached = user_orchestrator_cache.get(cache_key)
+                if cached is not None:
+                    user_orchestrator_cache.move_to_end(cache_key)
+                    logger.info(f"Using cached orchestrator for model {model_id}, user {user_id} (MCP config {config_hash})")
+                    return cached
+
                 logger.info(f"Creating user-specific orchestrator with {len(user_mcp_servers)} MCP servers for user {user_id}")
 
                 # Fetch model from database
@@ -655,32 +710,15 @@ async def get_orchestrator_for_model(model_id: str, user_id: Optional[int] = Non
                 )
                 ai_model = result.scalar_one_or_none()
 
-                if not ai_model:
-                    logger.error(f"Model {model_id} not found in database, falling back to config")
-                    new_orchestrator = OrchestratorAgent(model_id=model_id, user_mcp_toolsets=user_mcp_servers)
-                else:
-                    use_openrouter = ai_model.provider == "openrouter"
-                    # Gateway models use OpenAI-compatible API (not OpenRouter)
-                    if ai_model.provider == "gateway":
-                        use_openrouter = False
-                        logger.info(f"Using Pydantic AI Gateway for model: {ai_model.slug}")
-                    # Resolve thinking_effort: DB column > supports_thinking fallback
-                    db_thinking = getattr(ai_model, 'thinking_effort', None)
-                    if db_thinking is None and ai_model.supports_thinking:
-                        db_thinking = "high"  # Backward compat for old DB entries
-                    new_orchestrator = OrchestratorAgent(
-                        model_id=model_id,
-                        model_slug=ai_model.slug,
-                        use_openrouter=use_openrouter,
-                        user_mcp_toolsets=user_mcp_servers,
-                        thinking_effort=db_thinking,
-                    )
+                new_orchestrator = _build_orchestrator(model_id, ai_model, user_mcp_toolsets=user_mcp_servers)
 
-                # Register domain-specific agents
-                new_orchestrator.register_agent("web_search", web_search_agent)
-                new_orchestrator.register_agent("vision", va)
+                # Older configs of this user/model can never be hit again
+                for key in [k for k in user_orchestrator_cache if k[:2] == (model_id, user_id)]:
+                    del user_orchestrator_cache[key]
+                user_orchestrator_cache[cache_key] = new_orchestrator
+                while len(user_orchestrator_cache) > USER_ORCHESTRATOR_CACHE_SIZE:
+                    user_orchestrator_cache.popitem(last=False)
 
-                # Return user-specific orchestrator (NOT cached)
                 return new_orchestrator
 
     # Use cached orchestrator if available
@@ -695,32 +733,7 @@ async def get_orchestrator_for_model(model_id: str, user_id: Optional[int] = Non
         )
         ai_model = result.scalar_one_or_none()
 
-    if not ai_model:
-        logger.error(f"Model {model_id} not found in database, falling back to config")
-        # Fallback to config.models if not in database (backward compatibility)
-        new_orchestrator = OrchestratorAgent(model_id=model_id)
-    else:
-        # Create orchestrator with database model details
-        logger.info(f"Creating new orchestrator for model: {model_id} (slug: {ai_model.slug}, provider: {ai_model.provider})")
-        use_openrouter = ai_model.provider == "openrouter"
-        # Gateway models use OpenAI-compatible API (not OpenRouter)
-        if ai_model.provider == "gateway":
-            use_openrouter = False
-            logger.info(f"Using Pydantic AI Gateway for model: {ai_model.slug}")
-        # Resolve thinking_effort: DB column > supports_thinking fallback
-        db_thinking = getattr(ai_model, 'thinking_effort', None)
-        if db_thinking is None and ai_model.supports_thinking:
-            db_thinking = "high"  # Backward compat for old DB entries
-        new_orchestrator = OrchestratorAgent(
-            model_id=model_id,
-            model_slug=ai_model.slug,
-            use_openrouter=use_openrouter,
-            thinking_effort=db_thinking,
-        )
-
-    # Register domain-specific agents (same for all orchestrators)
-    new_orchestrator.register_agent("web_search", web_search_agent)
-    new_orchestrator.register_agent("vision", va)  # Use locally imported vision_agent
+    new_orchestrator = _build_orchestrator(model_id, ai_model)
 
     # Cache for future use
     orchestrator_cache[model_id] = new_orchestrator
@@ -869,6 +882,19 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"Error shutting down scheduler: {e}")
 
+    # Close pooled user MCP connections
+    try:
+        await MCP_POOL.close_all()
+    except Exception as e:
+        logger.error(f"Error closing MCP connections: {e}")
+
+    # Stop backtest day-pool worker processes
+    try:
+        from backtesting.day_pool import shutdown_day_pools
+        shutdown_day_pools()
+    except Exception as e:
+        logger.error(f"Error stopping backtest day pools: {e}")
+
     # Close database connections gracefully
     try:
         await db_manager.close()
@@ -1053,6 +1079,7 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
+    from services.instruments_cache import search_stats as instruments_search_stats
     return {
         "status": "healthy",
         "architecture": "trading-agent",
@@ -1062,6 +1089,7 @@ async def health_check():
             "vision": vision_agent_instance is not None
         },
         "registered_agents": list(orchestrator.specialized_agents.keys()) if orchestrator else [],
+        "instruments": instruments_search_stats(),
         "note": "Nifty Strategist v2 - AI Trading Agent for Indian Stock Market"
     }
 
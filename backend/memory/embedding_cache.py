@@ -0,0 +1,331 @@
+"""Shared, persistent embedding cache for every embedding call site.
+
+Memory retrieval, memory consolidation, thread search, notes and the doc
+indexers each called an embeddings API on their own, and the one cache that
+existed (``EmbeddingService.cache``) was an unbounded dict lost on restart. A
+restart followed by a reindex re-embedded every unchanged chunk; re-asking a
+recent question paid a full API round-trip again.
+
+Two tiers, one key — ``(model, dims, sha256(normalized text))``:
+
+- **Memory**: LRU of float16 vectors under a byte budget
+  (``EMBEDDING_CACHE_MEM_MB``, default 64 MB ≈ 10k 3072-d vectors).
+- **Disk**: SQLite (WAL) at ``EMBEDDING_CACHE_PATH`` (default
+  ``.cache/embeddings.sqlite3``), vectors stored as raw float16 blobs. Entries
+  unused for ``EMBEDDING_CACHE_TTL_DAYS`` are pruned on open.
+
+``get_or_compute`` resolves a whole batch at once: memory hits, then one
+``IN`` lookup on disk, then the misses (deduplicated, and shared with any
+identical request already in flight) go to the caller's ``compute`` function in
+``batch_size`` slices. float16 keeps ~3 significant digits, far below the
+noise that matters for cosine ranking; freshly computed vectors are returned
+at full precision.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache")
+CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", os.path.join(_CACHE_DIR, "embeddings.sqlite3"))
+MEM_BYTES = int(os.getenv("EMBEDDING_CACHE_MEM_MB", "64")) * (1 << 20)
+TTL_DAYS = float(os.getenv("EMBEDDING_CACHE_TTL_DAYS", "90"))
+
+# SQLite caps host parameters per statement (999 on older builds).
+_SQL_CHUNK = 500
+
+ComputeFn = Callable[[list[str]], Awaitable[list[list[float]]]]
+
+
+def normalize_text(text: str) -> str:
+    """Whitespace-collapsed text — what gets hashed into the cache key."""
+    return " ".join(text.split())
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+class _DiskStore:
+    """SQLite tier. Synchronous; callers run it off the event loop."""
+
+    def __init__(self, path: str, ttl_days: float):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    model TEXT NOT NULL,
+                    dims INTEGER NOT NULL,
+                    text_hash TEXT NOT NULL,
+                    vector BLOB NOT NULL,
+                    last_used REAL NOT NULL,
+                    PRIMARY KEY (model, dims, text_hash)
+                ) WITHOUT ROWID
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used)"
+            )
+            if ttl_days > 0:
+                cutoff = time.time() - ttl_days * 86400
+                pruned = self._conn.execute(
+                    "DELETE FROM embeddings WHERE last_used < ?", (cutoff,)
+                ).rowcount
+                if pruned:
+                    logger.info("[EmbeddingCache] pruned %d entries unused for %.0f days", pruned, ttl_days)
+
+    def get_many(self, model: str, dims: int, hashes: Sequence[str]) -> dict[str, np.ndarray]:
+        found: dict[str, np.ndarray] = {}
+        now = time.time()
+        with self._lock:
+            for i in range(0, len(hashes), _SQL_CHUNK):
+                chunk = list(hashes[i:i + _SQL_CHUNK])
+                marks = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings "
+                    f"WHERE model = ? AND dims = ? AND text_hash IN ({marks})",
+                    (model, dims, *chunk),
+                ).fetchall()
+                for h, blob in rows:
+                    found[h] = np.frombuffer(blob, dtype=np.float16)
+                if rows:
+                    self._conn.execute(
+                        f"UPDATE embeddings SET last_used = ? "
+                        f"WHERE model = ? AND dims = ? AND text_hash IN ({marks})",
+                        (now, model, dims, *chunk),
+                    )
+        return found
+
+    def put_many(self, model: str, dims: int, items: dict[str, np.ndarray]) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (model, dims, text_hash, vector, last_used) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    [(model, dims, h, v.tobytes(), now) for h, v in items.items()],
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class EmbeddingCache:
+    """Two-tier (memory LRU + SQLite) embedding cache with batched get-or-compute.
+
+    Args:
+        path: SQLite file, ``":memory:"``, or None for a memory-only cache.
+        max_bytes: Budget for the in-memory tier (float16 payload bytes).
+        ttl_days: Prune disk entries unused for this long (0 disables).
+    """
+
+    def __init__(self, path: Optional[str] = CACHE_PATH, max_bytes: int = MEM_BYTES,
+                 ttl_days: float = TTL_DAYS) -> None:
+        self._mem: "OrderedDict[tuple[str, int, str], np.ndarray]" = OrderedDict()
+        self._mem_bytes = 0
+        self._max_bytes = max_bytes
+        self._inflight: dict[tuple[str, int, str], asyncio.Future] = {}
+        self._disk: Optional[_DiskStore] = None
+        if path:
+            try:
+                self._disk = _DiskStore(path, ttl_days)
+            except (sqlite3.Error, OSError) as e:
+                logger.warning("[EmbeddingCache] disk tier unavailable (%s); memory only", e)
+
+        self.mem_hits = 0
+        self.disk_hits = 0
+        self.shared = 0
+        self.misses = 0
+        self.api_calls = 0
+
+    # ── Memory tier ──────────────────────────────────────────────────
+
+    def _mem_get(self, key: tuple[str, int, str]) -> Optional[np.ndarray]:
+        vec = self._mem.get(key)
+        if vec is not None:
+            self._mem.move_to_end(key)
+        return vec
+
+    def _mem_put(self, key: tuple[str, int, str], vec: np.ndarray) -> None:
+        old = self._mem.pop(key, None)
+        if old is not None:
+            self._mem_bytes -= old.nbytes
+        self._mem[key] = vec
+        self._mem_bytes += vec.nbytes
+        while self._mem_bytes > self._max_bytes and len(self._mem) > 1:
+            _, evicted = self._mem.popitem(last=False)
+            self._mem_bytes -= evicted.nbytes
+
+    # ── Public API ───────────────────────────────────────────────────
+
+    async def get_or_compute(
+        self,
+        model: str,
+        dims: int,
+        texts: Sequence[str],
+        compute: ComputeFn,
+        batch_size: int = 100,
+    ) -> list[list[float]]:
+        """Embeddings for ``texts`` in order, calling ``compute`` only for misses.
+
+        ``compute`` receives the caller's texts as given (one per distinct key,
+        at most ``batch_size`` at a time) and must return one vector per text.
+        Texts differing only in whitespace share a key. Errors from ``compute`` propagate;
+        nothing is cached for the failed slice.
+        """
+        if not texts:
+            return []
+        hashes = [text_hash(t) for t in texts]
+        out: dict[str, list[float]] = {}
+
+        # 1. Memory tier.
+        pending: list[str] = []
+        for h in dict.fromkeys(hashes):
+            vec = self._mem_get((model, dims, h))
+            if vec is not None:
+                self.mem_hits += 1
+                out[h] = vec.astype(np.float32).tolist()
+            else:
+                pending.append(h)
+
+        # 2. Disk tier, one batched lookup.
+        if pending and self._disk is not None:
+            try:
+                found = await asyncio.to_thread(self._disk.get_many, model, dims, pending)
+            except sqlite3.Error as e:
+                logger.warning("[EmbeddingCache] disk read failed: %s", e)
+                found = {}
+            for h, vec in found.items():
+                self.disk_hits += 1
+                self._mem_put((model, dims, h), vec)
+                out[h] = vec.astype(np.float32).tolist()
+            pending = [h for h in pending if h not in found]
+
+        # 3. Join identical requests already in flight; compute the rest.
+        waits: dict[str, asyncio.Future] = {}
+        mine: list[str] = []
+        for h in pending:
+            fut = self._inflight.get((model, dims, h))
+            if fut is not None:
+                self.shared += 1
+                waits[h] = fut
+            else:
+                mine.append(h)
+
+        if mine:
+            loop = asyncio.get_running_loop()
+            futs = {h: loop.create_future() for h in mine}
+            for h, fut in futs.items():
+                self._inflight[(model, dims, h)] = fut
+            text_of: dict[str, str] = {}
+            for h, t in zip(hashes, texts):
+                text_of.setdefault(h, t)
+            try:
+                for i in range(0, len(mine), batch_size):
+                    chunk = mine[i:i + batch_size]
+                    self.api_calls += 1
+                    self.misses += len(chunk)
+                    vectors = await compute([text_of[h] for h in chunk])
+                    if len(vectors) != len(chunk):
+                        raise ValueError(
+                            f"embedding backend returned {len(vectors)} vectors for {len(chunk)} texts"
+                        )
+                    fresh: dict[str, np.ndarray] = {}
+                    for h, vec in zip(chunk, vectors):
+                        vec = list(vec)
+                        out[h] = vec
+                        fresh[h] = np.asarray(vec, dtype=np.float16)
+                        self._mem_put((model, dims, h), fresh[h])
+                        futs[h].set_result(vec)
+                    await self._persist(model, dims, fresh)
+            except BaseException as e:
+                for fut in futs.values():
+                    if not fut.done():
+                        fut.set_exception(e)
+                        fut.exception()  # mark retrieved; waiters re-raise it
+                raise
+            finally:
+                for h in mine:
+                    self._inflight.pop((model, dims, h), None)
+
+        for h, fut in waits.items():
+            out[h] = await fut
+
+        return [out[h] for h in hashes]
+
+    async def get_or_compute_one(self, model: str, dims: int, text: str,
+                                 compute: ComputeFn) -> list[float]:
+        return (await self.get_or_compute(model, dims, [text], compute))[0]
+
+    async def _persist(self, model: str, dims: int, items: dict[str, np.ndarray]) -> None:
+        if self._disk is None or not items:
+            return
+        try:
+            await asyncio.to_thread(self._disk.put_many, model, dims, items)
+        except sqlite3.Error as e:
+            logger.warning("[EmbeddingCache] disk write failed: %s", e)
+
+    def clear(self) -> None:
+        """Drop both tiers."""
+        self._mem.clear()
+        self._mem_bytes = 0
+        if self._disk is not None:
+            self._disk.clear()
+
+    def stats(self) -> dict:
+        lookups = self.mem_hits + self.disk_hits + self.shared + self.misses
+        return {
+            "mem_entries": len(self._mem),
+            "mem_bytes": self._mem_bytes,
+            "disk_entries": self._disk.count() if self._disk is not None else 0,
+            "mem_hits": self.mem_hits,
+            "disk_hits": self.disk_hits,
+            "shared": self.shared,
+            "misses": self.misses,
+            "api_calls": self.api_calls,
+            "hit_rate_percent": round(
+                (lookups - self.misses) / lookups * 100, 2
+            ) if lookups else 0.0,
+        }
+
+
+_cache: Optional[EmbeddingCache] = None
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Process-wide embedding cache singleton."""
+    global _cache
+    if _cache is None:
+        _cache = EmbeddingCache()
+    return _cache
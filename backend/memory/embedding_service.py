@@ -2,7 +2,6 @@
 
 import os
 import asyncio
-import hashlib
 import logging
 from typing import List, Dict, Optional, Union, Any
 from dataclasses import dataclass
@@ -13,6 +12,8 @@ from functools import lru_cache
 import json
 import tiktoken
 
+from memory.embedding_cache import get_embedding_cache
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -31,9 +32,8 @@ class EmbeddingService:
         self.dimensions = 3072
         self.max_batch_size = 100  # OpenAI's batch limit
         self.max_tokens = 8191  # text-embedding-3-large token limit
-        self.cache: Dict[str, EmbeddingResult] = {}
-        self.cache_hits = 0
-        self.cache_misses = 0
+        self.cache = get_embedding_cache()
+        self._tokens_used = 0
 
         # Initialize tokenizer for accurate token counting
         try:
@@ -42,10 +42,6 @@ class EmbeddingService:
             # Fallback to cl100k_base encoding (used by most modern OpenAI models)
             self.tokenizer = tiktoken.get_encoding("cl100k_base")
         
-    def _get_cache_key(self, text: str) -> str:
-        """Generate cache key for text"""
-        return hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
-    
     def _clean_text(self, text: str) -> str:
         """Clean and normalize text for embedding, ensuring it fits within token limit"""
         # Remove excessive whitespace
@@ -66,123 +62,56 @@ class EmbeddingService:
 
         return text
     
-    async def get_embedding(self, text: str) -> EmbeddingResult:
-        """Get embedding for a single text"""
-        text = self._clean_text(text)
-        cache_key = self._get_cache_key(text)
-        
-        # Check cache first
-        if cache_key in self.cache:
-            self.cache_hits += 1
-            result = self.cache[cache_key]
-            return EmbeddingResult(
-                embedding=result.embedding,
-                token_count=result.token_count,
-                cached=True
-            )
-        
+    async def _request_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """One embeddings API call — only reached on a cache miss."""
         try:
             response = await self.client.embeddings.create(
                 model=self.model,
-                input=[text],
+                input=texts,
                 dimensions=self.dimensions
             )
-            
-            embedding = response.data[0].embedding
-            token_count = response.usage.total_tokens
-            
-            result = EmbeddingResult(
-                embedding=embedding,
-                token_count=token_count,
-                cached=False
-            )
-            
-            # Cache the result
-            self.cache[cache_key] = result
-            self.cache_misses += 1
-            
-            return result
-            
         except Exception as e:
-            logger.error(f"Failed to generate embedding: {e}")
+            logger.error(f"Failed to generate embeddings: {e}")
             raise
-    
+        self._tokens_used += response.usage.total_tokens
+        return [item.embedding for item in response.data]
+
+    async def get_embedding(self, text: str) -> EmbeddingResult:
+        """Get embedding for a single text"""
+        return (await self.get_embeddings_batch([text]))[0]
+
     async def get_embeddings_batch(self, texts: List[str]) -> List[EmbeddingResult]:
-        """Get embeddings for multiple texts efficiently"""
+        """Get embeddings for multiple texts efficiently.
+
+        Served from the shared embedding cache (memory, then disk); only the
+        misses reach the API, in batches of ``max_batch_size``.
+        """
         if not texts:
             return []
-        
-        # Process in batches
+        cleaned_texts = [self._clean_text(text) for text in texts]
+        computed: set = set()
+        tokens_before = self._tokens_used
+
+        async def _compute(batch: List[str]) -> List[List[float]]:
+            computed.update(batch)
+            return await self._request_embeddings(batch)
+
+        embeddings = await self.cache.get_or_compute(
+            self.model, self.dimensions, cleaned_texts, _compute,
+            batch_size=self.max_batch_size,
+        )
+        # Token usage is only reported per API call; spread it over the misses.
+        per_text = (self._tokens_used - tokens_before) // max(len(computed), 1)
         results = []
-        for i in range(0, len(texts), self.max_batch_size):
-            batch = texts[i:i + self.max_batch_size]
-            batch_results = await self._process_batch(batch)
-            results.extend(batch_results)
-        
+        for text, embedding in zip(cleaned_texts, embeddings):
+            fresh = text in computed
+            results.append(EmbeddingResult(
+                embedding=embedding,
+                token_count=per_text if fresh else 0,
+                cached=not fresh
+            ))
         return results
-    
-    async def _process_batch(self, texts: List[str]) -> List[EmbeddingResult]:
-        """Process a batch of texts"""
-        cleaned_texts = [self._clean_text(text) for text in texts]
-        cache_keys = [self._get_cache_key(text) for text in cleaned_texts]
-        
-        # Separate cached and non-cached texts
-        cached_results = {}
-        non_cached_texts = []
-        non_cached_indices = []
-        
-        for i, (text, cache_key) in enumerate(zip(cleaned_texts, cache_keys)):
-            if cache_key in self.cache:
-                cached_results[i] = self.cache[cache_key]
-                self.cache_hits += 1
-            else:
-                non_cached_texts.append(text)
-                non_cached_indices.append(i)
-        
-        # Get embeddings for non-cached texts
-        new_embeddings = {}
-        if non_cached_texts:
-            try:
-                response = await self.client.embeddings.create(
-                    model=self.model,
-                    input=non_cached_texts,
-                    dimensions=self.dimensions
-                )
-                
-                for i, (embedding_data, text_idx) in enumerate(zip(response.data, non_cached_indices)):
-                    embedding = embedding_data.embedding
-                    token_count = response.usage.total_tokens // len(non_cached_texts)  # Approximate
-                    
-                    result = EmbeddingResult(
-                        embedding=embedding,
-                        token_count=token_count,
-                        cached=False
-                    )
-                    
-                    new_embeddings[text_idx] = result
-                    cache_key = cache_keys[text_idx]
-                    self.cache[cache_key] = result
-                    self.cache_misses += 1
-                    
-            except Exception as e:
-                logger.error(f"Failed to generate batch embeddings: {e}")
-                raise
-        
-        # Combine results in original order
-        final_results = []
-        for i in range(len(texts)):
-            if i in cached_results:
-                result = cached_results[i]
-                final_results.append(EmbeddingResult(
-                    embedding=result.embedding,
-                    token_count=result.token_count,
-                    cached=True
-                ))
-            else:
-                final_results.append(new_embeddings[i])
-        
-        return final_results
-    
+
     def cosine_similarity(self, vec1: List[float], vec2: List[float]) -> float:
         """Calculate cosine similarity between two vectors"""
         try:
@@ -211,23 +140,12 @@ class EmbeddingService:
         return [self.cosine_similarity(query_embedding, target) for target in target_embeddings]
     
     def get_cache_stats(self) -> Dict[str, Any]:
-        """Get cache performance statistics"""
-        total_requests = self.cache_hits + self.cache_misses
-        hit_rate = (self.cache_hits / total_requests * 100) if total_requests > 0 else 0
-        
-        return {
-            "cache_size": len(self.cache),
-            "cache_hits": self.cache_hits,
-            "cache_misses": self.cache_misses,
-            "hit_rate_percent": round(hit_rate, 2),
-            "total_requests": total_requests
-        }
-    
+        """Get cache performance statistics (shared across all embedding callers)"""
+        return {**self.cache.stats(), "tokens_used": self._tokens_used}
+
     def clear_cache(self):
         """Clear embedding cache"""
         self.cache.clear()
-        self.cache_hits = 0
-        self.cache_misses = 0
         logger.info("Embedding cache cleared")
 
 # Global singleton instance
@@ -21,6 +21,8 @@ from typing import Dict, List
 
 import httpx
 
+from memory.embedding_cache import get_embedding_cache
+
 logger = logging.getLogger(__name__)
 
 # Contextualized embeddings use a separate endpoint from standard embeddings
@@ -139,23 +141,29 @@ class PplxEmbeddingService:
     async def get_embedding(self, text: str) -> PplxEmbeddingResult:
         """Embed a single text (for search queries). Uses standard endpoint.
 
-        Search queries don't need contextualization — they're standalone.
+        Search queries don't need contextualization — they're standalone, so
+        they go through the shared persistent embedding cache. Contextualized
+        turn embeddings depend on their sibling turns and are not shared.
         """
-        key = self._cache_key(text)
-        if key in self._cache:
-            self._cache_hits += 1
-            return PplxEmbeddingResult(embedding=self._cache[key], cached=True)
+        called = False
 
-        self._cache_misses += 1
-        text = " ".join(text.split())
+        async def _compute(texts: List[str]) -> List[List[float]]:
+            nonlocal called
+            called = True
+            return await self._call_standard_api(texts)
 
         try:
-            embeddings = await self._call_standard_api([text])
-            self._cache[key] = embeddings[0]
-            return PplxEmbeddingResult(embedding=embeddings[0], cached=False)
+            embedding = await get_embedding_cache().get_or_compute_one(
+                self.STANDARD_MODEL, self.DIMENSIONS, text, _compute,
+            )
         except Exception as e:
             logger.error("Perplexity embedding failed: %s", e)
             raise
+        if called:
+            self._cache_misses += 1
+        else:
+            self._cache_hits += 1
+        return PplxEmbeddingResult(embedding=embedding, cached=not called)
 
     async def get_embeddings_batch(self, texts: List[str]) -> List[PplxEmbeddingResult]:
         """Embed multiple texts from the same thread using contextualized API.
@@ -0,0 +1,13 @@
+-- Incremental documentation indexing (services/doc_index_pipeline.py).
+-- Per-file and per-chunk SHA-256 hashes let DocIndexer / UnifiedDocsIndexer
+-- skip unchanged files and re-embed only changed chunks. NULL hashes (rows
+-- from before this migration) are treated as changed on the next run.
+
+ALTER TABLE docs ADD COLUMN IF NOT EXISTS content_hash TEXT;
+
+ALTER TABLE doc_chunks ADD COLUMN IF NOT EXISTS file_hash TEXT;
+ALTER TABLE doc_chunks ADD COLUMN IF NOT EXISTS chunk_hash TEXT;
+
+-- Bulk upserts target (file_path, chunk_index); make sure the unique index
+-- exists on databases created before it was declared.
+CREATE UNIQUE INDEX IF NOT EXISTS idx_doc_chunks_file_chunk ON doc_chunks(file_path, chunk_index);
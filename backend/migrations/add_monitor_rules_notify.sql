@@ -0,0 +1,46 @@
+-- Change-data capture for monitor_rules. The trade-monitor daemon LISTENs on
+-- 'monitor_rules_changed' and applies per-rule deltas within milliseconds
+-- instead of waiting for its full reload (now a slow consistency sweep). The
+-- payload is the row id + user_id + op; the daemon re-reads the row itself, so
+-- the 8000-byte NOTIFY limit never matters. SQLite dev/test falls back to an
+-- updated_at high-water-mark scan, hence the index. See monitor/rule_changes.py.
+
+CREATE INDEX IF NOT EXISTS idx_monitor_rules_updated_at ON monitor_rules (updated_at);
+
+CREATE OR REPLACE FUNCTION notify_monitor_rules_changed()
+RETURNS TRIGGER AS $$
+DECLARE
+    r monitor_rules%ROWTYPE;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        r := OLD;
+    ELSE
+        r := NEW;
+    END IF;
+    PERFORM pg_notify(
+        'monitor_rules_changed',
+        json_build_object('id', r.id, 'user_id', r.user_id, 'op', TG_OP)::text
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Fire-state columns the daemon itself writes on every fire (fire_count,
+-- fired_at) and the updated_at stamp are excluded from the UPDATE comparison,
+-- so state-only persister flushes don't wake every listener. Config edits and
+-- enabled flips still notify. WHEN can't see OLD on INSERT, hence two triggers.
+DROP TRIGGER IF EXISTS trg_monitor_rules_notify ON monitor_rules;
+CREATE TRIGGER trg_monitor_rules_notify
+    AFTER INSERT OR DELETE ON monitor_rules
+    FOR EACH ROW EXECUTE FUNCTION notify_monitor_rules_changed();
+
+DROP TRIGGER IF EXISTS trg_monitor_rules_notify_update ON monitor_rules;
+CREATE TRIGGER trg_monitor_rules_notify_update
+    AFTER UPDATE ON monitor_rules
+    FOR EACH ROW
+    WHEN (
+        (to_jsonb(OLD) - ARRAY['fire_count', 'fired_at', 'updated_at'])
+        IS DISTINCT FROM
+        (to_jsonb(NEW) - ARRAY['fire_count', 'fired_at', 'updated_at'])
+    )
+    EXECUTE FUNCTION notify_monitor_rules_changed();
@@ -4,11 +4,19 @@ Without seeding, every daemon restart leaves candle buffers empty, and
 indicators silently return None until enough live ticks accumulate.
 For an atr_period=100 halftrend on 1m candles that's >1.5 hours of
 dead time per restart.
+
+Seeds go through ``SEED_COORDINATOR``: every buffer on the same
+(instrument, timeframe) — ten users' NIFTY 5m rules, a scalp session on the
+same underlying — shares one historical fetch, concurrent fetches for
+different keys run together, and ``get_historical_data`` paces the requests
+through its shared Upstox rate limiter. A fetched seed is reused until the
+bar it ends on closes, so a 09:00 restart warms every buffer in one wave.
 """
 from __future__ import annotations
 
+import asyncio
 import logging
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from typing import Any
 
 from monitor.candle_buffer import CandleBuffer
@@ -67,40 +75,33 @@ def _to_naive_utc(ts: Any) -> datetime | None:
     return dt
 
 
-async def seed_candle_buffer(
-    buf: CandleBuffer,
-    upstox_client: Any,
-    instrument_token: str,
-    tf_minutes: int,
-    max_candles: int = 200,
-) -> int:
-    """Seed ``buf`` with recent historical candles for ``instrument_token``.
+# NSE session open (09:15 IST) in UTC — bar boundaries are aligned to it.
+_SESSION_ANCHOR_UTC = (3, 45)
 
-    Returns the number of candles seeded (0 if seeding was skipped or
-    failed). All errors are swallowed with a warning — seeding is an
-    optimization, not a correctness requirement.
-    """
-    if len(buf.get_candles()) > 0:
-        return 0  # already has data, don't clobber
-    interval = _INTERVAL_MAP.get(tf_minutes)
-    if interval is None:
-        return 0  # unsupported timeframe for Upstox historical API
-    days = _seed_days(tf_minutes)
-    try:
-        bars = await upstox_client.get_historical_data(
-            symbol="",  # unused when instrument_key provided
-            interval=interval,
-            days=days,
-            instrument_key=instrument_token,
-        )
-    except Exception as e:
-        logger.warning(
-            "Candle seed failed for %s tf=%dm: %s",
-            instrument_token, tf_minutes, e,
-        )
-        return 0
+
+def _bar_close_after(now: datetime, tf_minutes: int) -> datetime:
+    """End of the ``tf_minutes`` bar containing naive-UTC ``now``."""
+    anchor = now.replace(
+        hour=_SESSION_ANCHOR_UTC[0], minute=_SESSION_ANCHOR_UTC[1],
+        second=0, microsecond=0,
+    )
+    step = timedelta(minutes=tf_minutes)
+    return anchor + ((now - anchor) // step + 1) * step
+
+
+async def _fetch_seed_candles(
+    upstox_client: Any, instrument_token: str, tf_minutes: int,
+) -> list[dict]:
+    """Fetch and normalize the seed window (oldest-first candle dicts)."""
+    interval = _INTERVAL_MAP[tf_minutes]
+    bars = await upstox_client.get_historical_data(
+        symbol="",  # unused when instrument_key provided
+        interval=interval,
+        days=_seed_days(tf_minutes),
+        instrument_key=instrument_token,
+    )
     if not bars:
-        return 0
+        return []
 
     # Upstox sometimes returns newest-first; normalize to oldest-first.
     if len(bars) >= 2:
@@ -122,11 +123,114 @@ async def seed_candle_buffer(
             "close": float(b.close),
             "volume": int(b.volume or 0),
         })
+    return candles
+
+
+class SeedCoordinator:
+    """Share historical seed fetches between buffers on the same key.
+
+    Keyed by (instrument_token, tf_minutes). A request for a key already
+    being fetched awaits that fetch; a request for a key fetched earlier in
+    the same bar gets the cached candles. At most ``max_inflight`` distinct
+    fetches run at once — the Upstox limiter inside ``get_historical_data``
+    does the actual pacing. Failures are not cached, so the callers' own
+    retry/backoff still applies.
+    """
+
+    def __init__(self, max_inflight: int = 4) -> None:
+        self._max_inflight = max_inflight
+        # Rebuilt per event loop: the coordinator is module-level and a
+        # Semaphore binds to the loop it first blocks on.
+        self._sem: asyncio.Semaphore | None = None
+        self._sem_loop: asyncio.AbstractEventLoop | None = None
+        self._inflight: dict[tuple[str, int], asyncio.Future] = {}
+        self._cache: dict[tuple[str, int], tuple[datetime, list[dict]]] = {}
+        self._requests = 0
+        self._fetches = 0
+        self._shared = 0
+
+    async def candles(
+        self, upstox_client: Any, instrument_token: str, tf_minutes: int,
+    ) -> list[dict]:
+        """Seed candles for the key (possibly shared). ``[]`` on failure."""
+        key = (instrument_token, tf_minutes)
+        self._requests += 1
+        now = datetime.utcnow()
+        hit = self._cache.get(key)
+        if hit is not None and now < hit[0]:
+            self._shared += 1
+            return hit[1]
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self._shared += 1
+            return await asyncio.shield(pending)
+
+        loop = asyncio.get_running_loop()
+        if self._sem is None or self._sem_loop is not loop:
+            self._sem, self._sem_loop = asyncio.Semaphore(self._max_inflight), loop
+        fut = loop.create_future()
+        self._inflight[key] = fut
+        candles: list[dict] = []
+        try:
+            async with self._sem:
+                self._fetches += 1
+                candles = await _fetch_seed_candles(
+                    upstox_client, instrument_token, tf_minutes,
+                )
+        except Exception as e:
+            logger.warning(
+                "Candle seed failed for %s tf=%dm: %s",
+                instrument_token, tf_minutes, e,
+            )
+        finally:
+            self._inflight.pop(key, None)
+            fut.set_result(candles)
+        if candles:
+            now = datetime.utcnow()
+            self._cache = {k: v for k, v in self._cache.items() if now < v[0]}
+            self._cache[key] = (_bar_close_after(now, tf_minutes), candles)
+        return candles
+
+    def stats(self) -> dict:
+        return {
+            "requests": self._requests,
+            "fetches": self._fetches,
+            "shared": self._shared,
+            "cached_keys": len(self._cache),
+        }
+
+
+SEED_COORDINATOR = SeedCoordinator()
+
+
+async def seed_candle_buffer(
+    buf: CandleBuffer,
+    upstox_client: Any,
+    instrument_token: str,
+    tf_minutes: int,
+    max_candles: int = 200,
+) -> int:
+    """Seed ``buf`` with recent historical candles for ``instrument_token``.
+
+    Returns the number of candles seeded (0 if seeding was skipped or
+    failed). All errors are swallowed with a warning — seeding is an
+    optimization, not a correctness requirement.
+    """
+    if len(buf.get_candles()) > 0:
+        return 0  # already has data, don't clobber
+    if tf_minutes not in _INTERVAL_MAP:
+        return 0  # unsupported timeframe for Upstox historical API
+    candles = await SEED_COORDINATOR.candles(
+        upstox_client, instrument_token, tf_minutes,
+    )
+    if not candles:
+        return 0
 
     # Trim to max_candles so the buffer's deque doesn't immediately
-    # evict seeded history on the first live tick.
-    if len(candles) > max_candles:
-        candles = candles[-max_candles:]
+    # evict seeded history on the first live tick. Copies: the buffer
+    # mutates its last candle in place as ticks arrive, and the list is
+    # shared with every other buffer on this key.
+    candles = [dict(c) for c in candles[-max_candles:]]
 
     buf.seed(candles)
     logger.info(
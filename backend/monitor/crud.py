@@ -5,7 +5,7 @@ import logging
 from datetime import datetime, timedelta
 from typing import Any
 
-from sqlalchemy import or_, select, update, delete
+from sqlalchemy import bindparam, or_, select, update, delete
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from database.models import MonitorRule as MonitorRuleDB, MonitorLog as MonitorLogDB, utc_now
@@ -346,6 +346,39 @@ async def sync_rule_fire_state(
         await session.commit()
 
 
+async def apply_rule_state_batch(
+    session: AsyncSession,
+    updates: dict[int, dict[str, Any]],
+) -> int:
+    """Persist coalesced daemon state for many rules in one transaction.
+
+    ``updates`` maps rule_id to the columns to set — any of trigger_config,
+    fire_count and enabled, plus the ``updated_at`` stamp the persister
+    passes explicitly so it can tell its own writes from foreign edits (see
+    monitor/state_persister.py). Rules deleted in the meantime simply match
+    no row. Returns the number of rules in the batch.
+
+    Rules are grouped by the set of columns they change and each group is
+    one executemany UPDATE, so a flush costs a statement per column set
+    (usually one or two) rather than one per rule.
+    """
+    if not updates:
+        return 0
+    groups: dict[tuple[str, ...], list[dict[str, Any]]] = {}
+    for rule_id, fields in updates.items():
+        groups.setdefault(tuple(sorted(fields)), []).append({"b_id": rule_id, **fields})
+    table = MonitorRuleDB.__table__
+    for columns, params in groups.items():
+        await session.execute(
+            update(table)
+            .where(table.c.id == bindparam("b_id"))
+            .values({c: bindparam(c) for c in columns}),
+            params,
+        )
+    await session.commit()
+    return len(updates)
+
+
 async def get_logs(
     session: AsyncSession,
     user_id: int,
@@ -464,6 +497,44 @@ async def get_active_rules_for_daemon(session: AsyncSession) -> list[MonitorRule
     return list(result.scalars().all())
 
 
+async def get_rules_by_ids(
+    session: AsyncSession, rule_ids: list[int] | set[int],
+) -> list[MonitorRuleDB]:
+    """Get rules by id regardless of state (for the daemon's change feed).
+
+    Ids that no longer exist are simply absent from the result.
+    """
+    if not rule_ids:
+        return []
+    stmt = select(MonitorRuleDB).where(MonitorRuleDB.id.in_(list(rule_ids)))
+    result = await session.execute(stmt)
+    return list(result.scalars().all())
+
+
+async def get_rule_versions_since(
+    session: AsyncSession, since: datetime | None,
+) -> list[tuple[int, datetime]]:
+    """Return (id, updated_at) for rules updated at or after ``since``.
+
+    ``since=None`` returns only the newest version, so a fresh change feed
+    can seed its high-water mark without reading the whole table.
+    """
+    if since is None:
+        stmt = (
+            select(MonitorRuleDB.id, MonitorRuleDB.updated_at)
+            .order_by(MonitorRuleDB.updated_at.desc())
+            .limit(1)
+        )
+    else:
+        stmt = (
+            select(MonitorRuleDB.id, MonitorRuleDB.updated_at)
+            .where(MonitorRuleDB.updated_at >= since)
+            .order_by(MonitorRuleDB.updated_at)
+        )
+    result = await session.execute(stmt)
+    return [(rid, ts) for rid, ts in result.all()]
+
+
 async def auto_disable_expired_rules(session: AsyncSession) -> int:
     """Disable all enabled rules whose expires_at has passed. Returns count."""
     stmt = (
@@ -9,6 +9,7 @@ from __future__ import annotations
 import asyncio
 import logging
 import os
+import time
 from datetime import datetime, time as dt_time, timedelta, timezone
 from typing import Optional
 
@@ -20,8 +21,10 @@ from database.session import get_db_context
 from monitor import crud
 from monitor.action_executor import ActionExecutor
 from monitor.models import MonitorRule
+from monitor.rule_changes import RuleChangeFeed
 from monitor.rule_evaluator import EvalContext, RuleResult, evaluate_rule
 from monitor.scalp_session import ScalpSessionManager
+from monitor.state_persister import RuleStatePersister
 from monitor.user_manager import UserManager
 from services.upstox_client import UpstoxClient
 
@@ -42,7 +45,10 @@ class MonitorDaemon:
 
     Args:
         paper_mode: If True, ActionExecutor logs actions instead of executing.
-        poll_interval: Seconds between DB polls and time-rule checks.
+        poll_interval: Seconds between DB polls and time-rule checks. With the
+            rule change feed running, the full rule reload only runs every
+            ``NF_RULE_SWEEP_S`` seconds as a consistency sweep; the token and
+            session health pass still runs every poll.
     """
 
     def __init__(
@@ -128,7 +134,17 @@ class MonitorDaemon:
             if os.getenv("NF_SECTOR_FLOW_FEED", "0").lower() in ("1", "true", "yes"):
                 from monitor.sector_flow_streamer import SectorFlowStreamer
 
-                self._sector_flow = SectorFlowStreamer(self._market_pool)
+                # NF_SCAN_ENGINE=1 also runs the in-process candidate scan off
+                # the same ticks, retiring the scan_cache_writer subprocess.
+                # NF_SECTOR_FLOW_UNIVERSE / NF_SECTOR_FLOW_TF_MIN widen the
+                # sensor (e.g. nifty_total on 5-min bars) — the columnar compute
+                # keeps either cheap.
+                self._sector_flow = SectorFlowStreamer(
+                    self._market_pool,
+                    universe=os.getenv("NF_SECTOR_FLOW_UNIVERSE", "nifty500"),
+                    timeframe_min=int(os.getenv("NF_SECTOR_FLOW_TF_MIN", "15")),
+                    scan_engine=os.getenv("NF_SCAN_ENGINE", "0").lower() in ("1", "true", "yes"),
+                )
 
         self._user_manager = UserManager(
             on_tick=self._on_tick,
@@ -162,6 +178,27 @@ class MonitorDaemon:
         # 2026-05-11 TATACONSUM incident — a 40s SDK call was repeatedly
         # interrupted by 30s polls, each firing place_order on the same rule.
         self._rule_inflight_locks: dict[int, asyncio.Lock] = {}
+        # Write-behind sink for trailing-stop trigger_config and chain/revert
+        # fire state. Trailing highs/lows coalesce per rule and flush on a
+        # timer; order-affecting transitions flush synchronously.
+        self._state_persister = RuleStatePersister(
+            flush_interval_ms=float(os.getenv("NF_RULE_STATE_FLUSH_MS", "500")),
+            max_pending=int(os.getenv("NF_RULE_STATE_FLUSH_MAX", "200")),
+        )
+        # Change-data capture on monitor_rules (NF_RULE_CHANGE_FEED=0 to
+        # disable): new/edited/deleted rules apply as per-rule deltas within
+        # milliseconds, and the full reload in _poll_rules drops to a slow
+        # consistency sweep (tokens/sessions are still checked every poll by
+        # _check_sessions). Serialized with the sweep via _rules_sync_lock.
+        self._rule_feed: RuleChangeFeed | None = None
+        if os.getenv("NF_RULE_CHANGE_FEED", "1").lower() in ("1", "true", "yes"):
+            self._rule_feed = RuleChangeFeed(
+                self._apply_rule_changes,
+                poll_interval=float(os.getenv("NF_RULE_FEED_POLL_S", "1.0")),
+            )
+        self._rule_sweep_interval = float(os.getenv("NF_RULE_SWEEP_S", "300"))
+        self._last_rule_sweep = 0.0
+        self._rules_sync_lock = asyncio.Lock()
 
     # ── Public API ────────────────────────────────────────────────────
 
@@ -172,6 +209,7 @@ class MonitorDaemon:
         time triggers. Runs until ``stop()`` is called.
         """
         self._running = True
+        self._state_persister.start()
         logger.info(
             "Monitor daemon starting (paper=%s, shared_feed=%s, owner_uid=%s)",
             self._paper_mode,
@@ -211,11 +249,16 @@ class MonitorDaemon:
         await self._poll_rules()
         await self._scalp_manager.load_sessions()
         await self._scalp_manager.reconcile_on_startup()
+        if self._rule_feed is not None:
+            await self._rule_feed.start()
 
         # Main loop: poll rules + scalp sessions + check time triggers
         while self._running:
             await asyncio.sleep(self._poll_interval)
-            await self._poll_rules()
+            if self._rule_sweep_due():
+                await self._poll_rules()
+            else:
+                await self._check_sessions()
             await self._scalp_manager.load_sessions()
             await self._check_time_rules()
             await self._scalp_manager.check_time_squareoff()
@@ -223,12 +266,17 @@ class MonitorDaemon:
     async def stop(self) -> None:
         """Graceful shutdown — stops all user sessions."""
         self._running = False
+        if self._rule_feed is not None:
+            await self._rule_feed.stop()
         if self._sector_flow is not None:
             await self._sector_flow.stop()
         await self._user_manager.stop_all()
         if self._market_pool is not None:
             await self._market_pool.stop()
-        logger.info("Monitor daemon stopped")
+        await self._state_persister.stop()
+        logger.info(
+            "Monitor daemon stopped (rule state: %s)", self._state_persister.stats(),
+        )
 
     def set_access_token(self, user_id: int, token: str) -> None:
         """Manually set an access token (overrides DB lookup for this user).
@@ -375,7 +423,20 @@ class MonitorDaemon:
 
     # ── Rule polling ──────────────────────────────────────────────────
 
+    def _rule_sweep_due(self) -> bool:
+        """Full reload every poll while the change feed is down, else every
+        ``_rule_sweep_interval`` seconds."""
+        if self._rule_feed is None or not self._rule_feed.healthy:
+            return True
+        return time.monotonic() - self._last_rule_sweep >= self._rule_sweep_interval
+
     async def _poll_rules(self) -> None:
+        """Full reload (consistency sweep), serialized with feed deltas."""
+        async with self._rules_sync_lock:
+            await self._reload_rules()
+        self._last_rule_sweep = time.monotonic()
+
+    async def _reload_rules(self) -> None:
         """Load active rules from DB, fetch tokens, and sync user sessions.
 
         Groups rules by user_id, loads access tokens from the DB for
@@ -405,6 +466,8 @@ class MonitorDaemon:
         rules_by_user: dict[int, list[MonitorRule]] = {}
         for db_rule in db_rules:
             schema = crud.db_rule_to_schema(db_rule)
+            # Unflushed trailing highs / chain state are newer than the row.
+            self._state_persister.overlay(schema, db_rule.updated_at)
             rules_by_user.setdefault(schema.user_id, []).append(schema)
 
         # Load access tokens and order node URLs from DB for all users with
@@ -439,56 +502,105 @@ class MonitorDaemon:
 
         # Sync or restart existing users
         for uid in old_users & new_users:
-            token = self._access_tokens.get(uid)
-            if not token:
-                # Token expired mid-session — stop the user
-                await self._user_manager.stop_user(uid)
-                logger.info(
-                    "Stopped session for user %d (token expired)", uid
-                )
-                continue
-            scalp_instruments = self._scalp_manager.get_subscribed_instruments(uid)
-            session = self._user_manager.get_session(uid)
-            if session is None:
-                # Session was destroyed (e.g. by auth failure handler)
-                # but user still has rules and a valid token — re-create
-                logger.info(
-                    "Re-creating session for user %d (session lost, token valid)",
-                    uid,
-                )
-                await self._user_manager.start_user(
-                    uid, token, rules_by_user[uid],
-                    extra_instruments=scalp_instruments or None,
-                )
-            elif session.access_token != token:
-                # Token changed (e.g. TOTP refresh) — restart streams
-                logger.info("Token changed for user %d, restarting streams", uid)
-                await self._user_manager.start_user(
-                    uid, token, rules_by_user[uid],
-                    extra_instruments=scalp_instruments or None,
-                )
-                # If this user owns the shared market feed, the pool's
-                # underlying token also needs to roll. ``rotate_token``
-                # rebuilds the stream and re-subscribes to the union of
-                # all current interest.
-                if (
-                    self._market_pool is not None
-                    and uid == self._feed_owner_user_id
-                ):
-                    await self._market_pool.rotate_token()
-            else:
-                await self._user_manager.sync_rules(
-                    uid, rules_by_user[uid],
-                    extra_instruments=scalp_instruments or None,
-                )
+            await self._sync_user_session(uid, rules_by_user[uid], resync=True)
 
         self._rules_by_user = rules_by_user
 
         # Ensure scalp-only users (no rules but have sessions) get started.
         # Rule-based users already had scalp instruments merged into their
         # subscription set above via extra_instruments.
+        await self._start_scalp_only_sessions(new_users)
+
+        # Periodic summary — helps confirm daemon is alive and processing
+        total_rules = sum(len(r) for r in rules_by_user.values())
+        total_sessions = sum(len(s) for s in self._scalp_manager._sessions.values())
+        active_users = [uid for uid in rules_by_user if uid in self._access_tokens]
+        logger.info(
+            "Poll cycle: %d active rules, %d scalp sessions for %d users %s",
+            total_rules, total_sessions, len(active_users), active_users,
+        )
+        logger.info("Rule state persister: %s", self._state_persister.stats())
+        if self._rule_feed is not None:
+            logger.info("Rule change feed: %s", self._rule_feed.stats())
+
+    async def _check_sessions(self) -> None:
+        """Token/session health pass run every poll between rule sweeps.
+
+        Reloads access tokens for the users already in memory and, against
+        the in-memory rule lists, stops sessions whose token expired,
+        re-creates sessions dropped by ``_on_stream_auth_failure`` and
+        restarts streams (rotating the shared feed) when a token changed.
+        Rules themselves are not re-read — the change feed and the slow
+        sweep own that.
+        """
+        async with self._rules_sync_lock:
+            rule_users = set(self._rules_by_user)
+            await self._load_user_configs(
+                rule_users | set(self._scalp_manager._sessions.keys())
+            )
+            for uid in rule_users:
+                await self._sync_user_session(
+                    uid, self._rules_by_user[uid], resync=False,
+                )
+            await self._start_scalp_only_sessions(rule_users)
+
+    async def _sync_user_session(
+        self, uid: int, rules: list[MonitorRule], *, resync: bool
+    ) -> None:
+        """Reconcile one rule user's session with their current token.
+
+        With ``resync`` a healthy session also gets ``rules`` pushed via
+        sync_rules (the full sweep); without it a healthy session is left
+        alone.
+        """
+        token = self._access_tokens.get(uid)
+        session = self._user_manager.get_session(uid)
+        if not token:
+            if session is not None:
+                # Token expired mid-session — stop the user
+                await self._user_manager.stop_user(uid)
+                logger.info(
+                    "Stopped session for user %d (token expired)", uid
+                )
+            return
+        scalp_instruments = self._scalp_manager.get_subscribed_instruments(uid)
+        if session is None:
+            # Session was destroyed (e.g. by auth failure handler)
+            # but user still has rules and a valid token — re-create
+            logger.info(
+                "Re-creating session for user %d (session lost, token valid)",
+                uid,
+            )
+            await self._user_manager.start_user(
+                uid, token, rules,
+                extra_instruments=scalp_instruments or None,
+            )
+        elif session.access_token != token:
+            # Token changed (e.g. TOTP refresh) — restart streams
+            logger.info("Token changed for user %d, restarting streams", uid)
+            await self._user_manager.start_user(
+                uid, token, rules,
+                extra_instruments=scalp_instruments or None,
+            )
+            # If this user owns the shared market feed, the pool's
+            # underlying token also needs to roll. ``rotate_token``
+            # rebuilds the stream and re-subscribes to the union of
+            # all current interest.
+            if (
+                self._market_pool is not None
+                and uid == self._feed_owner_user_id
+            ):
+                await self._market_pool.rotate_token()
+        elif resync:
+            await self._user_manager.sync_rules(
+                uid, rules,
+                extra_instruments=scalp_instruments or None,
+            )
+
+    async def _start_scalp_only_sessions(self, rule_users: set[int]) -> None:
+        """Start streams for scalp-only users (no rules, but live sessions)."""
         for uid in self._scalp_manager._sessions:
-            if uid not in new_users:
+            if uid not in rule_users:
                 token = self._access_tokens.get(uid)
                 if not token:
                     # Try loading token for this scalp-only user
@@ -502,13 +614,93 @@ class MonitorDaemon:
                         extra_instruments=scalp_instruments or None,
                     )
 
-        # Periodic summary — helps confirm daemon is alive and processing
-        total_rules = sum(len(r) for r in rules_by_user.values())
-        total_sessions = sum(len(s) for s in self._scalp_manager._sessions.values())
-        active_users = [uid for uid in rules_by_user if uid in self._access_tokens]
-        logger.info(
-            "Poll cycle: %d active rules, %d scalp sessions for %d users %s",
-            total_rules, total_sessions, len(active_users), active_users,
+    async def _apply_rule_changes(self, rule_ids: set[int]) -> None:
+        """Apply per-rule deltas reported by the change feed.
+
+        Re-reads only the changed rows. A rule that is enabled and unexpired
+        is inserted or replaced in its user's list; one that was disabled,
+        expired or deleted is dropped. Rows identical to the in-memory rule
+        (typically the daemon's own persister writes echoing back) are
+        skipped, so only users whose rules really changed get re-synced.
+        """
+        async with self._rules_sync_lock:
+            async with get_db_context() as session:
+                db_rules = await crud.get_rules_by_ids(session, rule_ids)
+            fresh = {r.id: crud.db_rule_to_schema(r) for r in db_rules}
+            versions = {r.id: r.updated_at for r in db_rules}
+
+            current: dict[int, tuple[int, MonitorRule]] = {
+                r.id: (uid, r)
+                for uid, rules in self._rules_by_user.items()
+                for r in rules
+            }
+            now = datetime.utcnow()
+            touched: set[int] = set()
+            for rule_id in rule_ids:
+                new = fresh.get(rule_id)
+                if new is not None:
+                    self._state_persister.overlay(new, versions[rule_id])
+                active = (
+                    new is not None
+                    and new.enabled
+                    and (new.expires_at is None or new.expires_at > now)
+                )
+                old_uid, old = current.get(rule_id, (None, None))
+                if old is None and not active:
+                    continue
+                if (
+                    old is not None and active
+                    and old.model_dump(exclude={"fired_at"})
+                    == new.model_dump(exclude={"fired_at"})
+                ):
+                    continue
+                if old is not None:
+                    self._rules_by_user[old_uid] = [
+                        r for r in self._rules_by_user[old_uid] if r.id != rule_id
+                    ]
+                    touched.add(old_uid)
+                if active:
+                    self._rules_by_user.setdefault(new.user_id, []).append(new)
+                    touched.add(new.user_id)
+
+            for uid in touched:
+                await self._sync_user_rules(uid)
+        if touched:
+            logger.info(
+                "Applied rule change(s) %s for users %s",
+                sorted(rule_ids), sorted(touched),
+            )
+
+    async def _sync_user_rules(self, uid: int) -> None:
+        """Push one user's in-memory rule list to their session after a delta."""
+        rules = self._rules_by_user.get(uid) or []
+        scalp_instruments = self._scalp_manager.get_subscribed_instruments(uid)
+        session = self._user_manager.get_session(uid)
+        if not rules:
+            self._rules_by_user.pop(uid, None)
+            if session is None:
+                return
+            if scalp_instruments:
+                await self._user_manager.sync_rules(
+                    uid, [], extra_instruments=scalp_instruments,
+                )
+            else:
+                await self._user_manager.stop_user(uid)
+            return
+        if session is not None:
+            await self._user_manager.sync_rules(
+                uid, rules, extra_instruments=scalp_instruments or None,
+            )
+            return
+        token = self._access_tokens.get(uid)
+        if not token:
+            await self._load_user_configs({uid})
+            token = self._access_tokens.get(uid)
+        if not token:
+            logger.info("Rule change for user %d deferred: no valid token", uid)
+            return
+        await self._user_manager.start_user(
+            uid, token, rules, extra_instruments=scalp_instruments or None,
         )
 
     # ── Tick routing ──────────────────────────────────────────────────
@@ -652,11 +844,12 @@ class MonitorDaemon:
             )
 
         # Persist trigger_config_update if present (e.g. trailing stop highest_price).
-        # Update in-memory immediately; defer DB write to background.
+        # Update in-memory immediately; the persister coalesces successive
+        # highs/lows per rule and writes only the latest on its next flush.
         if result.trigger_config_update is not None:
             rule.trigger_config = result.trigger_config_update
-            asyncio.create_task(
-                self._persist_trigger_config(rule.id, result.trigger_config_update)
+            self._state_persister.mark_trigger_config(
+                rule.id, result.trigger_config_update
             )
 
         if not result.fired:
@@ -818,42 +1011,26 @@ class MonitorDaemon:
                         # Persist chain state — even on ambiguous outcome the
                         # also_cancel_rules / also_enable_rules should stand,
                         # since the order may have filled.
-                        if chain_affected:
-                            for r in chain_affected:
-                                try:
-                                    await crud.sync_rule_fire_state(
-                                        session=db_session,
-                                        rule_id=r.id,
-                                        fire_count=r.fire_count,
-                                        enabled=r.enabled,
-                                    )
-                                except Exception as e:
-                                    logger.error(
-                                        "Failed to sync chain rule %d state: %s",
-                                        r.id, e,
-                                    )
+                        for r in chain_affected or ():
+                            self._state_persister.mark_fire_state(
+                                r.id, r.fire_count, r.enabled,
+                            )
                     else:
                         # Persist kill/activate chain state (enabled, fire_count)
                         # so DB stays in sync with in-memory daemon state.
-                        if chain_affected:
-                            for r in chain_affected:
-                                try:
-                                    await crud.sync_rule_fire_state(
-                                        session=db_session,
-                                        rule_id=r.id,
-                                        fire_count=r.fire_count,
-                                        enabled=r.enabled,
-                                    )
-                                except Exception as e:
-                                    logger.error(
-                                        "Failed to sync chain rule %d state: %s",
-                                        r.id, e,
-                                    )
+                        for r in chain_affected or ():
+                            self._state_persister.mark_fire_state(
+                                r.id, r.fire_count, r.enabled,
+                            )
             except Exception as e:
                 logger.error(
                     "Background execute_and_record failed for rule %d: %s",
                     rule.id, e, exc_info=True,
                 )
+            # A fire is an order-affecting transition: flush synchronously so
+            # chain/revert state and the rule's latest trailing config are
+            # durable in one transaction before the in-flight lock releases.
+            await self._state_persister.flush()
 
     async def _revert_failed_fire(
         self,
@@ -894,30 +1071,10 @@ class MonitorDaemon:
                     if r.id in result.rules_to_enable:
                         r.enabled = False
 
-        # Persist the revert to DB.
-        try:
-            await crud.sync_rule_fire_state(
-                session=db_session,
-                rule_id=rule.id,
-                fire_count=rule.fire_count,
-                enabled=rule.enabled,
-            )
-        except Exception as e:
-            logger.error("Failed to sync revert for rule %d: %s", rule.id, e)
-
-        if chain_affected:
-            for r in chain_affected:
-                try:
-                    await crud.sync_rule_fire_state(
-                        session=db_session,
-                        rule_id=r.id,
-                        fire_count=r.fire_count,
-                        enabled=r.enabled,
-                    )
-                except Exception as e:
-                    logger.error(
-                        "Failed to sync revert for chain rule %d: %s", r.id, e
-                    )
+        # Queue the revert; _execute_and_record flushes it synchronously.
+        self._state_persister.mark_fire_state(rule.id, rule.fire_count, rule.enabled)
+        for r in chain_affected or ():
+            self._state_persister.mark_fire_state(r.id, r.fire_count, r.enabled)
 
         logger.warning(
             "Rule %d (%s) order FAILED, reverted: fire_count=%d, "
@@ -928,21 +1085,6 @@ class MonitorDaemon:
             err_msg,
         )
 
-    async def _persist_trigger_config(
-        self, rule_id: int, trigger_config: dict
-    ) -> None:
-        """Background task: persist trailing stop trigger_config to DB."""
-        try:
-            async with get_db_context() as db_session:
-                await crud.update_rule(
-                    db_session, rule_id, trigger_config=trigger_config,
-                )
-        except Exception as e:
-            logger.error(
-                "Failed to persist trigger_config for rule %d: %s",
-                rule_id, e,
-            )
-
     # ── Market hours ────────────────────────────────────────────────
 
     @staticmethod
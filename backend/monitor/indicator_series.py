@@ -18,6 +18,11 @@ pulled out of ``compute_indicator`` and adapted to return the full
 series in one pass. Indicators without a native impl fall back to prefix
 recompute so the API still works — they're just no faster than today.
 
+``candles`` may also be a ``backtesting.candle_frame.CandleFrame``: the
+indicator DataFrame is then built straight from its arrays (no dict walk, no
+re-sort) and each (indicator, params) series is memoized on the frame, so a
+sweep running many combos over one fetch computes each series once.
+
 The parity guarantee (enforced by ``tests/monitor/test_indicator_series_parity.py``):
 for every indicator, every params, every prefix length n,
     compute_indicator_series(ind, candles, params)[n - 1]
@@ -31,6 +36,7 @@ import numpy as np
 import pandas as pd
 import ta
 
+from backtesting.candle_frame import CandleFrame
 from monitor.indicator_engine import compute_indicator
 
 
@@ -38,7 +44,7 @@ _SeriesFn = Callable[[pd.DataFrame, dict[str, Any]], list[float | None]]
 
 
 def compute_indicator_series(
-    indicator: str, candles: list[dict], params: dict[str, Any]
+    indicator: str, candles: list[dict] | CandleFrame, params: dict[str, Any]
 ) -> list[float | None]:
     """Return the indicator value at every prefix of ``candles``.
 
@@ -50,13 +56,35 @@ def compute_indicator_series(
     if n == 0:
         return []
 
+    if isinstance(candles, CandleFrame):
+        key = (indicator, repr(sorted(params.items())))
+        cached = candles._series_cache.get(key)
+        if cached is None:
+            cached = _compute_series(indicator, candles.records, params, candles.to_dataframe)
+            candles._series_cache[key] = cached
+        # Callers slice/own their copy; the memo must stay pristine
+        return list(cached)
+
+    return _compute_series(
+        indicator, candles, params,
+        lambda: pd.DataFrame(candles).sort_values("timestamp").reset_index(drop=True),
+    )
+
+
+def _compute_series(
+    indicator: str,
+    candles: list[dict],
+    params: dict[str, Any],
+    make_df: Callable[[], pd.DataFrame],
+) -> list[float | None]:
+    n = len(candles)
     fn = _SERIES_REGISTRY.get(indicator)
     if fn is None:
         # No native series impl — fall back to prefix recompute. Same total
         # cost as today's per-bar calls; cleaner caller API.
         return [compute_indicator(indicator, candles[: i + 1], params) for i in range(n)]
 
-    df = pd.DataFrame(candles).sort_values("timestamp").reset_index(drop=True)
+    df = make_df()
     try:
         return fn(df, params)
     except Exception:
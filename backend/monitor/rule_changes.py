@@ -0,0 +1,283 @@
+"""RuleChangeFeed — change-data capture for monitor_rules.
+
+The daemon used to learn about new/edited/deleted rules only from its full
+reload every poll interval, so a rule created from chat took up to 30s to go
+live and the reload cost grew with the total rule count. The feed reports
+*which* rule ids changed; the daemon re-reads just those rows and applies them
+as per-rule deltas, keeping the full reload as a slow consistency sweep.
+
+Two sources, same output:
+
+- **Postgres**: LISTEN on ``monitor_rules_changed``, fed by the row triggers in
+  ``migrations/add_monitor_rules_notify.sql``. Latency is one round-trip.
+  State-only updates (fire_count / fired_at / updated_at) don't notify.
+  Migrations are applied by hand, so ``start()`` checks the triggers exist and
+  falls back to scanning (with a warning) when it doesn't — LISTEN without it
+  would report healthy while nothing is ever notified.
+- **Fallback** (SQLite dev/test, or while the LISTEN connection is down): scan
+  ``updated_at`` against a high-water mark every ``poll_interval`` seconds.
+  This can't tell state-only writes apart, so persister flushes show up here;
+  the daemon skips rows identical to what it already holds.
+
+The high-water mark is kept in both modes, so after a LISTEN reconnect one scan
+catches up on anything committed while the connection was gone. Deletes are
+only visible to LISTEN; in fallback mode the consistency sweep drops them.
+Notifications are coalesced for ``debounce_ms`` so a burst (a strategy deploy
+writing five rules) becomes one delta.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable
+
+from sqlalchemy import bindparam, text
+
+from database.session import engine, get_db_context
+from monitor import crud
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "monitor_rules_changed"
+# INSERT/DELETE and the column-filtered UPDATE trigger. Both are required: an
+# install with only the older all-ops trigger would notify on state flushes.
+TRIGGERS = ("trg_monitor_rules_notify", "trg_monitor_rules_notify_update")
+
+# Re-scan this far behind the high-water mark: updated_at is stamped before
+# commit, so a slow transaction can land a row older than one already seen.
+_HWM_OVERLAP = timedelta(seconds=5)
+# LISTEN connection liveness check — a dead socket delivers no notifications
+# and raises nothing until used.
+_LISTEN_KEEPALIVE_S = 30.0
+_LISTEN_RETRY_S = 5.0
+
+
+class RuleChangeFeed:
+    """Report changed monitor_rules ids to ``on_changes`` as they happen.
+
+    Args:
+        on_changes: Awaited with the set of changed rule ids. Runs serially;
+            ids arriving meanwhile are batched into the next call.
+        poll_interval: Seconds between high-water-mark scans in fallback mode.
+        debounce_ms: Coalescing window after the first change of a batch.
+        use_listen: Force LISTEN on/off; defaults to on for Postgres.
+    """
+
+    def __init__(
+        self,
+        on_changes: Callable[[set[int]], Awaitable[None]],
+        poll_interval: float = 1.0,
+        debounce_ms: float = 50.0,
+        use_listen: bool | None = None,
+    ) -> None:
+        self._on_changes = on_changes
+        self._poll_interval = poll_interval
+        self._debounce = debounce_ms / 1000.0
+        self._use_listen = (
+            engine.dialect.name == "postgresql" if use_listen is None else use_listen
+        )
+        self._pending: set[int] = set()
+        self._wake = asyncio.Event()
+        self._tasks: list[asyncio.Task] = []
+        self._listening = False
+
+        self._hwm: datetime | None = None
+        # rule id -> updated_at already reported, for rows inside the overlap.
+        self._seen: dict[int, datetime] = {}
+
+        self._notifications = 0
+        self._scans = 0
+        self._batches = 0
+        self._rules_applied = 0
+        self._last_apply_ms = 0.0
+
+    # ── Lifecycle ─────────────────────────────────────────────────────
+
+    async def start(self) -> None:
+        """Seed the high-water mark and start the source + dispatcher tasks.
+
+        Call after the daemon's initial full load: anything older than the
+        seed is assumed to be in memory already.
+        """
+        if self._tasks:
+            return
+        await self._seed_hwm()
+        if self._use_listen and not await self._trigger_installed():
+            logger.warning(
+                "Rule change feed: triggers %s are not installed (apply "
+                "migrations/add_monitor_rules_notify.sql); falling back to poll mode",
+                ", ".join(TRIGGERS),
+            )
+            self._use_listen = False
+        source = self._run_listen() if self._use_listen else self._run_poll()
+        self._tasks = [
+            asyncio.create_task(source),
+            asyncio.create_task(self._run_dispatch()),
+        ]
+        logger.info(
+            "Rule change feed started (mode=%s)",
+            "listen" if self._use_listen else "poll",
+        )
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            except Exception:
+                logger.exception("Rule change feed task raised on stop")
+        self._tasks = []
+        self._listening = False
+
+    @property
+    def healthy(self) -> bool:
+        """True while deltas are flowing with feed latency (not sweep latency)."""
+        if not self._tasks or any(t.done() for t in self._tasks):
+            return False
+        return self._listening or not self._use_listen
+
+    # ── Sources ───────────────────────────────────────────────────────
+
+    def notify(self, rule_ids) -> None:
+        """Queue rule ids as changed (also used by in-process writers)."""
+        self._pending.update(rule_ids)
+        if self._pending:
+            self._wake.set()
+
+    def _on_notify(self, _conn, _pid, _channel, payload: str) -> None:
+        self._notifications += 1
+        try:
+            rule_id = int(json.loads(payload)["id"])
+        except Exception:
+            logger.warning("Unparseable %s payload: %r", CHANNEL, payload)
+            return
+        self.notify((rule_id,))
+
+    async def _trigger_installed(self) -> bool:
+        """Whether both NOTIFY triggers exist on monitor_rules (False if unknown)."""
+        try:
+            async with get_db_context() as session:
+                result = await session.execute(
+                    text(
+                        "SELECT DISTINCT tgname FROM pg_trigger "
+                        "WHERE tgname IN :names AND NOT tgisinternal"
+                    ).bindparams(bindparam("names", expanding=True)),
+                    {"names": list(TRIGGERS)},
+                )
+                return {row[0] for row in result} == set(TRIGGERS)
+        except Exception as e:
+            logger.error("Rule change feed: trigger check failed: %s", e)
+            return False
+
+    async def _seed_hwm(self) -> None:
+        try:
+            async with get_db_context() as session:
+                newest = await crud.get_rule_versions_since(session, None)
+        except Exception as e:
+            logger.error("Rule change feed: HWM seed failed: %s", e)
+            newest = []
+        self._hwm = newest[0][1] if newest else datetime.utcnow()
+
+    async def scan(self) -> int:
+        """One high-water-mark scan. Returns how many rule ids were queued."""
+        self._scans += 1
+        since = self._hwm - _HWM_OVERLAP if self._hwm else None
+        async with get_db_context() as session:
+            versions = await crud.get_rule_versions_since(session, since)
+        changed = []
+        for rule_id, updated_at in versions:
+            if self._seen.get(rule_id) == updated_at:
+                continue
+            self._seen[rule_id] = updated_at
+            changed.append(rule_id)
+            if self._hwm is None or updated_at > self._hwm:
+                self._hwm = updated_at
+        if self._hwm is not None:
+            floor = self._hwm - _HWM_OVERLAP
+            self._seen = {k: v for k, v in self._seen.items() if v >= floor}
+        if changed:
+            self.notify(changed)
+        return len(changed)
+
+    async def _run_poll(self) -> None:
+        while True:
+            await asyncio.sleep(self._poll_interval)
+            try:
+                await self.scan()
+            except Exception as e:
+                logger.error("Rule change feed scan failed: %s", e)
+
+    async def _run_listen(self) -> None:
+        while True:
+            try:
+                async with engine.connect() as conn:
+                    raw = await conn.get_raw_connection()
+                    driver = raw.driver_connection
+                    await driver.add_listener(CHANNEL, self._on_notify)
+                    self._listening = True
+                    try:
+                        # Catch anything committed before LISTEN took effect.
+                        await self.scan()
+                        while True:
+                            await asyncio.sleep(_LISTEN_KEEPALIVE_S)
+                            await driver.execute("SELECT 1")
+                    finally:
+                        self._listening = False
+                        try:
+                            await driver.remove_listener(CHANNEL, self._on_notify)
+                        except Exception:
+                            pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(
+                    "Rule change feed LISTEN dropped (%s); scanning until reconnect", e,
+                )
+            # Degrade to scans while retrying so deltas keep flowing.
+            try:
+                await self.scan()
+            except Exception as e:
+                logger.error("Rule change feed scan failed: %s", e)
+            await asyncio.sleep(_LISTEN_RETRY_S)
+
+    # ── Dispatch ──────────────────────────────────────────────────────
+
+    async def _run_dispatch(self) -> None:
+        while True:
+            await self._wake.wait()
+            await asyncio.sleep(self._debounce)
+            self._wake.clear()
+            batch, self._pending = self._pending, set()
+            if not batch:
+                continue
+            t0 = time.perf_counter()
+            try:
+                await self._on_changes(batch)
+            except Exception as e:
+                logger.error(
+                    "Applying %d rule change(s) failed, will retry: %s", len(batch), e,
+                )
+                self.notify(batch)
+                await asyncio.sleep(self._poll_interval)
+                continue
+            self._batches += 1
+            self._rules_applied += len(batch)
+            self._last_apply_ms = (time.perf_counter() - t0) * 1000.0
+
+    def stats(self) -> dict:
+        return {
+            "mode": "listen" if self._use_listen else "poll",
+            "listening": self._listening,
+            "notifications": self._notifications,
+            "scans": self._scans,
+            "batches": self._batches,
+            "rules_applied": self._rules_applied,
+            "last_apply_ms": round(self._last_apply_ms, 1),
+            "pending": len(self._pending),
+        }
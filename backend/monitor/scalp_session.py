@@ -100,10 +100,10 @@ def _seed_backoff_seconds(retry_count: int) -> int:
 
 # After this many failed seed attempts, stop retrying and let live ticks warm
 # the buffer (the pre-fix behaviour) rather than spinning on a hard failure.
+# Burst pacing is no longer done here: seeds go through candle_seeder's
+# SEED_COORDINATOR (one fetch per underlying+timeframe) and the Upstox
+# history rate limiter inside get_historical_data.
 _MAX_SEED_ATTEMPTS = 6
-# Minimum spacing between live seed API calls so a burst of new sessions in one
-# poll doesn't trip the historical-endpoint rate limit in the first place.
-_SEED_API_GAP_SEC = 0.5
 
 
 logger = logging.getLogger(__name__)
@@ -152,8 +152,6 @@ class ScalpSessionManager:
         self._seeded: set[str] = set()
         self._seed_attempts: dict[str, int] = {}
         self._seed_next_attempt: dict[str, datetime] = {}
-        # Timestamp of the last live seed API call, for inter-call spacing.
-        self._last_seed_api_ts: datetime | None = None
 
     # ── Lifecycle ────────────────────────────────────────────────────
 
@@ -189,6 +187,7 @@ class ScalpSessionManager:
         new_underlying_map: dict[str, list[int]] = {}
         new_premium_map: dict[str, int] = {}
         pending_actions: list[tuple[ScalpSession, str]] = []
+        to_seed: list[ScalpSession] = []
 
         for row in rows:
             session = db_to_session(row)
@@ -212,12 +211,17 @@ class ScalpSessionManager:
             # indicators are warm before acting on live ticks. Retried with
             # backoff on later polls if the seed fails (rate-limit / token not
             # yet loaded / transient) instead of leaving the buffer cold for
-            # hours. 2026-06-09.
-            await self._ensure_seeded(session)
+            # hours. 2026-06-09. Seeded together after the loop.
+            to_seed.append(session)
 
             if session.config.pending_action:
                 pending_actions.append((session, session.config.pending_action))
 
+        # All sessions seed concurrently; sessions on the same underlying and
+        # timeframe share one historical fetch via the seed coordinator.
+        if to_seed:
+            await asyncio.gather(*(self._ensure_seeded(s) for s in to_seed))
+
         # Defensive: in-memory HOLDING sessions that vanished from DB.
         new_ids = {row.id for row in rows}
         dropped_holding: list[ScalpSession] = [
@@ -306,18 +310,6 @@ class ScalpSessionManager:
             else:
                 await self._handle_pending_action(session, action)
 
-    async def _space_seed_call(self) -> None:
-        """Sleep so consecutive live seed API calls are at least
-        ``_SEED_API_GAP_SEC`` apart, keeping a burst of new sessions under the
-        Upstox historical-endpoint rate limit."""
-        last = self._last_seed_api_ts
-        now = datetime.utcnow()
-        if last is not None:
-            elapsed = (now - last).total_seconds()
-            if elapsed < _SEED_API_GAP_SEC:
-                await asyncio.sleep(_SEED_API_GAP_SEC - elapsed)
-        self._last_seed_api_ts = datetime.utcnow()
-
     async def _ensure_seeded(self, session: ScalpSession) -> None:
         """Ensure the session's candle buffer is seeded from history.
 
@@ -353,7 +345,6 @@ class ScalpSessionManager:
         if next_at is not None and datetime.utcnow() < next_at:
             return  # still inside the backoff window
 
-        await self._space_seed_call()
         minutes = self._candle_buffers[buf_key].tf_minutes
         fresh = CandleBuffer(minutes)
         seeded = 0
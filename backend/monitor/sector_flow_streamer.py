@@ -16,8 +16,17 @@ Prior-day close (for the gap calc) is read from the ltpc feed's ``cp`` field
 the live path.
 
 The snapshot is written to the same ``sector_flow_snapshots`` cache row that
-``nf-sector-flow`` reads, via the same pure ``_shape_snapshot`` shaper used by
-the inline/replay path — so live output matches replay output exactly.
+``nf-sector-flow`` reads. The buffers go straight into a columnar
+``SessionMatrix`` (no per-bar timestamp formatting) and through the columnar
+shaper, whose output is pinned identical to the inline/replay
+``_shape_snapshot`` — so live output matches replay output exactly. That keeps
+the compute cheap enough for 5-minute bars and the ~750-name nifty_total
+universe (``timeframe_min`` / ``universe``).
+
+Optionally (``scan_engine=True``) the same ticks also feed the in-process
+candidate ``ScanEngine`` (services/scan_engine.py), which replaces the 3-min
+``scan_cache_writer`` subprocess: one vectorized scoring pass over warm bars
+per cycle instead of ~80 historical fetches.
 """
 from __future__ import annotations
 
@@ -27,7 +36,9 @@ from datetime import datetime, time as dt_time, timedelta, timezone
 
 from monitor.candle_buffer import CandleBuffer
 from services import instruments_cache as ic
-from services.sector_flow_cache import _shape_snapshot, save_snapshot
+from services import scan_engine as se
+from services.sector_flow import SessionMatrix
+from services.sector_flow_cache import _matrix_from_bars, _shape_matrix, save_snapshot
 
 logger = logging.getLogger(__name__)
 
@@ -67,6 +78,9 @@ class SectorFlowStreamer:
         timeframe_min: int = 15,
         threshold: float = 0.3,
         window: int = 2,
+        scan_engine: bool = False,
+        scan_interval_s: float = 180.0,
+        scan_top_n: int = 40,
     ):
         self._pool = market_pool
         self._universe = universe
@@ -79,6 +93,13 @@ class SectorFlowStreamer:
         self._prev_close: dict[str, float] = {}         # symbol -> prior-day close (feed cp)
         self._task: asyncio.Task | None = None
         self._running = False
+        # Candidate scan engine — built in start() once the universe resolves.
+        self._scan_enabled = scan_engine
+        self._scan_interval = scan_interval_s
+        self._scan_top_n = scan_top_n
+        self._scan: se.ScanEngine | None = None
+        self._scan_task: asyncio.Task | None = None
+        self._scan_client = None
 
     # ── Lifecycle ─────────────────────────────────────────────────────
 
@@ -101,12 +122,17 @@ class SectorFlowStreamer:
                 self._universe,
             )
             return
+        if self._scan_enabled:
+            self._scan = se.ScanEngine(self._buffers.keys(), universe=self._universe)
+            keys.add(se.NIFTY_KEY)  # relative-strength reference
         # Refcounted interest on the shared pool — coexists with real users'
         # rule interest on the same instruments; subscribes the union over ONE
         # connection. No new connection, no historical REST.
         await self._pool.set_interest(self.SENTINEL_UID, keys)
         self._running = True
         self._task = asyncio.create_task(self._compute_loop())
+        if self._scan is not None:
+            self._scan_task = asyncio.create_task(self._scan_loop())
         logger.info(
             "[sector-flow] streaming %d instruments via shared pool "
             "(%dm bars, compute every %.0fs)",
@@ -116,13 +142,15 @@ class SectorFlowStreamer:
     async def stop(self) -> None:
         """Cancel the compute loop and drop the sentinel's pool interest."""
         self._running = False
-        if self._task is not None:
-            self._task.cancel()
+        for task in (self._task, self._scan_task):
+            if task is None:
+                continue
+            task.cancel()
             try:
-                await self._task
+                await task
             except asyncio.CancelledError:
                 pass
-            self._task = None
+        self._task = self._scan_task = None
         try:
             await self._pool.drop_user(self.SENTINEL_UID)
         except Exception:
@@ -142,10 +170,14 @@ class SectorFlowStreamer:
         for key, data in tick_data.items():
             sym = self._key_to_symbol.get(key)
             if sym is None:
+                if key == se.NIFTY_KEY and self._scan is not None:
+                    self._scan.on_index_tick(data)
                 continue
             ltp = data.get("ltp")
             if ltp is None:
                 continue
+            if self._scan is not None:
+                self._scan.on_tick(sym, data, ts)
             buf = self._buffers.get(sym)
             if buf is not None:
                 buf.add_tick(float(ltp), timestamp=ts)
@@ -172,7 +204,8 @@ class SectorFlowStreamer:
 
     def _build_results(self) -> tuple[dict[str, list[tuple]], str | None]:
         """Build the ``{symbol: [(iso, open, close), ...]}`` shape that
-        ``_shape_snapshot`` expects.
+        ``_shape_snapshot`` expects (the replay-compatible form; the live cycle
+        uses ``_build_matrix``, and tests pin the two paths to the same output).
 
         Timestamps are rendered in IST (matching the replay/display path), and
         a synthetic prior-day row carries the feed-sourced close so the gap
@@ -210,15 +243,50 @@ class SectorFlowStreamer:
             results[sym] = rows
         return results, today
 
+    def _build_matrix(self) -> tuple[SessionMatrix | None, list[str], str | None]:
+        """Columnar twin of ``_build_results``: the latest IST session's bars as
+        one aligned close matrix, plus the universe of symbols holding any
+        candles and the session date. Same selection rules — the feed's prior
+        close (when captured) wins over any older buffered candle."""
+        per_sym: dict[str, list[tuple]] = {}
+        latest = None
+        for sym, buf in self._buffers.items():
+            candles = buf.get_candles()
+            if not candles:
+                continue
+            rows = []
+            for c in candles:
+                ist = c["timestamp"] + _IST_OFFSET
+                rows.append((ist.date(), ist.hour * 60 + ist.minute, c["open"], c["close"]))
+            per_sym[sym] = rows
+            if latest is None or rows[-1][0] > latest:
+                latest = rows[-1][0]
+        if not per_sym:
+            return None, [], None
+        symbols, opens, prevs, bars = [], [], [], []
+        for sym in sorted(per_sym):
+            rows = per_sym[sym]
+            day_rows = [r for r in rows if r[0] == latest]
+            if not day_rows:
+                continue
+            prior = [r for r in rows if r[0] < latest]
+            pc = self._prev_close.get(sym)
+            symbols.append(sym)
+            opens.append(day_rows[0][2])
+            prevs.append(pc if pc is not None else (prior[-1][3] if prior else None))
+            bars.append({r[1]: r[3] for r in day_rows})
+        mat = _matrix_from_bars(symbols, opens, prevs, bars)
+        return mat, sorted(per_sym), latest.strftime("%Y-%m-%d")
+
     async def _compute_and_store(self) -> None:
-        results, today = self._build_results()
-        if not results:
+        mat, universe, today = self._build_matrix()
+        if mat is None:
             logger.debug("[sector-flow] no buffered candles yet — skipping compute")
             return
-        # Pure CPU over ~500×N bars (~tens of ms). Off-thread it so a compute
-        # cycle never stalls the daemon's event loop / tick processing.
+        # NumPy over the (names × bars) matrix — a few ms even at 5-min bars on
+        # nifty_total. Still off-thread so a cycle never stalls tick processing.
         snap = await asyncio.to_thread(
-            _shape_snapshot, results, self._universe, today,
+            _shape_matrix, mat, universe, self._universe, today,
             self._threshold, self._window,
         )
         if not snap or "error" in snap:
@@ -235,3 +303,62 @@ class SectorFlowStreamer:
             snap["date"], len(snap["sectors"]), mkt["direction"],
             mkt["decisiveness"], snap["as_of"], row_id,
         )
+
+    # ── Candidate scan ────────────────────────────────────────────────
+
+    async def _scan_loop(self) -> None:
+        while self._running:
+            try:
+                await asyncio.sleep(self._scan_interval)
+            except asyncio.CancelledError:
+                break
+            if not _market_open_ist():
+                continue
+            try:
+                await self._scan_and_store()
+            except Exception:
+                logger.exception("[scan-engine] scan cycle failed")
+
+    async def _ensure_baselines(self, client) -> None:
+        """Install today's prior-session baselines — the disk snapshot when one
+        exists, else one paced 20-day build (persisted for the next restart)."""
+        today = datetime.now(_IST).strftime("%Y-%m-%d")
+        current = self._scan.baselines
+        if current is not None and current.as_of == today:
+            return
+        path = se.baseline_path(self._universe, today)
+        baselines = se.ScanBaselines.load(path)
+        if baselines is None or baselines.as_of != today:
+            logger.info("[scan-engine] building %s baselines for %d symbols",
+                        today, len(self._scan.symbols))
+            baselines = await se.build_baselines(client, self._scan.symbols, today)
+            try:
+                baselines.save(path)
+            except OSError as e:
+                logger.warning("[scan-engine] could not persist baselines: %s", e)
+        self._scan.set_baselines(baselines)
+
+    async def _scan_and_store(self) -> None:
+        """One scan cycle: quotes → vectorized score → ``scan_cache`` row.
+
+        The first cycle of a session awaits the baseline build before storing
+        anything, so the subprocess fallback keeps serving the cache meanwhile."""
+        from services.candidate_analysis import _market_data_client
+        from services.scan_cache import run_and_store
+
+        if self._scan_client is None:
+            self._scan_client = _market_data_client()
+        client = self._scan_client
+        await self._ensure_baselines(client)
+        quotes, nifty_quote = await se.fetch_quotes(client, self._key_to_symbol)
+        self._scan.apply_quotes(quotes, nifty_quote)
+        rows, nifty_pct, elapsed = self._scan.compute(top_n=self._scan_top_n)
+        if not rows:
+            logger.debug("[scan-engine] no scorable symbols yet — skipping store")
+            return
+        result = await run_and_store(
+            self._universe, rows=rows, nifty_pct=nifty_pct,
+            elapsed_ms=max(1, int(elapsed * 1000)),
+        )
+        logger.info("[scan-engine] scored %d symbols in %.0fms → %s",
+                    len(self._scan.symbols), elapsed * 1000, result)
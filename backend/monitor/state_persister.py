@@ -0,0 +1,241 @@
+"""RuleStatePersister — write-behind coalescing of daemon rule state to DB.
+
+The daemon is the source of truth for per-rule runtime state (trailing-stop
+``trigger_config`` highs/lows, ``fire_count``, ``enabled``) and
+only syncs it to the DB for crash recovery. Writing each change as it happens
+meant one UPDATE per tick per trailing rule in a trending market, every one
+opening its own session against the shared connection cap.
+
+Instead, changes land in a dirty map keyed by rule id that keeps only the
+latest value of each field. A background loop flushes the map in a single
+transaction every ``flush_interval_ms`` or as soon as ``max_pending`` updates
+have accumulated, whichever comes first. Order-affecting transitions (fires,
+reverts, kill/activate chains) call ``flush()`` directly so their state is
+durable before the daemon moves on, and ``stop()`` drains whatever is left.
+
+Each pending field remembers when it was marked, and each flush stamps the
+rows it writes with its own ``updated_at``. A row re-read from the DB whose
+``updated_at`` is newer than a pending field — and isn't one of our own
+stamps — was edited by someone else (user, API) after the daemon's change;
+``overlay`` then lets the row win and drops that pending field, so the edit
+is neither reverted in memory nor written back over on the next flush.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any
+
+from database.models import utc_now
+from database.session import get_db_context
+from monitor import crud
+
+logger = logging.getLogger(__name__)
+
+
+class RuleStatePersister:
+    """Coalesce per-rule state writes and flush them in batched transactions.
+
+    Args:
+        flush_interval_ms: Max time a change may sit in the dirty map before
+            the background loop writes it.
+        max_pending: Number of updates (not rules) that triggers an early
+            flush, bounding how much state a crash can lose in a burst.
+    """
+
+    def __init__(
+        self,
+        flush_interval_ms: float = 500.0,
+        max_pending: int = 200,
+    ) -> None:
+        self._flush_interval = flush_interval_ms / 1000.0
+        self._max_pending = max(1, max_pending)
+        self._dirty: dict[int, dict[str, Any]] = {}
+        # When each dirty field was last marked (UTC, same clock as updated_at).
+        self._dirty_at: dict[int, dict[str, datetime]] = {}
+        # Batch currently being written — still newer than what the DB holds.
+        self._inflight: dict[int, dict[str, Any]] = {}
+        self._inflight_at: dict[int, dict[str, datetime]] = {}
+        # rule id -> updated_at our last committed flush stamped on its row.
+        self._written_at: dict[int, datetime] = {}
+        # Monotonic time of the oldest change still sitting in _dirty.
+        self._dirty_since: float | None = None
+        self._pending_updates = 0
+        # Serializes flushes so an older batch can never commit after a newer one.
+        self._flush_lock = asyncio.Lock()
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+        self._updates = 0
+        self._updates_flushed = 0
+        self._rows_written = 0
+        self._flushes = 0
+        self._flush_errors = 0
+        self._last_lag_ms = 0.0
+        self._max_lag_ms = 0.0
+
+    # ── Recording ─────────────────────────────────────────────────────
+
+    def _mark(self, rule_id: int, fields: dict[str, Any]) -> None:
+        entry = self._dirty.get(rule_id)
+        if entry is None:
+            self._dirty[rule_id] = dict(fields)
+        else:
+            entry.update(fields)
+        now = utc_now()
+        self._dirty_at.setdefault(rule_id, {}).update(dict.fromkeys(fields, now))
+        if self._dirty_since is None:
+            self._dirty_since = time.monotonic()
+        self._updates += 1
+        self._pending_updates += 1
+        if self._pending_updates >= self._max_pending:
+            self._wake.set()
+
+    def mark_trigger_config(self, rule_id: int, trigger_config: dict) -> None:
+        """Record the latest trigger_config (e.g. trailing-stop high/low)."""
+        self._mark(rule_id, {"trigger_config": trigger_config})
+
+    def mark_fire_state(self, rule_id: int, fire_count: int, enabled: bool) -> None:
+        """Record the daemon's fire_count/enabled for a rule.
+
+        ``fired_at`` is not tracked here: the rule that actually fired is
+        stamped by ``crud.sync_rule_fire_state`` on the order path.
+        """
+        self._mark(rule_id, {"fire_count": fire_count, "enabled": enabled})
+
+    # ── Flushing ──────────────────────────────────────────────────────
+
+    async def flush(self) -> int:
+        """Write every pending change in one transaction. Returns rows written.
+
+        On failure the batch is merged back under any newer changes so the
+        next flush retries it; nothing newer is overwritten by older state.
+        """
+        async with self._flush_lock:
+            if not self._dirty:
+                return 0
+            batch, since = self._dirty, self._dirty_since
+            batch_at = self._dirty_at
+            n_updates = self._pending_updates
+            self._dirty, self._dirty_since, self._dirty_at = {}, None, {}
+            self._inflight, self._inflight_at = batch, batch_at
+            self._pending_updates = 0
+            stamp = utc_now()
+            try:
+                async with get_db_context() as session:
+                    await crud.apply_rule_state_batch(
+                        session,
+                        {rid: {**fields, "updated_at": stamp} for rid, fields in batch.items()},
+                    )
+            except Exception as e:
+                self._flush_errors += 1
+                self._pending_updates += n_updates
+                for rule_id, fields in batch.items():
+                    self._dirty[rule_id] = {**fields, **self._dirty.get(rule_id, {})}
+                    self._dirty_at[rule_id] = {
+                        **batch_at.get(rule_id, {}), **self._dirty_at.get(rule_id, {}),
+                    }
+                if since is not None and (
+                    self._dirty_since is None or since < self._dirty_since
+                ):
+                    self._dirty_since = since
+                logger.error(
+                    "Rule state flush failed (%d rules, will retry): %s",
+                    len(batch), e,
+                )
+                return 0
+            finally:
+                self._inflight, self._inflight_at = {}, {}
+
+            self._written_at.update(dict.fromkeys(batch, stamp))
+            self._flushes += 1
+            self._rows_written += len(batch)
+            self._updates_flushed += n_updates
+            if since is not None:
+                lag_ms = (time.monotonic() - since) * 1000.0
+                self._last_lag_ms = lag_ms
+                self._max_lag_ms = max(self._max_lag_ms, lag_ms)
+            return len(batch)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self._flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Rule state flush loop raised; continuing")
+
+    def start(self) -> None:
+        """Start the background flush loop (idempotent)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flush loop and drain the dirty map."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def overlay(self, rule, updated_at: datetime | None = None) -> None:
+        """Apply not-yet-durable state onto a rule freshly read from the DB.
+
+        A rule re-read mid-flush (change feed, consistency sweep) would
+        otherwise roll a trailing high or a chain disable back to the older
+        DB value. ``updated_at`` is the row's version: pending fields marked
+        before a newer foreign edit are dropped instead (see module docstring).
+        ``fired_at`` is left alone — the DB stamp is close enough.
+        """
+        foreign = updated_at is not None and updated_at != self._written_at.get(rule.id)
+        for source, times in ((self._inflight, self._inflight_at), (self._dirty, self._dirty_at)):
+            fields = source.get(rule.id)
+            if not fields:
+                continue
+            marked = times.get(rule.id, {})
+            for key in ("trigger_config", "fire_count", "enabled"):
+                if key not in fields:
+                    continue
+                if foreign and key in marked and marked[key] < updated_at:
+                    if source is self._dirty:
+                        del fields[key]
+                        del marked[key]
+                    continue
+                setattr(rule, key, fields[key])
+            if source is self._dirty and not fields:
+                del self._dirty[rule.id]
+                self._dirty_at.pop(rule.id, None)
+                if not self._dirty:
+                    self._dirty_since = None
+
+    # ── Introspection ─────────────────────────────────────────────────
+
+    @property
+    def pending(self) -> int:
+        """Number of rules with unflushed state."""
+        return len(self._dirty)
+
+    def stats(self) -> dict:
+        """Flush lag and coalescing ratio (flushed updates per row written)."""
+        return {
+            "updates": self._updates,
+            "rows_written": self._rows_written,
+            "flushes": self._flushes,
+            "flush_errors": self._flush_errors,
+            "pending_rules": len(self._dirty),
+            "coalescing_ratio": (
+                round(self._updates_flushed / self._rows_written, 2)
+                if self._rows_written else None
+            ),
+            "last_flush_lag_ms": round(self._last_lag_ms, 1),
+            "max_flush_lag_ms": round(self._max_lag_ms, 1),
+        }
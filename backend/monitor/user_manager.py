@@ -5,6 +5,7 @@ and indicator engine computations for each active user.
 """
 from __future__ import annotations
 
+import asyncio
 import logging
 from dataclasses import dataclass, field
 from datetime import datetime
@@ -387,6 +388,17 @@ class UserManager:
                     "buffer seeding: %s", session.user_id, e,
                 )
 
+        async def _seed(key: str, buf: CandleBuffer, token: str, tf: int):
+            try:
+                await seed_candle_buffer(buf, client, token, tf)
+            except Exception as e:
+                logger.warning(
+                    "UserManager: buffer seed failed for %s: %s", key, e,
+                )
+
+        # Buffers are registered first, then seeded concurrently — the
+        # seed coordinator collapses keys other users already fetched.
+        seeds = []
         for key in needed_keys - current_keys:
             meta = needed[key]
             tf_str = meta["timeframe"]
@@ -394,15 +406,9 @@ class UserManager:
             new_buf = CandleBuffer(timeframe_minutes=tf_minutes)
             session.candle_buffers[key] = new_buf
             if client is not None:
-                try:
-                    await seed_candle_buffer(
-                        new_buf, client,
-                        meta["instrument_token"], tf_minutes,
-                    )
-                except Exception as e:
-                    logger.warning(
-                        "UserManager: buffer seed failed for %s: %s", key, e,
-                    )
+                seeds.append(_seed(key, new_buf, meta["instrument_token"], tf_minutes))
+        if seeds:
+            await asyncio.gather(*seeds)
 
         # Remove unused buffers
         for key in current_keys - needed_keys:
@@ -23,7 +23,7 @@ import httpx
 from auth import User, get_current_user
 from database.session import AsyncSessionLocal
 from database.models import UserMCPServer, UserMCPOAuthToken
-from services.mcp_manager import MCPManager
+from services.mcp_manager import MCP_POOL, MCPManager
 
 logger = logging.getLogger(__name__)
 
@@ -272,6 +272,7 @@ async def create_mcp_server(
             await db.refresh(new_server)
 
             logger.info(f"Created MCP server '{server_config.name}' for user {current_user.id}")
+            await MCP_POOL.invalidate_user(current_user.id)
 
             oauth_status = await get_oauth_status(db, new_server)
             return build_server_response(new_server, oauth_status)
@@ -381,6 +382,7 @@ async def update_mcp_server(
             await db.refresh(server)
 
             logger.info(f"Updated MCP server {server_id} for user {current_user.id}")
+            await MCP_POOL.invalidate_user(current_user.id)
 
             oauth_status = await get_oauth_status(db, server)
             return build_server_response(server, oauth_status)
@@ -421,6 +423,7 @@ async def delete_mcp_server(
             await db.commit()
 
             logger.info(f"Deleted MCP server {server_id} for user {current_user.id}")
+            await MCP_POOL.invalidate_user(current_user.id)
 
             return {"success": True, "message": "MCP server deleted"}
 
@@ -518,6 +521,7 @@ async def toggle_server(
             await db.commit()
 
             logger.info(f"Toggled MCP server {server_id} to {server.enabled} for user {current_user.id}")
+            await MCP_POOL.invalidate_user(current_user.id)
 
             return {
                 "success": True,
@@ -779,6 +783,7 @@ async def oauth_callback(
             await db.commit()
 
             logger.info(f"OAuth flow completed for server {server_id}")
+            await MCP_POOL.invalidate_user(token_record.user_id)
 
             return RedirectResponse(
                 url=f"{FRONTEND_URL}/settings/mcp?success=connected&server={server_id}"
@@ -826,6 +831,7 @@ async def oauth_revoke(
             await db.commit()
 
             logger.info(f"OAuth revoked for server {server_id}, user {current_user.id}")
+            await MCP_POOL.invalidate_user(current_user.id)
 
             return {"success": True, "message": "OAuth connection revoked"}
 
@@ -916,6 +922,7 @@ async def oauth_refresh(
             await db.commit()
 
             logger.info(f"OAuth token refreshed for server {server_id}, user {current_user.id}")
+            await MCP_POOL.invalidate_user(current_user.id)
 
             return {
                 "success": True,
@@ -9,185 +9,44 @@ Method (no lookahead): for each symbol and each complete trading day in the
 fetched window, at each eval time T ∈ {09:30, 11:30, 13:30, 14:30} reconstruct
 the exact inputs the live scan would have had at T (gap, rel-strength, RSI,
 session VWAP, RVOL-T, volume expansion) from candles up to T, compute the real
-phase1+phase2 score using the scan's own functions, then measure the forward
+phase1+phase2 score (the scan's scoring rules, vectorized), then measure the forward
 intraday return over the next `--horizon` minutes in the candidate's momentum
 direction. Reports Spearman correlation of score (and each component) with
 forward return, per eval time.
 
+Scoring is vectorized per symbol (backtesting/scan_score.py): every
+(day, eval time) of a symbol is scored in one NumPy pass over its candles,
+with index lookups by searchsorted on a Nifty series built once per run.
+Symbols are fetched first, then scored across a process pool (--workers).
+
 Usage:
   python scripts/scan_score_backtest.py --max-symbols 8 --test-days 4 --json
   python scripts/scan_score_backtest.py --universe nifty50 --horizon 90
+  python scripts/scan_score_backtest.py --universe nifty500 --max-symbols 500 \\
+      --fetch-days 120 --test-days 100 --workers 8
 """
 import argparse
-import importlib.util
 import json
 import os
 import sys
-from datetime import datetime, time as dtime, timedelta
 
 _backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-if _backend not in sys.path:
-    sys.path.insert(0, _backend)
+for _p in (_backend, os.path.join(_backend, "cli-tools")):
+    if _p not in sys.path:
+        sys.path.insert(0, _p)
 
 import pandas as pd
 
-from base import init_market_data_client, run_async  # noqa: E402  (cli-tools on path below)
-
-
-def _load_scan_module():
-    """Import the hyphenated nf-morning-scan CLI as a module for its scoring fns."""
-    cli = os.path.join(_backend, "cli-tools")
-    if cli not in sys.path:
-        sys.path.insert(0, cli)
-    path = os.path.join(cli, "nf-morning-scan")
-    from importlib.machinery import SourceFileLoader
-    loader = SourceFileLoader("nf_morning_scan", path)
-    spec = importlib.util.spec_from_loader("nf_morning_scan", loader)
-    mod = importlib.util.module_from_spec(spec)
-    loader.exec_module(mod)
-    return mod
-
-
-EVAL_TIMES = [dtime(9, 30), dtime(11, 30), dtime(13, 30), dtime(14, 30)]
-
-
-def _to_dt(ts):
-    return pd.to_datetime(ts)
+from backtesting.candle_frame import CandleFrame  # noqa: E402
+from backtesting.day_pool import map_days  # noqa: E402
+from backtesting.scan_score import RECORD_COLUMNS, IndexSeries, score_symbol  # noqa: E402
+from base import init_market_data_client, run_async  # noqa: E402  (cli-tools)
 
 
-def fetch_series(client, symbol, days, instrument_key=None):
+def fetch_frame(client, symbol, days, instrument_key=None):
     candles = run_async(client.get_historical_data(
         symbol, interval="15minute", days=days, instrument_key=instrument_key))
-    for c in candles:
-        c._dt = _to_dt(c.timestamp)              # tz-aware IST (for .date()/.time())
-        c._naive = c._dt.tz_localize(None)       # naive IST wall-clock (for arithmetic)
-    candles.sort(key=lambda c: c._dt)
-    return candles
-
-
-def build_index_closes(index_candles):
-    """date -> (prev_close, {time: close}) for the Nifty index."""
-    by_date = {}
-    for c in index_candles:
-        by_date.setdefault(c._dt.date(), []).append(c)
-    dates = sorted(by_date)
-    out = {}
-    for i, d in enumerate(dates):
-        prev_close = by_date[dates[i - 1]][-1].close if i > 0 else None
-        bars = sorted(((c._naive, c.close) for c in by_date[d]), key=lambda x: x[0])
-        out[d] = {"prev_close": prev_close, "bars": bars}
-    return out, dates
-
-
-def _index_close_before(index_info, d, moment):
-    """Last index close that closed strictly before `moment` (closed-bar convention)."""
-    if d not in index_info:
-        return None
-    last = None
-    for naive, close in index_info[d]["bars"]:
-        if naive < moment:
-            last = close
-    return last
-
-
-def index_pct_at(index_info, d, eval_dt):
-    """Nifty % change from prev close to the last closed index bar before eval_dt."""
-    if d not in index_info or not index_info[d]["prev_close"]:
-        return 0.0
-    prev_close = index_info[d]["prev_close"]
-    last = _index_close_before(index_info, d, eval_dt)
-    return (last - prev_close) / prev_close * 100 if last else 0.0
-
-
-def _index_fwd_ret(index_info, d, eval_dt, fwd_dt):
-    """Nifty % return over [eval_dt, fwd_dt] (for market-neutralizing the stock return)."""
-    p0 = _index_close_before(index_info, d, eval_dt)
-    p1 = _index_close_before(index_info, d, fwd_dt)
-    if not p0 or not p1:
-        return 0.0
-    return (p1 - p0) / p0 * 100
-
-
-def evaluate_symbol(scan, symbol, candles, index_info, horizon_min, test_days):
-    """Yield one record per (day, eval_time)."""
-    by_date = {}
-    for c in candles:
-        by_date.setdefault(c._dt.date(), []).append(c)
-    dates = sorted(by_date)
-    # leave the earliest days as warmup for RSI/RVOL baselines
-    target_days = dates[-test_days:] if test_days < len(dates) else dates[1:]
-
-    records = []
-    for d in target_days:
-        day_candles = by_date[d]
-        if len(day_candles) < 6:
-            continue
-        prev_dates = [x for x in dates if x < d]
-        if not prev_dates:
-            continue
-        prev_close = by_date[prev_dates[-1]][-1].close
-        today_open = day_candles[0].open
-
-        # (c) intraday-momentum feature: first 30-min return (Gao et al 2018).
-        # = (price at 09:45 − open) / open. Known only after 09:45.
-        first30_dt = datetime.combine(d, dtime(9, 45))
-        f30_bars = [c for c in day_candles if c._naive < first30_dt]
-        first30_ret = ((f30_bars[-1].close - today_open) / today_open * 100
-                       if f30_bars and today_open else None)
-
-        for T in EVAL_TIMES:
-            # No lookahead: only bars that have CLOSED strictly before T. For the
-            # 15-min grid this means the last bar is the one ending exactly at T
-            # (e.g. T=09:30 → last bar is 09:15, covering 09:15-09:30). The bar
-            # timestamped T itself covers T..T+15 and must be excluded.
-            eval_dt = datetime.combine(d, T)
-            today_T = [c for c in day_candles if c._naive < eval_dt]
-            if len(today_T) < 1:
-                continue
-            up_to_T = [c for c in candles if c._naive < eval_dt]
-            ltp = today_T[-1].close
-            if prev_close <= 0:
-                continue
-            stock_pct = (ltp - prev_close) / prev_close * 100
-            if stock_pct == 0:
-                continue
-            nifty_pct = index_pct_at(index_info, d, eval_dt)
-
-            gap = scan.compute_gap({"open": today_open, "close": prev_close})
-            rel = scan.compute_relative_strength(stock_pct, nifty_pct)
-            p1 = scan.phase1_score(gap, rel, stock_pct)
-
-            rsi = scan.compute_rsi(up_to_T)
-            vwap = scan.compute_vwap(today_T)
-            rvol = scan.compute_rvol_t(today_T, up_to_T)
-            volx = scan.compute_volume_expansion(today_T, up_to_T)
-            p2 = scan.phase2_score(rsi, vwap, ltp, rvol, volx)
-
-            # forward return: price h minutes after the eval moment, same closed-bar
-            # convention (last bar that closed before eval_dt + horizon).
-            fwd_dt = eval_dt + timedelta(minutes=horizon_min)
-            fwd = [c for c in day_candles if c._naive < fwd_dt]
-            fwd_close = fwd[-1].close if fwd else day_candles[-1].close
-            raw_ret = (fwd_close - ltp) / ltp * 100
-            # (a) market-neutralize: stock forward return minus Nifty's over the same window.
-            nifty_fwd = _index_fwd_ret(index_info, d, eval_dt, fwd_dt)
-            alpha_fwd = raw_ret - nifty_fwd
-
-            records.append({
-                "symbol": symbol, "date": str(d), "eval_time": T.strftime("%H:%M"),
-                "score": p1 + p2, "p1": p1, "p2": p2,
-                "gap_abs": abs(gap), "rel_strength": abs(rel),
-                "rsi": rsi if rsi is not None else float("nan"),
-                "above_vwap": 1 if (vwap and ltp > vwap) else 0,
-                "rvol": (rvol if rvol is not None else volx) or float("nan"),
-                # first30 is only KNOWN once the 09:45 bar has closed — null it for
-                # earlier evals to avoid lookahead (e.g. the 09:30 eval).
-                "first30": (first30_ret if (first30_ret is not None and eval_dt >= first30_dt)
-                            else float("nan")),
-                "alpha_fwd": alpha_fwd,       # market-neutralized forward return (the target)
-                "raw_fwd": raw_ret,
-            })
-    return records
+    return CandleFrame.from_candles(candles)
 
 
 TARGET = "alpha_fwd"  # market-neutralized forward return
@@ -235,8 +94,7 @@ def _ic_by_cross_section(df, col, min_names=10):
     }
 
 
-def summarize(records):
-    df = pd.DataFrame(records)
+def summarize(df):
     out = {"total_samples": len(df), "target": TARGET, "by_time": {}}
     if df.empty:
         return out, df
@@ -259,10 +117,11 @@ def main():
     ap.add_argument("--test-days", type=int, default=10, help="recent days to evaluate")
     ap.add_argument("--horizon", type=int, default=90, help="forward return horizon (min)")
     ap.add_argument("--shuffle", action="store_true", help="random sample of the universe (seed 42) instead of alphabetical head")
+    ap.add_argument("--workers", "-w", type=int, default=None,
+                    help="scoring processes (default: BACKTEST_DAY_WORKERS, 0 = one per CPU)")
     ap.add_argument("--json", action="store_true")
     args = ap.parse_args()
 
-    scan = _load_scan_module()
     from services.instruments_cache import ensure_loaded, get_universe
     from services.upstox_client import UpstoxClient
     ensure_loaded()
@@ -275,22 +134,25 @@ def main():
     symbols = universe[: args.max_symbols]
     client = init_market_data_client()
 
-    index_candles = fetch_series(
+    index = IndexSeries.from_frame(fetch_frame(
         client, "NIFTY 50", args.fetch_days,
-        instrument_key=UpstoxClient.INDEX_KEYS["NIFTY 50"])
-    index_info, _ = build_index_closes(index_candles)
+        instrument_key=UpstoxClient.INDEX_KEYS["NIFTY 50"]))
 
-    all_records = []
+    jobs = []
     for i, sym in enumerate(symbols, 1):
         try:
-            candles = fetch_series(client, sym, args.fetch_days)
-            recs = evaluate_symbol(scan, sym, candles, index_info, args.horizon, args.test_days)
-            all_records.extend(recs)
-            print(f"  [{i}/{len(symbols)}] {sym}: {len(recs)} samples", file=sys.stderr)
+            frame = fetch_frame(client, sym, args.fetch_days)
+            jobs.append((sym, frame, index, args.horizon, args.test_days))
+            print(f"  [{i}/{len(symbols)}] {sym}: {len(frame)} bars", file=sys.stderr)
         except Exception as e:
             print(f"  [{i}/{len(symbols)}] {sym}: SKIP ({e})", file=sys.stderr)
 
-    summary, df = summarize(all_records)
+    def _progress(done, total):
+        print(f"  scored {done}/{total} symbols", file=sys.stderr)
+
+    parts = map_days(score_symbol, jobs, workers=args.workers, progress_cb=_progress)
+    df = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=RECORD_COLUMNS)
+    summary, df = summarize(df)
 
     if args.json:
         print(json.dumps(summary, indent=2))
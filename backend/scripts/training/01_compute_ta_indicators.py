@@ -4,14 +4,23 @@
 Loads daily OHLCV data from the Nifty 500 10-year parquet, computes ~86 TA
 indicators per symbol via the `ta` library, adds derived features (returns,
 SMAs, volume ratios, 52-week highs/lows, gaps), and saves the result as a
-single parquet file for downstream training pipeline consumption.
+month-partitioned parquet dataset for downstream training pipeline consumption.
 
-Output: backend/data/training/ta_indicators.parquet
+Symbols are independent, so they are computed in a process pool.
+
+--incremental only recomputes symbols whose input has days past their last
+output row and upserts just those new rows into their month partitions. Each
+such symbol is still computed over its FULL history: cumulative indicators
+(OBV, ADI, NVI, ...) are path-dependent, so a warm-up window would shift
+their levels.
+
+Output: backend/data/training/ta_indicators/month=YYYY-MM/part.parquet
 
 Usage:
   python scripts/training/01_compute_ta_indicators.py
-  python scripts/training/01_compute_ta_indicators.py --input data/custom.parquet
-  python scripts/training/01_compute_ta_indicators.py --output data/training/my_ta.parquet
+  python scripts/training/01_compute_ta_indicators.py --incremental
+  python scripts/training/01_compute_ta_indicators.py --input data/custom.parquet --workers 4
+  python scripts/training/01_compute_ta_indicators.py --output data/training/my_ta
 """
 
 import argparse
@@ -19,6 +28,7 @@ import logging
 import os
 import sys
 import time
+from concurrent.futures import ProcessPoolExecutor
 
 import numpy as np
 import pandas as pd
@@ -31,6 +41,8 @@ if _backend_dir not in sys.path:
 from dotenv import load_dotenv
 load_dotenv(os.path.join(_backend_dir, ".env"))
 
+from partitioned_parquet import read_dataset, write_dataset
+
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s %(levelname)s %(message)s",
@@ -128,10 +140,19 @@ def main():
     )
     parser.add_argument(
         "--output", "-o",
-        default=os.path.join(_backend_dir, "data", "training", "ta_indicators.parquet"),
-        help="Output parquet path (default: data/training/ta_indicators.parquet)",
+        default=os.path.join(_backend_dir, "data", "training", "ta_indicators"),
+        help="Output dataset directory (default: data/training/ta_indicators)",
+    )
+    parser.add_argument(
+        "--workers", "-w", type=int, default=0,
+        help="Worker processes (default: 0 = one per CPU; 1 = in-process)",
+    )
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="Only add days newer than each symbol's last output row",
     )
     args = parser.parse_args()
+    workers = args.workers or os.cpu_count() or 1
 
     # ------------------------------------------------------------------
     # 1. Load OHLCV data
@@ -159,55 +180,72 @@ def main():
     logger.info(f"Date range: {date_min.date()} to {date_max.date()}")
 
     # ------------------------------------------------------------------
-    # 2. Process each symbol
+    # 2. Pick the symbols to (re)compute
     # ------------------------------------------------------------------
+    # Last output date per symbol: only later rows are new (incremental mode)
+    last_done: dict[str, pd.Timestamp] = {}
+    if args.incremental and os.path.isdir(args.output):
+        done = read_dataset(args.output, columns=["symbol", "date"])
+        if len(done):
+            last_done = pd.to_datetime(done["date"]).groupby(done["symbol"]).max().to_dict()
+        logger.info(f"Incremental: {len(last_done)} symbols already in {args.output}")
+
     symbols = df["symbol"].unique()
     total_symbols = len(symbols)
-    logger.info(f"Processing {total_symbols} symbols...")
-
-    results = []
     skipped = 0
-    t_start = time.time()
-
-    for idx, symbol in enumerate(symbols, 1):
-        sym_df = df[df["symbol"] == symbol].copy()
-
+    up_to_date = 0
+    jobs: list[tuple[str, pd.DataFrame]] = []
+    for symbol, sym_df in df.groupby("symbol", sort=True):
         # Skip thin symbols
         if len(sym_df) < MIN_TRADING_DAYS:
             skipped += 1
             continue
+        last = last_done.get(symbol)
+        if last is not None and sym_df["date"].max() <= last:
+            up_to_date += 1
+            continue
+        jobs.append((symbol, sym_df.reset_index(drop=True)))
 
-        # Ensure sorted by date
-        sym_df = sym_df.sort_values("date").reset_index(drop=True)
-
-        # Compute indicators
-        sym_df = process_symbol(sym_df)
-        results.append(sym_df)
-
-        # Log progress every 50 symbols
-        if idx % 50 == 0 or idx == total_symbols:
-            elapsed = time.time() - t_start
-            rate = idx / elapsed if elapsed > 0 else 0
-            logger.info(
-                f"  [{idx}/{total_symbols}] processed {symbol} "
-                f"({elapsed:.1f}s elapsed, {rate:.1f} sym/s)"
-            )
-
-    if not results:
+    logger.info(
+        f"Processing {len(jobs)} of {total_symbols} symbols with {workers} worker(s) "
+        f"({skipped} thin, {up_to_date} up to date)..."
+    )
+    if not jobs:
+        if up_to_date:
+            logger.info("Nothing new to compute.")
+            return
         logger.error("No symbols had enough data. Aborting.")
         sys.exit(1)
 
     # ------------------------------------------------------------------
-    # 3. Concatenate and save
+    # 3. Compute (process pool) and save
     # ------------------------------------------------------------------
+    results = []
+    t_start = time.time()
+    frames = (sym_df for _, sym_df in jobs)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        mapped = map(process_symbol, frames) if workers == 1 else \
+            pool.map(process_symbol, frames, chunksize=4)
+        for idx, ((symbol, _), sym_df) in enumerate(zip(jobs, mapped), 1):
+            last = last_done.get(symbol)
+            if last is not None:
+                sym_df = sym_df[sym_df["date"] > last]
+            results.append(sym_df)
+
+            # Log progress every 50 symbols
+            if idx % 50 == 0 or idx == len(jobs):
+                elapsed = time.time() - t_start
+                rate = idx / elapsed if elapsed > 0 else 0
+                logger.info(
+                    f"  [{idx}/{len(jobs)}] processed {symbol} "
+                    f"({elapsed:.1f}s elapsed, {rate:.1f} sym/s)"
+                )
+
     logger.info("Concatenating results...")
     out_df = pd.concat(results, ignore_index=True)
 
-    # Ensure output directory exists
-    os.makedirs(os.path.dirname(args.output), exist_ok=True)
-
     logger.info(f"Saving to {args.output}")
-    out_df.to_parquet(args.output, index=False)
+    months = write_dataset(out_df, args.output, upsert=args.incremental)
 
     # ------------------------------------------------------------------
     # 4. Summary
@@ -216,10 +254,11 @@ def main():
     logger.info("=" * 60)
     logger.info("DONE")
     logger.info(f"  Total rows:        {len(out_df):,}")
-    logger.info(f"  Symbols processed: {total_symbols - skipped}")
+    logger.info(f"  Symbols processed: {len(jobs)}")
     logger.info(f"  Symbols skipped:   {skipped} (< {MIN_TRADING_DAYS} trading days)")
     logger.info(f"  Date range:        {out_df['date'].min().date()} to {out_df['date'].max().date()}")
     logger.info(f"  Columns:           {len(out_df.columns)}")
+    logger.info(f"  Months written:    {len(months)}")
     logger.info(f"  Elapsed:           {elapsed_total:.1f}s")
     logger.info(f"  Output:            {args.output}")
     logger.info("=" * 60)
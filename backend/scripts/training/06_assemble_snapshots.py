@@ -6,16 +6,27 @@ into a single parquet with one row per (symbol, date). Each row contains
 only information that was knowable at 9:15 AM IST on that trading day,
 plus outcome labels computed from future prices.
 
+Every feature is built with vectorized joins: a groupby-shift for the
+point-in-time TA shift and the forward labels, an interval expansion (each
+headline joins the days whose lookback window covers it) for news, and a
+merge_asof (last announcement strictly before T) for earnings.
+
 Inputs (in backend/data/training/):
-  - ta_indicators.parquet       (from 01_compute_ta_indicators.py)
+  - ta_indicators/              (from 01_compute_ta_indicators.py)
   - news_headlines.parquet      (from 02_collect_news_headlines.py)
   - earnings_announcements.parquet (from 03_collect_earnings.py)
   - macro_daily.parquet         (from 04_collect_macro.py)
 
-Output: backend/data/training/snapshots_v1.parquet
+Output: backend/data/training/snapshots_v1/month=YYYY-MM/part.parquet
+
+--incremental reads only the last INCREMENTAL_WARMUP_DAYS of TA before the
+newest snapshot, rebuilds the days whose features or labels can have changed
+(new days, plus the last LABEL_HORIZON_DAYS trading days whose 5-day label
+now has its future close) and upserts those into their month partitions.
 
 Usage:
   python scripts/training/06_assemble_snapshots.py
+  python scripts/training/06_assemble_snapshots.py --incremental
   python scripts/training/06_assemble_snapshots.py --stats
 """
 
@@ -37,6 +48,8 @@ if _backend_dir not in sys.path:
 from dotenv import load_dotenv
 load_dotenv(os.path.join(_backend_dir, ".env"))
 
+from partitioned_parquet import max_date, read_dataset, write_dataset
+
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s %(levelname)s %(message)s",
@@ -46,7 +59,7 @@ logger = logging.getLogger(__name__)
 
 # Paths
 TRAINING_DIR = os.path.join(_backend_dir, "data", "training")
-TA_PATH = os.path.join(TRAINING_DIR, "ta_indicators.parquet")
+TA_PATH = os.path.join(TRAINING_DIR, "ta_indicators")
 NEWS_PATH = os.path.join(TRAINING_DIR, "news_headlines.parquet")
 EARNINGS_PATH = os.path.join(TRAINING_DIR, "earnings_announcements.parquet")
 MACRO_PATH = os.path.join(TRAINING_DIR, "macro_daily.parquet")
@@ -57,11 +70,19 @@ NEWS_LOOKBACK_DAYS = 3
 # Earnings season months (Jan/Feb, Apr/May, Jul/Aug, Oct/Nov)
 EARNINGS_SEASON_MONTHS = {1, 2, 4, 5, 7, 8, 10, 11}
 
+# Forward label horizon: target_return_5d at T needs close at T+4
+LABEL_HORIZON_DAYS = 4
+
+# Calendar days of TA history read before the newest snapshot in
+# --incremental mode: covers the T-1 shift, the label horizon and macro
+# forward-fill over short gaps.
+INCREMENTAL_WARMUP_DAYS = 30
 
-def load_ta() -> pd.DataFrame:
-    """Load TA indicators parquet."""
-    logger.info(f"Loading TA indicators from {TA_PATH}")
-    df = pd.read_parquet(TA_PATH)
+
+def load_ta(since: date | None = None) -> pd.DataFrame:
+    """Load TA indicators (only dates >= ``since`` when given)."""
+    logger.info(f"Loading TA indicators from {TA_PATH}" + (f" (since {since})" if since else ""))
+    df = read_dataset(TA_PATH, since=since)
     # Ensure date is a date object for joining
     if hasattr(df["date"].dtype, "tz"):
         df["date"] = df["date"].dt.tz_localize(None)
@@ -121,78 +142,65 @@ def build_news_features(spine: pd.DataFrame, news_df: pd.DataFrame) -> pd.DataFr
     logger.info("Building news features...")
     t_start = time.time()
 
-    # Parse matched_symbols JSON strings
-    news_df = news_df.copy()
-    news_df["symbols_list"] = news_df["matched_symbols"].apply(
-        lambda x: json.loads(x) if isinstance(x, str) else x
+    pairs = spine[["symbol", "date"]].drop_duplicates().reset_index(drop=True)
+
+    # Parse matched_symbols JSON strings; _seq keeps the file order, which
+    # is the order headlines are joined in.
+    news_df = news_df.reset_index(drop=True)
+    news_df = news_df.assign(
+        symbols_list=news_df["matched_symbols"].apply(
+            lambda x: json.loads(x) if isinstance(x, str) else x
+        ),
+        _seq=np.arange(len(news_df)),
+    )
+
+    # Interval join: a headline dated d is in the window [T-N, T-1] of
+    # exactly the days T = d+1 .. d+N, so expand each headline to those N
+    # target days and group — no per-pair scan.
+    def _expand(frame: pd.DataFrame) -> pd.DataFrame:
+        if frame.empty:
+            return frame.assign(target_date=pd.Series(dtype=object))
+        news_dates = pd.to_datetime(frame["date"])
+        parts = [
+            frame.assign(target_date=(news_dates + pd.Timedelta(days=k)).dt.date)
+            for k in range(1, NEWS_LOOKBACK_DAYS + 1)
+        ]
+        return pd.concat(parts, ignore_index=True)
+
+    # Stock-specific headlines: one row per (matched symbol, headline)
+    stock_news = news_df[news_df["symbols_list"].apply(len) > 0]
+    stock_exp = _expand(
+        stock_news.explode("symbols_list").rename(columns={"symbols_list": "symbol"})
+    ).sort_values("_seq", kind="stable")
+    stock_agg = stock_exp.groupby(["symbol", "target_date"], sort=False)["headline"].agg(
+        stock_hl="|".join, stock_n="size",
     )
 
-    # Separate stock-specific and macro headlines
-    stock_news = news_df[news_df["symbols_list"].apply(len) > 0].copy()
-    macro_news = news_df[news_df["is_macro"] == True].copy()  # noqa: E712
-
-    # Build date-indexed lookups for fast range queries
-    # For stock news: expand to one row per (symbol, date, headline)
-    stock_expanded = []
-    for _, row in stock_news.iterrows():
-        for sym in row["symbols_list"]:
-            stock_expanded.append({
-                "symbol": sym,
-                "news_date": row["date"],
-                "headline": row["headline"],
-            })
-    stock_exp_df = pd.DataFrame(stock_expanded) if stock_expanded else pd.DataFrame(
-        columns=["symbol", "news_date", "headline"]
+    # Macro headlines: window days ascending, file order within a day
+    macro_news = news_df[news_df["is_macro"] == True]  # noqa: E712
+    macro_exp = _expand(macro_news).sort_values(["target_date", "date", "_seq"], kind="stable")
+    macro_agg = macro_exp.groupby("target_date", sort=False)["headline"].agg(
+        macro_hl="|".join, macro_n="size",
     )
 
-    macro_headlines_by_date = {}
-    for _, row in macro_news.iterrows():
-        d = row["date"]
-        if d not in macro_headlines_by_date:
-            macro_headlines_by_date[d] = []
-        macro_headlines_by_date[d].append(row["headline"])
-
-    # For each (symbol, date) in spine, collect headlines
-    results = []
-    unique_pairs = spine[["symbol", "date"]].drop_duplicates()
-
-    for i, (symbol, trade_date) in enumerate(zip(unique_pairs["symbol"], unique_pairs["date"])):
-        if i > 0 and i % 200000 == 0:
-            logger.info(f"  News features: {i:,}/{len(unique_pairs):,} pairs...")
-
-        # Date window: T-N to T-1 (calendar days)
-        window_start = trade_date - timedelta(days=NEWS_LOOKBACK_DAYS)
-        window_end = trade_date - timedelta(days=1)
-
-        # Stock-specific headlines
-        stock_hl = []
-        if len(stock_exp_df) > 0:
-            mask = (
-                (stock_exp_df["symbol"] == symbol)
-                & (stock_exp_df["news_date"] >= window_start)
-                & (stock_exp_df["news_date"] <= window_end)
-            )
-            stock_hl = stock_exp_df.loc[mask, "headline"].tolist()
-
-        # Macro headlines
-        macro_hl = []
-        for d in pd.date_range(window_start, window_end):
-            d_date = d.date()
-            if d_date in macro_headlines_by_date:
-                macro_hl.extend(macro_headlines_by_date[d_date])
-
-        results.append({
-            "symbol": symbol,
-            "date": trade_date,
-            "news_stock_headlines": "|".join(stock_hl) if stock_hl else "",
-            "news_macro_headlines": "|".join(macro_hl) if macro_hl else "",
-            "news_headline_count": len(stock_hl) + len(macro_hl),
-        })
+    out = pairs.merge(
+        stock_agg, left_on=["symbol", "date"], right_index=True, how="left",
+    ).merge(macro_agg, left_on="date", right_index=True, how="left")
+
+    stock_n = out["stock_n"].fillna(0).astype(int)
+    macro_n = out["macro_n"].fillna(0).astype(int)
+    result = pd.DataFrame({
+        "symbol": out["symbol"],
+        "date": out["date"],
+        "news_stock_headlines": out["stock_hl"].fillna(""),
+        "news_macro_headlines": out["macro_hl"].fillna(""),
+        "news_headline_count": stock_n + macro_n,
+    })
 
     elapsed = time.time() - t_start
     logger.info(f"  News features built in {elapsed:.1f}s")
 
-    return pd.DataFrame(results)
+    return result
 
 
 def build_earnings_features(spine: pd.DataFrame, earnings_df: pd.DataFrame) -> pd.DataFrame:
@@ -207,50 +215,43 @@ def build_earnings_features(spine: pd.DataFrame, earnings_df: pd.DataFrame) -> p
     logger.info("Building earnings features...")
     t_start = time.time()
 
-    # Group announcements by symbol, sorted by date
-    earnings_by_symbol = {}
-    for sym, grp in earnings_df.groupby("symbol"):
-        earnings_by_symbol[sym] = sorted(grp["announcement_date"].unique())
-
-    results = []
-    unique_pairs = spine[["symbol", "date"]].drop_duplicates()
-
-    for i, (symbol, trade_date) in enumerate(zip(unique_pairs["symbol"], unique_pairs["date"])):
-        if i > 0 and i % 200000 == 0:
-            logger.info(f"  Earnings features: {i:,}/{len(unique_pairs):,} pairs...")
-
-        ann_dates = earnings_by_symbol.get(symbol, [])
-
-        # Find most recent announcement before trade_date
-        days_since = None
-        earnings_yesterday = False
-
-        # Binary search for efficiency
-        import bisect
-        idx = bisect.bisect_left(ann_dates, trade_date)
-        if idx > 0:
-            last_ann = ann_dates[idx - 1]
-            delta = (trade_date - last_ann).days
-            # Approximate business days (weekdays only)
-            days_since = sum(
-                1 for d in range(delta)
-                if (trade_date - timedelta(days=d + 1)).weekday() < 5
-            ) if delta <= 30 else delta  # Exact for recent, approximate for old
-            earnings_yesterday = (last_ann == trade_date - timedelta(days=1))
-
-        results.append({
-            "symbol": symbol,
-            "date": trade_date,
-            "days_since_earnings": days_since,
-            "is_earnings_week": days_since is not None and days_since <= 5,
-            "earnings_announced_yesterday": earnings_yesterday,
-            "in_earnings_season": trade_date.month in EARNINGS_SEASON_MONTHS,
-        })
+    pairs = spine[["symbol", "date"]].drop_duplicates().reset_index(drop=True)
+    pairs["_row"] = np.arange(len(pairs))
+    pairs["_ts"] = pd.to_datetime(pairs["date"])
+
+    ann = earnings_df[["symbol", "announcement_date"]].drop_duplicates()
+    ann = ann.assign(_ts=pd.to_datetime(ann["announcement_date"])).dropna(subset=["_ts"])
+
+    # Most recent announcement strictly before T, per symbol
+    joined = pd.merge_asof(
+        pairs.sort_values("_ts"),
+        ann[["symbol", "_ts"]].assign(last_ann=ann["_ts"]).sort_values("_ts"),
+        on="_ts", by="symbol", direction="backward", allow_exact_matches=False,
+    ).sort_values("_row").reset_index(drop=True)
+
+    has_ann = joined["last_ann"].notna().to_numpy()
+    trade_d = joined["_ts"].to_numpy().astype("datetime64[D]")
+    last_d = joined["last_ann"].fillna(joined["_ts"]).to_numpy().astype("datetime64[D]")
+    delta = (trade_d - last_d).astype(np.int64)
+    # Weekdays in [last_ann, T-1] — exact for recent announcements,
+    # calendar days beyond 30
+    busdays = np.busday_count(last_d, trade_d)
+    days_since = np.where(delta <= 30, busdays, delta).astype(float)
+    days_since[~has_ann] = np.nan
+
+    result = pd.DataFrame({
+        "symbol": joined["symbol"],
+        "date": joined["date"],
+        "days_since_earnings": days_since,
+        "is_earnings_week": has_ann & (days_since <= 5),
+        "earnings_announced_yesterday": has_ann & (delta == 1),
+        "in_earnings_season": joined["_ts"].dt.month.isin(EARNINGS_SEASON_MONTHS).to_numpy(),
+    })
 
     elapsed = time.time() - t_start
     logger.info(f"  Earnings features built in {elapsed:.1f}s")
 
-    return pd.DataFrame(results)
+    return result
 
 
 def add_outcome_labels(df: pd.DataFrame) -> pd.DataFrame:
@@ -274,27 +275,16 @@ def add_outcome_labels(df: pd.DataFrame) -> pd.DataFrame:
 
     df = df.sort_values(["symbol", "date"]).reset_index(drop=True)
 
-    df["target_return_1d"] = np.nan
-    df["target_return_5d"] = np.nan
-
-    for symbol, grp in df.groupby("symbol"):
-        idx = grp.index
-        opens = grp["_orig_open"].values
-        closes = grp["_orig_close"].values
+    opens = df["_orig_open"].to_numpy(dtype=float)
+    closes = df["_orig_close"].to_numpy(dtype=float)
+    # close_{T+4} within the symbol (NaN for its last 4 days)
+    future_close = df.groupby("symbol")["_orig_close"].shift(-LABEL_HORIZON_DAYS).to_numpy(dtype=float)
 
+    with np.errstate(divide="ignore", invalid="ignore"):
         # 1-day return: (close_T - open_T) / open_T
-        with np.errstate(divide="ignore", invalid="ignore"):
-            intraday = (closes - opens) / opens
-        df.loc[idx, "target_return_1d"] = intraday
-
+        df["target_return_1d"] = (closes - opens) / opens
         # 5-day return: (close_{T+4} - open_T) / open_T
-        if len(closes) > 4:
-            future_close = np.empty(len(closes))
-            future_close[:] = np.nan
-            future_close[:-4] = closes[4:]
-            with np.errstate(divide="ignore", invalid="ignore"):
-                five_day = (future_close - opens) / opens
-            df.loc[idx, "target_return_5d"] = five_day
+        df["target_return_5d"] = (future_close - opens) / opens
 
     # Direction labels
     df["target_direction_1d"] = np.where(df["target_return_1d"] > 0, "up", "down")
@@ -313,12 +303,16 @@ def add_outcome_labels(df: pd.DataFrame) -> pd.DataFrame:
 def main():
     parser = argparse.ArgumentParser(
         description="Assemble point-in-time training snapshots",
-        epilog="Requires: ta_indicators.parquet + optionally news, earnings, macro parquets",
+        epilog="Requires: ta_indicators/ + optionally news, earnings, macro parquets",
     )
     parser.add_argument(
         "--output", "-o",
-        default=os.path.join(TRAINING_DIR, "snapshots_v1.parquet"),
-        help="Output parquet path",
+        default=os.path.join(TRAINING_DIR, "snapshots_v1"),
+        help="Output dataset directory",
+    )
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="Only rebuild days after the newest snapshot (plus the label horizon)",
     )
     parser.add_argument(
         "--stats", action="store_true",
@@ -344,7 +338,12 @@ def main():
         logger.error("Run 01_compute_ta_indicators.py first")
         sys.exit(1)
 
-    ta_df = load_ta()
+    last_snapshot = max_date(args.output) if args.incremental else None
+    if last_snapshot is not None:
+        logger.info(f"Incremental: newest snapshot is {last_snapshot}")
+        ta_df = load_ta(since=last_snapshot - timedelta(days=INCREMENTAL_WARMUP_DAYS))
+    else:
+        ta_df = load_ta()
 
     # The spine: for each (symbol, date) we build a snapshot.
     # Point-in-time: row T in ta_df contains indicators computed from data
@@ -367,13 +366,8 @@ def main():
     non_shift_cols = {"symbol", "date", "_orig_open", "_orig_close"}
     shift_cols = [c for c in ta_df.columns if c not in non_shift_cols]
 
-    shifted_parts = []
-    for symbol, grp in ta_df.groupby("symbol"):
-        grp = grp.copy()
-        grp[shift_cols] = grp[shift_cols].shift(1)
-        shifted_parts.append(grp)
-
-    spine = pd.concat(shifted_parts, ignore_index=True)
+    spine = ta_df.copy()
+    spine[shift_cols] = ta_df.groupby("symbol", sort=False)[shift_cols].shift(1)
 
     # After shift: open/close/high/low/volume are now T-1's values (features).
     # _orig_open/_orig_close are T's actual values (for labels).
@@ -468,12 +462,20 @@ def main():
     if drop_cols:
         spine = spine.drop(columns=drop_cols)
 
+    # Incremental: keep the days that are new or whose 5-day label just
+    # gained its future close; the warm-up rows before them are unchanged.
+    if last_snapshot is not None:
+        old_days = sorted(d for d in spine["date"].unique() if d <= last_snapshot)
+        rebuild_from = old_days[-LABEL_HORIZON_DAYS] if len(old_days) >= LABEL_HORIZON_DAYS \
+            else (old_days[0] if old_days else last_snapshot)
+        spine = spine[spine["date"] >= rebuild_from].reset_index(drop=True)
+        logger.info(f"  Rebuilding {len(spine):,} rows from {rebuild_from}")
+
     # ----------------------------------------------------------------
     # 7. Save
     # ----------------------------------------------------------------
-    os.makedirs(os.path.dirname(args.output), exist_ok=True)
     logger.info(f"Saving to {args.output}...")
-    spine.to_parquet(args.output, index=False)
+    months = write_dataset(spine, args.output, upsert=last_snapshot is not None)
 
     # ----------------------------------------------------------------
     # 8. Summary
@@ -486,7 +488,7 @@ def main():
     logger.info(f"  Symbols:        {spine['symbol'].nunique()}")
     logger.info(f"  Date range:     {spine['date'].min()} to {spine['date'].max()}")
     logger.info(f"  Columns:        {len(spine.columns)}")
-    logger.info(f"  File size:      {os.path.getsize(args.output) / 1e6:.1f} MB")
+    logger.info(f"  Months written: {len(months)}")
     logger.info(f"  Elapsed:        {elapsed:.1f}s")
 
     if args.stats:
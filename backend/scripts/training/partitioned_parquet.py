@@ -0,0 +1,124 @@
+"""Month-partitioned Parquet datasets for the training pipeline.
+
+The pipeline steps used to rewrite one monolithic parquet per run, so a
+nightly refresh rebuilt ten years of history to add one day. Outputs are now
+datasets partitioned by month:
+
+  <root>/month=YYYY-MM/part.parquet
+
+- ``write_dataset(df, root)`` rebuilds the whole dataset.
+- ``write_dataset(df, root, upsert=True)`` rewrites only the months ``df``
+  touches, replacing rows with the same key (symbol, date) and keeping the
+  rest. Appending new trading days touches the current month only.
+- ``read_dataset(root, since=...)`` reads only the months on/after ``since``.
+
+Partition files are written to a temp name and renamed into place, so a
+crashed run never leaves a half-written month behind. The hive-style
+``month=`` directories also load as one frame with
+``pd.read_parquet(root)`` (which adds a ``month`` column).
+"""
+from __future__ import annotations
+
+import os
+import shutil
+from datetime import date
+
+import pandas as pd
+
+PARTITION_PREFIX = "month="
+PART_FILE = "part.parquet"
+
+
+def _month_keys(dates: pd.Series) -> pd.Series:
+    return pd.to_datetime(dates).dt.strftime("%Y-%m")
+
+
+def list_months(root: str) -> list[str]:
+    """The dataset's partition months (``YYYY-MM``), ascending."""
+    if not os.path.isdir(root):
+        return []
+    return sorted(
+        name[len(PARTITION_PREFIX):]
+        for name in os.listdir(root)
+        if name.startswith(PARTITION_PREFIX)
+        and os.path.exists(os.path.join(root, name, PART_FILE))
+    )
+
+
+def _part_path(root: str, month: str) -> str:
+    return os.path.join(root, f"{PARTITION_PREFIX}{month}", PART_FILE)
+
+
+def read_dataset(
+    root: str,
+    *,
+    since: date | None = None,
+    columns: list[str] | None = None,
+    date_col: str = "date",
+) -> pd.DataFrame:
+    """Load a dataset (or a legacy single parquet file), optionally from ``since`` on."""
+    if os.path.isfile(root):
+        df = pd.read_parquet(root, columns=columns)
+    else:
+        months = list_months(root)
+        if since is not None:
+            months = [m for m in months if m >= since.strftime("%Y-%m")]
+        if not months:
+            return pd.DataFrame(columns=columns)
+        df = pd.concat(
+            [pd.read_parquet(_part_path(root, m), columns=columns) for m in months],
+            ignore_index=True,
+        )
+    if since is not None and len(df):
+        df = df[pd.to_datetime(df[date_col]) >= pd.Timestamp(since)].reset_index(drop=True)
+    return df
+
+
+def max_date(root: str, date_col: str = "date") -> date | None:
+    """Latest ``date_col`` value in the dataset (reads the last month only)."""
+    months = list_months(root)
+    if not months:
+        return None
+    dates = pd.read_parquet(_part_path(root, months[-1]), columns=[date_col])[date_col]
+    return pd.to_datetime(dates).max().date() if len(dates) else None
+
+
+def _write_part(df: pd.DataFrame, path: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    df.to_parquet(tmp, index=False)
+    os.replace(tmp, path)
+
+
+def write_dataset(
+    df: pd.DataFrame,
+    root: str,
+    *,
+    upsert: bool = False,
+    key_cols: tuple[str, ...] = ("symbol", "date"),
+    date_col: str = "date",
+) -> list[str]:
+    """Write ``df`` into month partitions under ``root``; return the months written.
+
+    ``upsert=False`` replaces the whole dataset. ``upsert=True`` merges into
+    the existing months ``df`` touches: rows of ``df`` win over existing rows
+    with the same ``key_cols``; every other existing row is kept.
+    """
+    if not upsert and os.path.isdir(root):
+        shutil.rmtree(root)
+    os.makedirs(root, exist_ok=True)
+    if df.empty:
+        return []
+
+    months = _month_keys(df[date_col])
+    written = []
+    for month, part in df.groupby(months.values, sort=True):
+        path = _part_path(root, month)
+        if upsert and os.path.exists(path):
+            existing = pd.read_parquet(path)
+            part = pd.concat([existing, part], ignore_index=True)
+            part = part.drop_duplicates(subset=list(key_cols), keep="last")
+        part = part.sort_values(list(key_cols)).reset_index(drop=True)
+        _write_part(part, path)
+        written.append(month)
+    return written
@@ -317,6 +317,7 @@ async def _run_scalp(job_id: int, user_id: int, config: dict) -> dict | None:
 
     from api.upstox_oauth import get_user_upstox_token
     from services.upstox_client import UpstoxClient
+    from backtesting.candle_frame import CandleFrame
     from backtesting.scalp_equity import run_scalp_equity_backtest
     from monitor.scalp_models import ScalpSessionConfig
     from api.backtest import _scalp_result_to_dict, _INTERVAL_TO_TIMEFRAME, fetch_with_warmup
@@ -338,11 +339,7 @@ async def _run_scalp(job_id: int, user_id: int, config: dict) -> dict | None:
     if not ohlcv:
         raise ValueError(f"No historical data for {symbol}")
 
-    candles = [
-        {"timestamp": c.timestamp, "open": c.open, "high": c.high,
-         "low": c.low, "close": c.close, "volume": c.volume}
-        for c in ohlcv
-    ]
+    candles = CandleFrame.from_candles(ohlcv)
     await _update_progress(job_id, total=len(candles), done=0,
                            message=f"Replaying {len(candles)} bars")
 
@@ -397,6 +394,7 @@ async def _run_scalp_options(job_id: int, user_id: int, config: dict) -> dict |
     """
     from api.upstox_oauth import get_user_upstox_token
     from services.upstox_client import UpstoxClient
+    from backtesting.candle_frame import CandleFrame
     from backtesting.scalp_options import (
         plan_atm_legs, run_scalp_options_backtest,
     )
@@ -433,18 +431,14 @@ async def _run_scalp_options(job_id: int, user_id: int, config: dict) -> dict |
     if not ohlcv:
         raise ValueError(f"No historical data for {underlying}")
 
-    underlying_candles = [
-        {"timestamp": c.timestamp, "open": c.open, "high": c.high,
-         "low": c.low, "close": c.close, "volume": c.volume}
-        for c in ohlcv
-    ]
+    underlying_candles = CandleFrame.from_candles(ohlcv)
 
     # Rolling-expiry mode: resolve each flip against the front-of-book weekly
     # for that bar's date instead of a single fixed expiry. Needs a token
     # (Plus plan) for the expired-instruments API.
     from api.backtest import (
         _is_rolling_expiry, _build_rolling_expiry_data, _replay_dates,
-        _fetch_rolling_leg, _plan_leg_dates,
+        _fetch_rolling_legs,
     )
 
     rolling_mode = _is_rolling_expiry(expiry)
@@ -518,26 +512,18 @@ async def _run_scalp_options(job_id: int, user_id: int, config: dict) -> dict |
                 symbol=underlying, interval=interval, days=days,
                 instrument_key=ik,
             )
-            return ik, [
-                {"timestamp": c.timestamp, "open": c.open, "high": c.high,
-                 "low": c.low, "close": c.close, "volume": c.volume}
-                for c in leg_ohlcv
-            ]
+            return ik, CandleFrame.from_candles(leg_ohlcv)
         except Exception as e:
             logger.warning("scalp options: fetch failed for %s: %s", ik, e)
             return ik, []
 
-    async def _fetch_leg_rolling(ik: str) -> tuple[str, list[dict]]:
-        _from, leg_expiry = _plan_leg_dates(plans, ik)
-        from_date = window_start or _from
-        to_date = leg_expiry or _from
-        return await _fetch_rolling_leg(
-            token, client, underlying, ik, interval, from_date, to_date, days,
+    if rolling_mode:
+        leg_candles_by_key = await _fetch_rolling_legs(
+            token, client, underlying, plans, interval, window_start, days,
         )
-
-    fetcher = _fetch_leg_rolling if rolling_mode else _fetch_leg
-    fetched = await asyncio.gather(*[fetcher(ik) for ik in unique_keys])
-    leg_candles_by_key = {ik: data for ik, data in fetched}
+    else:
+        fetched = await asyncio.gather(*[_fetch_leg(ik) for ik in unique_keys])
+        leg_candles_by_key = {ik: data for ik, data in fetched}
 
     if await _check_cancel(job_id):
         await _mark_cancelled(job_id)
@@ -572,9 +558,9 @@ async def _run_equity(job_id: int, user_id: int, config: dict) -> dict | None:
     from api.upstox_oauth import get_user_upstox_token
     from services.upstox_client import UpstoxClient
     from strategies.templates import get_template, list_templates
-    from backtesting.engine import BacktestEngine, run_backtest_for_day
     from backtesting.metrics import compute_metrics
-    from api.backtest import _split_by_day, _build_rules_for_day, _trade_to_dict
+    from backtesting.template_days import run_template_days
+    from api.backtest import _split_by_day, _trade_to_dict
 
     template_name = config["template"]
     template = get_template(template_name)
@@ -595,15 +581,13 @@ async def _run_equity(job_id: int, user_id: int, config: dict) -> dict | None:
         raise ValueError("Upstox token not available")
 
     client = UpstoxClient(access_token=token, user_id=user_id)
-    ohlcv = await client.get_historical_data(symbol, interval=interval, days=days)
-    if not ohlcv:
+    ohlcv = await client.get_historical_data(
+        symbol, interval=interval, days=days, columnar=True,
+    )
+    if not len(ohlcv):
         raise ValueError(f"No historical data for {symbol}")
 
-    candles = [
-        {"timestamp": c.timestamp, "open": c.open, "high": c.high,
-         "low": c.low, "close": c.close, "volume": c.volume}
-        for c in ohlcv
-    ]
+    candles = ohlcv.to_frame()
 
     params = {k: v for k, v in (config.get("params") or {}).items() if v is not None and v != ""}
     params.setdefault("capital", 100_000)
@@ -621,21 +605,13 @@ async def _run_equity(job_id: int, user_id: int, config: dict) -> dict | None:
                            message=f"Replaying {total_days} trading days")
 
     def _go():
-        trades: list = []
-        for idx, (day_key, day_candles) in enumerate(day_groups.items()):
-            if cancel():
-                break
-            if len(day_candles) < 2:
-                continue
-            rules = _build_rules_for_day(template, symbol, day_candles, params, template_name)
-            if not rules:
-                continue
-            sim_candles = day_candles[1:] if template_name == "orb" else day_candles
-            result = run_backtest_for_day(
-                sim_candles, rules, symbol, template_name, capital,
-            )
-            trades.extend(result.trades)
-            progress(idx + 1, total_days)
+        # Days are independent — sharded across the backtest day pool, with
+        # progress/cancel checked as shards complete.
+        trades = run_template_days(
+            template_name, symbol, day_groups, params, capital,
+            progress_cb=progress, cancel_check=cancel,
+        )
+        progress(total_days, total_days)
         return trades
 
     all_trades = await asyncio.to_thread(_go)
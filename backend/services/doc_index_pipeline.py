@@ -0,0 +1,301 @@
+"""Incremental, pipelined documentation indexing.
+
+``DocIndexer`` and ``UnifiedDocsIndexer`` used to re-chunk and re-embed every
+file on every run and write one document at a time, so a one-line doc edit
+cost a full reindex. ``IndexPipeline`` makes indexing incremental and overlaps
+the three kinds of work:
+
+    read + hash + chunk  ──►  embed (batched, concurrent, rate-limited)  ──►  bulk write
+      (thread pool)              across files                                (one txn per batch)
+
+- **Per-file hash**: a file whose SHA-256 matches the stored hash is skipped
+  before it is even chunked.
+- **Per-chunk hash**: within a changed file, chunks whose hash matches the
+  stored chunk at the same index are neither re-embedded nor rewritten
+  (indexers that store one row per file simply don't supply chunk hashes).
+- Embedding requests pack chunks from several files into one API call, run up
+  to ``DOC_INDEX_EMBED_CONCURRENCY`` at a time under a ``RateLimiter``, and go
+  through the shared embedding cache, so unchanged text never reaches the API.
+- The writer hands batches of finished files to the indexer's bulk
+  upsert/delete callback, one transaction per ``DOC_INDEX_WRITE_BATCH`` files.
+
+A file whose embeddings or write fail keeps its old stored hash, so the next
+run retries it.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Iterable, Optional
+
+from database.session import get_db_session
+from services.rate_limiter import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+EMBED_CONCURRENCY = int(os.getenv("DOC_INDEX_EMBED_CONCURRENCY", "4"))
+EMBED_BATCH = int(os.getenv("DOC_INDEX_EMBED_BATCH", "64"))
+EMBED_RPM = int(os.getenv("DOC_INDEX_EMBED_RPM", "300"))
+WRITE_BATCH = int(os.getenv("DOC_INDEX_WRITE_BATCH", "50"))
+
+_DONE = object()
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class DocWork:
+    """One changed file on its way through the pipeline.
+
+    ``chunks`` are the indexer's chunk dicts; each must carry ``chunk_text``
+    and gets a ``chunk_hash``. ``embeddings`` is filled per chunk index;
+    ``changed`` lists the chunk indexes that need writing.
+    """
+    path: str
+    file_hash: str
+    chunks: list[dict]
+    meta: dict[str, Any] = field(default_factory=dict)
+    changed: list[int] = field(default_factory=list)
+    embeddings: dict[int, list[float]] = field(default_factory=dict)
+    failed: bool = False
+    _remaining: int = 0
+
+
+@dataclass
+class IndexStats:
+    files_seen: int = 0
+    files_skipped: int = 0
+    files_indexed: int = 0
+    files_deleted: int = 0
+    chunks_embedded: int = 0
+    chunks_reused: int = 0
+    embed_calls: int = 0
+    write_batches: int = 0
+    errors: int = 0
+    elapsed_s: float = 0.0
+
+
+ChunkFn = Callable[[Path, str], Optional[DocWork]]
+EmbedFn = Callable[[list[str]], Awaitable[list[list[float]]]]
+WriteFn = Callable[[Any, list[DocWork]], Awaitable[None]]
+DeleteFn = Callable[[Any, list[str]], Awaitable[None]]
+
+
+class IndexPipeline:
+    """Producer/consumer indexing run.
+
+    Args:
+        chunk: ``(file, content) -> DocWork | None`` — parse and chunk one file
+            (runs in a worker thread; return None to skip the file). A file
+            that no longer yields any chunks must come back as a DocWork with
+            an empty ``chunks`` list, so ``write`` clears what was stored for it.
+        embed: Embeds a list of texts (e.g. the indexer's cached
+            ``generate_embeddings_batch``).
+        write: ``(session, works)`` bulk upsert of finished files.
+        delete: ``(session, paths)`` bulk delete of files gone from disk;
+            None to never delete.
+    """
+
+    def __init__(
+        self,
+        chunk: ChunkFn,
+        embed: EmbedFn,
+        write: WriteFn,
+        delete: Optional[DeleteFn] = None,
+        *,
+        embed_concurrency: int = EMBED_CONCURRENCY,
+        embed_batch: int = EMBED_BATCH,
+        limiter: Optional[RateLimiter] = None,
+        write_batch: int = WRITE_BATCH,
+        session_factory: Callable[[], Any] = get_db_session,
+    ) -> None:
+        self._chunk = chunk
+        self._embed = embed
+        self._write = write
+        self._delete = delete
+        self._sem = asyncio.Semaphore(embed_concurrency)
+        self._embed_batch = embed_batch
+        self._limiter = limiter or RateLimiter([(EMBED_RPM, 60.0)])
+        self._write_batch = write_batch
+        self._session_factory = session_factory
+        self.stats = IndexStats()
+
+    async def run(
+        self,
+        files: Iterable[tuple[Path, str]],
+        stored_hashes: dict[str, str],
+        stored_chunks: Optional[dict[str, dict[int, str]]] = None,
+        force: bool = False,
+    ) -> IndexStats:
+        """Index ``files`` (``(file, path_key)`` pairs) against stored state.
+
+        Args:
+            stored_hashes: path_key -> file hash from the last successful index.
+            stored_chunks: path_key -> {chunk_index: chunk_hash}; enables
+                chunk-level reuse. None re-embeds every chunk of a changed file.
+            force: Ignore stored hashes (re-embeds through the cache, rewrites all).
+        """
+        t0 = time.perf_counter()
+        embed_q: asyncio.Queue = asyncio.Queue(maxsize=256)
+        write_q: asyncio.Queue = asyncio.Queue()
+        files = list(files)
+        on_disk = {key for _, key in files}
+
+        producer = asyncio.create_task(self._produce(files, stored_hashes, stored_chunks, force, embed_q))
+        embedder = asyncio.create_task(self._embed_stage(embed_q, write_q))
+        writer = asyncio.create_task(self._write_stage(write_q))
+        try:
+            await asyncio.gather(producer, embedder, writer)
+        except BaseException:
+            for task in (producer, embedder, writer):
+                task.cancel()
+            raise
+
+        gone = sorted(set(stored_hashes) - on_disk)
+        if gone and self._delete is not None:
+            try:
+                async with self._session_factory() as session:
+                    await self._delete(session, gone)
+                    await session.commit()
+                self.stats.files_deleted = len(gone)
+            except Exception as e:
+                logger.error("  ✗ Failed to delete %d removed file(s): %s", len(gone), e)
+                self.stats.errors += 1
+
+        self.stats.elapsed_s = time.perf_counter() - t0
+        return self.stats
+
+    # ── Stage 1: read, hash, chunk ───────────────────────────────────
+
+    def _read_and_chunk(self, file: Path, key: str, known: Optional[str],
+                        known_chunks: Optional[dict[int, str]], force: bool):
+        content = file.read_text(encoding="utf-8")
+        file_hash = content_hash(content)
+        if not force and known == file_hash:
+            return None
+        work = self._chunk(file, content)
+        if work is None:
+            return None
+        work.path, work.file_hash = key, file_hash
+        for i, chunk in enumerate(work.chunks):
+            chunk["chunk_hash"] = content_hash(chunk["chunk_text"])
+            if force or known_chunks is None or known_chunks.get(i) != chunk["chunk_hash"]:
+                work.changed.append(i)
+        return work
+
+    async def _produce(self, files, stored_hashes, stored_chunks, force, embed_q) -> None:
+        try:
+            for file, key in files:
+                self.stats.files_seen += 1
+                known_chunks = stored_chunks.get(key, {}) if stored_chunks is not None else None
+                try:
+                    work = await asyncio.to_thread(
+                        self._read_and_chunk, file, key, stored_hashes.get(key), known_chunks, force,
+                    )
+                except Exception as e:
+                    logger.error(f"  ✗ Error reading {file}: {e}")
+                    self.stats.errors += 1
+                    continue
+                if work is None:
+                    self.stats.files_skipped += 1
+                    continue
+                self.stats.chunks_reused += len(work.chunks) - len(work.changed)
+                await embed_q.put(work)
+        finally:
+            await embed_q.put(_DONE)
+
+    # ── Stage 2: batched, concurrent embeddings ──────────────────────
+
+    async def _embed_stage(self, embed_q: asyncio.Queue, write_q: asyncio.Queue) -> None:
+        pending: list[tuple[DocWork, int]] = []
+        tasks: set[asyncio.Task] = set()
+
+        def dispatch(batch):
+            task = asyncio.create_task(self._embed_batch_call(batch, write_q))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        try:
+            while True:
+                work = await embed_q.get()
+                if work is _DONE:
+                    break
+                if not work.changed:
+                    await write_q.put(work)
+                    continue
+                work._remaining = len(work.changed)
+                pending.extend((work, i) for i in work.changed)
+                while len(pending) >= self._embed_batch:
+                    dispatch(pending[:self._embed_batch])
+                    pending = pending[self._embed_batch:]
+                # Don't hold a partial batch while the producer is busy chunking.
+                if pending and embed_q.empty():
+                    dispatch(pending)
+                    pending = []
+            if pending:
+                dispatch(pending)
+            while tasks:
+                await asyncio.gather(*list(tasks))
+        finally:
+            await write_q.put(_DONE)
+
+    async def _embed_batch_call(self, batch: list[tuple[DocWork, int]], write_q: asyncio.Queue) -> None:
+        async with self._sem:
+            await self._limiter.acquire()
+            self.stats.embed_calls += 1
+            try:
+                vectors = await self._embed([w.chunks[i]["chunk_text"] for w, i in batch])
+            except Exception as e:
+                logger.error(f"  ✗ Embedding batch of {len(batch)} chunks failed: {e}")
+                vectors = None
+        for n, (work, i) in enumerate(batch):
+            if vectors is None:
+                work.failed = True
+            else:
+                work.embeddings[i] = vectors[n]
+                self.stats.chunks_embedded += 1
+            work._remaining -= 1
+            if work._remaining == 0:
+                if work.failed:
+                    self.stats.errors += 1
+                else:
+                    await write_q.put(work)
+
+    # ── Stage 3: bulk writes ─────────────────────────────────────────
+
+    async def _write_stage(self, write_q: asyncio.Queue) -> None:
+        done = False
+        while not done:
+            batch: list[DocWork] = []
+            item = await write_q.get()
+            while True:
+                if item is _DONE:
+                    done = True
+                    break
+                batch.append(item)
+                if len(batch) >= self._write_batch or write_q.empty():
+                    break
+                item = write_q.get_nowait()
+            if batch:
+                await self._flush(batch)
+
+    async def _flush(self, batch: list[DocWork]) -> None:
+        try:
+            async with self._session_factory() as session:
+                await self._write(session, batch)
+                await session.commit()
+        except Exception as e:
+            logger.error(f"  ✗ Writing {len(batch)} file(s) failed: {e}")
+            self.stats.errors += len(batch)
+            return
+        self.stats.write_batches += 1
+        self.stats.files_indexed += len(batch)
+        for work in batch:
+            logger.info(f"  ✓ Indexed: {work.path} ({len(work.changed)}/{len(work.chunks)} chunks changed)")
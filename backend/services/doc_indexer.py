@@ -29,6 +29,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, delete, text
 
 from database.session import get_db_session
+from memory.embedding_cache import get_embedding_cache
+from services.doc_index_pipeline import DocWork, IndexPipeline, IndexStats
 
 logger = logging.getLogger(__name__)
 
@@ -60,6 +62,7 @@ class DocIndexer:
         self.docs_dir = docs_dir
         self.model_name = model_name
         self.use_openai = use_openai
+        self._openai_client = None
 
         # Get API key from environment
         if use_openai:
@@ -84,7 +87,7 @@ class DocIndexer:
 
     async def generate_embedding(self, text: str) -> List[float]:
         """
-        Generate embedding for text using OpenAI or OpenRouter API.
+        Generate embedding for text, served from the shared embedding cache.
 
         Args:
             text: Text to embed
@@ -92,49 +95,36 @@ class DocIndexer:
         Returns:
             Embedding vector as list of floats
         """
-        if self.use_openai:
-            import openai
-            client = openai.AsyncOpenAI(api_key=self.api_key)
-
-            response = await client.embeddings.create(
-                model=self.model_name,
-                input=text
-            )
-            return response.data[0].embedding
-        else:
-            # OpenRouter
-            response = await self.client.post(
-                "https://openrouter.ai/api/v1/embeddings",
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "HTTP-Referer": "https://node.idrinkcoffee.info",
-                    "X-Title": "EspressoBot Documentation Indexer",
-                },
-                json={
-                    "model": self.model_name,
-                    "input": text,
-                }
-            )
-
-            if response.status_code != 200:
-                raise Exception(f"OpenRouter API error: {response.status_code} - {response.text}")
-
-            data = response.json()
-            return data["data"][0]["embedding"]
+        return (await self.generate_embeddings_batch([text]))[0]
 
     async def generate_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
         """
         Generate embeddings for multiple texts in batch.
 
+        Unchanged texts are served from the shared embedding cache (memory,
+        then disk); only misses reach the API.
+
         Args:
             texts: List of texts to embed
 
         Returns:
             List of embedding vectors
         """
-        if self.use_openai:
+        return await get_embedding_cache().get_or_compute(
+            self.model_name, self.embedding_dim, texts, self._request_embeddings
+        )
+
+    def _get_openai_client(self):
+        """One AsyncOpenAI client per instance, so its connection pool is reused."""
+        if self._openai_client is None:
             import openai
-            client = openai.AsyncOpenAI(api_key=self.api_key)
+            self._openai_client = openai.AsyncOpenAI(api_key=self.api_key)
+        return self._openai_client
+
+    async def _request_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """One embeddings API call for ``texts`` — only reached on a cache miss."""
+        if self.use_openai:
+            client = self._get_openai_client()
 
             response = await client.embeddings.create(
                 model=self.model_name,
@@ -208,17 +198,19 @@ class DocIndexer:
 
         return chunks
 
-    def parse_markdown_file(self, file_path: Path) -> Dict[str, Any]:
+    def parse_markdown_file(self, file_path: Path, content: Optional[str] = None) -> Dict[str, Any]:
         """
         Parse a markdown file and extract metadata.
 
         Args:
             file_path: Path to markdown file
+            content: File content, if already read
 
         Returns:
             Dictionary with title, content, category, api_version
         """
-        content = file_path.read_text(encoding='utf-8')
+        if content is None:
+            content = file_path.read_text(encoding='utf-8')
 
         # Extract title from first heading
         title_match = re.search(r'^#\s+(.+)$', content, re.MULTILINE)
@@ -249,125 +241,106 @@ class DocIndexer:
             "file_path": str(file_path)
         }
 
-    async def index_document(self, session: AsyncSession, doc: Dict[str, Any]):
-        """
-        Index a single document with embeddings.
+    def _chunk_file(self, file_path: Path, content: str) -> Optional[DocWork]:
+        """Pipeline stage 1: parse + chunk one file (runs in a worker thread)."""
+        doc = self.parse_markdown_file(file_path, content)
+        chunks = [{"chunk_text": chunk} for chunk in self.chunk_text(content)]
+        # No chunks still goes to the writer, which drops the stale row.
+        return DocWork(path=doc["doc_path"], file_hash="", chunks=chunks, meta=doc)
 
-        Args:
-            session: Database session
-            doc: Document metadata and content
-        """
-        # Check if document already exists
+    async def _load_stored_hashes(self, session: AsyncSession) -> Dict[str, str]:
+        """doc_path -> content hash of every document indexed by this pipeline."""
         result = await session.execute(
-            text("SELECT id, content FROM docs WHERE doc_path = :path"),
-            {"path": doc["doc_path"]}
+            text("SELECT doc_path, content_hash FROM docs WHERE content_hash IS NOT NULL")
         )
-        existing = result.fetchone()
+        return {row[0]: row[1] for row in result.fetchall()}
 
-        # Check if content has changed
-        if existing:
-            existing_content = existing[1]
-            if existing_content == doc["content"]:
-                logger.debug(f"  Skipping unchanged document: {doc['doc_path']}")
-                return
-
-            # Content changed, delete old entry
+    async def _write_documents(self, session: AsyncSession, works: List[DocWork]):
+        """Bulk upsert of changed documents, one row per file (mean chunk embedding)."""
+        import numpy as np
+        now = datetime.datetime.now(datetime.UTC).isoformat()
+        emptied = [w.path for w in works if not w.chunks]
+        if emptied:
             await session.execute(
-                text("DELETE FROM docs WHERE id = :id"),
-                {"id": existing[0]}
+                text("DELETE FROM docs WHERE doc_path = :doc_path"),
+                [{"doc_path": p} for p in emptied]
             )
-            logger.info(f"  Updated document: {doc['doc_path']}")
-
-        # Create embeddings for text chunks
-        chunks = self.chunk_text(doc["content"])
-
-        # Generate embeddings in batch for efficiency
-        try:
-            embeddings = await self.generate_embeddings_batch(chunks)
-        except Exception as e:
-            logger.error(f"  Error generating embeddings: {e}")
-            # Fallback to single embedding of full content
-            try:
-                full_text = doc["content"][:8000]  # Limit to 8K chars
-                embedding = await self.generate_embedding(full_text)
-                embeddings = [embedding]
-                chunks = [full_text]
-            except Exception as e2:
-                logger.error(f"  Fallback embedding failed: {e2}")
-                return
-
-        # Use average embedding (can be improved with chunk-level storage later)
-        import numpy as np
-        avg_embedding = np.mean(embeddings, axis=0).tolist()
-
-        # Insert into database
-        await session.execute(
-            text("""
-                INSERT INTO docs (doc_path, category, title, content, embedding, api_version, metadata)
-                VALUES (:doc_path, :category, :title, :content, :embedding, :api_version, :metadata)
-            """),
-            {
+        rows = []
+        for work in works:
+            if not work.chunks:
+                continue
+            doc = work.meta
+            avg_embedding = np.mean(
+                [work.embeddings[i] for i in range(len(work.chunks))], axis=0
+            ).tolist()
+            rows.append({
                 "doc_path": doc["doc_path"],
                 "category": doc["category"],
                 "title": doc["title"],
                 "content": doc["content"],
                 "embedding": json.dumps(avg_embedding),
                 "api_version": doc["api_version"],
+                "content_hash": work.file_hash,
                 "metadata": json.dumps({
                     "file_path": doc["file_path"],
-                    "chunk_count": len(chunks),
+                    "chunk_count": len(work.chunks),
                     "embedding_model": self.model_name,
                     "embedding_dim": len(avg_embedding),
-                    "indexed_at": datetime.datetime.now(datetime.UTC).isoformat()
+                    "indexed_at": now
                 })
-            }
+            })
+        if not rows:
+            return
+        await session.execute(
+            text("""
+                INSERT INTO docs (doc_path, category, title, content, embedding, api_version, metadata, content_hash)
+                VALUES (:doc_path, :category, :title, :content, :embedding, :api_version, :metadata, :content_hash)
+                ON CONFLICT (doc_path) DO UPDATE SET
+                    category = EXCLUDED.category,
+                    title = EXCLUDED.title,
+                    content = EXCLUDED.content,
+                    embedding = EXCLUDED.embedding,
+                    api_version = EXCLUDED.api_version,
+                    metadata = EXCLUDED.metadata,
+                    content_hash = EXCLUDED.content_hash
+            """),
+            rows
         )
 
-        logger.info(f"  Indexed: {doc['title']} ({len(chunks)} chunks, {len(avg_embedding)} dims)")
-
-    async def index_all(self, force: bool = False):
+    async def index_all(self, force: bool = False) -> IndexStats:
         """
         Index all Shopify documentation files.
 
+        Incremental: only files whose content hash changed since the last run
+        are chunked, embedded and written (see services/doc_index_pipeline.py).
+
         Args:
             force: If True, re-index all documents even if unchanged
         """
         if not self.docs_dir.exists():
             logger.warning(f"Documentation directory not found: {self.docs_dir}")
             logger.warning("Run download_shopify_docs.py first to download documentation")
-            return
+            return IndexStats()
 
         logger.info(f"🔍 Indexing Shopify documentation from {self.docs_dir}")
 
-        # Find all markdown files
-        md_files = list(self.docs_dir.rglob("*.md"))
+        # Find all markdown files (skip metadata files and index files)
+        md_files = [
+            f for f in self.docs_dir.rglob("*.md")
+            if f.name.lower() not in ["index.md", "readme.md", "metadata.md"]
+        ]
         logger.info(f"   Found {len(md_files)} markdown files")
 
         if force:
             logger.info("   Force mode: re-indexing all documents")
 
-        indexed_count = 0
-        skipped_count = 0
-        error_count = 0
-
         async with get_db_session() as session:
-            for md_file in md_files:
-                try:
-                    # Skip metadata files and index files
-                    if md_file.name.lower() in ["index.md", "readme.md", "metadata.md"]:
-                        continue
-
-                    # Parse and index
-                    doc = self.parse_markdown_file(md_file)
-                    await self.index_document(session, doc)
-                    indexed_count += 1
-
-                except Exception as e:
-                    logger.error(f"  Error indexing {md_file}: {e}")
-                    error_count += 1
-
-            # Commit all changes
-            await session.commit()
+            stored = await self._load_stored_hashes(session)
+
+        pipeline = IndexPipeline(self._chunk_file, self.generate_embeddings_batch, self._write_documents)
+        stats = await pipeline.run(
+            ((f, str(f.relative_to(self.docs_dir))) for f in md_files), stored, force=force
+        )
 
         # Update metadata table
         await self.update_index_metadata()
@@ -375,10 +348,12 @@ class DocIndexer:
         # Close HTTP client
         await self.client.aclose()
 
-        logger.info(f"\n✅ Indexing complete!")
-        logger.info(f"   Indexed: {indexed_count} documents")
-        logger.info(f"   Skipped: {skipped_count} unchanged documents")
-        logger.info(f"   Errors: {error_count}")
+        logger.info(f"\n✅ Indexing complete! ({stats.elapsed_s:.1f}s)")
+        logger.info(f"   Indexed: {stats.files_indexed} documents")
+        logger.info(f"   Skipped: {stats.files_skipped} unchanged documents")
+        logger.info(f"   Chunks embedded: {stats.chunks_embedded} ({stats.embed_calls} API batches)")
+        logger.info(f"   Errors: {stats.errors}")
+        return stats
 
     async def update_index_metadata(self):
         """Update docs_metadata table with index statistics"""
@@ -48,6 +48,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 
 from database.session import get_db_session
+from memory.embedding_cache import get_embedding_cache
 
 logger = logging.getLogger(__name__)
 
@@ -115,6 +116,7 @@ class DocManager:
         self.docs_dir = docs_dir
         self.model_name = model_name
         self.use_openai = use_openai
+        self._openai_client = None
 
         # Get API key from environment
         if use_openai:
@@ -684,35 +686,26 @@ class DocManager:
     # =========================================================================
 
     async def generate_embedding(self, text: str) -> List[float]:
-        """Generate embedding for text."""
-        if self.use_openai:
-            import openai
-            client = openai.AsyncOpenAI(api_key=self.api_key)
-            response = await client.embeddings.create(
-                model=self.model_name,
-                input=text
-            )
-            return response.data[0].embedding
-        else:
-            client = await self._get_client()
-            response = await client.post(
-                "https://openrouter.ai/api/v1/embeddings",
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "HTTP-Referer": "https://node.idrinkcoffee.info",
-                    "X-Title": "EspressoBot DocManager",
-                },
-                json={"model": self.model_name, "input": text}
-            )
-            if response.status_code != 200:
-                raise Exception(f"OpenRouter API error: {response.status_code}")
-            return response.json()["data"][0]["embedding"]
+        """Generate embedding for text (shared embedding cache first)."""
+        return (await self.generate_embeddings_batch([text]))[0]
 
     async def generate_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
-        """Generate embeddings for multiple texts."""
-        if self.use_openai:
+        """Generate embeddings for multiple texts; only cache misses reach the API."""
+        return await get_embedding_cache().get_or_compute(
+            self.model_name, self.embedding_dim, texts, self._request_embeddings
+        )
+
+    def _get_openai_client(self):
+        """One AsyncOpenAI client per instance, so its connection pool is reused."""
+        if self._openai_client is None:
             import openai
-            client = openai.AsyncOpenAI(api_key=self.api_key)
+            self._openai_client = openai.AsyncOpenAI(api_key=self.api_key)
+        return self._openai_client
+
+    async def _request_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """One embeddings API call for ``texts`` — only reached on a cache miss."""
+        if self.use_openai:
+            client = self._get_openai_client()
             response = await client.embeddings.create(
                 model=self.model_name,
                 input=texts
@@ -0,0 +1,292 @@
+"""Local, immutable archive of expired option-contract candles.
+
+A rolling-expiry options backtest needs candles for every expired leg it
+plans. ``fetch_expired_candles`` caches raw JSON per exact request range, so a
+backtest over a slightly different window (or interval) re-downloads every
+contract, and each JSON file is re-parsed into dicts on every run. Candles for
+an expired contract never change, so this archive keeps one columnar file per
+contract and serves any date range out of it:
+
+  <ARCHIVE_DIR>/<UNDERLYING>/<expiry>/<interval>/<strike><CE|PE>.npz
+  <ARCHIVE_DIR>/manifest.json
+
+- Files are ``np.savez_compressed`` columns (``ts_ns`` int64 epoch ns plus
+  float64 ``open/high/low/close/volume/oi``) and load straight into a
+  ``CandleFrame`` — no JSON, no per-candle dicts.
+- ``manifest.json`` indexes the archive by contract key (underlying, expiry,
+  strike, type, interval): the broker ``instrument_key``, the date range that
+  was downloaded, and the first/last candle dates. A request is served from
+  disk when the archived range covers it — or when it can't hold more (the
+  contract's data starts after the archived start / the archive runs to
+  expiry). Otherwise the union range is downloaded once and the file
+  replaced.
+- ``prefetch`` fetches a backtest's whole leg set with bounded concurrency
+  and writes the manifest once at the end.
+
+Only past expiries are archived; anything else is passed through uncached.
+Writes are atomic (temp file + rename), and a corrupt file or manifest is
+treated as a miss and re-downloaded.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+
+from backtesting.candle_frame import (
+    CandleFrame, date_to_day, day_to_date, ist_day, timestamps_to_ns,
+)
+from services import expired_instruments
+
+logger = logging.getLogger(__name__)
+
+# Module-level so tests can repoint it at tmp_path. Env var overrides the default.
+ARCHIVE_DIR: Path = Path(
+    os.environ.get(
+        "NF_EXPIRED_CANDLE_ARCHIVE_DIR",
+        str(Path(__file__).resolve().parent.parent / ".cache" / "expired_candles"),
+    )
+)
+
+# Contracts downloaded at once by ``prefetch`` (HTTP is further bounded by
+# expired_instruments' own semaphore).
+PREFETCH_CONCURRENCY = int(os.getenv("EXPIRED_ARCHIVE_PREFETCH_CONCURRENCY", "4"))
+
+MANIFEST_FILE = "manifest.json"
+_MANIFEST_VERSION = 1
+_COLUMNS = ("open", "high", "low", "close", "volume", "oi")
+
+_manifest: dict | None = None
+_manifest_dir: Path | None = None
+
+
+@dataclass(frozen=True)
+class ContractKey:
+    """Archive identity of one option contract's candles at one interval."""
+
+    underlying: str
+    expiry: str          # ISO date
+    strike: float
+    option_type: str     # "CE" | "PE"
+    interval: str
+
+    @property
+    def slug(self) -> str:
+        return f"{self.underlying.upper()}/{self.expiry}/{self.interval}/{self.strike:g}{self.option_type}"
+
+
+@dataclass(frozen=True)
+class LegRequest:
+    """Candles wanted for one contract over ``[from_date, to_date]`` (ISO, inclusive)."""
+
+    key: ContractKey
+    instrument_key: str
+    from_date: str
+    to_date: str
+
+
+# --------------------------------------------------------------------------- #
+# Manifest
+# --------------------------------------------------------------------------- #
+def _entries() -> dict[str, dict]:
+    """The manifest's entries, loaded once per ARCHIVE_DIR."""
+    global _manifest, _manifest_dir
+    if _manifest is None or _manifest_dir != ARCHIVE_DIR:
+        _manifest_dir = ARCHIVE_DIR
+        _manifest = {"version": _MANIFEST_VERSION, "entries": {}}
+        path = ARCHIVE_DIR / MANIFEST_FILE
+        if path.exists():
+            try:
+                with path.open("r", encoding="utf-8") as fh:
+                    loaded = json.load(fh)
+                if loaded.get("version") == _MANIFEST_VERSION:
+                    _manifest = loaded
+            except (json.JSONDecodeError, OSError, ValueError, AttributeError) as exc:
+                logger.warning("expired_candle_archive: corrupt manifest %s (%s); rebuilding", path, exc)
+    return _manifest["entries"]
+
+
+def _save_manifest() -> None:
+    """Write the manifest atomically; failures are non-fatal."""
+    entries = _entries()
+    try:
+        ARCHIVE_DIR.mkdir(parents=True, exist_ok=True)
+        path = ARCHIVE_DIR / MANIFEST_FILE
+        tmp = path.with_suffix(".json.tmp")
+        with tmp.open("w", encoding="utf-8") as fh:
+            json.dump({"version": _MANIFEST_VERSION, "entries": entries}, fh, indent=1, sort_keys=True)
+        os.replace(tmp, path)
+    except OSError as exc:
+        logger.warning("expired_candle_archive: failed to write manifest (%s)", exc)
+
+
+def manifest_entry(key: ContractKey) -> dict | None:
+    """The manifest record for ``key``, if archived."""
+    return _entries().get(key.slug)
+
+
+# --------------------------------------------------------------------------- #
+# Columnar files
+# --------------------------------------------------------------------------- #
+def _file_path(key: ContractKey) -> Path:
+    return ARCHIVE_DIR / key.underlying.upper() / key.expiry / key.interval / f"{key.strike:g}{key.option_type}.npz"
+
+
+def _read_columns(key: ContractKey) -> dict[str, np.ndarray] | None:
+    path = _file_path(key)
+    try:
+        with np.load(path) as data:
+            return {name: data[name] for name in ("ts_ns",) + _COLUMNS}
+    except (OSError, KeyError, ValueError) as exc:
+        logger.warning("expired_candle_archive: unreadable %s (%s); refetching", path, exc)
+        return None
+
+
+def _write_columns(key: ContractKey, cols: dict[str, np.ndarray]) -> None:
+    path = _file_path(key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".npz.tmp")
+    with tmp.open("wb") as fh:
+        np.savez_compressed(fh, **cols)
+    os.replace(tmp, path)
+
+
+def _columns_from_candles(candles: list[dict]) -> dict[str, np.ndarray]:
+    ts = timestamps_to_ns(c["timestamp"] for c in candles)
+    order = np.argsort(ts, kind="stable")
+    cols = {"ts_ns": ts[order]}
+    for name in _COLUMNS:
+        cols[name] = np.fromiter((float(c.get(name) or 0.0) for c in candles), np.float64, len(candles))[order]
+    return cols
+
+
+def _merge(old: dict[str, np.ndarray], new: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+    """Union of two column sets by timestamp; ``new`` wins on duplicates."""
+    ts = np.concatenate([old["ts_ns"], new["ts_ns"]])
+    # Last occurrence of each timestamp (the new download), then time order
+    _, first_rev = np.unique(ts[::-1], return_index=True)
+    keep = np.sort(len(ts) - 1 - first_rev)
+    keep = keep[np.argsort(ts[keep], kind="stable")]
+    return {name: np.concatenate([old[name], new[name]])[keep] for name in ("ts_ns",) + _COLUMNS}
+
+
+def _iso_day(iso: str) -> int:
+    return date_to_day(date.fromisoformat(iso))
+
+
+def _day_iso(day: int) -> str:
+    return day_to_date(day).isoformat()
+
+
+def _to_frame(cols: dict[str, np.ndarray], from_date: str, to_date: str) -> CandleFrame:
+    """Rows whose IST session date is within ``[from_date, to_date]``."""
+    days = ist_day(cols["ts_ns"])
+    rows = (days >= _iso_day(from_date)) & (days <= _iso_day(to_date))
+    return CandleFrame(cols["ts_ns"][rows], cols["open"][rows], cols["high"][rows],
+                       cols["low"][rows], cols["close"][rows], cols["volume"][rows])
+
+
+def _covers(entry: dict, key: ContractKey, from_date: str, to_date: str) -> bool:
+    """Whether the archived download holds everything ``[from_date, to_date]`` can."""
+    first = entry.get("first_date")
+    start_ok = from_date >= entry["from_date"] or (first is not None and first > entry["from_date"])
+    end_ok = to_date <= entry["to_date"] or entry["to_date"] >= key.expiry
+    return start_ok and end_ok
+
+
+# --------------------------------------------------------------------------- #
+# Public API
+# --------------------------------------------------------------------------- #
+def read_archived(key: ContractKey, from_date: str, to_date: str) -> CandleFrame | None:
+    """Candles for ``key`` over the range from disk, or None when not covered."""
+    entry = manifest_entry(key)
+    if entry is None or not _covers(entry, key, from_date, to_date):
+        return None
+    cols = _read_columns(key)
+    return None if cols is None else _to_frame(cols, from_date, to_date)
+
+
+async def _fetch(token: str, req: LegRequest) -> CandleFrame:
+    """Archive-through fetch of one leg; updates the in-memory manifest only."""
+    key = req.key
+    cached = read_archived(key, req.from_date, req.to_date)
+    if cached is not None:
+        return cached
+
+    entry = manifest_entry(key)
+    old = _read_columns(key) if entry is not None else None
+    from_date, to_date = req.from_date, req.to_date
+    if old is not None:
+        from_date, to_date = min(from_date, entry["from_date"]), max(to_date, entry["to_date"])
+
+    candles = await expired_instruments.download_expired_candles(
+        token, req.instrument_key, key.interval, from_date, to_date,
+    )
+    cols = _columns_from_candles(candles)
+    if old is not None:
+        cols = _merge(old, cols)
+
+    if key.expiry < expired_instruments.today_iso():
+        try:
+            _write_columns(key, cols)
+        except OSError as exc:
+            logger.warning("expired_candle_archive: failed to write %s (%s)", key.slug, exc)
+        else:
+            days = ist_day(cols["ts_ns"])
+            _entries()[key.slug] = {
+                "instrument_key": req.instrument_key,
+                "underlying": key.underlying.upper(),
+                "expiry": key.expiry,
+                "strike": key.strike,
+                "option_type": key.option_type,
+                "interval": key.interval,
+                "from_date": from_date,
+                "to_date": to_date,
+                "first_date": _day_iso(days[0]) if len(days) else None,
+                "last_date": _day_iso(days[-1]) if len(days) else None,
+                "rows": int(len(days)),
+            }
+    return _to_frame(cols, req.from_date, req.to_date)
+
+
+async def prefetch(
+    token: str,
+    requests: Iterable[LegRequest],
+    *,
+    concurrency: int | None = None,
+) -> dict[str, CandleFrame]:
+    """Fetch every leg (archive first), at most ``concurrency`` downloads at once.
+
+    Returns ``{instrument_key: CandleFrame}``; a leg whose download fails
+    maps to an empty frame (the replay counts it as a missing leg) and is
+    retried on the next run.
+    """
+    requests = list(requests)
+    on_disk = sum(
+        1 for r in requests
+        if (e := manifest_entry(r.key)) is not None and _covers(e, r.key, r.from_date, r.to_date)
+    )
+    sem = asyncio.Semaphore(max(1, concurrency or PREFETCH_CONCURRENCY))
+
+    async def _one(req: LegRequest) -> tuple[str, CandleFrame]:
+        async with sem:
+            try:
+                return req.instrument_key, await _fetch(token, req)
+            except Exception as exc:
+                logger.warning("expired_candle_archive: fetch failed for %s (%s): %s",
+                               req.key.slug, req.instrument_key, exc)
+                return req.instrument_key, CandleFrame.empty()
+
+    try:
+        fetched = await asyncio.gather(*[_one(r) for r in requests])
+    finally:
+        _save_manifest()
+    logger.info("expired_candle_archive: %d legs, %d served from the archive", len(requests), on_disk)
+    return dict(fetched)
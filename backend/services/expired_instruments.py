@@ -187,8 +187,11 @@ def front_expiry_for_date(d: str, expiries: list[str]) -> str | None:
     return min(candidates)
 
 
-def _today_iso() -> str:
-    # Indirection so tests can reason about "future" expiries deterministically.
+def today_iso() -> str:
+    """Today's date as YYYY-MM-DD — the cut-off between expired and live contracts.
+
+    An indirection so tests can reason about "future" expiries deterministically.
+    """
     from datetime import date
 
     return date.today().isoformat()
@@ -201,6 +204,8 @@ async def get_expiries(token: str, underlying: str) -> list[str]:
     """Return sorted ISO past-expiry dates for an underlying.
 
     Disk-cached with a 1-day TTL (new past-expiries accumulate over time).
+    When the refresh fails, a stale cached list is returned instead so a
+    backtest over archived contracts still runs offline.
     """
     instrument_key = underlying_instrument_key(underlying)
     filename = _safe_filename("expiries", instrument_key)
@@ -210,11 +215,19 @@ async def get_expiries(token: str, underlying: str) -> list[str]:
         if isinstance(cached, list):
             return cached
 
-    body = await _get(
-        token,
-        f"{BASE_URL}/expiries",
-        params={"instrument_key": instrument_key},
-    )
+    try:
+        body = await _get(
+            token,
+            f"{BASE_URL}/expiries",
+            params={"instrument_key": instrument_key},
+        )
+    except (httpx.HTTPError, RuntimeError, OSError) as exc:
+        stale = _cache_read(filename)
+        if not isinstance(stale, list):
+            raise
+        logger.warning("expired_instruments: expiries refresh failed for %s (%s); using stale cache",
+                       instrument_key, exc)
+        return stale
     expiries = sorted(body.get("data") or [])
     _cache_write(filename, expiries)
     return expiries
@@ -228,7 +241,7 @@ async def get_expired_contracts(token: str, underlying: str, expiry: str) -> lis
     cached (contracts may still change).
     """
     instrument_key = underlying_instrument_key(underlying)
-    is_past = expiry < _today_iso()
+    is_past = expiry < today_iso()
     filename = _safe_filename("contracts", instrument_key, expiry)
 
     if is_past:
@@ -257,12 +270,10 @@ async def fetch_expired_candles(
 ) -> list[dict]:
     """Return ASCENDING candle dicts for an expired contract.
 
-    Upstox returns candles newest-first; we reverse them so callers can replay
-    chronologically. Each candle dict has keys: timestamp, open, high, low,
-    close, volume, oi.
-
     Cached PERMANENTLY (expired-contract candles never change). The cache key
-    includes the instrument key, interval, and the full date range.
+    includes the instrument key, interval, and the full date range. Backtests
+    go through ``services.expired_candle_archive`` instead, which keeps one
+    columnar file per contract and serves any range out of it.
     """
     filename = _safe_filename(
         "candles", expired_instrument_key, interval, from_date, to_date
@@ -271,6 +282,26 @@ async def fetch_expired_candles(
     if isinstance(cached, list):
         return cached
 
+    candles = await download_expired_candles(
+        token, expired_instrument_key, interval, from_date, to_date,
+    )
+    _cache_write(filename, candles)
+    return candles
+
+
+async def download_expired_candles(
+    token: str,
+    expired_instrument_key: str,
+    interval: str,
+    from_date: str,
+    to_date: str,
+) -> list[dict]:
+    """Download ASCENDING candle dicts for an expired contract (no caching).
+
+    Upstox returns candles newest-first; we reverse them so callers can replay
+    chronologically. Each candle dict has keys: timestamp, open, high, low,
+    close, volume, oi.
+    """
     # Pipe chars in the instrument key must be URL-encoded; quote with no safe
     # chars so '|' and ':' are escaped, then embed in the path.
     encoded_key = quote(expired_instrument_key, safe="")
@@ -296,6 +327,4 @@ async def fetch_expired_candles(
                 "oi": float(row[6]) if len(row) > 6 and row[6] is not None else 0.0,
             }
         )
-
-    _cache_write(filename, candles)
     return candles
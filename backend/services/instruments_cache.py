@@ -18,8 +18,12 @@ import io
 import json
 import logging
 import os
+import pickle
 import time
 import urllib.request
+from array import array
+from bisect import bisect_left
+from collections import deque
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +31,12 @@ _INSTRUMENTS_URL = "https://assets.upstox.com/market-quote/instruments/exchange/
 _CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache")
 _CACHE_CSV = os.path.join(_CACHE_DIR, "nse_instruments.csv")
 _CACHE_META = os.path.join(_CACHE_DIR, "nse_instruments.meta")
+# Parsed lookup tables + search index, pickled next to the CSV so processes
+# (each CLI subprocess, the API, the daemon) skip the ~100k-row parse. Written
+# right after each download; stamped with the CSV's mtime/size so a stale
+# snapshot is never served. Bump the version when the payload layout changes.
+_CACHE_SNAPSHOT = os.path.join(_CACHE_DIR, "nse_instruments.snapshot.pkl")
+_SNAPSHOT_VERSION = 1
 _TTL_SECONDS = 24 * 60 * 60  # 24 hours
 
 # BSE instruments — kept in a SEPARATE file from the NSE cache so NSE-only
@@ -102,6 +112,8 @@ _symbol_to_sector: dict[str, str] = {}  # symbol → NSE "Industry" sector label
 _index_alias_to_key: dict[str, str] = {}  # canonicalized alias → instrument_key
 _index_key_to_name: dict[str, str] = {}  # instrument_key → display name
 _index_key_to_tradingsymbol: dict[str, str] = {}  # instrument_key → tradingsymbol
+_symbol_search: "_SymbolSearch | None" = None  # built with the tables above
+_index_search_rows: list[tuple[str, str, str, str, str]] = []
 _loaded = False
 _nifty500_loaded = False
 _nifty_total_loaded = False
@@ -178,6 +190,12 @@ def _download() -> bool:
             f.write(str(time.time()))
 
         logger.info(f"Instruments cache saved ({len(csv_bytes)} bytes)")
+        # Build the snapshot now so every process loading today's CSV (CLI
+        # subprocesses included) reads it instead of re-parsing.
+        try:
+            _write_snapshot(_csv_stamp(), _build_tables())
+        except Exception as e:
+            logger.warning(f"Failed to build instruments snapshot: {e}")
         return True
     except Exception as e:
         logger.warning(f"Failed to download instruments CSV: {e}")
@@ -242,75 +260,237 @@ def bse_cache_path() -> str:
     return _BSE_CACHE_CSV
 
 
-def _load_from_disk() -> bool:
-    """Parse the cached CSV into in-memory dicts. Returns True if successful."""
-    global _symbol_to_instrument_key, _symbol_to_name, _loaded
-    global _index_alias_to_key, _index_key_to_name, _index_key_to_tradingsymbol
+class _NgramIndex:
+    """Substring index over rows of uppercase text fields.
 
-    if not os.path.exists(_CACHE_CSV):
-        return False
+    Every 1-3 character gram maps to the ascending row positions containing
+    it. A query scans the rarest gram's postings and verifies the substring,
+    so callers that pre-order rows by rank get matches back in rank order and
+    can stop at ``limit``.
+    """
 
+    def __init__(self, texts: list[tuple[str, ...]]) -> None:
+        self.texts = texts
+        postings: dict[str, list[int]] = {}
+        for i, fields in enumerate(texts):
+            grams: set[str] = set()
+            for text in fields:
+                for n in (1, 2, 3):
+                    grams.update(text[j:j + n] for j in range(len(text) - n + 1))
+            for gram in grams:
+                postings.setdefault(gram, []).append(i)
+        self.postings = {g: array("i", ids) for g, ids in postings.items()}
+
+    def matches(self, term: str):
+        """Yield row positions whose fields contain ``term``, ascending."""
+        if not term:
+            yield from range(len(self.texts))
+            return
+        n = min(len(term), 3)
+        best = None
+        for j in range(len(term) - n + 1):
+            ids = self.postings.get(term[j:j + n])
+            if ids is None:
+                return
+            if best is None or len(ids) < len(best):
+                best = ids
+        if len(term) <= 3:
+            yield from best
+            return
+        texts = self.texts
+        for i in best:
+            if any(term in text for text in texts[i]):
+                yield i
+
+
+class _SymbolSearch:
+    """Equity search index in ``search_symbols`` rank order.
+
+    Rows are sorted by (not Nifty 50, symbol) — the tail of the ranking key —
+    so exact and prefix hits (found by dict lookup and bisect) go first and the
+    remaining substring hits come straight off the n-gram postings.
+    """
+
+    def __init__(self, sym_to_name: dict[str, str]) -> None:
+        rows = sorted(
+            sym_to_name.items(),
+            key=lambda kv: (kv[0] not in NIFTY_50_SYMBOLS, kv[0]),
+        )
+        self.rows = [
+            {"symbol": sym, "name": name, "nifty50": sym in NIFTY_50_SYMBOLS}
+            for sym, name in rows
+        ]
+        self.rank = {sym: i for i, (sym, _name) in enumerate(rows)}
+        self.sorted_symbols = sorted(self.rank)
+        self.sorted_ranks = [self.rank[sym] for sym in self.sorted_symbols]
+        self.ngrams = _NgramIndex([(sym, name.upper()) for sym, name in rows])
+
+    def search(self, term_upper: str, limit: int) -> list[int]:
+        """Row positions of the top matches, sliced ``[:limit]`` like a full sort."""
+        cap = limit if limit > 0 else len(self.rows)
+        out: list[int] = []
+        exact = self.rank.get(term_upper)
+        if exact is not None:
+            out.append(exact)
+        # Prefix hits are a contiguous alphabetical range; re-sort it by rank
+        # (Nifty 50 first) since alphabetical order isn't rank order.
+        lo = bisect_left(self.sorted_symbols, term_upper)
+        hi = bisect_left(self.sorted_symbols, term_upper + "\uffff", lo)
+        prefix = [i for i in self.sorted_ranks[lo:hi] if i != exact]
+        prefix.sort()
+        out.extend(prefix)
+        if len(out) < cap:
+            rows = self.rows
+            for i in self.ngrams.matches(term_upper):
+                if rows[i]["symbol"].startswith(term_upper):
+                    continue  # already placed as exact/prefix
+                out.append(i)
+                if len(out) >= cap:
+                    break
+        return out[:limit]
+
+
+def _csv_stamp() -> str:
+    """Identity of the instruments CSV on disk ("" if it's missing)."""
+    try:
+        st = os.stat(_CACHE_CSV)
+    except OSError:
+        return ""
+    return f"{st.st_mtime_ns}:{st.st_size}"
+
+
+def _build_tables() -> dict:
+    """Parse the cached CSV into the lookup tables + search index.
+
+    Raises on a missing or unreadable CSV; callers decide how to degrade.
+    """
     sym_to_key: dict[str, str] = {}
     sym_to_name: dict[str, str] = {}
     idx_alias_to_key: dict[str, str] = {}
     idx_key_to_name: dict[str, str] = {}
     idx_key_to_tsym: dict[str, str] = {}
 
+    with open(_CACHE_CSV, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            exchange = row.get("exchange", "")
+            inst_key = row.get("instrument_key", "")
+            tsym = row.get("tradingsymbol", "")
+            name = row.get("name", "")
+
+            if exchange == "NSE_EQ":
+                symbol = tsym.upper()
+                if symbol and inst_key:
+                    sym_to_key[symbol] = inst_key
+                    if name:
+                        sym_to_name[symbol] = name
+            elif exchange == "NSE_INDEX" and inst_key:
+                idx_key_to_name[inst_key] = name or tsym
+                if tsym:
+                    idx_key_to_tsym[inst_key] = tsym.upper()
+                # Register every canonicalized alias for this index
+                for raw in (tsym, name):
+                    if not raw:
+                        continue
+                    alias = _canon_index(raw)
+                    if alias:
+                        idx_alias_to_key.setdefault(alias, inst_key)
+
+    # Apply hand-curated aliases (map to the canonicalized tradingsymbol
+    # we already registered above).
+    for alias, canonical_tsym in _INDEX_ALIASES.items():
+        target = idx_alias_to_key.get(_canon_index(canonical_tsym))
+        if target:
+            idx_alias_to_key.setdefault(alias, target)
+
+    # Register BSE indices (not in the NSE CSV).
+    for alias, (inst_key, display_name) in _BSE_INDICES.items():
+        idx_alias_to_key.setdefault(alias, inst_key)
+        idx_key_to_name.setdefault(inst_key, display_name)
+        idx_key_to_tsym.setdefault(inst_key, alias)
+
+    return {
+        "sym_to_key": sym_to_key,
+        "sym_to_name": sym_to_name,
+        "idx_alias_to_key": idx_alias_to_key,
+        "idx_key_to_name": idx_key_to_name,
+        "idx_key_to_tsym": idx_key_to_tsym,
+        "symbol_search": _SymbolSearch(sym_to_name),
+    }
+
+
+def _read_snapshot(stamp: str) -> dict | None:
+    """Return the pickled tables if they were built from this CSV, else None."""
     try:
-        with open(_CACHE_CSV, newline="", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                exchange = row.get("exchange", "")
-                inst_key = row.get("instrument_key", "")
-                tsym = row.get("tradingsymbol", "")
-                name = row.get("name", "")
-
-                if exchange == "NSE_EQ":
-                    symbol = tsym.upper()
-                    if symbol and inst_key:
-                        sym_to_key[symbol] = inst_key
-                        if name:
-                            sym_to_name[symbol] = name
-                elif exchange == "NSE_INDEX" and inst_key:
-                    idx_key_to_name[inst_key] = name or tsym
-                    if tsym:
-                        idx_key_to_tsym[inst_key] = tsym.upper()
-                    # Register every canonicalized alias for this index
-                    for raw in (tsym, name):
-                        if not raw:
-                            continue
-                        alias = _canon_index(raw)
-                        if alias:
-                            idx_alias_to_key.setdefault(alias, inst_key)
-
-        # Apply hand-curated aliases (map to the canonicalized tradingsymbol
-        # we already registered above).
-        for alias, canonical_tsym in _INDEX_ALIASES.items():
-            target = idx_alias_to_key.get(_canon_index(canonical_tsym))
-            if target:
-                idx_alias_to_key.setdefault(alias, target)
-
-        # Register BSE indices (not in the NSE CSV).
-        for alias, (inst_key, display_name) in _BSE_INDICES.items():
-            idx_alias_to_key.setdefault(alias, inst_key)
-            idx_key_to_name.setdefault(inst_key, display_name)
-            idx_key_to_tsym.setdefault(inst_key, alias)
-
-        _symbol_to_instrument_key = sym_to_key
-        _symbol_to_name = sym_to_name
-        _index_alias_to_key = idx_alias_to_key
-        _index_key_to_name = idx_key_to_name
-        _index_key_to_tradingsymbol = idx_key_to_tsym
-        _loaded = True
-        logger.info(
-            f"Instruments cache loaded: {len(sym_to_key)} equity, "
-            f"{len(idx_key_to_name)} indices"
-        )
-        return True
+        with open(_CACHE_SNAPSHOT, "rb") as f:
+            version, snap_stamp, tables = pickle.load(f)
+    except Exception:
+        return None
+    if version != _SNAPSHOT_VERSION or snap_stamp != stamp:
+        return None
+    return tables
+
+
+def _write_snapshot(stamp: str, tables: dict) -> None:
+    """Pickle the tables next to the CSV (atomic replace; failures are logged)."""
+    tmp = f"{_CACHE_SNAPSHOT}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            pickle.dump(
+                (_SNAPSHOT_VERSION, stamp, tables), f,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+        os.replace(tmp, _CACHE_SNAPSHOT)
     except Exception as e:
-        logger.warning(f"Failed to parse instruments cache: {e}")
+        logger.warning(f"Failed to write instruments snapshot: {e}")
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+
+
+def _load_from_disk() -> bool:
+    """Load the lookup tables from the snapshot, or parse the CSV. Returns True if successful."""
+    global _symbol_to_instrument_key, _symbol_to_name, _loaded
+    global _index_alias_to_key, _index_key_to_name, _index_key_to_tradingsymbol
+    global _symbol_search, _index_search_rows
+
+    if not os.path.exists(_CACHE_CSV):
         return False
 
+    t0 = time.perf_counter()
+    stamp = _csv_stamp()
+    tables = _read_snapshot(stamp)
+    source = "snapshot"
+    if tables is None:
+        source = "csv"
+        try:
+            tables = _build_tables()
+        except Exception as e:
+            logger.warning(f"Failed to parse instruments cache: {e}")
+            return False
+        _write_snapshot(stamp, tables)
+
+    _symbol_to_instrument_key = tables["sym_to_key"]
+    _symbol_to_name = tables["sym_to_name"]
+    _index_alias_to_key = tables["idx_alias_to_key"]
+    _index_key_to_name = tables["idx_key_to_name"]
+    _index_key_to_tradingsymbol = tables["idx_key_to_tsym"]
+    _symbol_search = tables["symbol_search"]
+    _index_search_rows = [
+        (key, name, _index_key_to_tradingsymbol.get(key, ""),
+         name.upper(), _canon_index(name))
+        for key, name in _index_key_to_name.items()
+    ]
+    _loaded = True
+    _search_stats["load_ms"] = round((time.perf_counter() - t0) * 1000, 2)
+    _search_stats["load_source"] = source
+    logger.info(
+        f"Instruments cache loaded from {source} in {_search_stats['load_ms']} ms: "
+        f"{len(_symbol_to_instrument_key)} equity, {len(_index_key_to_name)} indices"
+    )
+    return True
+
 
 def _nifty500_cache_is_fresh() -> bool:
     """Return True if Nifty 500 cache exists and is less than _TTL_SECONDS old."""
@@ -816,15 +996,17 @@ def list_indices() -> list[dict]:
 def search_indices(term: str, limit: int = 20) -> list[dict]:
     """Substring search across NSE indices (name + tradingsymbol)."""
     ensure_loaded()
+    t0 = time.perf_counter()
     term_upper = term.upper()
     term_canon = _canon_index(term)
     results = []
-    for inst_key, display_name in _index_key_to_name.items():
-        tsym = _index_key_to_tradingsymbol.get(inst_key, "")
+    # ~150 rows with their uppercased/canonical forms precomputed at load —
+    # a straight scan is already well under the equity index's latency.
+    for inst_key, display_name, tsym, name_upper, name_canon in _index_search_rows:
         if (
-            term_upper in display_name.upper()
+            term_upper in name_upper
             or term_upper in tsym
-            or term_canon and term_canon in _canon_index(display_name)
+            or term_canon and term_canon in name_canon
         ):
             results.append({
                 "symbol": tsym or display_name.upper(),
@@ -836,6 +1018,7 @@ def search_indices(term: str, limit: int = 20) -> list[dict]:
         0 if r["name"].upper().startswith(term_upper) else 1,
         r["name"],
     ))
+    _record_search(t0)
     return results[:limit]
 
 
@@ -849,28 +1032,47 @@ def search_symbols(term: str, limit: int = 20) -> list[dict]:
     """Search symbols and company names by substring match.
 
     Returns list of dicts with keys: symbol, name, nifty50.
-    Collects all matches first, then sorts by relevance and truncates.
+    Ranked: exact match → symbol starts with term → Nifty 50 → alphabetical,
+    answered from the prebuilt n-gram index rather than a scan of every name.
     """
     ensure_loaded()
-    term_upper = term.upper()
-    results = []
+    if _symbol_search is None:
+        return []
+    t0 = time.perf_counter()
+    rows = _symbol_search.rows
+    results = [dict(rows[i]) for i in _symbol_search.search(term.upper(), limit)]
+    _record_search(t0)
+    return results
 
-    for sym, name in _symbol_to_name.items():
-        if term_upper in sym or term_upper in name.upper():
-            results.append({
-                "symbol": sym,
-                "name": name,
-                "nifty50": sym in NIFTY_50_SYMBOLS,
-            })
 
-    # Sort: exact match → symbol starts with term → Nifty 50 → alphabetical
-    results.sort(key=lambda r: (
-        0 if r["symbol"] == term_upper else 1,
-        0 if r["symbol"].startswith(term_upper) else 1,
-        0 if r["nifty50"] else 1,
-        r["symbol"],
-    ))
-    return results[:limit]
+# Startup load time + recent search latencies, for search_stats().
+_search_stats: dict = {"load_ms": None, "load_source": None}
+_search_latencies_us: deque[float] = deque(maxlen=2048)
+
+
+def _record_search(t0: float) -> None:
+    _search_latencies_us.append((time.perf_counter() - t0) * 1e6)
+
+
+def search_stats() -> dict:
+    """Return how the tables were loaded and recent search latency percentiles.
+
+    ``load_ms`` / ``load_source`` ("snapshot" or "csv") describe the last
+    ``_load_from_disk``; p50/p99 are over the last 2048 search calls.
+    """
+    lat = sorted(_search_latencies_us)
+
+    def pct(q: float) -> float | None:
+        if not lat:
+            return None
+        return round(lat[min(len(lat) - 1, int(q * len(lat)))], 1)
+
+    return {
+        **_search_stats,
+        "searches": len(lat),
+        "p50_us": pct(0.50),
+        "p99_us": pct(0.99),
+    }
 
 
 def symbol_count() -> int:
@@ -3,13 +3,25 @@ MCP Manager Service - Dynamic MCP server management for user-specific tool loadi
 
 Handles spawning and managing MCP servers based on user configurations stored in the database.
 Supports stdio, SSE, and HTTP transports with OAuth 2.1 authentication for remote servers.
+
+Spawned servers are kept in ``MCP_POOL``, keyed by (user, server fingerprint), and
+stay connected between requests: Pydantic AI's MCP servers are reference-counted,
+so a pooled connection is simply re-entered by each agent run instead of being
+re-established. A server whose config or OAuth token changes gets a new
+fingerprint; the stale connection is closed on the next load, on
+``MCP_POOL.invalidate_user`` (called when MCP settings change) or after
+``MCP_POOL_IDLE_SECONDS`` without use.
 """
 
+import asyncio
+import hashlib
+import json
 import logging
 import os
+import time
 from datetime import datetime, timedelta, timezone
 from utils.datetime_utils import utc_now_naive
-from typing import List, Dict, Any, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 from pydantic_ai.mcp import MCPServerStdio, MCPServerStreamableHTTP, MCPServerSSE
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
@@ -30,6 +42,139 @@ class OAuthNotConnectedError(Exception):
     pass
 
 
+MCP_POOL_IDLE_SECONDS = float(os.getenv("MCP_POOL_IDLE_SECONDS", "900"))
+
+
+def mcp_server_fingerprint(server_config: UserMCPServer, oauth_token: Optional[str] = None) -> str:
+    """Hash of everything that shapes a spawned server (config + current OAuth token)."""
+    payload = json.dumps(
+        {
+            "id": server_config.id,
+            "name": server_config.name,
+            "transport": server_config.transport_type,
+            "config": server_config.config,
+            "auth_type": server_config.auth_type,
+            "token": hashlib.sha256(oauth_token.encode()).hexdigest() if oauth_token else None,
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def mcp_config_hash(server_keys: List[str]) -> str:
+    """Hash of a user's whole MCP setup, for keying cached orchestrators."""
+    return hashlib.sha256("\n".join(sorted(server_keys)).encode()).hexdigest()[:16]
+
+
+class MCPConnectionPool:
+    """
+    Long-lived MCP server instances shared across requests.
+
+    ``acquire`` returns the pooled server for a fingerprint (spawning and warming
+    it on first use). The pool holds one ``async with`` reference on each server,
+    so agent runs nest inside the open connection rather than reconnecting.
+    """
+
+    def __init__(self, idle_seconds: float = MCP_POOL_IDLE_SECONDS):
+        self.idle_seconds = idle_seconds
+        self._servers: Dict[Tuple[int, str], Dict[str, Any]] = {}
+        # Per-key locks: a slow stdio startup only blocks requests for that server
+        self._key_locks: Dict[Tuple[int, str], asyncio.Lock] = {}
+        self._invalidation_listeners: List[Callable[[int], None]] = []
+        self.hits = 0
+        self.spawns = 0
+
+    def add_invalidation_listener(self, listener: Callable[[int], None]) -> None:
+        """Register a callback run with the user_id whenever a user's MCP setup is invalidated."""
+        self._invalidation_listeners.append(listener)
+
+    async def acquire(
+        self,
+        user_id: int,
+        fingerprint: str,
+        factory: Callable[[], Awaitable[Optional[Any]]],
+    ) -> Optional[Any]:
+        key = (user_id, fingerprint)
+        async with self._key_locks.setdefault(key, asyncio.Lock()):
+            entry = self._servers.get(key)
+            if entry is not None:
+                entry["last_used"] = time.monotonic()
+                self.hits += 1
+                return entry["server"]
+
+            server = await factory()
+            if server is None:
+                return None
+            self.spawns += 1
+            connected = False
+            try:
+                await server.__aenter__()
+                connected = True
+            except Exception as e:
+                # Leave it unconnected; the agent run will connect (and report) itself
+                logger.warning(f"Could not pre-connect MCP server for user {user_id}: {e}")
+            self._servers[key] = {"server": server, "connected": connected, "last_used": time.monotonic()}
+            return server
+
+    def _pop(self, keys: List[Tuple[int, str]]) -> List[Dict[str, Any]]:
+        for key in keys:
+            self._key_locks.pop(key, None)
+        return [self._servers.pop(key) for key in keys]
+
+    async def _close(self, entries: List[Dict[str, Any]]) -> None:
+        for entry in entries:
+            if not entry["connected"]:
+                continue
+            try:
+                await entry["server"].__aexit__(None, None, None)
+            except Exception as e:
+                logger.warning(f"Error closing pooled MCP server: {e}")
+
+    async def release_stale(self, user_id: int, keep: List[str]) -> int:
+        """Close a user's pooled servers whose fingerprint is no longer configured."""
+        stale = [k for k in self._servers if k[0] == user_id and k[1] not in keep]
+        entries = self._pop(stale)
+        await self._close(entries)
+        return len(entries)
+
+    async def sweep(self) -> int:
+        """Close servers idle for longer than ``idle_seconds``."""
+        cutoff = time.monotonic() - self.idle_seconds
+        idle = [k for k, e in self._servers.items() if e["last_used"] < cutoff]
+        entries = self._pop(idle)
+        await self._close(entries)
+        return len(entries)
+
+    async def invalidate_user(self, user_id: int) -> int:
+        """Drop everything cached for a user's MCP setup (call after settings change)."""
+        for listener in self._invalidation_listeners:
+            try:
+                listener(user_id)
+            except Exception as e:
+                logger.warning(f"MCP invalidation listener failed: {e}")
+        entries = self._pop([k for k in self._servers if k[0] == user_id])
+        await self._close(entries)
+        if entries:
+            logger.info(f"Closed {len(entries)} pooled MCP connection(s) for user {user_id}")
+        return len(entries)
+
+    async def close_all(self) -> None:
+        entries = self._pop(list(self._servers))
+        await self._close(entries)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "servers": len(self._servers),
+            "connected": sum(1 for e in self._servers.values() if e["connected"]),
+            "hits": self.hits,
+            "spawns": self.spawns,
+        }
+
+
+MCP_POOL = MCPConnectionPool()
+
+
 class MCPManager:
     """Manages dynamic loading and spawning of user MCP servers"""
 
@@ -174,9 +319,6 @@ class MCPManager:
             OAuthTokenExpiredError: If OAuth token expired
         """
         try:
-            transport_type = server_config.transport_type
-            config = server_config.config
-
             # Get OAuth token if needed
             oauth_token = None
             if server_config.auth_type == "oauth":
@@ -187,21 +329,7 @@ class MCPManager:
                 else:
                     logger.warning(f"No OAuth token found for {server_config.name}")
 
-            # Merge environment variables
-            mcp_env = os.environ.copy()
-            if env_vars:
-                mcp_env.update(env_vars)
-
-            # Spawn based on transport type
-            if transport_type == "stdio":
-                return self._spawn_stdio(server_config.name, config, mcp_env)
-            elif transport_type == "sse":
-                return self._spawn_sse(server_config.name, config, oauth_token)
-            elif transport_type == "http":
-                return self._spawn_http(server_config.name, config, oauth_token)
-            else:
-                logger.error(f"Unknown transport type: {transport_type}")
-                return None
+            return self._build_server(server_config, oauth_token, env_vars)
 
         except (OAuthNotConnectedError, OAuthTokenExpiredError):
             raise
@@ -209,6 +337,32 @@ class MCPManager:
             logger.error(f"Error spawning MCP server '{server_config.name}': {e}")
             return None
 
+    def _build_server(
+        self,
+        server_config: UserMCPServer,
+        oauth_token: Optional[str],
+        env_vars: Optional[Dict[str, str]] = None
+    ) -> Optional[Any]:
+        """Instantiate the transport-specific server object (no connection yet)."""
+        transport_type = server_config.transport_type
+        config = server_config.config
+
+        # Merge environment variables
+        mcp_env = os.environ.copy()
+        if env_vars:
+            mcp_env.update(env_vars)
+
+        # Spawn based on transport type
+        if transport_type == "stdio":
+            return self._spawn_stdio(server_config.name, config, mcp_env)
+        elif transport_type == "sse":
+            return self._spawn_sse(server_config.name, config, oauth_token)
+        elif transport_type == "http":
+            return self._spawn_http(server_config.name, config, oauth_token)
+        else:
+            logger.error(f"Unknown transport type: {transport_type}")
+            return None
+
     def _spawn_stdio(self, name: str, config: Dict[str, Any], env: Dict[str, str]) -> MCPServerStdio:
         """
         Spawn a stdio MCP server.
@@ -369,6 +523,71 @@ class MCPManager:
             logger.error(f"Error spawning user MCP servers: {e}")
             return []
 
+    async def load_user_mcp_servers(
+        self,
+        user_id: int,
+        env_vars: Optional[Dict[str, str]] = None,
+        pool: Optional[MCPConnectionPool] = None
+    ) -> Tuple[Optional[str], List[Any]]:
+        """
+        Get a user's enabled MCP servers from the connection pool.
+
+        Servers whose config and OAuth token are unchanged are reused (already
+        connected); changed ones are spawned fresh and their stale connections
+        closed.
+
+        Args:
+            user_id: User ID to load servers for
+            env_vars: Optional environment variables to pass to stdio servers
+            pool: Connection pool (defaults to ``MCP_POOL``)
+
+        Returns:
+            (config_hash, servers) — config_hash is None when the user has no
+            usable servers
+        """
+        pool = pool or MCP_POOL
+        try:
+            server_configs = await self.get_user_mcp_servers(user_id, enabled_only=True)
+            if not server_configs:
+                await pool.release_stale(user_id, keep=[])
+                return None, []
+
+            mcp_servers = []
+            fingerprints = []
+            instance_keys = []
+            for config in server_configs:
+                try:
+                    oauth_token = await self.get_oauth_token(config)
+                    fingerprint = mcp_server_fingerprint(config, oauth_token)
+
+                    async def _spawn(config=config, oauth_token=oauth_token):
+                        logger.info(f"Spawning pooled MCP server: {config.name} ({config.transport_type})")
+                        return self._build_server(config, oauth_token, env_vars)
+
+                    server = await pool.acquire(user_id, fingerprint, _spawn)
+                    if server:
+                        mcp_servers.append(server)
+                        fingerprints.append(fingerprint)
+                        # A respawned instance (after an idle sweep) must key a new orchestrator
+                        instance_keys.append(f"{fingerprint}:{id(server)}")
+                    else:
+                        logger.warning(f"❌ Failed to spawn MCP server: {config.name}")
+                except (OAuthNotConnectedError, OAuthTokenExpiredError) as e:
+                    logger.warning(f"⚠️ OAuth issue for MCP server {config.name}: {e}")
+                except Exception as e:
+                    logger.error(f"❌ Error spawning MCP server {config.name}: {e}")
+
+            await pool.release_stale(user_id, keep=fingerprints)
+            await pool.sweep()
+
+            if not mcp_servers:
+                return None, []
+            return mcp_config_hash(instance_keys), mcp_servers
+
+        except Exception as e:
+            logger.error(f"Error loading user MCP servers: {e}")
+            return None, []
+
     async def validate_server_config(self, transport_type: str, config: Dict[str, Any]) -> tuple[bool, Optional[str]]:
         """
         Validate MCP server configuration before saving.
@@ -0,0 +1,60 @@
+"""Token-bucket rate limiting for outbound broker API calls.
+
+Upstox enforces per-second, per-minute and per-30-minute request caps per
+account. ``RateLimiter`` holds one token bucket per window and hands out
+reservations: ``acquire()`` takes a token from every bucket immediately
+(going into debt when empty) and sleeps until the most constrained bucket
+would have refilled. Reserving before awaiting keeps it race-free on one
+event loop without an ``asyncio.Lock`` (which would bind the limiter to the
+first loop that used it — CLI tools spin up a fresh loop per ``run_async``).
+
+Usage::
+
+    limiter = RateLimiter([(25, 1.0), (450, 60.0)])
+    await limiter.acquire()
+    ...  # issue the request
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+
+class _Bucket:
+    __slots__ = ("capacity", "rate", "tokens", "stamp")
+
+    def __init__(self, capacity: int, period_s: float) -> None:
+        self.capacity = float(capacity)
+        self.rate = capacity / period_s
+        self.tokens = float(capacity)
+        self.stamp = time.monotonic()
+
+    def reserve(self, now: float) -> float:
+        """Take one token; return seconds until it is actually available."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+        self.tokens -= 1.0
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+class RateLimiter:
+    """Multi-window token bucket. ``windows`` is a list of ``(requests, seconds)``."""
+
+    def __init__(self, windows: list[tuple[int, float]]) -> None:
+        self._buckets = [_Bucket(n, period) for n, period in windows]
+        self._lock = threading.Lock()
+        self.waited_s = 0.0  # cumulative throttle delay, for logging/tests
+
+    def reserve(self) -> float:
+        """Reserve one request slot; return the delay before it may be sent."""
+        with self._lock:
+            now = time.monotonic()
+            delay = max(b.reserve(now) for b in self._buckets)
+            self.waited_s += delay
+            return delay
+
+    async def acquire(self) -> None:
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
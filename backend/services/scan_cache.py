@@ -1,8 +1,10 @@
-"""Cached candidate scan — write (cron) + read (snapshot) helpers.
+"""Cached candidate scan — write (cron / scan engine) + read (snapshot) helpers.
 
-The slow nf-morning-scan runs on its own ~3-min cron as an isolated subprocess
-and stores its result here; the snapshot reads the newest fresh row instead of
-scanning inline. See ``database.models.ScanSnapshot``.
+Two writers feed this table. When the daemon's sector-flow feed runs the
+in-process ``ScanEngine`` (services/scan_engine.py), it stores a row every cycle
+from warm in-memory bars. Otherwise the slow nf-morning-scan runs on its own
+~3-min cron as an isolated subprocess. The snapshot reads the newest fresh row
+either way instead of scanning inline. See ``database.models.ScanSnapshot``.
 """
 from __future__ import annotations
 
@@ -58,11 +60,36 @@ async def get_latest_scan(universe: str, max_age_seconds: float) -> tuple[list[d
     return (row.rows or []), age
 
 
-async def run_and_store(universe: str = "nifty500") -> dict:
-    """Run the candidate scan and persist it. Used by the cron subprocess."""
-    from services.trading_snapshot import _run_live_scan
+async def get_engine_scan_age(universe: str) -> float | None:
+    """Age (seconds) of the newest row written by the in-process scan engine.
 
-    rows, _source = await _run_live_scan(universe, top_n=10)
+    The engine is the only writer that records ``elapsed_ms`` (the subprocess
+    path stores None), so this is how the cron tells the engine is live and
+    skips spawning the subprocess. None when the engine has never written.
+    """
+    async with get_db_context() as session:
+        stmt = (
+            select(ScanSnapshot.created_at)
+            .where(ScanSnapshot.universe == universe, ScanSnapshot.elapsed_ms.is_not(None))
+            .order_by(ScanSnapshot.created_at.desc())
+            .limit(1)
+        )
+        created = (await session.execute(stmt)).scalar_one_or_none()
+    return None if created is None else (utc_now() - created).total_seconds()
+
+
+async def run_and_store(universe: str = "nifty500", *, rows: list[dict] | None = None,
+                        nifty_pct: float | None = None, elapsed_ms: int | None = None) -> dict:
+    """Run the candidate scan and persist it.
+
+    The cron subprocess calls this bare (runs nf-morning-scan in-process); the
+    scan engine passes its precomputed ``rows`` / ``nifty_pct`` / ``elapsed_ms``
+    so both writers share the enrichment + store path.
+    """
+    if rows is None:
+        from services.trading_snapshot import _run_live_scan
+
+        rows, _source = await _run_live_scan(universe, top_n=10)
 
     # Fold the full nf-analyze technical read (signal/MACD/supertrend/UTBot/
     # Renko/BB/ATR/S-R) into the top candidates so the snapshot can render it
@@ -76,8 +103,7 @@ async def run_and_store(universe: str = "nifty500") -> dict:
     except Exception as e:
         logger.warning("scan_cache: candidate-analysis enrichment failed: %s", e)
 
-    nifty_pct = None
-    row_id = await save_scan(universe, rows, nifty_pct, None)
+    row_id = await save_scan(universe, rows, nifty_pct, elapsed_ms)
     n_enriched = sum(1 for r in rows if r.get("analysis"))
     logger.info("scan_cache: stored %d rows (%d deep-analyzed) for %s (row #%d)",
                 len(rows), n_enriched, universe, row_id)
@@ -0,0 +1,622 @@
+"""Incremental in-process candidate scan — nf-morning-scan's scoring over warm,
+columnar bars instead of a per-cycle historical fan-out.
+
+Why this exists: the 3-min scan-cache cron spawned ``scripts/scan_cache_writer.py``,
+which loaded nf-morning-scan and issued TWO ``get_historical_data`` calls per deep
+candidate (1-day intraday + 20-day volume) every cycle — IO-bound at ~130s
+against a 200s kill timeout, and only the top ~40 names ever got a phase-2 read.
+
+The engine splits the inputs by how often they change:
+
+  * Prior-session inputs (Wilder RSI state, 20-day time-of-day cumulative volume
+    profile, average daily volume) change once a day. They are built ONCE per
+    session by a paced 20-day fetch and persisted as a compressed ``.npz`` under
+    ``backend/.cache`` so a daemon restart reloads them in milliseconds.
+  * Today's 15-min bars are accumulated from the shared-feed ticks the
+    ``SectorFlowStreamer`` already receives, into (symbols × session slots)
+    NumPy arrays — no REST on the tick path.
+  * Quote fields (open / prev close / day volume) come from the same batched
+    full-quote call nf-morning-scan's phase 1 makes (≈10 calls for nifty500).
+    The ltpc feed carries neither the official open nor day volume, so this
+    keeps gap / RVOL-T exact rather than approximated from sampled ticks.
+
+A refresh is then one vectorized pass over the whole universe (sub-second).
+Scores mirror nf-morning-scan's ``phase1_score`` / ``phase2_score`` /
+``detect_setup`` exactly (pinned by tests/test_scan_engine.py) and rows come out
+in ``run_scan``'s shape, so ``scan_cache`` and the snapshot can't tell the
+difference. One deliberate change: EVERY name gets a phase-2 read (there is no
+``deep_count`` cut), so ranking is by total score across the whole universe.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterable, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_IST_OFFSET = timedelta(hours=5, minutes=30)
+_IST = timezone(_IST_OFFSET)
+
+_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache")
+
+# 15-min session grid: 09:15 → 15:15 bar starts (25 slots). Slot k covers
+# [09:15 + 15k, 09:15 + 15(k+1)) IST — the same grid Upstox's candles use.
+BAR_MINUTES = 15
+SESSION_OPEN_MIN_IST = 9 * 60 + 15
+SESSION_SLOTS = 25
+
+RSI_WINDOW = 14                 # nf-morning-scan compute_rsi: RSI(14)
+BASELINE_DAYS = 20              # nf-morning-scan fetch_historical_volume: 20 days
+BASELINE_FETCH_CONCURRENCY = 2  # paced — this is the one bulk REST burst per day
+QUOTE_BATCH = 50                # Upstox full-quote batch limit
+NIFTY_KEY = "NSE_INDEX|Nifty 50"
+
+# Bump when the .npz layout changes so stale snapshots are rebuilt, not misread.
+_BASELINE_VERSION = 1
+
+
+def slot_for_ist_minutes(minutes: int) -> int:
+    """Session slot for an IST minute-of-day, or -1 when outside the session."""
+    k = (minutes - SESSION_OPEN_MIN_IST) // BAR_MINUTES
+    return k if 0 <= k < SESSION_SLOTS else -1
+
+
+def _rsi_from_state(avg_up: np.ndarray, avg_down: np.ndarray) -> np.ndarray:
+    """ta's RSIIndicator formula on Wilder averages (100 when avg_down is 0)."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = avg_up / avg_down
+        return np.where(avg_down == 0, 100.0, 100.0 - 100.0 / (1.0 + rs))
+
+
+def _wilder_step(state: tuple, closes: np.ndarray, present: np.ndarray) -> tuple:
+    """Advance per-symbol Wilder RSI state by one bar (vectorized across symbols).
+
+    ``state`` is ``(avg_up, avg_down, last_close, n_closes)``. Mirrors ta's
+    ``RSIIndicator``: the leading NaN diff is zero-filled, so both averages
+    start at 0 on the first close and every later diff blends in at
+    ``alpha = 1/14`` (pandas ``ewm(adjust=False)``). Symbols without a bar
+    this slot (``present`` False) keep their state — a no-trade bar doesn't
+    exist in Upstox's candles either.
+    """
+    avg_up, avg_down, last_close, n = state
+    alpha = 1.0 / RSI_WINDOW
+    has_prev = present & (n > 0)
+    diff = np.where(has_prev, closes - last_close, 0.0)
+    avg_up = np.where(has_prev, (1 - alpha) * avg_up + alpha * np.maximum(diff, 0.0), avg_up)
+    avg_down = np.where(has_prev, (1 - alpha) * avg_down + alpha * np.maximum(-diff, 0.0), avg_down)
+    return avg_up, avg_down, np.where(present, closes, last_close), n + present.astype(np.int64)
+
+
+def phase1_scores(gap: np.ndarray, rel_strength: np.ndarray, pct: np.ndarray) -> np.ndarray:
+    """nf-morning-scan's ``phase1_score`` over arrays (gap / RS / direction)."""
+    abs_gap, abs_rs = np.abs(gap), np.abs(rel_strength)
+    return (np.where(abs_gap >= 2, 2, np.where(abs_gap >= 1, 1, 0))
+            + np.where(abs_rs >= 1, 2, np.where(abs_rs >= 0.5, 1, 0))
+            + (((gap > 0) & (pct > 0)) | ((gap < 0) & (pct < 0))).astype(int))
+
+
+def phase2_scores(
+    rsi: np.ndarray,
+    vwap: np.ndarray,
+    ltp: np.ndarray,
+    rvol_t: np.ndarray,
+    vol_expansion: np.ndarray,
+) -> np.ndarray:
+    """nf-morning-scan's ``phase2_score`` over arrays (NaN = the scalar's None).
+
+    RVOL-T is preferred, volume expansion is the fallback.
+    """
+    vol = np.where(np.isnan(rvol_t), vol_expansion, rvol_t)
+    return (np.where(vol >= 2.0, 2, np.where(vol >= 1.5, 1, 0))
+            + ((rsi >= 60) | (rsi <= 40)).astype(int)
+            + (~np.isnan(vwap) & (vwap != 0) & ~np.isnan(ltp) & (ltp != 0)
+               & (ltp > vwap)).astype(int))
+
+
+# ── Prior-session baselines ─────────────────────────────────────────────────
+
+@dataclass
+class ScanBaselines:
+    """Per-symbol prior-session inputs, aligned to ``symbols``.
+
+    ``cum_vol_profile[i, k]`` is the mean (over prior days with volume) of the
+    cumulative volume traded from the open through slot ``k`` — exactly the
+    denominator nf-morning-scan's ``compute_rvol_t`` rebuilds from 20 days of
+    candles on every call. ``avg_daily_vol`` is ``compute_volume_expansion``'s
+    denominator. The Wilder arrays are the RSI(14) state at the prior close.
+    """
+    as_of: str                       # IST session date these baselines serve
+    symbols: list[str]
+    cum_vol_profile: np.ndarray      # (N, SESSION_SLOTS) float64, NaN = no history
+    avg_daily_vol: np.ndarray        # (N,) float64, NaN = no history
+    rsi_avg_up: np.ndarray           # (N,) float64
+    rsi_avg_down: np.ndarray         # (N,) float64
+    rsi_last_close: np.ndarray       # (N,) float64, NaN = no history
+    rsi_n: np.ndarray                # (N,) int64 closes seen so far
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp.npz"
+        np.savez_compressed(
+            tmp, version=np.int64(_BASELINE_VERSION), as_of=np.array(self.as_of),
+            symbols=np.array(self.symbols), cum_vol_profile=self.cum_vol_profile,
+            avg_daily_vol=self.avg_daily_vol, rsi_avg_up=self.rsi_avg_up,
+            rsi_avg_down=self.rsi_avg_down, rsi_last_close=self.rsi_last_close,
+            rsi_n=self.rsi_n,
+        )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["ScanBaselines"]:
+        """Load a snapshot, or None when missing / unreadable / another layout."""
+        try:
+            with np.load(path, allow_pickle=False) as z:
+                if int(z["version"]) != _BASELINE_VERSION:
+                    return None
+                return cls(
+                    as_of=str(z["as_of"]), symbols=[str(s) for s in z["symbols"]],
+                    cum_vol_profile=z["cum_vol_profile"], avg_daily_vol=z["avg_daily_vol"],
+                    rsi_avg_up=z["rsi_avg_up"], rsi_avg_down=z["rsi_avg_down"],
+                    rsi_last_close=z["rsi_last_close"], rsi_n=z["rsi_n"],
+                )
+        except (OSError, KeyError, ValueError):
+            return None
+
+
+def baseline_path(universe: str, as_of: str) -> str:
+    return os.path.join(_CACHE_DIR, f"scan_baselines_{universe}_{as_of}.npz")
+
+
+def _candle_fields(c: Any) -> tuple[str, float, float]:
+    """(timestamp, close, volume) from an ``OHLCVData`` or a candle dict."""
+    if isinstance(c, dict):
+        return str(c["timestamp"]), float(c["close"]), float(c.get("volume") or 0)
+    return str(c.timestamp), float(c.close), float(c.volume or 0)
+
+
+def baselines_from_candles(symbols: list[str], candles_by_symbol: dict[str, list],
+                           as_of: str) -> ScanBaselines:
+    """Build baselines from prior-session 15-min candles (pure, no I/O).
+
+    Candles on or after ``as_of`` are ignored, so a 20-day fetch that includes
+    today's partial session is safe to pass straight through. Timestamps are
+    Upstox ISO strings in IST (``2026-07-01T09:15:00+05:30``).
+    """
+    n = len(symbols)
+    profile = np.full((n, SESSION_SLOTS), np.nan)
+    avg_daily = np.full(n, np.nan)
+    state = (np.zeros(n), np.zeros(n), np.full(n, np.nan), np.zeros(n, dtype=np.int64))
+    for i, sym in enumerate(symbols):
+        rows = sorted((_candle_fields(c) for c in candles_by_symbol.get(sym) or []),
+                      key=lambda r: r[0])
+        rows = [r for r in rows if r[0][:10] < as_of]
+        if not rows:
+            continue
+        by_day: dict[str, np.ndarray] = {}
+        for ts, _close, vol in rows:
+            k = slot_for_ist_minutes(int(ts[11:13]) * 60 + int(ts[14:16]))
+            if k < 0:
+                continue
+            by_day.setdefault(ts[:10], np.zeros(SESSION_SLOTS))[k] += vol
+        if by_day:
+            day_vols = np.stack(list(by_day.values()))
+            avg_daily[i] = day_vols.sum(axis=1).mean()
+            cum = np.cumsum(day_vols, axis=1)
+            counted = cum > 0
+            with np.errstate(invalid="ignore"):
+                profile[i] = np.where(counted.any(axis=0),
+                                      np.where(counted, cum, 0).sum(axis=0) / counted.sum(axis=0),
+                                      np.nan)
+        # Wilder state per symbol — once a day, so a scalar walk is fine here.
+        up, down, last, cnt = 0.0, 0.0, float("nan"), 0
+        alpha = 1.0 / RSI_WINDOW
+        for _ts, close, _vol in rows:
+            if cnt:
+                d = close - last
+                up = (1 - alpha) * up + alpha * max(d, 0.0)
+                down = (1 - alpha) * down + alpha * max(-d, 0.0)
+            last = close
+            cnt += 1
+        state[0][i], state[1][i], state[2][i], state[3][i] = up, down, last, cnt
+    return ScanBaselines(
+        as_of=as_of, symbols=list(symbols), cum_vol_profile=profile,
+        avg_daily_vol=avg_daily, rsi_avg_up=state[0], rsi_avg_down=state[1],
+        rsi_last_close=state[2], rsi_n=state[3],
+    )
+
+
+async def build_baselines(client, symbols: list[str], as_of: str, *,
+                          concurrency: int = BASELINE_FETCH_CONCURRENCY) -> ScanBaselines:
+    """Fetch 20 days of 15-min candles per symbol (paced) and build baselines.
+
+    The one bulk historical burst per session; failures leave that symbol
+    without history (its RVOL/RSI read None, exactly as the CLI does).
+    """
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(sym):
+        async with sem:
+            try:
+                return sym, await client.get_historical_data(
+                    sym, interval="15minute", days=BASELINE_DAYS)
+            except Exception as e:
+                logger.debug("scan_engine: baseline fetch failed for %s: %s", sym, e)
+                return sym, []
+
+    fetched = dict(await asyncio.gather(*[one(s) for s in symbols]))
+    return await asyncio.to_thread(baselines_from_candles, symbols, fetched, as_of)
+
+
+# ── Quotes (phase-1 inputs) ─────────────────────────────────────────────────
+
+def _quote_dict(qd: Any) -> dict:
+    """SDK full-quote → nf-morning-scan's quote dict (same fields, same maths)."""
+    ltp = qd.last_price
+    ohlc = qd.ohlc
+    close = ohlc.close if ohlc else None
+    net_change = getattr(qd, "net_change", None)
+    if net_change is not None and close:
+        pct_change = (net_change / close) * 100
+    elif close and ltp:
+        net_change = ltp - close
+        pct_change = (net_change / close) * 100
+    else:
+        net_change = net_change or 0
+        pct_change = 0
+    volume = getattr(qd, "volume", None) or getattr(qd, "volume_traded", None)
+    return {
+        "ltp": ltp,
+        "open": ohlc.open if ohlc else None,
+        "high": ohlc.high if ohlc else None,
+        "low": ohlc.low if ohlc else None,
+        "close": close,
+        "volume": volume or 0,
+        "net_change": net_change,
+        "pct_change": round(pct_change, 2),
+    }
+
+
+async def fetch_quotes(client, key_to_symbol: dict[str, str]) -> tuple[dict[str, dict], dict | None]:
+    """Batched full quotes for the universe + Nifty 50 → ``(stock_quotes, nifty_quote)``.
+
+    Same call shape as nf-morning-scan's ``fetch_all_quotes`` (50 keys/call),
+    but through ``_call_with_token_retry`` so the sync SDK runs off the loop.
+    """
+    import upstox_client
+
+    await client._ensure_valid_token()
+    keys = [NIFTY_KEY] + [k for k in key_to_symbol if k != NIFTY_KEY]
+    resp_to_sym = {k.replace("|", ":"): s for k, s in key_to_symbol.items()}
+    resp_to_sym.update({f"NSE_EQ:{s}": s for s in key_to_symbol.values()})
+    nifty_resp = NIFTY_KEY.replace("|", ":")
+
+    stock_quotes: dict[str, dict] = {}
+    nifty_quote: dict | None = None
+    for i in range(0, len(keys), QUOTE_BATCH):
+        batch = keys[i:i + QUOTE_BATCH]
+
+        def _do_call(batch=batch):
+            api = upstox_client.MarketQuoteApi(upstox_client.ApiClient(client._configuration))
+            return api.get_full_market_quote(symbol=",".join(batch), api_version="v2",
+                                             _request_timeout=15)
+
+        try:
+            response = await client._call_with_token_retry(_do_call)
+        except Exception as e:
+            logger.warning("scan_engine: quote batch %d failed: %s", i // QUOTE_BATCH, e)
+            continue
+        for rk, qd in (getattr(response, "data", None) or {}).items():
+            if rk == nifty_resp:
+                nifty_quote = _quote_dict(qd)
+                continue
+            sym = resp_to_sym.get(rk)
+            if sym is not None:
+                stock_quotes[sym] = _quote_dict(qd)
+    return stock_quotes, nifty_quote
+
+
+# ── The engine ──────────────────────────────────────────────────────────────
+
+_SETUPS = np.array([
+    "ORB breakout", "ORB breakdown", "VWAP pullback", "VWAP rejection",
+    "Momentum continuation", "Gap fade candidate", "Relative strength leader",
+    "Relative weakness", "Watching",
+], dtype=object)
+
+
+class ScanEngine:
+    """Warm (symbols × slots) bar arrays + baselines → scored candidate rows.
+
+    Feed it with ``on_tick`` (from the shared pool), ``apply_quotes`` (batched
+    full quotes, once per cycle) and ``set_baselines`` (once per session); call
+    ``compute`` for the ranked rows. All state is in-process; no method does
+    I/O except the module-level ``fetch_quotes`` / ``build_baselines`` helpers
+    the host drives.
+    """
+
+    def __init__(self, symbols: Iterable[str], universe: str = "nifty500"):
+        self.universe = universe
+        self.symbols: list[str] = sorted(set(symbols))
+        self._index = {s: i for i, s in enumerate(self.symbols)}
+        self._baselines: ScanBaselines | None = None
+        self._session: str | None = None
+        self._reset_session(None)
+
+    # ── state ──────────────────────────────────────────────────────────
+
+    def _reset_session(self, session_date: str | None) -> None:
+        n, k = len(self.symbols), SESSION_SLOTS
+        self._session = session_date
+        self._open = np.full((n, k), np.nan)
+        self._high = np.full((n, k), np.nan)
+        self._low = np.full((n, k), np.nan)
+        self._close = np.full((n, k), np.nan)
+        self._vol = np.zeros((n, k))
+        self._last_cum_vol = np.full(n, np.nan)     # last cumulative day volume seen
+        # Quote fields — filled by apply_quotes, else derived from ticks.
+        self._ltp = np.full(n, np.nan)
+        self._day_open = np.full(n, np.nan)
+        self._prev_close = np.full(n, np.nan)
+        self._day_high = np.full(n, np.nan)
+        self._day_low = np.full(n, np.nan)
+        self._day_volume = np.full(n, np.nan)
+        self._net_change = np.full(n, np.nan)
+        self._quote_pct = np.full(n, np.nan)
+        self._has_quote = np.zeros(n, dtype=bool)
+        self._nifty_quote: dict | None = None
+        self._nifty_ltp: float | None = None
+        self._nifty_cp: float | None = None
+
+    @property
+    def session_date(self) -> str | None:
+        return self._session
+
+    @property
+    def baselines(self) -> ScanBaselines | None:
+        return self._baselines
+
+    def set_baselines(self, baselines: ScanBaselines) -> None:
+        """Install prior-session baselines, realigned to this engine's symbols."""
+        if baselines.symbols != self.symbols:
+            pos = {s: j for j, s in enumerate(baselines.symbols)}
+            idx = np.array([pos.get(s, -1) for s in self.symbols], dtype=np.int64)
+            known = idx >= 0
+            take = np.where(known, idx, 0)
+
+            def _align(arr, fill):
+                out = arr[take].astype(arr.dtype, copy=True)
+                out[~known] = fill
+                return out
+
+            baselines = ScanBaselines(
+                as_of=baselines.as_of, symbols=list(self.symbols),
+                cum_vol_profile=_align(baselines.cum_vol_profile, np.nan),
+                avg_daily_vol=_align(baselines.avg_daily_vol, np.nan),
+                rsi_avg_up=_align(baselines.rsi_avg_up, 0.0),
+                rsi_avg_down=_align(baselines.rsi_avg_down, 0.0),
+                rsi_last_close=_align(baselines.rsi_last_close, np.nan),
+                rsi_n=_align(baselines.rsi_n, 0),
+            )
+        self._baselines = baselines
+
+    # ── ingestion ──────────────────────────────────────────────────────
+
+    def on_tick(self, symbol: str, data: dict, ts: datetime) -> None:
+        """Fold one feed tick (``{"ltp", "close", "ltq"?, "volume"?}``) into today's bars.
+
+        ``ts`` is naive UTC (the daemon's tick clock). Bar volume is the Δ of
+        cumulative day ``volume`` when the feed carries it (full mode), else the
+        tick's ``ltq`` — only VWAP weighting uses bar volume, and it is
+        scale-invariant, so ltpc's sampled ``ltq`` is an adequate proxy there.
+        """
+        i = self._index.get(symbol)
+        ltp = data.get("ltp")
+        if i is None or ltp is None:
+            return
+        ist = ts + _IST_OFFSET if ts.tzinfo is None else ts.astimezone(_IST)
+        day = ist.strftime("%Y-%m-%d")
+        if day != self._session:
+            self._reset_session(day)
+        price = float(ltp)
+        cp = data.get("close")
+        if cp and np.isnan(self._prev_close[i]):
+            self._prev_close[i] = float(cp)
+        self._ltp[i] = price
+        k = slot_for_ist_minutes(ist.hour * 60 + ist.minute)
+        if k < 0:
+            return
+        if np.isnan(self._day_open[i]) and not self._has_quote[i]:
+            self._day_open[i] = price
+        vol = 0.0
+        cum = data.get("volume")
+        if cum:
+            cum = float(cum)
+            last = self._last_cum_vol[i]
+            vol = cum - last if not np.isnan(last) and cum >= last else 0.0
+            self._last_cum_vol[i] = cum
+        elif data.get("ltq"):
+            vol = float(data["ltq"])
+        if np.isnan(self._open[i, k]):
+            self._open[i, k] = self._high[i, k] = self._low[i, k] = price
+        else:
+            self._high[i, k] = max(self._high[i, k], price)
+            self._low[i, k] = min(self._low[i, k], price)
+        self._close[i, k] = price
+        self._vol[i, k] += vol
+
+    def on_index_tick(self, data: dict) -> None:
+        """Nifty 50 tick — keeps the relative-strength reference live between quote syncs."""
+        if data.get("ltp") is not None:
+            self._nifty_ltp = float(data["ltp"])
+        if data.get("close"):
+            self._nifty_cp = float(data["close"])
+
+    def apply_quotes(self, stock_quotes: dict[str, dict], nifty_quote: dict | None) -> None:
+        """Install the cycle's batched full quotes (nf-morning-scan's phase-1 inputs)."""
+        for sym, q in stock_quotes.items():
+            i = self._index.get(sym)
+            if i is None:
+                continue
+            self._has_quote[i] = True
+            for arr, key in ((self._ltp, "ltp"), (self._day_open, "open"),
+                             (self._prev_close, "close"), (self._day_high, "high"),
+                             (self._day_low, "low"), (self._day_volume, "volume"),
+                             (self._net_change, "net_change"), (self._quote_pct, "pct_change")):
+                v = q.get(key)
+                arr[i] = np.nan if v is None else float(v)
+        if nifty_quote is not None:
+            self._nifty_quote = nifty_quote
+            if nifty_quote.get("ltp") is not None:
+                self._nifty_ltp = float(nifty_quote["ltp"])
+            if nifty_quote.get("close"):
+                self._nifty_cp = float(nifty_quote["close"])
+
+    # ── compute ────────────────────────────────────────────────────────
+
+    def _nifty_pct(self) -> float:
+        if self._nifty_quote is not None and self._nifty_ltp == self._nifty_quote.get("ltp"):
+            return self._nifty_quote.get("pct_change") or 0.0
+        if self._nifty_ltp and self._nifty_cp:
+            return round((self._nifty_ltp - self._nifty_cp) / self._nifty_cp * 100, 2)
+        return 0.0
+
+    def compute(self, top_n: int = 10, min_score: int = 0) -> tuple[list[dict], float, float]:
+        """Score every symbol and return ``(rows, nifty_pct, elapsed_s)``.
+
+        ``rows`` are the top ``top_n`` by (total, phase1, |rel_strength|) in
+        nf-morning-scan's ``run_scan`` row shape.
+        """
+        t0 = time.perf_counter()
+        ltp, cp, op = self._ltp, self._prev_close, self._day_open
+        live = ~np.isnan(ltp) & (self._has_quote | ~np.isnan(cp))
+        nifty_pct = self._nifty_pct()
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # Phase 1 — compute_gap / compute_relative_strength / phase1_score.
+            tick_pct = np.round((ltp - cp) / cp * 100, 2)
+            pct = np.where(self._has_quote, self._quote_pct, tick_pct)
+            pct = np.where(np.isnan(pct), 0.0, pct)
+            ok_gap = ~np.isnan(op) & (op != 0) & ~np.isnan(cp) & (cp != 0)
+            gap = np.where(ok_gap, np.round((op - cp) / cp * 100, 2), 0.0)
+            rs = np.round(pct - nifty_pct, 2)
+            abs_gap, abs_rs = np.abs(gap), np.abs(rs)
+            p1 = phase1_scores(gap, rs, pct)
+
+            # Today's bars → latest slot, OR, VWAP.
+            present = ~np.isnan(self._close)
+            has_bars = present.any(axis=1)
+            last_slot = np.where(has_bars, SESSION_SLOTS - 1 - np.argmax(present[:, ::-1], axis=1), -1)
+            first_slot = np.where(has_bars, np.argmax(present, axis=1), 0)
+            rows_idx = np.arange(len(self.symbols))
+            last_close = np.where(has_bars, self._close[rows_idx, np.maximum(last_slot, 0)], np.nan)
+            or_high = np.where(has_bars, self._high[rows_idx, first_slot], np.nan)
+            or_low = np.where(has_bars, self._low[rows_idx, first_slot], np.nan)
+            bar_vol = np.where(present, self._vol, 0.0)
+            typical = (self._high + self._low + self._close) / 3
+            tpv = np.where(present, typical * bar_vol, 0.0).sum(axis=1)
+            sum_vol = bar_vol.sum(axis=1)
+            vwap = np.where(sum_vol > 0, np.round(tpv / sum_vol, 2), np.nan)
+
+            # Today's total volume: the quote's exchange day volume when we have
+            # it, else what the ticks accumulated.
+            today_vol = np.where(self._has_quote & ~np.isnan(self._day_volume),
+                                 self._day_volume, sum_vol)
+
+            rsi = np.full(len(self.symbols), np.nan)
+            rvol = np.full(len(self.symbols), np.nan)
+            vol_exp = np.full(len(self.symbols), np.nan)
+            b = self._baselines
+            if b is not None:
+                # RSI(14): continue the prior-close Wilder state over today's bars.
+                state = (b.rsi_avg_up.copy(), b.rsi_avg_down.copy(),
+                         b.rsi_last_close.copy(), b.rsi_n.copy())
+                for k in range(SESSION_SLOTS):
+                    col = present[:, k]
+                    if col.any():
+                        state = _wilder_step(state, self._close[:, k], col)
+                # compute_rsi returns None below 15 candles.
+                rsi = np.where(state[3] > RSI_WINDOW,
+                               np.round(_rsi_from_state(state[0], state[1]), 1), np.nan)
+                # RVOL-T / volume expansion — only when today has bars.
+                base = b.cum_vol_profile[rows_idx, np.maximum(last_slot, 0)]
+                ok_rvol = has_bars & ~np.isnan(base) & (base > 0)
+                rvol = np.where(ok_rvol, np.round(today_vol / base, 2), np.nan)
+                ok_exp = has_bars & ~np.isnan(b.avg_daily_vol) & (b.avg_daily_vol > 0)
+                vol_exp = np.where(ok_exp, np.round(today_vol / b.avg_daily_vol, 2), np.nan)
+
+            # Phase 2 — phase2_score (RVOL-T preferred, expansion as fallback).
+            p2 = phase2_scores(rsi, vwap, ltp, rvol, vol_exp)
+
+            # detect_setup, first-match order preserved by np.select.
+            vwap_ok = ~np.isnan(vwap) & (vwap != 0) & ~np.isnan(ltp) & (ltp != 0)
+            breakout_up = has_bars & (last_close > or_high)
+            breakout_dn = has_bars & (last_close < or_low)
+            setup_idx = np.select(
+                [breakout_up, breakout_dn,
+                 vwap_ok & (ltp > vwap) & ((ltp - vwap) / vwap * 100 < 0.3),
+                 vwap_ok & (ltp < vwap) & ((vwap - ltp) / vwap * 100 < 0.3),
+                 (abs_gap >= 1.5) & (abs_rs >= 1) & (gap > 0),
+                 (abs_gap >= 1.5) & (abs_rs >= 1),
+                 (abs_rs >= 1) & (rs > 0),
+                 abs_rs >= 1],
+                np.arange(8), default=8,
+            )
+
+        total = p1 + p2
+        cand = np.flatnonzero(live & (total >= min_score))
+        # lexsort: last key is primary → (total, phase1, |rs|) all descending.
+        order = cand[np.lexsort((-abs_rs[cand], -p1[cand], -total[cand]))][:top_n]
+
+        def _f(x):
+            return None if np.isnan(x) else float(x)
+
+        rows = []
+        for i in order:
+            if self._has_quote[i]:
+                quote = {
+                    "ltp": _f(ltp[i]), "open": _f(op[i]), "high": _f(self._day_high[i]),
+                    "low": _f(self._day_low[i]), "close": _f(cp[i]),
+                    "volume": int(self._day_volume[i]) if not np.isnan(self._day_volume[i]) else 0,
+                    "net_change": _f(self._net_change[i]), "pct_change": float(pct[i]),
+                }
+            else:
+                nc = ltp[i] - cp[i] if not np.isnan(cp[i]) else 0.0
+                quote = {
+                    "ltp": _f(ltp[i]), "open": _f(op[i]),
+                    "high": _f(np.nanmax(self._high[i])) if has_bars[i] else None,
+                    "low": _f(np.nanmin(self._low[i])) if has_bars[i] else None,
+                    "close": _f(cp[i]), "volume": int(sum_vol[i]),
+                    "net_change": float(nc), "pct_change": float(pct[i]),
+                }
+            opening_range = None
+            if has_bars[i]:
+                brk = ("bullish" if breakout_up[i] else "bearish" if breakout_dn[i] else None)
+                opening_range = {
+                    "or_high": float(or_high[i]), "or_low": float(or_low[i]),
+                    "breakout": brk, "current_price": float(last_close[i]),
+                }
+            v = _f(vwap[i])
+            rows.append({
+                "symbol": self.symbols[i],
+                "quote": quote,
+                "gap_pct": float(gap[i]),
+                "rel_strength": float(rs[i]),
+                "phase1_score": int(p1[i]),
+                "rsi": _f(rsi[i]),
+                "vwap": v,
+                "above_vwap": bool(ltp[i] > v) if v and ltp[i] else None,
+                "rvol_t": _f(rvol[i]),
+                "vol_expansion": _f(vol_exp[i]),
+                "opening_range": opening_range,
+                "phase2_score": int(p2[i]),
+                "total_score": int(total[i]),
+                "setup": _SETUPS[setup_idx[i]],
+            })
+        return rows, float(nifty_pct), time.perf_counter() - t0
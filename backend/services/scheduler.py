@@ -561,6 +561,9 @@ class WorkflowScheduler:
 
     # Universe the cached candidate scan covers. nifty500 = full Hero Scanner.
     SCAN_CACHE_UNIVERSE = "nifty500"
+    # An engine row younger than this (two engine cycles) means the daemon's
+    # in-process scan is live and the subprocess would only duplicate it.
+    SCAN_ENGINE_FRESH_S = 360
 
     def _add_scan_cache_job(self):
         """Refresh the cached candidate scan every 3 min during market hours.
@@ -598,9 +601,22 @@ class WorkflowScheduler:
         return (9 * 60 + 15) <= hm <= (15 * 60 + 30)
 
     async def _run_scan_cache(self):
-        """Spawn the scan-cache writer as an isolated subprocess (market hours only)."""
+        """Spawn the scan-cache writer as an isolated subprocess (market hours only).
+
+        Skipped while the daemon's in-process scan engine is writing fresh rows
+        (services/scan_engine.py) — the subprocess is the fallback when that
+        feed is disabled or down.
+        """
         if not self._market_open_ist():
             return
+        try:
+            from services.scan_cache import get_engine_scan_age
+            age = await get_engine_scan_age(self.SCAN_CACHE_UNIVERSE)
+            if age is not None and age < self.SCAN_ENGINE_FRESH_S:
+                logger.debug("scan cache: engine row %.0fs old — subprocess skipped", age)
+                return
+        except Exception as e:
+            logger.debug("scan cache: engine freshness check failed: %s", e)
         import sys
         from pathlib import Path
 
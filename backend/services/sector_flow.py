@@ -23,10 +23,13 @@ tunable cutoffs that we set from the backtest (validation-first), not by hand.
 """
 from __future__ import annotations
 
+import math
 import statistics
 from dataclasses import dataclass, field
 from typing import Optional
 
+import numpy as np
+
 # A constituent counts toward up/down breadth only if it has moved more than this
 # (% from session open) — filters flat names so breadth reflects conviction, not
 # noise. Tunable; set from the backtest.
@@ -258,3 +261,183 @@ def persistent_bias(rel_tl: list[RelativeSnapshot], *, band: float = BIAS_BAND)
     bias = "laggard" if avg <= -band else ("leader" if avg >= band else "neutral")
     return {"avg_rel_median": round(avg, 3), "last_rel_median": round(vals[-1], 3),
             "bias": bias, "n_bars": len(rel_tl)}
+
+
+# ── Columnar path: (symbols × bars) matrices + NumPy group reductions ──────────
+#
+# The dataclass timelines above walk Python dicts per symbol per bar — fine for
+# one sector in the replay script, but the live snapshot runs them for the whole
+# universe plus every sector each cycle, and that cost grows with bars × names
+# (5-minute bars or the ~750-name nifty_total make it the dominant term). The
+# functions below compute the SAME numbers from one aligned close matrix: a
+# forward-filled (symbols × bars) grid, a symbol→sector index, and per-group
+# reductions over columns. Output parity with sector_timeline/relative_timeline
+# is pinned by tests/test_sector_flow_columnar.py.
+
+
+@dataclass
+class SessionMatrix:
+    """One session's constituents aligned to a common intraday grid.
+
+    ``minutes`` is the ascending union of bar starts (IST minute-of-day) across
+    all symbols; ``close[i, t]`` is NaN where symbol ``i`` printed no bar at
+    ``minutes[t]``. ``day_open`` is each symbol's first bar open that session;
+    ``prev_close`` its prior-session close (NaN when unknown).
+    """
+    symbols: list[str]
+    minutes: np.ndarray        # (T,) int64
+    close: np.ndarray          # (S, T) float64
+    day_open: np.ndarray       # (S,) float64
+    prev_close: np.ndarray     # (S,) float64
+
+    def labels(self) -> list[str]:
+        return [f"{m // 60:02d}:{m % 60:02d}" for m in self.minutes.tolist()]
+
+
+def forward_fill(values: np.ndarray) -> np.ndarray:
+    """Carry the last non-NaN value forward along each row (leading NaNs stay)."""
+    idx = np.where(np.isnan(values), 0, np.arange(values.shape[1]))
+    np.maximum.accumulate(idx, axis=1, out=idx)
+    filled = values[np.arange(values.shape[0])[:, None], idx]
+    # Rows whose first column is NaN pick index 0 until their first print —
+    # that NaN propagates correctly, so no extra masking is needed.
+    return filled
+
+
+def pct_matrix(mat: SessionMatrix) -> np.ndarray:
+    """(S, T) % from open over the forward-filled grid; NaN where a name has no
+    data yet or a non-positive open (sector_timeline skips those)."""
+    filled = forward_fill(mat.close)
+    op = mat.day_open[:, None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct = (filled - op) / op * 100.0
+    return np.where(op > 0, pct, np.nan)
+
+
+def _column_fmean(block: np.ndarray) -> np.ndarray:
+    """Per-column ``statistics.fmean`` of the non-NaN values (exact fsum, so the
+    rounded output matches the scalar path bit-for-bit)."""
+    out = np.zeros(block.shape[1])
+    for t in range(block.shape[1]):
+        col = block[:, t]
+        col = col[~np.isnan(col)]
+        if col.size:
+            out[t] = math.fsum(col.tolist()) / col.size
+    return out
+
+
+def timeline_arrays(pct: np.ndarray, *, threshold: float = DEFAULT_MOVE_THRESHOLD,
+                    window: int = DEFAULT_WINDOW_BARS) -> dict[str, np.ndarray]:
+    """Columnar ``sector_timeline`` over one group's (names × bars) pct block.
+
+    Returns arrays keyed like ``SectorSnapshot`` fields. The first ``window``
+    entries of the acceleration arrays are NaN (``None`` in the scalar path);
+    ``accelerating`` is an int8 array with -1 for "not yet defined".
+    """
+    active = ~np.isnan(pct)
+    n = active.sum(axis=0)
+    n_up = (active & (pct > threshold)).sum(axis=0)
+    n_down = (active & (pct < -threshold)).sum(axis=0)
+    safe_n = np.maximum(n, 1)
+    up_frac = np.where(n > 0, n_up / safe_n, 0.0)
+    down_frac = np.where(n > 0, n_down / safe_n, 0.0)
+    net = up_frac - down_frac
+    median = np.zeros(pct.shape[1])
+    has = n > 0
+    if has.any():
+        median[has] = np.nanmedian(pct[:, has], axis=0)
+    mean = _column_fmean(pct)
+
+    T = pct.shape[1]
+    d_net = np.full(T, np.nan)
+    d_median = np.full(T, np.nan)
+    accelerating = np.full(T, -1, dtype=np.int8)
+    decisiveness = np.full(T, np.nan)
+    if T > window:
+        d_net[window:] = net[window:] - net[:-window]
+        d_median[window:] = median[window:] - median[:-window]
+        tail_net, tail_med = net[window:], median[window:]
+        direction = np.where(tail_net > 0, 1.0, np.where(tail_net < 0, -1.0,
+                             np.where(tail_med >= 0, 1.0, -1.0)))
+        aligned = d_median[window:] * direction
+        accelerating[window:] = ((aligned > 0) & (np.abs(tail_net) > 0)).astype(np.int8)
+        decisiveness[window:] = np.abs(tail_net) * np.maximum(0.0, aligned)
+    return {"n": n, "up_frac": up_frac, "down_frac": down_frac, "net_breadth": net,
+            "median_move": median, "mean_move": mean, "d_net_breadth": d_net,
+            "d_median": d_median, "accelerating": accelerating,
+            "decisiveness": decisiveness}
+
+
+def relative_arrays(sector: dict[str, np.ndarray], market: dict[str, np.ndarray],
+                    *, window: int = DEFAULT_WINDOW_BARS) -> dict[str, np.ndarray]:
+    """Columnar ``relative_timeline`` for a sector already aligned to the
+    market's columns (same length; the caller selects the sector's grid)."""
+    rel_median = sector["median_move"] - market["median_move"]
+    T = rel_median.shape[0]
+    d_rel = np.full(T, np.nan)
+    decoupling = np.full(T, -1, dtype=np.int8)
+    rel_decis = np.full(T, np.nan)
+    if T > window:
+        d_rel[window:] = rel_median[window:] - rel_median[:-window]
+        direction = np.where(rel_median[window:] >= 0, 1.0, -1.0)
+        aligned = d_rel[window:] * direction
+        decoupling[window:] = (aligned > 0).astype(np.int8)
+        rel_decis[window:] = np.abs(rel_median[window:]) * np.maximum(0.0, aligned)
+    return {"rel_median": rel_median,
+            "rel_breadth": sector["net_breadth"] - market["net_breadth"],
+            "sector_median": sector["median_move"], "market_median": market["median_move"],
+            "d_rel_median": d_rel, "decoupling": decoupling, "rel_decisiveness": rel_decis}
+
+
+def _r(x: float, nd: int) -> Optional[float]:
+    return None if math.isnan(x) else round(float(x), nd)
+
+
+def _flag(x: int) -> Optional[bool]:
+    return None if x < 0 else bool(x)
+
+
+def snapshot_dicts(sector: str, labels: list[str], arr: dict[str, np.ndarray]) -> list[dict]:
+    """``SectorSnapshot.as_dict()`` rows from ``timeline_arrays`` output."""
+    out = []
+    for t, as_of in enumerate(labels):
+        out.append({
+            "sector": sector, "as_of": as_of, "n": int(arr["n"][t]),
+            "up_frac": round(float(arr["up_frac"][t]), 3),
+            "down_frac": round(float(arr["down_frac"][t]), 3),
+            "net_breadth": round(float(arr["net_breadth"][t]), 3),
+            "median_move": round(float(arr["median_move"][t]), 3),
+            "mean_move": round(float(arr["mean_move"][t]), 3),
+            "d_net_breadth": _r(arr["d_net_breadth"][t], 3),
+            "d_median": _r(arr["d_median"][t], 3),
+            "accelerating": _flag(int(arr["accelerating"][t])),
+            "decisiveness": _r(arr["decisiveness"][t], 4),
+        })
+    return out
+
+
+def relative_dicts(sector: str, labels: list[str], arr: dict[str, np.ndarray]) -> list[dict]:
+    """``RelativeSnapshot.as_dict()`` rows from ``relative_arrays`` output."""
+    out = []
+    for t, as_of in enumerate(labels):
+        out.append({
+            "sector": sector, "as_of": as_of,
+            "rel_median": round(float(arr["rel_median"][t]), 3),
+            "rel_breadth": round(float(arr["rel_breadth"][t]), 3),
+            "sector_median": round(float(arr["sector_median"][t]), 3),
+            "market_median": round(float(arr["market_median"][t]), 3),
+            "d_rel_median": _r(arr["d_rel_median"][t], 3),
+            "decoupling": _flag(int(arr["decoupling"][t])),
+            "rel_decisiveness": _r(arr["rel_decisiveness"][t], 4),
+        })
+    return out
+
+
+def persistent_bias_array(rel_median: np.ndarray, *, band: float = BIAS_BAND) -> dict:
+    """``persistent_bias`` over a rel_median array (fsum mean, same rounding)."""
+    if rel_median.size == 0:
+        return {"avg_rel_median": 0.0, "last_rel_median": 0.0, "bias": "neutral", "n_bars": 0}
+    avg = math.fsum(rel_median.tolist()) / rel_median.size
+    bias = "laggard" if avg <= -band else ("leader" if avg >= band else "neutral")
+    return {"avg_rel_median": round(avg, 3), "last_rel_median": round(float(rel_median[-1]), 3),
+            "bias": bias, "n_bars": int(rel_median.size)}
@@ -17,15 +17,24 @@ import logging
 import statistics
 from datetime import datetime, timedelta
 
+import numpy as np
+
 from sqlalchemy import delete, select
 
 from database.models import SectorFlowSnapshot, utc_now
 from database.session import get_db_context
 from services import instruments_cache as ic
 from services.sector_flow import (
+    SessionMatrix,
+    pct_matrix,
     persistent_bias,
+    persistent_bias_array,
+    relative_arrays,
+    relative_dicts,
     relative_timeline,
     sector_timeline,
+    snapshot_dicts,
+    timeline_arrays,
 )
 
 logger = logging.getLogger(__name__)
@@ -152,6 +161,141 @@ def _shape_snapshot(results: dict[str, list[tuple]], universe_name: str,
     }
 
 
+# ── columnar shaping (same output as _shape_snapshot, NumPy group reductions) ─
+
+def _day_matrix(results: dict[str, list[tuple]], day: str) -> SessionMatrix:
+    """``_build_day`` for the whole universe as one aligned close matrix.
+
+    Same selection rules: a symbol enters with its first ``day`` row's open,
+    later rows in the same HH:MM slot overwrite earlier ones, and the prior
+    close is the last row dated before ``day``.
+    """
+    symbols, opens, prevs, bars = [], [], [], []
+    for sym in sorted(results):
+        rows = results.get(sym) or []
+        day_rows = sorted((r for r in rows if r[0][:10] == day), key=lambda r: r[0])
+        if not day_rows:
+            continue
+        prior = [r for r in rows if r[0][:10] < day]
+        symbols.append(sym)
+        opens.append(day_rows[0][1])
+        prevs.append(sorted(prior, key=lambda r: r[0])[-1][2] if prior else None)
+        bars.append({int(r[0][11:13]) * 60 + int(r[0][14:16]): r[2] for r in day_rows})
+    return _matrix_from_bars(symbols, opens, prevs, bars)
+
+
+def _matrix_from_bars(symbols: list[str], opens: list[float], prevs: list[float | None],
+                      bars: list[dict[int, float]]) -> SessionMatrix:
+    """Assemble a ``SessionMatrix`` from per-symbol {IST minute: close} maps."""
+    minutes = np.array(sorted({m for b in bars for m in b}), dtype=np.int64)
+    col = {m: j for j, m in enumerate(minutes.tolist())}
+    close = np.full((len(symbols), len(minutes)), np.nan)
+    for i, b in enumerate(bars):
+        if b:
+            close[i, [col[m] for m in b]] = list(b.values())
+    return SessionMatrix(
+        symbols=symbols, minutes=minutes, close=close,
+        day_open=np.array(opens, dtype=np.float64),
+        prev_close=np.array([np.nan if p is None else p for p in prevs], dtype=np.float64),
+    )
+
+
+def _peak(values: np.ndarray) -> int:
+    """Index of the first maximum, treating undefined (NaN) as 0 — the scalar
+    path's ``max(tl, key=lambda s: s.x or 0)``."""
+    return int(np.argmax(np.nan_to_num(values, nan=0.0)))
+
+
+def _or_zero(x: float, nd: int):
+    """``round(x or 0, nd)`` as the scalar path writes it — undefined (NaN) and
+    0.0 both come out as the int 0, so the JSON matches byte-for-byte."""
+    x = float(x)
+    return round(x, nd) if x and not np.isnan(x) else 0
+
+
+def _shape_matrix(mat: SessionMatrix, universe: list[str], universe_name: str,
+                  target: str, threshold: float, window: int) -> dict:
+    """Two-layer snapshot from a ``SessionMatrix`` — output-identical to
+    ``_shape_snapshot``. ``universe`` is every symbol that had any data (it
+    sizes sectors for ``MIN_SECTOR_NAMES``, exactly as the scalar path does)."""
+    if not mat.symbols:
+        return {"error": f"No market data for {target}."}
+    sector_sizes: dict[str, int] = {}
+    for s in universe:
+        sec = ic.get_sector(s)
+        if sec:
+            sector_sizes[sec] = sector_sizes.get(sec, 0) + 1
+    sector_of = [ic.get_sector(s) for s in mat.symbols]
+
+    pct = pct_matrix(mat)
+    labels = mat.labels()
+    market = timeline_arrays(pct, threshold=threshold, window=window)
+    decis = np.nan_to_num(market["decisiveness"], nan=0.0)
+    rolling = bool((decis[-window:] >= MARKET_ROLL_DECIS).any())
+    m_peak = _peak(market["decisiveness"])
+    has_prev = ~np.isnan(mat.prev_close) & (mat.prev_close != 0)
+    gaps = ((mat.day_open[has_prev] - mat.prev_close[has_prev])
+            / mat.prev_close[has_prev] * 100.0).tolist()
+
+    has_bar = ~np.isnan(mat.close)
+    sectors = {}
+    for label, size in sector_sizes.items():   # first-seen order, like by_sector
+        if size < MIN_SECTOR_NAMES:
+            continue
+        rows = np.flatnonzero([s == label for s in sector_of])
+        if len(rows) < MIN_SECTOR_NAMES:
+            continue
+        cols = np.flatnonzero(has_bar[rows].any(axis=0))
+        sec = timeline_arrays(pct[np.ix_(rows, cols)], threshold=threshold, window=window)
+        mkt = {k: v[cols] for k, v in market.items()}
+        rel = relative_arrays(sec, mkt, window=window)
+        bias = persistent_bias_array(rel["rel_median"])
+        peak = _peak(rel["rel_decisiveness"])
+        last_decis = rel["rel_decisiveness"][-1]
+        sectors[label] = {
+            "n": len(rows), "bias": bias["bias"],
+            "thin": len(rows) < THIN_SECTOR_NAMES,
+            "avg_rel_median": bias["avg_rel_median"],
+            "last_rel_median": round(float(rel["rel_median"][-1]), 3),
+            "decoupling_now": bool((0.0 if np.isnan(last_decis) else last_decis) >= DECOUPLE_DECIS),
+            "peak_rel_decisiveness": _or_zero(rel["rel_decisiveness"][peak], 4),
+            "peak_rel_at": labels[cols[peak]],
+            "timeline": relative_dicts(label, [labels[c] for c in cols], rel),
+        }
+
+    last = -1
+    median_last = float(market["median_move"][last])
+    return {
+        "date": target,
+        "universe": universe_name,
+        "as_of": labels[last],
+        "market": {
+            "median_move": round(median_last, 2),
+            "net_breadth": round(float(market["net_breadth"][last]), 2),
+            "n": int(market["n"][last]),
+            "gap": round(statistics.median(gaps), 2) if gaps else None,
+            "decisiveness": _or_zero(market["decisiveness"][last], 4),
+            "rolling": rolling,
+            "peak_decisiveness": _or_zero(market["decisiveness"][m_peak], 4),
+            "peak_at": labels[m_peak],
+            "direction": "down" if median_last < 0 else "up",
+        },
+        "market_timeline": snapshot_dicts("MARKET", labels, market),
+        "sectors": sectors,
+    }
+
+
+def _shape_snapshot_columnar(results: dict[str, list[tuple]], universe_name: str,
+                             target_date: str | None, threshold: float, window: int) -> dict:
+    """``_shape_snapshot`` via the columnar path (same inputs, same output)."""
+    present = sorted({r[0][:10] for rows in results.values() for r in rows})
+    if not present:
+        return {"error": "No candle data."}
+    target = target_date or present[-1]
+    return _shape_matrix(_day_matrix(results, target), sorted(results), universe_name,
+                         target, threshold, window)
+
+
 # ── compute (live fetch + shape) ─────────────────────────────────────────────
 
 async def compute_snapshot(universe: str = "nifty500", date: str | None = None,
@@ -169,7 +313,7 @@ async def compute_snapshot(universe: str = "nifty500", date: str | None = None,
         from base import init_market_data_client
         client = init_market_data_client()
     results = await _fetch_universe(client, symbols, days)
-    return _shape_snapshot(results, universe, date, threshold, window)
+    return _shape_snapshot_columnar(results, universe, date, threshold, window)
 
 
 # ── store + read (mirrors scan_cache) ────────────────────────────────────────
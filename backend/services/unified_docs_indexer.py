@@ -28,6 +28,8 @@ backend_dir = Path(__file__).parent.parent
 sys.path.insert(0, str(backend_dir))
 
 from database.session import get_db_session
+from memory.embedding_cache import get_embedding_cache
+from services.doc_index_pipeline import DocWork, IndexPipeline, IndexStats
 
 logger = logging.getLogger(__name__)
 
@@ -77,6 +79,7 @@ class UnifiedDocsIndexer:
         self.chunk_overlap = chunk_overlap
         self.model_name = model_name
         self.use_openai = use_openai
+        self._openai_client = None
 
         # Get API key from environment
         if use_openai:
@@ -109,56 +112,44 @@ class UnifiedDocsIndexer:
 
     async def generate_embedding(self, text: str) -> List[float]:
         """
-        Generate embedding for text using OpenAI or OpenRouter API.
+        Generate embedding for text, served from the shared embedding cache.
 
         Args:
             text: Text to embed
 
         Returns:
-            Embedding vector as list of floats (3072 or 4096 dimensions)
+            Embedding vector as list of floats
         """
-        if self.use_openai:
-            import openai
-            client = openai.AsyncOpenAI(api_key=self.api_key)
-
-            response = await client.embeddings.create(
-                model=self.model_name,
-                input=text
-            )
-            return response.data[0].embedding
-        else:
-            response = await self.client.post(
-                "https://openrouter.ai/api/v1/embeddings",
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "HTTP-Referer": "https://node.idrinkcoffee.info",
-                    "X-Title": "EspressoBot Documentation Indexer",
-                },
-                json={
-                    "model": self.model_name,
-                    "input": text,
-                }
-            )
-
-            if response.status_code != 200:
-                raise Exception(f"OpenRouter API error: {response.status_code} - {response.text}")
-
-            data = response.json()
-            return data["data"][0]["embedding"]
+        return (await self.generate_embeddings_batch([text]))[0]
 
     async def generate_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
         """
         Generate embeddings for multiple texts in batch.
 
+        Unchanged texts are served from the shared embedding cache (memory,
+        then disk); only misses reach the API.
+
         Args:
             texts: List of texts to embed
 
         Returns:
             List of embedding vectors
         """
-        if self.use_openai:
+        return await get_embedding_cache().get_or_compute(
+            self.model_name, self.embedding_dim, texts, self._request_embeddings
+        )
+
+    def _get_openai_client(self):
+        """One AsyncOpenAI client per instance, so its connection pool is reused."""
+        if self._openai_client is None:
             import openai
-            client = openai.AsyncOpenAI(api_key=self.api_key)
+            self._openai_client = openai.AsyncOpenAI(api_key=self.api_key)
+        return self._openai_client
+
+    async def _request_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """One embeddings API call for ``texts`` — only reached on a cache miss."""
+        if self.use_openai:
+            client = self._get_openai_client()
 
             response = await client.embeddings.create(
                 model=self.model_name,
@@ -373,16 +364,21 @@ class UnifiedDocsIndexer:
 
         return chunks
 
-    async def index_all(self, force: bool = False):
+    async def index_all(self, force: bool = False) -> IndexStats:
         """
         Index all documentation files.
 
+        Incremental: unchanged files (per-file hash) are skipped; in changed
+        internal docs only chunks whose hash changed are re-embedded and
+        rewritten, and chunks/files that disappeared are deleted. See
+        services/doc_index_pipeline.py.
+
         Args:
             force: If True, re-index all documents even if unchanged
         """
         if not self.docs_dir.exists():
             logger.warning(f"Documentation directory not found: {self.docs_dir}")
-            return
+            return IndexStats()
 
         logger.info(f"🔍 Indexing {self.doc_type} documentation from {self.docs_dir}")
 
@@ -395,159 +391,193 @@ class UnifiedDocsIndexer:
 
         logger.info(f"   Found {len(md_files)} markdown files")
 
-        indexed_count = 0
-        error_count = 0
-
         async with get_db_session() as session:
-            for md_file in md_files:
-                try:
-                    # Read file
-                    content = md_file.read_text(encoding='utf-8')
-
-                    # Get relative path
-                    relative_path = str(md_file.relative_to(self.docs_dir.parent))
+            stored_hashes, stored_chunks = await self._load_stored_hashes(session)
 
-                    # Chunk the file
-                    chunks = self.chunk_markdown(content, relative_path)
-
-                    # Generate embeddings
-                    texts = [chunk['chunk_text'] for chunk in chunks]
-                    embeddings = await self.generate_embeddings_batch(texts)
-
-                    # Store in database
-                    await self._store_chunks(session, chunks, embeddings, relative_path)
-
-                    indexed_count += 1
-                    logger.info(f"  ✓ Indexed: {relative_path} ({len(chunks)} chunks)")
-
-                except Exception as e:
-                    logger.error(f"  ✗ Error indexing {md_file}: {e}")
-                    error_count += 1
-
-            await session.commit()
+        if self.doc_type == "shopify":
+            pipeline = IndexPipeline(self._chunk_file, self.generate_embeddings_batch, self._write_shopify_docs)
+        else:
+            pipeline = IndexPipeline(
+                self._chunk_file, self.generate_embeddings_batch,
+                self._write_internal_chunks, self._delete_internal_files,
+            )
+        stats = await pipeline.run(
+            ((f, str(f.relative_to(self.docs_dir.parent))) for f in md_files),
+            stored_hashes, stored_chunks, force=force,
+        )
 
         # Close HTTP client (only for OpenRouter)
         if not self.use_openai:
             await self.client.aclose()
 
-        logger.info(f"\n✅ Indexing complete!")
-        logger.info(f"   Indexed: {indexed_count} files")
-        logger.info(f"   Errors: {error_count}")
-
-    async def _store_chunks(
-        self,
-        session: AsyncSession,
-        chunks: List[Dict[str, Any]],
-        embeddings: List[List[float]],
-        file_path: str
-    ):
+        logger.info(f"\n✅ Indexing complete! ({stats.elapsed_s:.1f}s)")
+        logger.info(f"   Indexed: {stats.files_indexed} files, skipped {stats.files_skipped} unchanged")
+        logger.info(f"   Chunks: {stats.chunks_embedded} embedded ({stats.embed_calls} API batches), "
+                    f"{stats.chunks_reused} unchanged")
+        if stats.files_deleted:
+            logger.info(f"   Removed: {stats.files_deleted} deleted files")
+        logger.info(f"   Errors: {stats.errors}")
+        return stats
+
+    def _chunk_file(self, file_path: Path, content: str) -> Optional[DocWork]:
+        """Pipeline stage 1: chunk one file (runs in a worker thread)."""
+        relative_path = str(file_path.relative_to(self.docs_dir.parent))
+        chunks = self.chunk_markdown(content, relative_path)
+        # No chunks still goes to the writer, which trims the stale rows.
+        return DocWork(path=relative_path, file_hash="", chunks=chunks)
+
+    async def _load_stored_hashes(
+        self, session: AsyncSession
+    ) -> tuple[Dict[str, str], Optional[Dict[str, Dict[int, str]]]]:
         """
-        Store chunks in appropriate database table.
+        Load what was indexed last time under this docs directory.
 
-        Args:
-            session: Database session
-            chunks: List of chunk dicts
-            embeddings: List of embedding vectors
-            file_path: File path for deletion
+        Returns:
+            (path -> file hash, path -> {chunk_index: chunk hash}); the chunk
+            map is None for Shopify docs, which store one row per file.
         """
+        prefix = f"{self.docs_dir.name}/%"
         if self.doc_type == "shopify":
-            await self._store_shopify_chunks(session, chunks, embeddings, file_path)
-        else:
-            await self._store_internal_chunks(session, chunks, embeddings, file_path)
+            result = await session.execute(
+                text("SELECT doc_path, content_hash FROM docs "
+                     "WHERE doc_path LIKE :prefix AND content_hash IS NOT NULL"),
+                {"prefix": prefix}
+            )
+            return {row[0]: row[1] for row in result.fetchall()}, None
 
-    async def _store_shopify_chunks(
-        self,
-        session: AsyncSession,
-        chunks: List[Dict[str, Any]],
-        embeddings: List[List[float]],
-        file_path: str
-    ):
-        """Store chunks in docs table (source of truth for full content)"""
-        # Delete existing entry for this file
-        await session.execute(
-            text("DELETE FROM docs WHERE doc_path = :path"),
-            {"path": file_path}
+        result = await session.execute(
+            text("SELECT file_path, chunk_index, file_hash, chunk_hash FROM doc_chunks "
+                 "WHERE file_path LIKE :prefix"),
+            {"prefix": prefix}
         )
+        file_hashes: Dict[str, str] = {}
+        chunk_hashes: Dict[str, Dict[int, str]] = {}
+        for file_path, chunk_index, file_hash, chunk_hash in result.fetchall():
+            chunk_hashes.setdefault(file_path, {})[chunk_index] = chunk_hash
+            # A file counts as indexed only once every chunk carries its hash.
+            if file_hash is None or file_hashes.get(file_path, file_hash) != file_hash:
+                file_hashes[file_path] = ""
+            else:
+                file_hashes[file_path] = file_hash
+        return file_hashes, chunk_hashes
 
-        # For Shopify docs, we average embeddings and store one entry per file
+    async def _write_shopify_docs(self, session: AsyncSession, works: List[DocWork]):
+        """Bulk upsert into docs table (source of truth for full content), one row per file"""
         import numpy as np
-        avg_embedding = np.mean(embeddings, axis=0).tolist()
-
-        # Convert to halfvec string format: [1.0,2.0,3.0,...]
-        halfvec_str = '[' + ','.join(str(v) for v in avg_embedding) + ']'
-
-        # Parse metadata from path
-        # file_path is already relative (e.g., "shopify-api/liquid/00-liquid-objects.md")
-        relative_path = Path(file_path)
-        parts = relative_path.parts
-
-        api_version = parts[1] if len(parts) > 1 else None  # e.g., "admin"
-        category = parts[2] if len(parts) > 2 else "general"
-
-        # Extract title from first chunk
-        title = chunks[0]['heading_context'].split(' / ')[0] if chunks[0]['heading_context'] else relative_path.stem
-
-        # Combine all chunk text
-        full_content = '\n\n'.join(chunk['chunk_text'] for chunk in chunks)
-
-        # Insert into database with halfvec
-        await session.execute(
-            text("""
-                INSERT INTO docs (doc_path, category, title, content, embedding_halfvec, api_version, metadata)
-                VALUES (:doc_path, :category, :title, :content, CAST(:embedding AS halfvec), :api_version, :metadata)
-            """),
-            {
-                "doc_path": file_path,
-                "category": category,
-                "title": title,
-                "content": full_content,
-                "embedding": halfvec_str,
-                "api_version": api_version,
+        now = datetime.now(timezone.utc).isoformat()
+        emptied = [w.path for w in works if not w.chunks]
+        if emptied:
+            await session.execute(
+                text("DELETE FROM docs WHERE doc_path = :doc_path"),
+                [{"doc_path": p} for p in emptied]
+            )
+        rows = []
+        for work in works:
+            chunks = work.chunks
+            if not chunks:
+                continue
+            # For Shopify docs, we average embeddings and store one entry per file
+            avg_embedding = np.mean([work.embeddings[i] for i in range(len(chunks))], axis=0).tolist()
+
+            # Parse metadata from path
+            # work.path is already relative (e.g., "shopify-api/liquid/00-liquid-objects.md")
+            relative_path = Path(work.path)
+            parts = relative_path.parts
+
+            rows.append({
+                "doc_path": work.path,
+                "category": parts[2] if len(parts) > 2 else "general",
+                # Extract title from first chunk
+                "title": chunks[0]['heading_context'].split(' / ')[0] if chunks[0]['heading_context'] else relative_path.stem,
+                # Combine all chunk text
+                "content": '\n\n'.join(chunk['chunk_text'] for chunk in chunks),
+                # Convert to halfvec string format: [1.0,2.0,3.0,...]
+                "embedding": '[' + ','.join(str(v) for v in avg_embedding) + ']',
+                "api_version": parts[1] if len(parts) > 1 else None,  # e.g., "admin"
+                "content_hash": work.file_hash,
                 "metadata": json.dumps({
-                    "file_path": file_path,
+                    "file_path": work.path,
                     "chunk_count": len(chunks),
                     "embedding_model": self.model_name,
                     "embedding_dim": len(avg_embedding),
-                    "indexed_at": datetime.now(timezone.utc).isoformat()
+                    "indexed_at": now
                 })
-            }
-        )
+            })
 
-    async def _store_internal_chunks(
-        self,
-        session: AsyncSession,
-        chunks: List[Dict[str, Any]],
-        embeddings: List[List[float]],
-        file_path: str
-    ):
-        """Store chunks in doc_chunks table using halfvec (derived data for search)"""
-        # Delete existing chunks for this file
+        if not rows:
+            return
         await session.execute(
-            text("DELETE FROM doc_chunks WHERE file_path = :path"),
-            {"path": file_path}
+            text("""
+                INSERT INTO docs (doc_path, category, title, content, embedding_halfvec, api_version, metadata, content_hash)
+                VALUES (:doc_path, :category, :title, :content, CAST(:embedding AS halfvec), :api_version, :metadata, :content_hash)
+                ON CONFLICT (doc_path) DO UPDATE SET
+                    category = EXCLUDED.category,
+                    title = EXCLUDED.title,
+                    content = EXCLUDED.content,
+                    embedding_halfvec = EXCLUDED.embedding_halfvec,
+                    api_version = EXCLUDED.api_version,
+                    metadata = EXCLUDED.metadata,
+                    content_hash = EXCLUDED.content_hash
+            """),
+            rows
         )
 
-        # Insert new chunks with halfvec
-        for chunk, embedding in zip(chunks, embeddings):
-            # Convert to halfvec string format
-            halfvec_str = '[' + ','.join(str(v) for v in embedding) + ']'
+    async def _write_internal_chunks(self, session: AsyncSession, works: List[DocWork]):
+        """Bulk upsert changed chunks into doc_chunks (halfvec) and trim removed ones"""
+        upserts = []
+        for work in works:
+            for i in work.changed:
+                chunk = work.chunks[i]
+                upserts.append({
+                    "file_path": work.path,
+                    "chunk_index": i,
+                    "chunk_text": chunk['chunk_text'],
+                    "chunk_tokens": chunk['chunk_tokens'],
+                    "heading_context": chunk['heading_context'],
+                    # Convert to halfvec string format
+                    "embedding": '[' + ','.join(str(v) for v in work.embeddings[i]) + ']',
+                    "chunk_hash": chunk['chunk_hash'],
+                    "file_hash": work.file_hash,
+                })
 
+        if upserts:
             await session.execute(
                 text("""
                     INSERT INTO doc_chunks
-                    (file_path, chunk_index, chunk_text, chunk_tokens, heading_context, embedding_halfvec, created_at, updated_at)
-                    VALUES (:file_path, :chunk_index, :chunk_text, :chunk_tokens, :heading_context, CAST(:embedding AS halfvec), NOW(), NOW())
+                    (file_path, chunk_index, chunk_text, chunk_tokens, heading_context, embedding_halfvec,
+                     chunk_hash, file_hash, created_at, updated_at)
+                    VALUES (:file_path, :chunk_index, :chunk_text, :chunk_tokens, :heading_context,
+                            CAST(:embedding AS halfvec), :chunk_hash, :file_hash, NOW(), NOW())
+                    ON CONFLICT (file_path, chunk_index) DO UPDATE SET
+                        chunk_text = EXCLUDED.chunk_text,
+                        chunk_tokens = EXCLUDED.chunk_tokens,
+                        heading_context = EXCLUDED.heading_context,
+                        embedding_halfvec = EXCLUDED.embedding_halfvec,
+                        chunk_hash = EXCLUDED.chunk_hash,
+                        file_hash = EXCLUDED.file_hash,
+                        updated_at = NOW()
                 """),
-                {
-                    "file_path": chunk['file_path'],
-                    "chunk_index": chunk['chunk_index'],
-                    "chunk_text": chunk['chunk_text'],
-                    "chunk_tokens": chunk['chunk_tokens'],
-                    "heading_context": chunk['heading_context'],
-                    "embedding": halfvec_str
-                }
+                upserts
             )
 
+        per_file = [{"path": w.path, "count": len(w.chunks), "file_hash": w.file_hash} for w in works]
+        # Drop chunks past the new end of each file, then stamp the file hash
+        # on the unchanged chunks that were kept.
+        await session.execute(
+            text("DELETE FROM doc_chunks WHERE file_path = :path AND chunk_index >= :count"),
+            [{"path": f["path"], "count": f["count"]} for f in per_file]
+        )
+        await session.execute(
+            text("UPDATE doc_chunks SET file_hash = :file_hash WHERE file_path = :path"),
+            [{"path": f["path"], "file_hash": f["file_hash"]} for f in per_file]
+        )
+
+    async def _delete_internal_files(self, session: AsyncSession, paths: List[str]):
+        """Bulk delete chunks of files that no longer exist on disk"""
+        await session.execute(
+            text("DELETE FROM doc_chunks WHERE file_path = :path"),
+            [{"path": p} for p in paths]
+        )
 
 async def main():
     """CLI entry point for indexing"""
@@ -1,21 +1,132 @@
 """Upstox API client using the official SDK."""
 
 import asyncio
+import heapq
 import json
 import logging
 import os
+from dataclasses import dataclass
 from datetime import datetime, timedelta, date
 from pathlib import Path
 from typing import Literal
 
+import numpy as np
 import upstox_client
 from upstox_client.rest import ApiException
 
+from backtesting.candle_frame import CandleFrame
 from models.analysis import OHLCVData
 from models.trading import FnoPosition, Portfolio, PortfolioPosition, TradeResult
+from services.rate_limiter import RateLimiter
 
 logger = logging.getLogger(__name__)
 
+# Shared by every historical/intraday candle request in the process. Upstox's
+# standard-API caps are 50/s, 500/min and 2000/30min per account; these leave
+# headroom for quotes/orders issued outside the limiter.
+HISTORY_LIMITER = RateLimiter([(25, 1.0), (450, 60.0), (1800, 1800.0)])
+# Per-call cap on chunk requests in flight (each occupies a worker thread).
+HISTORY_MAX_INFLIGHT = 6
+
+
+def plan_history_chunks(
+    days: int, interval_value: int, now: datetime | None = None,
+) -> list[tuple[str, str]]:
+    """Split a ``days``-long window ending ``now`` into ``(from, to)`` date ranges.
+
+    Upstox limits: 1 month per request for 1-15min, 3 months for 30min, so
+    chunks are 25 / 80 days. Ranges are disjoint and oldest-first.
+    """
+    max_chunk_days = 25 if interval_value <= 15 else 80
+    chunk_to = now or datetime.now()
+    chunk_from = chunk_to - timedelta(days=days)
+    chunks = []
+    while chunk_from < chunk_to:
+        chunk_end = min(chunk_from + timedelta(days=max_chunk_days), chunk_to)
+        chunks.append((chunk_from.strftime("%Y-%m-%d"), chunk_end.strftime("%Y-%m-%d")))
+        chunk_from = chunk_end + timedelta(days=1)
+    return chunks
+
+
+def _candle_ts(candle) -> str:
+    return candle[0] if isinstance(candle[0], str) else candle[0].isoformat()
+
+
+def merge_candle_runs(runs: list[list]) -> list:
+    """K-way merge raw SDK candle runs into one ascending, timestamp-unique list.
+
+    Each run is one response (Upstox returns newest→oldest); it's flipped to
+    ascending and only re-sorted if it still isn't monotone. On duplicate
+    timestamps the earlier run wins — historical chunks are passed before the
+    intraday run, so a candle both endpoints return is kept once, from history.
+    """
+    ascending = []
+    for run in runs:
+        if not run:
+            continue
+        if _candle_ts(run[0]) > _candle_ts(run[-1]):
+            run = run[::-1]
+        keys = [_candle_ts(c) for c in run]
+        if any(a > b for a, b in zip(keys, keys[1:])):
+            run = sorted(run, key=_candle_ts)
+        ascending.append(run)
+    merged = []
+    last = None
+    for candle in heapq.merge(*ascending, key=_candle_ts):
+        ts = _candle_ts(candle)
+        if ts != last:
+            merged.append(candle)
+            last = ts
+    return merged
+
+
+@dataclass
+class OHLCVColumns:
+    """Candles as parallel columns — ``get_historical_data(columnar=True)``.
+
+    Skips building one pydantic ``OHLCVData`` per candle; callers that feed
+    the backtest engines go straight to ``to_frame()``.
+    """
+
+    timestamp: list[str]
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+    @classmethod
+    def from_raw(cls, candles: list) -> "OHLCVColumns":
+        """Build from SDK rows ``[timestamp, open, high, low, close, volume, oi]``."""
+        values = np.array([c[1:6] for c in candles], dtype=np.float64).reshape(-1, 5)
+        return cls(
+            timestamp=[_candle_ts(c) for c in candles],
+            open=values[:, 0], high=values[:, 1], low=values[:, 2],
+            close=values[:, 3], volume=values[:, 4].astype(np.int64),
+        )
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    def to_dicts(self) -> list[dict]:
+        """Engine candle dicts (``timestamp/open/high/low/close/volume``)."""
+        return [
+            {"timestamp": t, "open": o, "high": h, "low": lo, "close": c, "volume": v}
+            for t, o, h, lo, c, v in zip(
+                self.timestamp, self.open.tolist(), self.high.tolist(),
+                self.low.tolist(), self.close.tolist(), self.volume.tolist(),
+            )
+        ]
+
+    def to_frame(self) -> CandleFrame:
+        """The ``CandleFrame`` every backtest engine accepts natively."""
+        return CandleFrame.from_columns(
+            self.timestamp, self.open, self.high, self.low, self.close, self.volume,
+        )
+
+    def to_ohlcv(self) -> list[OHLCVData]:
+        return [OHLCVData(**d) for d in self.to_dicts()]
+
 
 class UpstoxClient:
     """
@@ -443,7 +554,8 @@ class UpstoxClient:
         interval: Literal["1minute", "5minute", "15minute", "30minute", "day"] = "15minute",
         days: int = 30,
         instrument_key: str | None = None,
-    ) -> list[OHLCVData]:
+        columnar: bool = False,
+    ) -> list[OHLCVData] | OHLCVColumns:
         """
         Get historical OHLCV data for a symbol using SDK.
 
@@ -453,9 +565,11 @@ class UpstoxClient:
             days: Number of days of history
             instrument_key: If provided, use directly (skips symbol resolution).
                 Useful for F&O instruments where the key is already known.
+            columnar: Return an ``OHLCVColumns`` instead of per-candle models.
 
         Returns:
-            List of OHLCV candles
+            List of OHLCV candles (ascending, unique timestamps), or
+            ``OHLCVColumns`` when ``columnar``
 
         Raises:
             ValueError: If no access token, no ISIN mapping, or API error
@@ -476,115 +590,98 @@ class UpstoxClient:
 
         logger.info(f"Fetching {symbol} ({instrument_key}) {interval_value} {unit} candles from {from_date} to {to_date}")
 
-        # The Upstox SDK is synchronous (urllib3). Build the blocking work as a
-        # closure and run it in a worker thread (below) so it never blocks the
-        # asyncio event loop — a single rate-limited call used to freeze the
-        # whole server via urllib3's Retry-After sleep.
-        def _blocking() -> list[OHLCVData]:
-            api_client = upstox_client.ApiClient(self._configuration)
-            history_api = upstox_client.HistoryV3Api(api_client)
+        # The Upstox SDK is synchronous (urllib3): each request runs in a worker
+        # thread so it never blocks the asyncio event loop — a single
+        # rate-limited call used to freeze the whole server via urllib3's
+        # Retry-After sleep. Multi-chunk ranges fan out concurrently, paced by
+        # the shared HISTORY_LIMITER.
+        inflight = asyncio.Semaphore(HISTORY_MAX_INFLIGHT)
+        history_api = None
+
+        async def _request(call, **kwargs) -> list:
+            async with inflight:
+                await HISTORY_LIMITER.acquire()
+                response = await asyncio.to_thread(
+                    call, instrument_key=instrument_key, unit=unit,
+                    interval=interval_value, _request_timeout=15, **kwargs,
+                )
+            return list(response.data.candles) if response.data else []
+
+        async def _today() -> list:
+            # Upstox's historical endpoint EXCLUDES the current day — today's
+            # candles only come from the intraday endpoint. Append them so the
+            # latest session is always present (live session VWAP, same-day
+            # RSI/MACD, etc.). The merge dedups by timestamp.
+            try:
+                return await _request(history_api.get_intra_day_candle_data)
+            except Exception as e:
+                logger.warning(f"Intraday append failed for {symbol} (using historical only): {e}")
+                return []
 
+        try:
+            history_api = upstox_client.HistoryV3Api(
+                upstox_client.ApiClient(self._configuration)
+            )
             # Use intraday endpoint for today's minute-level data (days <= 1),
             # historical endpoint for multi-day ranges (including 5D with minute intervals).
             # If intraday returns nothing (market closed / weekend), fall back to
             # historical with a wider window to show the last trading day's candles.
-            candles_data = []
             if days <= 1 and unit == "minutes":
-                response = history_api.get_intra_day_candle_data(
-                    instrument_key=instrument_key,
-                    unit=unit,
-                    interval=interval_value,
-                    _request_timeout=15,
-                )
-                candles_data = response.data.candles if response.data else []
+                candles_data = await _request(history_api.get_intra_day_candle_data)
 
                 if not candles_data:
                     # Market closed — fall back to last 4 days to cover weekends/holidays
                     logger.info(f"Intraday empty for {symbol}, falling back to historical (last 4 days)")
                     fallback_from = (datetime.now() - timedelta(days=4)).strftime("%Y-%m-%d")
-                    response = history_api.get_historical_candle_data1(
-                        instrument_key=instrument_key,
-                        unit=unit,
-                        interval=interval_value,
-                        to_date=to_date,
-                        from_date=fallback_from,
-                        _request_timeout=15,
+                    candles_data = await _request(
+                        history_api.get_historical_candle_data1,
+                        to_date=to_date, from_date=fallback_from,
                     )
-                    candles_data = response.data.candles if response.data else []
                     # Keep only the most recent trading day's candles
                     if candles_data:
                         last_day = candles_data[0][0][:10]
                         candles_data = [c for c in candles_data if c[0][:10] == last_day]
+                candles_data = merge_candle_runs([candles_data])
             else:
-                # Upstox limits: 1 month for 1-15min, 3 months for 30min.
-                # Chunk requests to stay within limits.
-                max_chunk_days = 25 if interval_value <= 15 else 80
-                candles_data = []
-                chunk_to = datetime.now()
-                chunk_from = chunk_to - timedelta(days=days)
-                while chunk_from < chunk_to:
-                    chunk_end = min(chunk_from + timedelta(days=max_chunk_days), chunk_to)
-                    response = history_api.get_historical_candle_data1(
-                        instrument_key=instrument_key,
-                        unit=unit,
-                        interval=interval_value,
-                        to_date=chunk_end.strftime("%Y-%m-%d"),
-                        from_date=chunk_from.strftime("%Y-%m-%d"),
-                        _request_timeout=15,
+                fetches = [
+                    _request(
+                        history_api.get_historical_candle_data1,
+                        to_date=chunk_to, from_date=chunk_from,
                     )
-                    chunk_candles = response.data.candles if response.data else []
-                    candles_data.extend(chunk_candles)
-                    chunk_from = chunk_end + timedelta(days=1)
-
-                # Upstox's historical endpoint EXCLUDES the current day — today's
-                # candles only come from the intraday endpoint. Append them so the
-                # latest session is always present (live session VWAP, same-day
-                # RSI/MACD, etc.). Dedup by timestamp in case ranges overlap.
+                    for chunk_from, chunk_to in plan_history_chunks(days, interval_value)
+                ]
                 if unit == "minutes":
-                    try:
-                        intra_resp = history_api.get_intra_day_candle_data(
-                            instrument_key=instrument_key,
-                            unit=unit,
-                            interval=interval_value,
-                            _request_timeout=15,
-                        )
-                        intra_candles = intra_resp.data.candles if intra_resp.data else []
-                        seen_ts = {c[0] for c in candles_data}
-                        candles_data.extend(c for c in intra_candles if c[0] not in seen_ts)
-                    except Exception as e:
-                        logger.warning(f"Intraday append failed for {symbol} (using historical only): {e}")
-
-            # Sort all candles by timestamp ascending (API returns newest→oldest within each chunk).
-            # Without this: multi-chunk fetches corrupt candle ordering.
-            candles_data.sort(key=lambda c: c[0] if isinstance(c[0], str) else c[0].isoformat())
-
-            if not candles_data:
-                raise ValueError(f"No candle data returned for {symbol}. Market may be closed or symbol invalid.")
-
-            candles = []
-            for candle in candles_data:
-                # SDK returns: [timestamp, open, high, low, close, volume, oi]
-                candles.append(
-                    OHLCVData(
-                        timestamp=candle[0] if isinstance(candle[0], str) else candle[0].isoformat(),
-                        open=float(candle[1]),
-                        high=float(candle[2]),
-                        low=float(candle[3]),
-                        close=float(candle[4]),
-                        volume=int(candle[5]),
-                    )
-                )
-
-            logger.info(f"Fetched {len(candles)} candles for {symbol}")
-            return candles
-
-        try:
-            return await asyncio.to_thread(_blocking)
+                    fetches.append(_today())
+                # Chunks stay oldest-first with intraday last: the merge keeps
+                # the first run's candle on a duplicate timestamp.
+                candles_data = merge_candle_runs(await asyncio.gather(*fetches))
         except ApiException as e:
             raise ValueError(f"Upstox API error for {symbol}: {e.status} - {e.reason}. {e.body}")
         except Exception as e:
             raise ValueError(f"Failed to fetch data for {symbol}: {e}")
 
+        if not candles_data:
+            raise ValueError(
+                f"Failed to fetch data for {symbol}: No candle data returned for {symbol}. "
+                "Market may be closed or symbol invalid."
+            )
+
+        logger.info(f"Fetched {len(candles_data)} candles for {symbol}")
+        if columnar:
+            return OHLCVColumns.from_raw(candles_data)
+        # SDK returns: [timestamp, open, high, low, close, volume, oi]
+        return [
+            OHLCVData(
+                timestamp=_candle_ts(candle),
+                open=float(candle[1]),
+                high=float(candle[2]),
+                low=float(candle[3]),
+                close=float(candle[4]),
+                volume=int(candle[5]),
+            )
+            for candle in candles_data
+        ]
+
     async def get_quote(self, symbol: str) -> dict:
         """Get current quote for a symbol using SDK."""
         await self._ensure_valid_token()
@@ -7,9 +7,13 @@ from __future__ import annotations
 import csv
 import os
 import re
+from bisect import bisect_left, bisect_right
 from datetime import datetime
+from functools import lru_cache
 from typing import Any
 
+import numpy as np
+
 _CACHE_DIR = os.path.join(
     os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache",
 )
@@ -17,7 +21,15 @@ _CACHE_PATH = os.path.join(_CACHE_DIR, "nse_instruments.csv")
 # BSE F&O instruments live in a separate file (SENSEX / BANKEX OPTIDX rows are
 # not in the NSE CSV). Read alongside the NSE cache when present.
 _BSE_CACHE_PATH = os.path.join(_CACHE_DIR, "bse_instruments.csv")
-
+# Columnar contract catalogue built from the CSVs above (see ContractCatalogue).
+# Stamped with the source files' (mtime, size) so it rebuilds once per daily
+# CSV refresh; bump the version whenever the array layout changes.
+_CATALOGUE_PATH = os.path.join(_CACHE_DIR, "fno_catalogue.npz")
+_CATALOGUE_VERSION = 1
+
+_catalogue: ContractCatalogue | None = None
+# Full tradingsymbol → row dict, materialized from the catalogue on demand
+# (list_fno_underlyings and the fuzzy resolve fallback still walk every row).
 _options_cache: dict[str, dict] = {}
 # Maps short trading symbol prefix (e.g. "RELIANCE") → full company name
 _symbol_to_name: dict[str, str] = {}
@@ -72,14 +84,43 @@ def _resolve_symbol(symbol: str) -> str:
     For OPTIDX, name is the short symbol (e.g. "NIFTY").
     For OPTSTK, name is the full company name (e.g. "RELIANCE INDUSTRIES LTD").
     """
-    _load_cache()
+    catalogue = _load_catalogue()
     symbol = symbol.upper()
-    for data in _options_cache.values():
-        if data["name"] == symbol:
-            return symbol
+    if symbol in catalogue.groups:
+        return symbol
     return _symbol_to_name.get(symbol, symbol)
 
 
+@lru_cache(maxsize=512)
+def _expiry_forms(expiry: str) -> tuple[str, str]:
+    """Return ``(expiry, DDMMMYY form)`` for matching against cache expiries.
+
+    ``YYYY-MM-DD`` input is converted; anything else (or an unparseable
+    dashed string) is matched as given.
+    """
+    if "-" in expiry:
+        try:
+            return expiry, datetime.strptime(
+                expiry, "%Y-%m-%d"
+            ).strftime("%d%b%y").upper()
+        except ValueError:
+            pass
+    return expiry, expiry
+
+
+def _matching_expiries(expiries: dict[str, Any], expiry: str) -> list[str]:
+    """Return the cache expiries an ``expiry`` argument refers to, sorted.
+
+    An exact key hit is the common case (callers pass the CSV's own
+    ``YYYY-MM-DD``). Otherwise fall back to the historical substring match
+    over this underlying's expiries — a few dozen at most, not every row.
+    """
+    if expiry in expiries:
+        return [expiry]
+    raw, normalized = _expiry_forms(expiry)
+    return sorted(e for e in expiries if raw in e or normalized in e)
+
+
 def get_lot_size(underlying: str, expiry: str | None = None) -> int:
     """Return lot size for an underlying from cache, with hardcoded fallback.
 
@@ -92,70 +133,229 @@ def get_lot_size(underlying: str, expiry: str | None = None) -> int:
     underlying = underlying.upper()
     # Prefer cache (authoritative, updated daily)
     try:
-        cache = _load_cache()
+        catalogue = _load_catalogue()
         resolved = _resolve_symbol(underlying)
-        expiry_normalized = expiry
-        if expiry and "-" in expiry:
-            try:
-                expiry_normalized = datetime.strptime(
-                    expiry, "%Y-%m-%d"
-                ).strftime("%d%b%y").upper()
-            except ValueError:
-                pass
-        fallback_lot: int | None = None
-        for data in cache.values():
-            if data["name"] != resolved:
-                continue
-            if expiry is None:
-                return data["lot_size"]
-            # Expiry given: match it; keep first row as fallback if none match.
-            if fallback_lot is None:
-                fallback_lot = data["lot_size"]
-            cache_expiry = data.get("expiry", "") or ""
-            if expiry in cache_expiry or (
-                expiry_normalized and expiry_normalized in cache_expiry
-            ):
-                return data["lot_size"]
-        if fallback_lot is not None:
-            return fallback_lot
+        if resolved in catalogue.first_lot:
+            if expiry:
+                expiries = catalogue.groups[resolved]
+                for key in _matching_expiries(expiries, expiry):
+                    return catalogue.chain(resolved, key).lot_size
+            return catalogue.first_lot[resolved]
     except FileNotFoundError:
         pass
     # Fallback to hardcoded (may be stale)
     return LOT_SIZES.get(underlying, 1)
 
 
-def _load_cache() -> dict[str, dict]:
-    """Load F&O instruments from the NSE + BSE instruments CSV caches.
+_STR_FIELDS = (
+    "instrument_key", "tradingsymbol", "name", "expiry",
+    "instrument_type", "option_type", "exchange",
+)
 
-    NSE covers NIFTY/BANKNIFTY/FINNIFTY/MIDCPNIFTY + stock options; BSE covers
-    SENSEX/BANKEX index options. The BSE file is optional — NSE underlyings
-    still resolve if it's absent (e.g. before the first download).
+
+class ExpiryChain:
+    """All listed contracts of one underlying + expiry, indexed by strike.
+
+    ``strikes`` is the sorted union of CE and PE strikes; ``ce`` / ``pe`` are
+    aligned to it (``None`` where only the other side is listed).
     """
-    global _options_cache, _symbol_to_name
-    if _options_cache:
-        return _options_cache
 
-    # Make sure both CSVs are on disk (downloads them if stale/missing). The
-    # download is a no-op when fresh, so this is cheap on the hot path.
-    try:
-        from services.instruments_cache import ensure_loaded
-        ensure_loaded()
-    except Exception:
-        pass
+    __slots__ = ("strikes", "ce", "pe", "ce_strikes", "pe_strikes", "lot_size")
 
-    if not os.path.exists(_CACHE_PATH):
-        raise FileNotFoundError(
-            f"Instruments cache not found at {_CACHE_PATH}. "
-            "Run `nf-quote` first to download instruments."
+    def __init__(self, rows: list[dict], lot_size: int) -> None:
+        by_strike: dict[float, list] = {}
+        for data in rows:
+            if data["option_type"] not in ("CE", "PE"):
+                continue
+            slot = by_strike.setdefault(data["strike"], [None, None])
+            side = 0 if data["option_type"] == "CE" else 1
+            if slot[side] is None:
+                slot[side] = data
+        self.strikes: list[float] = sorted(by_strike)
+        self.ce: list[dict | None] = [by_strike[s][0] for s in self.strikes]
+        self.pe: list[dict | None] = [by_strike[s][1] for s in self.strikes]
+        self.ce_strikes = [s for s, d in zip(self.strikes, self.ce) if d and s]
+        self.pe_strikes = [s for s, d in zip(self.strikes, self.pe) if d and s]
+        self.lot_size = lot_size
+
+    def strikes_for(self, option_type: str | None) -> list[float]:
+        """Sorted non-zero strikes listed for ``option_type`` (both sides if None)."""
+        if option_type == "CE":
+            return self.ce_strikes
+        if option_type == "PE":
+            return self.pe_strikes
+        if option_type is None:
+            return [s for s in self.strikes if s]
+        return []
+
+    def get(self, strike: float, option_type: str) -> dict | None:
+        """The contract at exactly ``strike`` / ``option_type``, or None."""
+        i = bisect_left(self.strikes, strike)
+        if i == len(self.strikes) or self.strikes[i] != strike:
+            return None
+        return (self.ce if option_type == "CE" else self.pe)[i]
+
+
+class ContractCatalogue:
+    """Every OPTIDX/OPTSTK row as parallel arrays, plus a chain index.
+
+    ``cols`` keeps CSV order; ``order`` is the same rows sorted by
+    (name, expiry, strike) and ``groups[name][expiry]`` is the ``(start, end)``
+    slice of ``order`` holding one chain. The arrays round-trip through an
+    uncompressed ``.npz`` (no pickle), so a fresh process is ready in a few
+    milliseconds; ``ExpiryChain``s are built lazily, one chain at a time.
+    """
+
+    def __init__(
+        self,
+        cols: dict[str, np.ndarray],
+        order: np.ndarray,
+        groups: dict[str, dict[str, tuple[int, int]]],
+        sym_to_name: dict[str, str],
+        first_lot: dict[str, int],
+    ) -> None:
+        self.cols = cols
+        self.order = order
+        self.groups = groups
+        self.sym_to_name = sym_to_name
+        self.first_lot = first_lot
+        self._chains: dict[tuple[str, str], ExpiryChain] = {}
+
+    @classmethod
+    def from_options(
+        cls, options: dict[str, dict], sym_to_name: dict[str, str],
+    ) -> ContractCatalogue:
+        rows = list(options.values())
+        # UTF-8 bytes columns: a quarter of the size of numpy's UCS-4 strings.
+        cols = {
+            f: np.array([(r[f] or "").encode() for r in rows], dtype=bytes)
+            for f in _STR_FIELDS
+        }
+        cols["strike"] = np.array([r["strike"] for r in rows], dtype=np.float64)
+        cols["lot_size"] = np.array([r["lot_size"] for r in rows], dtype=np.int64)
+
+        names, expiries = cols["name"], cols["expiry"]
+        order = np.lexsort((cols["strike"], expiries, names))
+        groups: dict[str, dict[str, tuple[int, int]]] = {}
+        if len(order):
+            n_sorted, e_sorted = names[order], expiries[order]
+            cuts = np.flatnonzero(
+                (n_sorted[1:] != n_sorted[:-1]) | (e_sorted[1:] != e_sorted[:-1])
+            ) + 1
+            starts = np.concatenate(([0], cuts))
+            ends = np.concatenate((cuts, [len(order)]))
+            for start, end in zip(starts.tolist(), ends.tolist()):
+                by_expiry = groups.setdefault(n_sorted[start].decode(), {})
+                if e_sorted[start]:
+                    by_expiry[e_sorted[start].decode()] = (start, end)
+        return cls(cols, order, groups, sym_to_name, _first_lots(cols))
+
+    def record(self, i: int) -> dict:
+        """Row ``i`` in the ``_load_cache`` dict shape."""
+        out: dict[str, Any] = {f: self.cols[f][i].decode() for f in _STR_FIELDS}
+        out["strike"] = float(self.cols["strike"][i])
+        out["lot_size"] = int(self.cols["lot_size"][i])
+        return out
+
+    def chain(self, name: str, expiry: str) -> ExpiryChain | None:
+        """The indexed chain for ``name`` + exact ``expiry`` key, or None."""
+        key = (name, expiry)
+        chain = self._chains.get(key)
+        if chain is None:
+            span = self.groups.get(name, {}).get(expiry)
+            if span is None:
+                return None
+            idx = self.order[span[0]:span[1]]
+            chain = ExpiryChain(
+                [self.record(i) for i in idx.tolist()],
+                int(self.cols["lot_size"][idx.min()]),
+            )
+            self._chains[key] = chain
+        return chain
+
+    def options(self) -> dict[str, dict]:
+        """Materialize every row as tradingsymbol → dict, in CSV order."""
+        lists = {
+            f: [v.decode() for v in a.tolist()] if a.dtype.kind == "S" else a.tolist()
+            for f, a in self.cols.items()
+        }
+        fields = list(lists)
+        return {
+            row["tradingsymbol"]: row
+            for row in (dict(zip(fields, vals)) for vals in zip(*lists.values()))
+        }
+
+    def save(self, path: str, stamp: str) -> None:
+        """Write the catalogue as an uncompressed npz (atomic replace, best effort)."""
+        groups = [
+            (name, exp, start, end)
+            for name, by_expiry in self.groups.items()
+            for exp, (start, end) in by_expiry.items()
+        ]
+        arrays = {f"c_{f}": a for f, a in self.cols.items()}
+        arrays.update(
+            version=np.array(_CATALOGUE_VERSION),
+            stamp=np.array(stamp),
+            order=self.order,
+            g_name=np.array([g[0] for g in groups], dtype=str),
+            g_expiry=np.array([g[1] for g in groups], dtype=str),
+            g_span=np.array([g[2:] for g in groups], dtype=np.int64).reshape(-1, 2),
+            names=np.array(list(self.first_lot), dtype=str),
+            s_sym=np.array(list(self.sym_to_name), dtype=str),
+            s_name=np.array(list(self.sym_to_name.values()), dtype=str),
         )
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(tmp, path)
+        except OSError:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
 
-    options: dict[str, dict] = {}
-    sym_to_name: dict[str, str] = {}
+    @classmethod
+    def load(cls, path: str, stamp: str) -> ContractCatalogue | None:
+        """Read a snapshot written by ``save``; None if missing, stale or unreadable."""
+        try:
+            with np.load(path, allow_pickle=False) as z:
+                if int(z["version"]) != _CATALOGUE_VERSION or str(z["stamp"]) != stamp:
+                    return None
+                cols = {k[2:]: z[k] for k in z.files if k.startswith("c_")}
+                order = z["order"]
+                g_name, g_expiry = z["g_name"].tolist(), z["g_expiry"].tolist()
+                g_span = z["g_span"].tolist()
+                names = z["names"].tolist()
+                sym_to_name = dict(zip(z["s_sym"].tolist(), z["s_name"].tolist()))
+        except Exception:
+            return None
+        groups: dict[str, dict[str, tuple[int, int]]] = {n: {} for n in names}
+        for name, exp, (start, end) in zip(g_name, g_expiry, g_span):
+            groups[name][exp] = (start, end)
+        return cls(cols, order, groups, sym_to_name, _first_lots(cols))
+
+
+def _first_lots(cols: dict[str, np.ndarray]) -> dict[str, int]:
+    """name → lot size of its first row in CSV order."""
+    uniq, first = np.unique(cols["name"], return_index=True)
+    lots = cols["lot_size"][first].tolist()
+    return {n.decode(): lot for n, lot in zip(uniq.tolist(), lots)}
+
+
+def _source_stamp(paths: list[str]) -> str:
+    """Identity of the source CSVs — changes whenever either is re-downloaded."""
+    parts = []
+    for path in paths:
+        st = os.stat(path)
+        parts.append(f"{os.path.basename(path)}:{st.st_mtime_ns}:{st.st_size}")
+    return "|".join(parts)
 
-    paths = [_CACHE_PATH]
-    if os.path.exists(_BSE_CACHE_PATH):
-        paths.append(_BSE_CACHE_PATH)
 
+def _parse_csvs(paths: list[str]) -> tuple[dict[str, dict], dict[str, str]]:
+    """Read OPTIDX/OPTSTK rows from the instruments CSVs."""
+    options: dict[str, dict] = {}
+    sym_to_name: dict[str, str] = {}
     for path in paths:
         with open(path, newline="", encoding="utf-8") as f:
             reader = csv.DictReader(f)
@@ -178,8 +378,62 @@ def _load_cache() -> dict[str, dict]:
                         sym = _parse_optstk_symbol(ts)
                         if sym and sym not in sym_to_name:
                             sym_to_name[sym] = name
-    _options_cache = options
-    _symbol_to_name = sym_to_name
+    return options, sym_to_name
+
+
+def _load_catalogue() -> ContractCatalogue:
+    """Load the F&O contract catalogue for the NSE + BSE instruments CSVs.
+
+    NSE covers NIFTY/BANKNIFTY/FINNIFTY/MIDCPNIFTY + stock options; BSE covers
+    SENSEX/BANKEX index options. The BSE file is optional — NSE underlyings
+    still resolve if it's absent (e.g. before the first download).
+
+    Reads ``fno_catalogue.npz`` when it was built from the CSVs currently on
+    disk; otherwise parses the CSVs once and rewrites the snapshot.
+    """
+    global _catalogue, _symbol_to_name
+    if _catalogue is not None:
+        return _catalogue
+
+    # Make sure both CSVs are on disk (downloads them if stale/missing). The
+    # download is a no-op when fresh, so this is cheap on the hot path.
+    try:
+        from services.instruments_cache import ensure_loaded
+        ensure_loaded()
+    except Exception:
+        pass
+
+    if not os.path.exists(_CACHE_PATH):
+        raise FileNotFoundError(
+            f"Instruments cache not found at {_CACHE_PATH}. "
+            "Run `nf-quote` first to download instruments."
+        )
+
+    paths = [_CACHE_PATH]
+    if os.path.exists(_BSE_CACHE_PATH):
+        paths.append(_BSE_CACHE_PATH)
+
+    stamp = _source_stamp(paths)
+    catalogue = ContractCatalogue.load(_CATALOGUE_PATH, stamp)
+    if catalogue is None:
+        catalogue = ContractCatalogue.from_options(*_parse_csvs(paths))
+        catalogue.save(_CATALOGUE_PATH, stamp)
+
+    _catalogue = catalogue
+    _symbol_to_name = catalogue.sym_to_name
+    return catalogue
+
+
+def _load_cache() -> dict[str, dict]:
+    """Return every F&O option row keyed by tradingsymbol.
+
+    Only the whole-table walks need this; per-contract lookups go through
+    ``_load_catalogue`` and never materialize it.
+    """
+    global _options_cache
+    if _options_cache:
+        return _options_cache
+    _options_cache = _load_catalogue().options()
     return _options_cache
 
 
@@ -222,14 +476,9 @@ def list_fno_underlyings() -> list[dict]:
 
 def list_expiries(underlying: str) -> list[str]:
     """Return sorted unique expiry dates (YYYY-MM-DD) available for an underlying."""
-    cache = _load_cache()
+    catalogue = _load_catalogue()
     resolved = _resolve_symbol(underlying.upper())
-    expiries = {
-        data.get("expiry")
-        for data in cache.values()
-        if data.get("name") == resolved and data.get("expiry")
-    }
-    return sorted(expiries)
+    return sorted(catalogue.groups.get(resolved, {}))
 
 
 def list_strikes(
@@ -238,33 +487,52 @@ def list_strikes(
     option_type: str | None = None,
 ) -> list[float]:
     """Return sorted unique strikes for an underlying + expiry (+ optional CE/PE)."""
-    cache = _load_cache()
+    catalogue = _load_catalogue()
     resolved = _resolve_symbol(underlying.upper())
-
-    expiry_normalized = expiry
-    if "-" in expiry:
-        try:
-            dt = datetime.strptime(expiry, "%Y-%m-%d")
-            expiry_normalized = dt.strftime("%d%b%y").upper()
-        except ValueError:
-            pass
-
     opt_type = option_type.upper() if option_type else None
+    keys = _matching_expiries(catalogue.groups.get(resolved, {}), expiry)
+    if len(keys) == 1:
+        return list(catalogue.chain(resolved, keys[0]).strikes_for(opt_type))
     strikes: set[float] = set()
-    for data in cache.values():
-        if data.get("name") != resolved:
-            continue
-        if opt_type and data.get("option_type") != opt_type:
-            continue
-        cache_expiry = data.get("expiry", "") or ""
-        if expiry not in cache_expiry and expiry_normalized not in cache_expiry:
-            continue
-        strike_val = data.get("strike")
-        if strike_val:
-            strikes.add(float(strike_val))
+    for key in keys:
+        strikes.update(catalogue.chain(resolved, key).strikes_for(opt_type))
     return sorted(strikes)
 
 
+def nearest_strike(
+    underlying: str,
+    expiry: str,
+    price: float,
+    option_type: str | None = None,
+) -> float | None:
+    """Return the listed strike closest to ``price`` (the ATM strike), or None.
+
+    Ties go to the lower strike, matching ``min(strikes, key=abs distance)``.
+    """
+    strikes = list_strikes(underlying, expiry, option_type)
+    if not strikes:
+        return None
+    i = bisect_left(strikes, price)
+    if i == 0:
+        return strikes[0]
+    if i == len(strikes):
+        return strikes[-1]
+    lo, hi = strikes[i - 1], strikes[i]
+    return lo if price - lo <= hi - price else hi
+
+
+def strikes_between(
+    underlying: str,
+    expiry: str,
+    low: float,
+    high: float,
+    option_type: str | None = None,
+) -> list[float]:
+    """Return listed strikes in ``[low, high]``, sorted."""
+    strikes = list_strikes(underlying, expiry, option_type)
+    return strikes[bisect_left(strikes, low):bisect_right(strikes, high)]
+
+
 def resolve_option_instrument(
     underlying: str,
     expiry: str,
@@ -285,7 +553,7 @@ def resolve_option_instrument(
     Raises:
         ValueError: If no matching instrument found.
     """
-    cache = _load_cache()
+    catalogue = _load_catalogue()
     underlying = underlying.upper()
     resolved_name = _resolve_symbol(underlying)
     opt_type = option_type.upper()
@@ -297,28 +565,22 @@ def resolve_option_instrument(
         expiry_normalized = dt.strftime("%d%b%y").upper()
 
     # Primary search: match by name, strike, option_type, and expiry
+    for key in _matching_expiries(catalogue.groups.get(resolved_name, {}), expiry):
+        data = catalogue.chain(resolved_name, key).get(strike, opt_type)
+        if data is not None:
+            return data
+
+    # Fallback: fuzzy match on tradingsymbol endings
     matching = []
-    for data in cache.values():
+    for ts, data in _load_cache().items():
         if (
-            data["name"] == resolved_name
-            and data["strike"] == strike
-            and data["option_type"] == opt_type
+            ts.startswith(underlying)
+            and ts.endswith(f"{int(strike)}{opt_type}")
         ):
             cache_expiry = data.get("expiry", "")
-            if expiry_normalized in cache_expiry or expiry in cache_expiry:
+            if expiry in cache_expiry or expiry_normalized[-4:] in ts:
                 matching.append(data)
 
-    # Fallback: fuzzy match on tradingsymbol endings
-    if not matching:
-        for ts, data in cache.items():
-            if (
-                ts.startswith(underlying)
-                and ts.endswith(f"{int(strike)}{opt_type}")
-            ):
-                cache_expiry = data.get("expiry", "")
-                if expiry in cache_expiry or expiry_normalized[-4:] in ts:
-                    matching.append(data)
-
     if not matching:
         raise ValueError(
             f"No instrument found for {underlying} {expiry} {strike} {opt_type}. "
@@ -0,0 +1,142 @@
+"""Tests for backtesting.candle_frame.CandleFrame.
+
+Engines used to re-parse every candle timestamp on every run; they now accept
+a CandleFrame built once at fetch time. The frame must sort and derive IST
+session columns correctly, and every engine entry point must give identical
+results for a frame and for the equivalent list of dicts.
+"""
+from __future__ import annotations
+
+import random
+from datetime import date, datetime, time as dtime, timedelta, timezone
+
+import numpy as np
+
+from backtesting.candle_frame import CandleFrame
+from backtesting.engine import BacktestEngine
+from backtesting.htf_trend import compute_daily_trend
+from backtesting.scalp_equity import run_scalp_equity_backtest
+from backtesting.sweep import compute_split_date
+from monitor.indicator_series import compute_indicator_series
+from monitor.scalp_models import ScalpSessionConfig, SessionMode
+from services.upstox_client import OHLCVColumns
+from strategies.templates import RuleSpec
+
+IST = timezone(timedelta(hours=5, minutes=30))
+
+
+def _session_candles(days: int = 4, bars: int = 25, seed: int = 7) -> list[dict]:
+    rng = random.Random(seed)
+    out: list[dict] = []
+    price = 100.0
+    for d in range(days):
+        start = datetime(2026, 4, 20 + d, 9, 15, tzinfo=IST)
+        for i in range(bars):
+            o = price
+            price = max(1.0, price + rng.uniform(-1.5, 1.5))
+            out.append({
+                "timestamp": (start + timedelta(minutes=15 * i)).isoformat(),
+                "open": o, "high": max(o, price) + 0.5, "low": min(o, price) - 0.5,
+                "close": price, "volume": rng.randint(100, 1000),
+            })
+    return out
+
+
+def _scalp_config() -> ScalpSessionConfig:
+    return ScalpSessionConfig(
+        name="frame", session_mode=SessionMode.EQUITY_INTRADAY.value, underlying="TEST",
+        indicator_timeframe="15m", primary_indicator="ema_crossover",
+        primary_params={"fast": 3, "slow": 5}, squareoff_time="15:09",
+        max_trades=5, cooldown_seconds=0, quantity=10, trail_percent=1.0,
+    )
+
+
+def test_sorted_columns_and_ist_session_days():
+    candles = _session_candles(days=3, bars=4)
+    shuffled = candles[::-1]
+    frame = CandleFrame.from_candles(shuffled)
+
+    assert [c["timestamp"] for c in frame] == [c["timestamp"] for c in candles]
+    assert frame[0] is candles[0]  # caller's dicts, not copies
+    assert frame.ts_ns.dtype == np.int64 and frame.close.dtype == np.float64
+    assert frame.day_offsets.tolist() == [0, 4, 8, 12]
+    assert frame.day_dates == [date(2026, 4, 20), date(2026, 4, 21), date(2026, 4, 22)]
+    assert frame.tod_seconds[:2].tolist() == [9 * 3600 + 15 * 60, 9 * 3600 + 30 * 60]
+    assert frame.datetimes[0] == datetime.fromisoformat(candles[0]["timestamp"])
+    assert frame.naive_datetimes[0] == datetime(2026, 4, 20, 9, 15)
+
+    # Naive timestamps are IST wall clock; other offsets convert to IST.
+    naive = CandleFrame.from_candles([{**candles[0], "timestamp": "2026-04-20 09:15:00"}])
+    utc = CandleFrame.from_candles([{**candles[0], "timestamp": "2026-04-20T03:45:00Z"}])
+    assert naive.ts_ns[0] == utc.ts_ns[0] == frame.ts_ns[0]
+
+    tail = frame[5:]
+    assert len(tail) == 7 and tail.day_offsets.tolist() == [0, 3, 7]
+    assert list(frame.split_days()) == ["2026-04-20", "2026-04-21", "2026-04-22"]
+    assert frame.searchsorted(datetime(2026, 4, 21, 0, 0)) == 4
+
+
+def test_ohlcv_columns_to_frame_matches_dicts():
+    candles = _session_candles(days=2, bars=3)
+    cols = OHLCVColumns(
+        timestamp=[c["timestamp"] for c in candles],
+        open=np.array([c["open"] for c in candles]),
+        high=np.array([c["high"] for c in candles]),
+        low=np.array([c["low"] for c in candles]),
+        close=np.array([c["close"] for c in candles]),
+        volume=np.array([c["volume"] for c in candles], dtype=np.int64),
+    )
+    frame = CandleFrame.from_candles(cols)
+    assert frame.records == cols.to_dicts()
+    assert CandleFrame.from_candles(frame) is frame
+
+
+def test_indicator_series_parity_and_memo():
+    candles = _session_candles()
+    frame = CandleFrame.from_candles(candles)
+    for indicator, params in [("rsi", {"period": 5}), ("ema_crossover", {"fast": 3, "slow": 5}),
+                              ("session_vwap", {})]:
+        expected = compute_indicator_series(indicator, candles, params)
+        assert compute_indicator_series(indicator, frame, params) == expected
+        # Memoized per frame, and the caller's copy can't corrupt the memo.
+        again = compute_indicator_series(indicator, frame, params)
+        again.clear()
+        assert compute_indicator_series(indicator, frame, params) == expected
+
+
+def test_scalp_equity_frame_matches_list():
+    candles = _session_candles()
+    cfg = _scalp_config()
+    from_list = run_scalp_equity_backtest(candles, cfg, symbol="T", interval="15minute",
+                                          warmup_bars=10)
+    from_frame = run_scalp_equity_backtest(CandleFrame.from_candles(candles), cfg,
+                                           symbol="T", interval="15minute", warmup_bars=10)
+    assert from_frame.trades == from_list.trades
+    assert from_frame.session_days == from_list.session_days
+    assert from_frame.squareoff_exits == from_list.squareoff_exits
+    assert from_list.trades and from_list.trades[0].entry_time.tzinfo is not None
+    assert compute_split_date(CandleFrame.from_candles(candles), 10) == \
+        compute_split_date(candles, 10)
+
+
+def test_rule_engine_and_htf_trend_accept_frames():
+    candles = _session_candles(days=1, bars=25)
+    rules = [
+        RuleSpec(name="entry", trigger_type="time", trigger_config={"at": "10:00"},
+                 action_type="place_order", action_config={"transaction_type": "BUY"},
+                 role="entry"),
+        RuleSpec(name="exit", trigger_type="time", trigger_config={"at": "14:00"},
+                 action_type="place_order", action_config={"transaction_type": "SELL"},
+                 role="squareoff"),
+    ]
+    from_list = BacktestEngine(candles, rules, "T").run()
+    from_frame = BacktestEngine(CandleFrame.from_candles(candles), rules, "T").run()
+    assert from_frame.trades == from_list.trades and from_list.trades
+    assert from_frame.trades[0].entry_time.time() == dtime(10, 0)
+    assert from_frame.days == from_list.days == 1
+
+    daily = [{"timestamp": (datetime(2026, 1, 1, tzinfo=IST) + timedelta(days=i)).isoformat(),
+              "close": 100.0 + i, "open": 0, "high": 0, "low": 0, "volume": 0}
+             for i in range(30)]
+    assert compute_daily_trend(CandleFrame.from_candles(daily), "daily_ema20") == \
+        compute_daily_trend(daily, "daily_ema20")
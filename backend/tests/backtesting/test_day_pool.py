@@ -0,0 +1,102 @@
+"""Tests for day-parallel backtests (backtesting/day_pool.py).
+
+Template and F&O backtests now shard their days across a process pool. The
+parallel run must return exactly the sequential output (trades in day order),
+progress must reach the total, and a cancelled run must return the finished
+chronological prefix.
+"""
+from __future__ import annotations
+
+import os
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import backtesting.day_pool as day_pool
+from backtesting.candle_frame import CandleFrame
+from backtesting.fno_engine import run_fno_backtest
+from backtesting.template_days import run_template_days
+from strategies.templates import RuleSpec
+
+IST = timezone(timedelta(hours=5, minutes=30))
+
+
+@pytest.fixture(autouse=True)
+def _always_parallel(monkeypatch):
+    monkeypatch.setattr(day_pool, "BACKTEST_PARALLEL_MIN_DAYS", 0)
+
+
+def _candles(days: int, bars: int = 30, seed: int = 3) -> list[dict]:
+    rng = random.Random(seed)
+    out: list[dict] = []
+    price = 100.0
+    for d in range(days):
+        start = datetime(2026, 3, 2, 9, 15, tzinfo=IST) + timedelta(days=d)
+        for i in range(bars):
+            o = price
+            price = max(1.0, price + rng.uniform(-1.0, 1.0))
+            out.append({
+                "timestamp": (start + timedelta(minutes=5 * i)).isoformat(),
+                "open": o, "high": max(o, price) + 0.3, "low": min(o, price) - 0.3,
+                "close": price, "volume": rng.randint(100, 1000),
+            })
+    return out
+
+
+def _square(n: int) -> tuple:
+    if n >= 20:
+        time.sleep(0.05)  # late days finish well after the first shard
+    return (n * n,)
+
+
+def test_map_days_keeps_day_order_and_reports_progress():
+    progress = []
+    out = day_pool.map_days(_square, [(i,) for i in range(40)], workers=2,
+                            progress_cb=lambda d, t: progress.append((d, t)))
+    assert out == [(i * i,) for i in range(40)]
+    assert progress[-1] == (40, 40)
+    assert [d for d, _ in progress] == sorted(d for d, _ in progress)
+    # Really ran in worker processes, not the sequential fallback.
+    assert os.getpid() not in day_pool.map_days(os.getpid, [()] * 8, workers=2)
+
+
+def test_cancel_returns_chronological_prefix():
+    items = [(i,) for i in range(40)]
+    out = day_pool.map_days(_square, items, workers=2, cancel_check=lambda: True)
+    assert out == [(i * i,) for i in range(len(out))]
+    assert len(out) < len(items)
+
+
+def test_template_days_parallel_matches_sequential():
+    day_groups = CandleFrame.from_candles(_candles(days=12)).split_days()
+    params = {"capital": 100_000, "quantity": 10}
+    sequential = run_template_days("orb", "TEST", day_groups, params, 100_000, workers=1)
+    parallel = run_template_days("orb", "TEST", day_groups, params, 100_000, workers=2)
+    assert sequential and parallel == sequential
+
+
+def test_fno_parallel_matches_sequential():
+    leg_candles = {
+        "NSE_FO|CE_P": _candles(days=10, seed=5),
+        "NSE_FO|PE_P": _candles(days=10, seed=9),
+    }
+    rules = [
+        RuleSpec(name=f"NIFTY {side}", trigger_type="time", trigger_config={"at": "09:30"},
+                 action_type="place_order",
+                 action_config={"transaction_type": "SELL", "quantity": 75,
+                                "instrument_token": f"NSE_FO|{side}_P"},
+                 role=f"entry_{side.lower()}")
+        for side in ("CE", "PE")
+    ]
+    kwargs = dict(leg_candles=leg_candles, rules=rules, strategy_name="straddle",
+                  underlying="NIFTY", initial_capital=200_000)
+    progress = []
+    sequential = run_fno_backtest(**kwargs, workers=1)
+    parallel = run_fno_backtest(**kwargs, workers=2,
+                                progress_cb=lambda d, t: progress.append((d, t)))
+    assert sequential.day_results and parallel.day_results == sequential.day_results
+    assert parallel.metrics == sequential.metrics
+    assert parallel.equity_curve == sequential.equity_curve
+    assert progress[-1] == (10, 10)
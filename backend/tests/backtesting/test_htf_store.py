@@ -0,0 +1,120 @@
+"""Tests for backtesting.htf_store (the persistent daily-trend store).
+
+The broker is a fake serving one daily candle per calendar day up to the
+pinned "today" and recording each ``days`` it was asked for. STORE_DIR is
+repointed at tmp_path so tests never touch the real sweep cache.
+"""
+from __future__ import annotations
+
+import asyncio
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+import backtesting.htf_store as store
+from backtesting.htf_trend import compute_daily_trend
+
+IST = timezone(timedelta(hours=5, minutes=30))
+VARIANTS = ["daily_ema20", "daily_mom3"]
+
+
+def _close(d: date) -> float:
+    return 100.0 + (d.toordinal() % 17) * (1 if d.toordinal() % 5 else -2)
+
+
+class _Broker:
+    def __init__(self):
+        self.today = date(2026, 6, 10)
+        self.calls: list[int] = []
+        self.fail = False
+
+    async def get_historical_data(self, symbol, interval="day", days=10):
+        assert interval == "day"
+        self.calls.append(days)
+        if self.fail:
+            raise RuntimeError("broker down")
+        return [
+            {"timestamp": datetime(d.year, d.month, d.day, 15, 30, tzinfo=IST).isoformat(),
+             "open": _close(d), "high": _close(d), "low": _close(d),
+             "close": _close(d), "volume": 1000}
+            for d in (self.today - timedelta(days=i) for i in range(days - 1, -1, -1))
+        ]
+
+    def expected(self, variant: str, days: int) -> dict[date, str]:
+        return compute_daily_trend(asyncio.run(self.get_historical_data("X", "day", days)), variant)
+
+
+@pytest.fixture
+def broker(monkeypatch, tmp_path):
+    b = _Broker()
+    monkeypatch.setattr(store, "STORE_DIR", tmp_path / "htf")
+    monkeypatch.setattr(store, "_today", lambda: b.today)
+    return b
+
+
+def _trends(broker, variants=VARIANTS, fetch_days=80):
+    return asyncio.run(store.daily_trends(broker, "TEST", variants, fetch_days=fetch_days))
+
+
+def test_first_call_fetches_and_matches_compute_daily_trend(broker):
+    got = _trends(broker)
+    assert broker.calls == [80]
+    for v in VARIANTS:
+        assert got[v] == broker.expected(v, 80)
+    assert (store.STORE_DIR / "TEST.json").exists()
+
+
+def test_same_day_is_served_from_the_store(broker):
+    first = _trends(broker)
+    assert _trends(broker) == first
+    assert broker.calls == [80]
+
+
+def test_next_day_fetches_incrementally(broker):
+    first = _trends(broker)
+    broker.today += timedelta(days=2)
+    got = _trends(broker)
+    assert broker.calls == [80, 2 + store.REFRESH_OVERLAP_DAYS]
+    for v in VARIANTS:
+        # Appended days never change an earlier date's trend
+        assert all(got[v][d] == t for d, t in first[v].items() if d <= date(2026, 6, 10))
+        full = compute_daily_trend(
+            asyncio.run(broker.get_historical_data("X", "day", 82)), v)
+        assert got[v] == full
+
+
+def test_deeper_history_refetches_the_full_range(broker):
+    _trends(broker, fetch_days=40)
+    _trends(broker, fetch_days=80)
+    assert broker.calls == [40, 80]
+    _trends(broker, fetch_days=60)
+    assert broker.calls == [40, 80]
+
+
+def test_new_variant_is_computed_without_a_fetch(broker):
+    _trends(broker, variants=["daily_mom3"])
+    got = _trends(broker, variants=["daily_ema20_50"])
+    assert broker.calls == [80]
+    assert got["daily_ema20_50"] == broker.expected("daily_ema20_50", 80)
+
+
+def test_failed_fetch_falls_back_to_stored_closes(broker):
+    first = _trends(broker)
+    broker.today += timedelta(days=1)
+    broker.fail = True
+    assert _trends(broker) == first
+    assert len(broker.calls) == 2
+
+
+def test_failed_fetch_without_a_store_raises(broker):
+    broker.fail = True
+    with pytest.raises(RuntimeError, match="broker down"):
+        _trends(broker)
+
+
+def test_corrupt_store_is_rebuilt(broker):
+    _trends(broker)
+    (store.STORE_DIR / "TEST.json").write_text("{broken")
+    got = _trends(broker)
+    assert broker.calls == [80, 80]
+    assert got["daily_mom3"] == broker.expected("daily_mom3", 80)
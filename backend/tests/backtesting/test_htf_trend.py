@@ -1,5 +1,6 @@
 """Unit tests for backtesting.htf_trend (daily regime detection, no-lookahead)
-and the engine's ``entry_gate`` hook in run_scalp_equity_backtest.
+and the engine's ``entry_gate`` / ``entry_gate_mask`` hooks in
+run_scalp_equity_backtest.
 
 Synthetic candles only; no network.
 """
@@ -12,6 +13,7 @@ import pytest
 from backtesting.htf_trend import (
     HTF_VARIANTS,
     compute_daily_trend,
+    entry_gate_mask,
     make_entry_gate,
 )
 from backtesting.scalp_equity import run_scalp_equity_backtest
@@ -280,3 +282,55 @@ class TestEngineEntryGate:
             entry_gate=lambda ts, side: False)
         assert r.trades == []
         assert r.entry_gate_blocks > 0
+
+
+# ──────────────────────────────────────────────────────────────────────
+# entry_gate_mask — the callable's decisions, precomputed per bar
+# ──────────────────────────────────────────────────────────────────────
+
+class TestEntryGateMask:
+    def _candles(self):
+        # Four sessions; 06-03 is missing from the map (falls back to 06-02)
+        # and 05-29 precedes it (blocked).
+        days = [datetime(2026, 5, 29, tzinfo=IST)] + [
+            datetime(2026, 6, d, tzinfo=IST) for d in (1, 2, 3)]
+        return [c for d in days for c in _oscillating_day(d, n=20)]
+
+    def test_matches_callable_bar_for_bar(self):
+        trend = {date(2026, 6, 1): "up", date(2026, 6, 2): "down"}
+        candles = self._candles()
+        mask = entry_gate_mask(trend, candles)
+        gate = make_entry_gate(trend)
+        assert len(mask) == len(candles)
+        for i, c in enumerate(candles):
+            ts = datetime.fromisoformat(c["timestamp"])
+            for side in ("long", "short", "both"):
+                assert mask.allows(i, side) == gate(ts, side)
+        assert mask.long.sum() == 20 and mask.short.sum() == 40
+
+    def test_unknown_mode_raises(self):
+        with pytest.raises(ValueError, match="unknown entry-gate mode"):
+            entry_gate_mask({}, self._candles(), mode="contra")
+
+    def test_engine_mask_matches_callable(self):
+        trend = {date(2026, 6, 1): "up", date(2026, 6, 2): "down", date(2026, 6, 3): "flat"}
+        candles = self._candles()
+        cfg = _gate_test_config()
+        for warmup in (0, 25):
+            by_fn = run_scalp_equity_backtest(
+                candles, cfg, symbol="TEST", interval="5minute", warmup_bars=warmup,
+                entry_gate=make_entry_gate(trend))
+            by_mask = run_scalp_equity_backtest(
+                candles, cfg, symbol="TEST", interval="5minute", warmup_bars=warmup,
+                entry_gate_mask=entry_gate_mask(trend, candles))
+            assert by_mask.trades, "vacuous: the gate let nothing through"
+            assert [(t.side, t.entry_time, t.pnl) for t in by_mask.trades] == \
+                   [(t.side, t.entry_time, t.pnl) for t in by_fn.trades]
+            assert by_mask.entry_gate_blocks == by_fn.entry_gate_blocks > 0
+
+    def test_engine_rejects_misaligned_mask(self):
+        candles = self._candles()
+        mask = entry_gate_mask({}, candles).prefix(10)
+        with pytest.raises(ValueError, match="entry_gate_mask has 10 bars"):
+            run_scalp_equity_backtest(candles, _gate_test_config(), symbol="TEST",
+                                      interval="5minute", entry_gate_mask=mask)
@@ -0,0 +1,132 @@
+"""Tests for the multi-symbol portfolio backtest (backtesting/portfolio.py).
+
+Symbols run as independent signal streams, then one allocator replays them on
+a shared clock. With no binding limit the portfolio must take every candidate
+trade; each limit (positions, margin, daily loss) must block entries the way
+it says; the NumPy equity/drawdown/daily reductions must match a plain walk
+over the trades; and the per-symbol runs give the same answer in the pool.
+"""
+from __future__ import annotations
+
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import backtesting.day_pool as day_pool
+from backtesting.candle_frame import CandleFrame
+from backtesting.portfolio import PortfolioLimits, PortfolioSymbol, run_portfolio_backtest
+from backtesting.scalp_equity import run_scalp_equity_backtest
+from monitor.scalp_models import ScalpSessionConfig, SessionMode
+
+IST = timezone(timedelta(hours=5, minutes=30))
+
+
+def _candles(seed: int, days: int = 5, bars: int = 70) -> list[dict]:
+    rng = random.Random(seed)
+    out: list[dict] = []
+    price = 100.0 + seed
+    for d in range(days):
+        start = datetime(2026, 4, 6, 9, 15, tzinfo=IST) + timedelta(days=d)
+        for i in range(bars):
+            o = price
+            price = max(1.0, price + rng.uniform(-1.2, 1.2))
+            out.append({
+                "timestamp": (start + timedelta(minutes=5 * i)).isoformat(),
+                "open": o, "high": max(o, price) + 0.4, "low": min(o, price) - 0.4,
+                "close": price, "volume": rng.randint(100, 1000),
+            })
+    return out
+
+
+def _symbols(n: int = 4) -> list[PortfolioSymbol]:
+    out = []
+    for k in range(n):
+        cfg = ScalpSessionConfig(
+            name=f"p{k}", session_mode=SessionMode.EQUITY_INTRADAY.value, underlying=f"S{k}",
+            indicator_timeframe="5m", primary_indicator="ema_crossover",
+            primary_params={"fast": 3, "slow": 8}, squareoff_time="15:15",
+            max_trades=6, cooldown_seconds=0, quantity=10,
+        )
+        out.append(PortfolioSymbol(symbol=f"S{k}", candles=CandleFrame.from_candles(_candles(k)),
+                                   config=cfg, interval="5minute"))
+    return out
+
+
+def _overlap_peak(trades) -> int:
+    events = sorted([(t.entry_time, 1) for t in trades] + [(t.exit_time, -1) for t in trades],
+                    key=lambda e: (e[0], e[1]))
+    live = peak = 0
+    for _, step in events:
+        live += step
+        peak = max(peak, live)
+    return peak
+
+
+def test_unconstrained_portfolio_takes_every_candidate():
+    syms = _symbols()
+    result = run_portfolio_backtest(syms, PortfolioLimits(capital=10_000_000, max_positions=100),
+                                    workers=1)
+    streams = [run_scalp_equity_backtest(s.candles, s.config, symbol=s.symbol,
+                                         interval=s.interval).trades for s in syms]
+    assert result.candidate_trades == sum(len(s) for s in streams) > 0
+    assert len(result.trades) == result.candidate_trades
+    assert result.max_positions_blocks == result.margin_blocks == result.daily_loss_blocks == 0
+    assert {k: v["taken"] for k, v in result.per_symbol.items()} == \
+        {s.symbol: len(t) for s, t in zip(syms, streams)}
+
+    # Vectorized curves match a plain walk over the exit-ordered trades.
+    equity, peak, dd = [10_000_000.0], 10_000_000.0, [0.0]
+    for t in result.trades:
+        equity.append(equity[-1] + t.pnl)
+        peak = max(peak, equity[-1])
+        dd.append((peak - equity[-1]) / peak * 100)
+    assert result.equity_curve == pytest.approx(equity, abs=0.01)
+    assert result.drawdown_pct == pytest.approx(dd, abs=0.01)
+    assert sum(d["net_pnl"] for d in result.daily) == pytest.approx(sum(t.pnl for t in result.trades),
+                                                                    abs=0.05)
+    assert result.daily[-1]["equity"] == pytest.approx(equity[-1], abs=0.01)
+
+
+def test_max_positions_and_margin_limits_block_entries():
+    syms = _symbols()
+    one = run_portfolio_backtest(syms, PortfolioLimits(capital=10_000_000, max_positions=1),
+                                 workers=1)
+    assert one.max_positions_blocks > 0 and one.peak_positions == 1
+    assert _overlap_peak(one.trades) == 1
+
+    # ~₹1,000-1,050 notional per position: ₹2,500 cash fits two at a time.
+    tight = run_portfolio_backtest(syms, PortfolioLimits(capital=2_500, max_positions=10),
+                                   workers=1)
+    assert tight.margin_blocks > 0 and tight.peak_positions <= 2
+    assert tight.peak_margin_used <= 2_500 + max(0.0, tight.metrics["net_pnl"])
+
+    # 20% margin (5x leverage) lets the same cash carry more positions.
+    levered = run_portfolio_backtest(
+        syms, PortfolioLimits(capital=2_500, max_positions=10, margin_pct=20), workers=1)
+    assert len(levered.trades) > len(tight.trades)
+
+
+def test_daily_loss_cap_stops_new_entries_for_the_day():
+    syms = _symbols()
+    result = run_portfolio_backtest(
+        syms, PortfolioLimits(capital=10_000_000, max_positions=100, daily_loss_cap=1.0),
+        workers=1)
+    assert result.daily_loss_blocks > 0
+    # Once a day's realised P&L is at/below the cap, nothing enters later that day.
+    by_exit = sorted(result.trades, key=lambda t: t.exit_time)
+    for t in result.trades:
+        realised = sum(x.pnl for x in by_exit
+                       if x.exit_time <= t.entry_time and x.exit_time.date() == t.entry_time.date())
+        assert realised > -1.0
+
+
+def test_parallel_symbol_streams_match_sequential(monkeypatch):
+    monkeypatch.setattr(day_pool, "BACKTEST_PARALLEL_MIN_DAYS", 0)
+    syms = _symbols()
+    limits = PortfolioLimits(capital=5_000, max_positions=3, daily_loss_cap=50.0)
+    sequential = run_portfolio_backtest(syms, limits, workers=1)
+    parallel = run_portfolio_backtest(syms, limits, workers=2)
+    assert parallel.trades == sequential.trades
+    assert parallel.equity_curve == sequential.equity_curve
+    assert parallel.daily == sequential.daily
@@ -17,6 +17,7 @@ from backtesting.ranking import (
     combo_score,
     confidence_label,
     day_consistency,
+    early_abort_check,
     gate_summary,
     plateau_flags,
     split_trades,
@@ -260,6 +261,47 @@ class TestGateCategorization:
         assert gate_summary([]) == {}
 
 
+# ──────────────────────────────────────────────────────────────────────
+# Layer 1b — early abort
+# ──────────────────────────────────────────────────────────────────────
+
+class TestEarlyAbortCheck:
+    def test_passable_combo_keeps_running(self):
+        check = early_abort_check(min_trades=10, max_trades_per_day=3, daily_loss_cap=5000)
+        trades = [_trade(20.0, day=9, mm=i) for i in range(2)]
+        assert check(trades, 3) is None          # 2 + 3 days × 3 = 11 ≥ 10
+
+    def test_unreachable_min_trades_aborts(self):
+        check = early_abort_check(min_trades=10, max_trades_per_day=3)
+        trades = [_trade(20.0, day=9, mm=i) for i in range(2)]
+        reason = check(trades, 2)                # 2 + 2 × 3 = 8 < 10
+        assert reason and "cannot reach 10 trades" in reason
+        assert categorize_gate_reason(f"early abort: {reason}") == "early_abort"
+
+    def test_no_per_day_cap_never_aborts_on_min_trades(self):
+        check = early_abort_check(min_trades=10, max_trades_per_day=None)
+        assert check([], 1) is None
+
+    def test_breached_day_aborts_and_stays_aborted(self):
+        check = early_abort_check(min_trades=1, max_trades_per_day=3, daily_loss_cap=1000)
+        day9 = [_trade(-600.0, day=9, mm=0, exit_reason="sl"),
+                _trade(-500.0, day=9, mm=30, exit_reason="sl")]
+        assert "2026-06-09" in check(day9, 5)
+        # Later winners can't un-fail the gate.
+        more = day9 + [_trade(5000.0, day=10)]
+        assert check(more, 4) is not None
+        reasons = apply_gates(more, compute_metrics(more, 100_000), min_trades=1,
+                              daily_loss_cap=1000)
+        assert any(categorize_gate_reason(r) == "daily_loss_cap" for r in reasons)
+
+    def test_tstat_floor_waits_for_min_trades(self):
+        check = early_abort_check(min_trades=4, max_trades_per_day=None, tstat_floor=0.0)
+        losers = [_trade(-10.0 - i, day=9, mm=i, exit_reason="sl") for i in range(3)]
+        assert check(losers, 10) is None         # only 3 trades — no t-stat yet
+        losers.append(_trade(-20.0, day=10, exit_reason="sl"))
+        assert "running t-stat" in check(losers, 9)
+
+
 # ──────────────────────────────────────────────────────────────────────
 # Layer 3 — split + validate
 # ──────────────────────────────────────────────────────────────────────
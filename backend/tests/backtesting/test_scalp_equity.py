@@ -376,6 +376,39 @@ class TestMaxTrades:
         assert r.max_trades_blocks >= 0  # sanity — counter exists
 
 
+# ──────────────────────────────────────────────────────────────────────
+# Early-abort hook
+# ──────────────────────────────────────────────────────────────────────
+
+class TestEarlyAbortHook:
+    def _days(self, n: int) -> list[dict]:
+        bars: list[dict] = []
+        for d in range(n):
+            start = _ist(2026, 4, 20 + d)
+            bars += _flat_series(10, 100.0, start)
+            bars += _uptrend(10, 100.0, 0.5, start + timedelta(minutes=50))
+            bars += _downtrend(10, 105.0, 0.5, start + timedelta(minutes=100))
+        return bars
+
+    def test_called_between_sessions_and_stops_the_replay(self):
+        bars = self._days(4)
+        cfg = _base_config()
+        full = run_scalp_equity_backtest(bars, cfg, symbol="TEST", interval="5minute")
+        calls = []
+
+        def hook(trades, days_left):
+            calls.append((len(trades), days_left))
+            return "enough" if days_left == 2 else None
+
+        r = run_scalp_equity_backtest(bars, cfg, symbol="TEST", interval="5minute",
+                                      early_abort=hook)
+        assert [d for _, d in calls] == [3, 2]
+        assert r.early_abort_reason == "enough"
+        assert r.bars_saved == 60                      # days 3 and 4 unreplayed
+        assert [t.pnl for t in r.trades] == [t.pnl for t in full.trades[:len(r.trades)]]
+        assert full.early_abort_reason is None and full.bars_saved == 0
+
+
 # ──────────────────────────────────────────────────────────────────────
 # Test 9: cooldown
 # ──────────────────────────────────────────────────────────────────────
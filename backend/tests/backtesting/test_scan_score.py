@@ -0,0 +1,159 @@
+"""Tests for the vectorized scan-score backtest (backtesting/scan_score.py).
+
+``score_symbol`` scores every (day, eval time) of a symbol in one NumPy pass.
+Each row must match what nf-morning-scan's own scalar functions give when fed
+the bars closed before T — the per-(day, T) loop the script used to run — and
+the pooled run must return the same rows as the in-process one.
+"""
+from __future__ import annotations
+
+import importlib.util
+import math
+import os
+import sys
+from datetime import datetime, timedelta
+from importlib.machinery import SourceFileLoader
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import backtesting.day_pool as day_pool
+from backtesting.candle_frame import CandleFrame
+from backtesting.scan_score import EVAL_TIMES, FIRST30_END, IndexSeries, score_symbol
+from models.analysis import OHLCVData
+
+_CLI = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                    "cli-tools", "nf-morning-scan")
+
+
+@pytest.fixture(scope="module")
+def cli():
+    cli_dir = os.path.dirname(_CLI)
+    if cli_dir not in sys.path:
+        sys.path.insert(0, cli_dir)
+    loader = SourceFileLoader("nf_morning_scan", _CLI)
+    spec = importlib.util.spec_from_loader("nf_morning_scan", loader)
+    mod = importlib.util.module_from_spec(spec)
+    loader.exec_module(mod)
+    return mod
+
+
+def _series(seed: int, n_days: int = 11, base: float = 100.0) -> list[OHLCVData]:
+    """15-min bars with gaps, the odd missing/zero-volume bar and one short day."""
+    rng = np.random.default_rng(seed)
+    out, price = [], base + seed
+    day = datetime(2026, 6, 1)
+    for d in range(n_days):
+        bars = 4 if d == 5 else 25                       # a half session
+        price *= 1 + rng.normal(0, 0.01)                 # overnight gap
+        for k in range(bars):
+            if rng.random() < 0.05:
+                continue
+            o = price
+            price = max(1.0, price * (1 + rng.normal(0, 0.004)))
+            ts = day + timedelta(days=d, hours=9, minutes=15 + 15 * k)
+            vol = 0 if rng.random() < 0.03 else int(rng.integers(1_000, 50_000))
+            out.append(OHLCVData(timestamp=ts.strftime("%Y-%m-%dT%H:%M:00+05:30"), open=o,
+                                 high=max(o, price) * 1.001, low=min(o, price) * 0.999,
+                                 close=price, volume=vol))
+    return out
+
+
+def _naive(c) -> datetime:
+    return datetime.fromisoformat(c.timestamp).replace(tzinfo=None)
+
+
+def _reference(cli, symbol, candles, index_candles, horizon, test_days) -> list[dict]:
+    """The scalar per-(day, T) evaluation, built from the CLI's own functions."""
+    idx_by_date: dict = {}
+    for c in index_candles:
+        idx_by_date.setdefault(_naive(c).date(), []).append(c)
+    idx_dates = sorted(idx_by_date)
+
+    def idx_close_before(d, moment):
+        bars = [c.close for c in idx_by_date.get(d, []) if _naive(c) < moment]
+        return bars[-1] if bars else None
+
+    by_date: dict = {}
+    for c in candles:
+        by_date.setdefault(_naive(c).date(), []).append(c)
+    dates = sorted(by_date)
+    target = dates[-test_days:] if test_days < len(dates) else dates[1:]
+    rows = []
+    for d in target:
+        day = by_date[d]
+        prior = [x for x in dates if x < d]
+        if len(day) < 6 or not prior:
+            continue
+        prev_close, today_open = by_date[prior[-1]][-1].close, day[0].open
+        f30_dt = datetime.combine(d, FIRST30_END)
+        f30 = [c for c in day if _naive(c) < f30_dt]
+        first30 = (f30[-1].close - today_open) / today_open * 100 if f30 and today_open else None
+        k = idx_dates.index(d) if d in idx_dates else -1
+        idx_prev = idx_by_date[idx_dates[k - 1]][-1].close if k > 0 else None
+        for T in EVAL_TIMES:
+            eval_dt = datetime.combine(d, T)
+            today_T = [c for c in day if _naive(c) < eval_dt]
+            up_to_T = [c for c in candles if _naive(c) < eval_dt]
+            if not today_T or prev_close <= 0:
+                continue
+            ltp = today_T[-1].close
+            stock_pct = (ltp - prev_close) / prev_close * 100
+            if stock_pct == 0:
+                continue
+            idx_now = idx_close_before(d, eval_dt)
+            nifty_pct = (idx_now - idx_prev) / idx_prev * 100 if idx_prev and idx_now else 0.0
+            gap = cli.compute_gap({"open": today_open, "close": prev_close})
+            rel = cli.compute_relative_strength(stock_pct, nifty_pct)
+            rsi = cli.compute_rsi(up_to_T)
+            vwap = cli.compute_vwap(today_T)
+            rvol = cli.compute_rvol_t(today_T, up_to_T)
+            volx = cli.compute_volume_expansion(today_T, up_to_T)
+            p1 = cli.phase1_score(gap, rel, stock_pct)
+            p2 = cli.phase2_score(rsi, vwap, ltp, rvol, volx)
+            fwd_dt = eval_dt + timedelta(minutes=horizon)
+            fwd_close = [c for c in day if _naive(c) < fwd_dt][-1].close
+            raw = (fwd_close - ltp) / ltp * 100
+            idx_fwd = idx_close_before(d, fwd_dt)
+            nifty_fwd = (idx_fwd - idx_now) / idx_now * 100 if idx_now and idx_fwd else 0.0
+            rows.append({
+                "symbol": symbol, "date": str(d), "eval_time": T.strftime("%H:%M"),
+                "score": p1 + p2, "p1": p1, "p2": p2, "gap_abs": abs(gap),
+                "rel_strength": abs(rel), "rsi": math.nan if rsi is None else rsi,
+                "above_vwap": 1 if (vwap and ltp > vwap) else 0,
+                "rvol": (rvol if rvol is not None else volx) or math.nan,
+                "first30": first30 if first30 is not None and eval_dt >= f30_dt else math.nan,
+                "alpha_fwd": raw - nifty_fwd, "raw_fwd": raw,
+            })
+    return rows
+
+
+@pytest.fixture(scope="module")
+def market():
+    index = _series(99, base=24_000.0)
+    index = [c for c in index if not c.timestamp.startswith("2026-06-09")]   # index gap day
+    return index, {f"S{i}": _series(i) for i in range(3)}
+
+
+@pytest.mark.parametrize("horizon,test_days", [(90, 8), (30, 40)])
+def test_rows_match_cli_scalar_scoring(cli, market, horizon, test_days):
+    index_candles, symbols = market
+    index = IndexSeries.from_frame(CandleFrame.from_candles(index_candles))
+    for sym, candles in symbols.items():
+        got = score_symbol(sym, CandleFrame.from_candles(candles), index, horizon, test_days)
+        expected = pd.DataFrame(_reference(cli, sym, candles, index_candles, horizon, test_days))
+        assert len(expected) > 0
+        pd.testing.assert_frame_equal(got, expected[got.columns], check_dtype=False,
+                                      rtol=1e-9, atol=1e-9)
+
+
+def test_pooled_scoring_matches_in_process(monkeypatch, market):
+    monkeypatch.setattr(day_pool, "BACKTEST_PARALLEL_MIN_DAYS", 0)
+    index_candles, symbols = market
+    index = IndexSeries.from_frame(CandleFrame.from_candles(index_candles))
+    jobs = [(s, CandleFrame.from_candles(c), index, 90, 8) for s, c in symbols.items()]
+    sequential = day_pool.map_days(score_symbol, jobs, workers=1)
+    pooled = day_pool.map_days(score_symbol, jobs, workers=2)
+    for a, b in zip(sequential, pooled):
+        pd.testing.assert_frame_equal(a, b)
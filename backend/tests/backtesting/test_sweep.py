@@ -3,16 +3,27 @@ and an end-to-end run_combo on SYNTHETIC candles (no network).
 """
 from __future__ import annotations
 
+import asyncio
 from datetime import datetime, timedelta, timezone
 
 import pytest
 
+import backtesting.sweep as sweep
+from backtesting.candle_frame import CandleFrame
+from backtesting.portfolio import PortfolioLimits, PortfolioSymbol, run_portfolio_backtest
+from backtesting.ranking import categorize_gate_reason
 from backtesting.sweep import (
     _combo_fingerprint,
+    _leading_days,
+    _train_day_count,
     assemble_symbol,
     compute_split_date,
     expand_grid,
+    halving_cost,
+    halving_schedule,
     run_combo,
+    stream_sweep,
+    sweep_symbol,
 )
 
 IST = timezone(timedelta(hours=5, minutes=30))
@@ -443,3 +454,360 @@ class TestRunComboHtfGate:
         assert gated["entry_gate_blocks"] == 0
         assert ungated["htf_gate"] is None
         assert ungated["entry_gate_blocks"] == 0
+
+
+# ──────────────────────────────────────────────────────────────────────
+# Early abort — run_combo stops hopeless combos, gate outcome unchanged
+# ──────────────────────────────────────────────────────────────────────
+
+class TestEarlyAbort:
+    _COMBO = {"primary": "ema_crossover", "confirm": None, "interval": "5minute",
+              "entry_side": "long", "trail_percent": 1.0,
+              "sl_points": None, "target_points": None}
+
+    def test_unreachable_min_trades_stops_and_stays_gated(self):
+        candles, warmup = _build_candles(n_days=20)
+        full = run_combo(candles, warmup, "TEST", self._COMBO, quantity=10, min_trades=40)
+        cut = run_combo(candles, warmup, "TEST", self._COMBO, quantity=10, min_trades=40,
+                        early_abort=True)
+        assert full["gated"] and cut["gated"]
+        assert full["bars_saved"] == 0
+        assert cut["bars_saved"] > 0
+        assert cut["bars_replayed"] + cut["bars_saved"] == full["bars_replayed"]
+        assert cut["total_trades"] < full["total_trades"]
+        assert cut["gate_reasons"][-1].startswith("early abort: cannot reach 40 trades")
+
+    def test_passable_gates_replay_every_bar(self):
+        candles, warmup = _build_candles()
+        plain = run_combo(candles, warmup, "TEST", self._COMBO, quantity=10, min_trades=1)
+        hooked = run_combo(candles, warmup, "TEST", self._COMBO, quantity=10, min_trades=1,
+                           early_abort=True)
+        assert hooked == plain
+
+    def test_tstat_floor_implies_early_abort(self):
+        candles, warmup = _build_candles(n_days=20)
+        row = run_combo(candles, warmup, "TEST", self._COMBO, quantity=10, min_trades=3,
+                        abort_tstat_floor=5.0)
+        assert row["bars_saved"] > 0
+        assert "running t-stat" in row["gate_reasons"][-1]
+
+    def test_abort_config_changes_fingerprint(self):
+        sizing = {"quantity": 10, "days": 15}
+        fp = _combo_fingerprint(self._COMBO, sizing, "2026-06-10")
+        fp_abort = _combo_fingerprint(
+            self._COMBO, {**sizing, "early_abort": {"tstat_floor": None}}, "2026-06-10")
+        assert fp != fp_abort
+
+
+# ──────────────────────────────────────────────────────────────────────
+# Streaming — rows arrive as combos finish, across symbols
+# ──────────────────────────────────────────────────────────────────────
+
+class TestStreamSweep:
+    _COMBOS = expand_grid(["ema_crossover", "macd"], None, ["5minute"],
+                          [{"trail_percent": 1.0, "sl_points": None, "target_points": None}],
+                          ["long"])
+
+    def _kwargs(self, **over):
+        kw = dict(days=5, quantity=10, capital_per_trade=10_000, squareoff="15:15",
+                  max_trades=3, cooldown=0, slippage_bps=5.0, min_trades=1,
+                  max_single_trade_share=0.5, daily_loss_cap=None,
+                  sem=asyncio.Semaphore(4), use_cache=False, cache_ttl_hours=1.0,
+                  scan_date="2026-06-10")
+        kw.update(over)
+        return kw
+
+    @pytest.fixture
+    def fetch(self, monkeypatch):
+        candles, warmup = _build_candles()
+        gates: dict[str, asyncio.Event] = {}
+
+        async def fake_fetch(client, symbol, interval, days, end_offset_days=0):
+            if symbol == "EMPTY":
+                return [], 0
+            if symbol in gates:
+                await gates[symbol].wait()
+            return candles, warmup
+
+        monkeypatch.setattr(sweep, "fetch_candles_with_warmup", fake_fetch)
+        return gates
+
+    def test_events_match_sweep_symbol(self, fetch):
+        async def go():
+            events = [e async for e in stream_sweep(None, ["A", "EMPTY"], self._COMBOS,
+                                                    **self._kwargs())]
+            collected = await sweep_symbol(None, "A", self._COMBOS, **self._kwargs())
+            empty = await sweep_symbol(None, "EMPTY", self._COMBOS, **self._kwargs())
+            return events, collected, empty
+
+        events, collected, empty = asyncio.run(go())
+        rows = [e["row"] for e in events if e["type"] == "row"]
+        done = {e["symbol"]: e for e in events if e["type"] == "symbol_done"}
+        assert rows == collected["rows"] and len(rows) == len(self._COMBOS)
+        assert done["A"]["rows"] == 2 and done["A"]["fetched"]
+        assert done["EMPTY"] == {"type": "symbol_done", "symbol": "EMPTY",
+                                 "rows": 0, "fetched": False}
+        assert empty is None
+        assert events.index(done["A"]) > max(i for i, e in enumerate(events) if e["type"] == "row")
+
+    def test_symbol_failing_mid_sweep_is_not_fetched(self, fetch, monkeypatch):
+        real = sweep.stream_symbol
+
+        async def flaky(client, symbol, combos, **kwargs):
+            async for event in real(client, symbol, combos, **kwargs):
+                yield event
+                if symbol == "BOOM" and event["type"] == "row":
+                    raise RuntimeError("broker down")
+
+        monkeypatch.setattr(sweep, "stream_symbol", flaky)
+
+        async def go():
+            return [e async for e in stream_sweep(None, ["A", "BOOM"], self._COMBOS,
+                                                  **self._kwargs())]
+
+        events = asyncio.run(go())
+        done = {e["symbol"]: e for e in events if e["type"] == "symbol_done"}
+        assert done["A"]["fetched"]
+        assert done["BOOM"] == {"type": "symbol_done", "symbol": "BOOM", "rows": 1,
+                                "fetched": False, "error": "broker down"}
+
+    def test_rows_stream_before_slow_symbols_finish(self, fetch):
+        fetch["SLOW"] = asyncio.Event()
+
+        async def go():
+            seen = []
+            async for e in stream_sweep(None, ["SLOW", "FAST"], self._COMBOS, **self._kwargs()):
+                seen.append((e["type"], e["symbol"]))
+                if e["symbol"] == "FAST":
+                    fetch["SLOW"].set()        # SLOW only starts once FAST has streamed
+            return seen
+
+        seen = asyncio.run(asyncio.wait_for(go(), timeout=30))
+        assert seen[0] == ("row", "FAST")
+        assert seen[-1] == ("symbol_done", "SLOW")
+
+
+# ──────────────────────────────────────────────────────────────────────
+# Successive halving — rungs on train days, survivors get the full run
+# ──────────────────────────────────────────────────────────────────────
+
+class TestSuccessiveHalving:
+    _EV = [{"trail_percent": t, "sl_points": sl, "target_points": None}
+           for t in (0.5, 1.0, 1.5) for sl in (None, 2.0)]
+    _KW = dict(days=30, quantity=10, capital_per_trade=10_000, squareoff="15:15",
+               max_trades=3, cooldown=0, slippage_bps=5.0, min_trades=3,
+               max_single_trade_share=0.5, daily_loss_cap=None,
+               use_cache=False, cache_ttl_hours=1.0, scan_date="2026-06-10")
+
+    def test_schedule_and_cost(self):
+        assert halving_schedule(18, eta=3, min_days=3) == [3, 9]
+        assert halving_schedule(27, eta=3, min_days=3) == [3, 9]
+        assert halving_schedule(28, eta=2, min_days=4) == [4, 8, 16]
+        assert halving_schedule(3, eta=3, min_days=3) == []
+        # 90 combos over 28 days: 90·3/28 + 30·9/28 + 10 full runs
+        assert halving_cost(90, 28) == pytest.approx(90 * 3 / 28 + 30 * 9 / 28 + 10)
+        assert halving_cost(90, 3) == 90
+
+    def test_rungs_only_see_train_days(self):
+        candles, warmup = _build_candles(n_days=30)
+        frame = CandleFrame.from_candles(candles)
+        split = compute_split_date(frame, warmup)
+        n_train = _train_day_count(frame, warmup)
+        for n_days in halving_schedule(n_train):
+            rung = _leading_days(frame, warmup, n_days)
+            days = rung[warmup:].day_dates
+            assert len(days) == n_days and days[-1] < split
+            assert len(rung) > warmup
+
+    @pytest.fixture
+    def market(self, monkeypatch):
+        candles, warmup = _build_candles(n_days=30)
+        frame = CandleFrame.from_candles(candles)
+
+        async def fake_fetch(client, symbol, interval, days, end_offset_days=0):
+            return frame, warmup
+
+        monkeypatch.setattr(sweep, "fetch_candles_with_warmup", fake_fetch)
+
+    def _sweep(self, combos, **over):
+        return asyncio.run(sweep_symbol(None, "T", combos, sem=asyncio.Semaphore(1),
+                                        **{**self._KW, **over}))["rows"]
+
+    @pytest.fixture
+    def centres(self, monkeypatch):
+        """The last rung's survivors, as passed to ``_plateau_neighbours``."""
+        seen: list[dict] = []
+        real = sweep._plateau_neighbours
+
+        def spy(combos, centres):
+            seen.extend(centres)
+            return real(combos, centres)
+
+        monkeypatch.setattr(sweep, "_plateau_neighbours", spy)
+        return seen
+
+    def test_one_row_per_combo_and_survivors_match_grid(self, market, centres):
+        combos = expand_grid(["ema_crossover", "macd"], None, ["5minute"], self._EV,
+                             ["long", "short"])
+        grid = self._sweep(combos)
+        halved = self._sweep(combos, search="halving")
+        assert len(halved) == len(grid) == len(combos)
+
+        eliminated = [r for r in halved if r.get("halving")]
+        full = [r for r in halved if not r.get("halving")]
+        # 24 combos, eta 3, rungs [3, 9] → 8 → 3 survive to the full run,
+        # joined by their trail / sl neighbours
+        assert len(centres) == 3
+        expected = ({sweep._combo_key(c) for c in centres}
+                    | sweep._plateau_neighbours(combos, centres))
+        assert len(full) == len(expected) > 3
+        assert len(eliminated) == len(combos) - len(full)
+        assert {r["halving"]["rung"] for r in eliminated} <= {1, 2}
+
+        def key(r):
+            return (r["primary"], r["entry_side"], r["trail_percent"], r["sl_points"])
+
+        assert {key(r) for r in full} == {key(c) for c in combos
+                                          if sweep._combo_key(c) in expected}
+        by_key = {key(r): r for r in grid}
+        for r in full:
+            assert r == by_key[key(r)]     # the full-window row, unchanged
+        for r in eliminated:
+            assert r["gated"] and not r["confirmed"]
+            assert [categorize_gate_reason(g) for g in r["gate_reasons"]] == ["halving"]
+            assert r["walk_forward"] == {"confirmed": False, "train": None, "validation": None}
+            assert r["bars_replayed"] < by_key[key(r)]["bars_replayed"]
+
+        block = assemble_symbol("T", None, halved)
+        assert block["counts"]["tested"] == len(combos)
+        assert block["gate_summary"]["halving"] == len(eliminated)
+
+    def test_short_window_falls_back_to_grid(self, market):
+        combos = expand_grid(["ema_crossover"], None, ["5minute"], self._EV[:2], ["long"])
+        rows = self._sweep(combos, search="halving", halving_min_days=100)
+        assert rows == self._sweep(combos)
+
+    def test_unknown_search_mode_rejected(self, market):
+        with pytest.raises(ValueError, match="search mode"):
+            self._sweep([], search="bayes")
+
+    def test_eta_below_two_rejected(self, market):
+        with pytest.raises(ValueError, match="halving_eta"):
+            self._sweep([], search="halving", halving_eta=1)
+
+    def test_cached_combos_skip_the_rungs(self, market, centres, monkeypatch, tmp_path):
+        monkeypatch.setattr(sweep, "_CACHE_DIR", str(tmp_path))
+        combos = expand_grid(["ema_crossover", "macd"], None, ["5minute"], self._EV,
+                             ["long", "short"])
+        warm = self._sweep(combos[:6], use_cache=True)
+        assert len(list(tmp_path.iterdir())) == 6
+
+        halved = self._sweep(combos, search="halving", use_cache=True)
+        assert len(halved) == len(combos)
+        for row in warm:
+            assert row in halved
+        # Only the 18 uncached combos race: rungs [3, 9] → 6 → 2 survive
+        assert len(centres) == 2
+        assert all(sweep._combo_key(c) not in {sweep._combo_key(w) for w in combos[:6]}
+                   for c in centres)
+        # Rung rows are never cached; every new full-window row is
+        n_full = sum(1 for r in halved if not r.get("halving"))
+        assert len(list(tmp_path.iterdir())) == n_full
+
+    def test_lone_spike_survivor_is_flagged(self, market, monkeypatch):
+        # trail 1.0 wins every rung and nets +500 out of sample; the other
+        # trails are net-negative, so 1.0 is a lone spike on the trail axis.
+        def fake_run_combo(candles, warmup, symbol, combo, **kw):
+            spike = combo["trail_percent"] == 1.0
+            net = 500.0 if spike else -50.0
+            return {**combo, "symbol": symbol, "score": {"tstat": 3.0 if spike else 0.1},
+                    "total_pnl": net, "net_pnl": net, "gated": False, "gate_reasons": [],
+                    "confirmed": spike, "validation_per_day": net / 5,
+                    "bars_replayed": len(candles)}
+
+        monkeypatch.setattr(sweep, "run_combo", fake_run_combo)
+        ev = [{"trail_percent": t, "sl_points": None, "target_points": None}
+              for t in (0.5, 1.0, 1.5, 2.0, 2.5, 3.0)]
+        combos = expand_grid(["ema_crossover"], None, ["5minute"], ev, ["long"])
+        rows = self._sweep(combos, search="halving")
+
+        full = sorted(r["trail_percent"] for r in rows if not r.get("halving"))
+        assert full == [0.5, 1.0, 1.5]         # the survivor and its two neighbours
+        best = assemble_symbol("T", None, rows)["best"]
+        assert best["trail_percent"] == 1.0
+        assert "spike" in best["plateau_warning"]
+
+    def test_eliminated_rows_are_not_plateau_neighbours(self):
+        def row(trail, net, **extra):
+            return {"trail_percent": trail, "sl_points": None, "target_points": None,
+                    "net_pnl": net, "validation_per_day": net, "gated": False,
+                    "confirmed": True, "gate_reasons": [], **extra}
+
+        rows = [row(1.0, 500.0)] + [
+            row(t, -50.0, gated=True, confirmed=False,
+                gate_reasons=["halving: eliminated at rung 1"], halving={"rung": 1})
+            for t in (0.5, 1.5)
+        ]
+        block = assemble_symbol("T", None, rows)
+        assert "plateau_warning" not in block["best"]
+
+
+# ──────────────────────────────────────────────────────────────────────
+# Portfolio replay — the deployment plan as one account
+# ──────────────────────────────────────────────────────────────────────
+
+class TestPortfolioReplay:
+    _KW = dict(days=10, quantity=None, capital_per_trade=10_000, squareoff="15:15",
+               max_trades=3, cooldown=0, slippage_bps=5.0)
+
+    def _plan(self, *symbols, **over):
+        return [{"symbol": s, "primary": "ema_crossover", "confirm": None,
+                 "interval": "5minute", "entry_side": "long", "trail_percent": 1.0,
+                 "sl_points": None, "target_points": None, "htf_gate": None, **over}
+                for s in symbols]
+
+    @pytest.fixture
+    def market(self, monkeypatch):
+        candles, warmup = _build_candles(n_days=12)
+
+        async def fake_fetch(client, symbol, interval, days, end_offset_days=0):
+            return ([], 0) if symbol == "EMPTY" else (candles, warmup)
+
+        monkeypatch.setattr(sweep, "fetch_candles_with_warmup", fake_fetch)
+        return candles, warmup
+
+    def test_matches_run_portfolio_backtest(self, market):
+        candles, warmup = market
+        limits = PortfolioLimits(capital=50_000, max_positions=1)
+        plan = self._plan("A", "B")
+        block = asyncio.run(sweep.portfolio_replay(None, plan, limits, **self._KW))
+
+        qty = int(10_000 / candles[-1]["close"])
+        members = [PortfolioSymbol(s, candles, sweep.combo_config(s, r, quantity=qty, squareoff="15:15",
+                                                                  max_trades=3, cooldown=0),
+                                   "5minute", warmup)
+                   for s, r in zip(("A", "B"), plan)]
+        direct = run_portfolio_backtest(members, limits, slippage_bps=5.0)
+
+        assert block["symbols"] == ["A", "B"] and block["skipped"] == []
+        assert block["trades_taken"] == len(direct.trades) > 0
+        assert block["blocked"]["max_positions"] == direct.max_positions_blocks > 0
+        assert block["net_pnl"] == round(direct.metrics["net_pnl"], 2)
+        assert block["per_symbol"] == direct.per_symbol
+        assert block["daily"] == direct.daily
+
+    def test_unrebuildable_symbols_are_skipped(self, market, monkeypatch):
+        async def no_trend(*args, **kwargs):
+            raise RuntimeError("daily fetch failed")
+
+        monkeypatch.setattr(sweep.htf_store, "daily_trends", no_trend)
+        plan = self._plan("A", "EMPTY") + self._plan("G", htf_gate="daily_ema20")
+        block = asyncio.run(sweep.portfolio_replay(
+            None, plan, PortfolioLimits(capital=50_000), **self._KW))
+        assert block["symbols"] == ["A"]
+        assert block["skipped"] == ["EMPTY", "G"]
+
+    def test_empty_plan(self, market):
+        block = asyncio.run(sweep.portfolio_replay(
+            None, [], PortfolioLimits(capital=50_000), **self._KW))
+        assert block["symbols"] == [] and "trades_taken" not in block
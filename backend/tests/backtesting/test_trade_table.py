@@ -0,0 +1,112 @@
+"""Parity tests for the columnar TradeTable paths (backtesting/trade_table.py).
+
+compute_metrics, plausibility_warnings and the ranking layers accept either a
+list of Trades (the original Python loops) or a TradeTable (NumPy
+reductions). For any trade list both paths must return the same dicts,
+warnings and gate reasons.
+"""
+from __future__ import annotations
+
+import random
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from backtesting.metrics import compute_metrics, plausibility_warnings
+from backtesting.ranking import (
+    apply_gates,
+    combo_score,
+    day_consistency,
+    split_trades,
+    tstat,
+    validate_combo,
+)
+from backtesting.scalp_equity import run_scalp_equity_backtest
+from backtesting.simulator import Trade
+from backtesting.trade_table import TradeTable
+from monitor.scalp_models import ScalpSessionConfig, SessionMode
+
+IST = timezone(timedelta(hours=5, minutes=30))
+
+
+def _trades(n: int, seed: int, *, win_bias: float = 0.0, fixed_hold: int | None = None) -> list[Trade]:
+    rng = random.Random(seed)
+    out = []
+    for i in range(n):
+        entry = datetime(2026, 6, 1 + i // 4, 9, 30, tzinfo=IST) + timedelta(minutes=40 * (i % 4))
+        hold = fixed_hold if fixed_hold is not None else rng.choice([0, 5, 15, 30, 45])
+        pnl = round(rng.uniform(-500, 500) + win_bias, 2)
+        out.append(Trade(
+            symbol="T", side=rng.choice(["long", "short"]),
+            entry_price=100.0, entry_time=entry,
+            exit_price=100.0 + pnl / 10, exit_time=entry + timedelta(minutes=hold),
+            quantity=10, pnl=pnl, pnl_pct=pnl / 10,
+            exit_reason=rng.choice(["sl", "target", "trailing", "squareoff", "end_of_data"]),
+            holding_minutes=hold,
+        ))
+    return out
+
+
+CASES = [
+    [],
+    _trades(1, 1),
+    _trades(3, 2),
+    _trades(40, 3),
+    _trades(60, 4, win_bias=800.0, fixed_hold=15),   # all winners: PF=inf, ≥90% WR
+    _trades(60, 5, win_bias=-300.0),                 # losing, long loss streaks
+]
+
+
+@pytest.mark.parametrize("trades", CASES)
+def test_metrics_and_warnings_match_list_path(trades):
+    table = TradeTable.from_trades(trades)
+    for capital in (100_000, 1):
+        metrics = compute_metrics(trades, capital)
+        assert compute_metrics(table, capital) == metrics
+        assert plausibility_warnings(table, metrics) == plausibility_warnings(trades, metrics)
+
+
+@pytest.mark.parametrize("trades", CASES)
+def test_ranking_layers_match_list_path(trades):
+    table = TradeTable.from_trades(trades)
+    assert day_consistency(table) == day_consistency(trades)
+
+    score, expected = combo_score(table), combo_score(trades)
+    assert score.pop("tstat") == pytest.approx(expected.pop("tstat"), abs=1e-4)
+    assert score == expected
+    assert tstat(table.pnl) == pytest.approx(tstat([t.pnl for t in trades]), rel=1e-9)
+
+    mn = compute_metrics(trades, 100_000)
+    for cap in (None, 100.0, 5_000.0):
+        assert apply_gates(table, mn, daily_loss_cap=cap) == apply_gates(trades, mn, daily_loss_cap=cap)
+        assert apply_gates(table, {}, daily_loss_cap=cap) == apply_gates(trades, {}, daily_loss_cap=cap)
+
+    train_t, val_t = split_trades(table, date(2026, 6, 6))
+    train_l, val_l = split_trades(trades, date(2026, 6, 6))
+    assert train_t.trades == train_l and val_t.trades == val_l
+    wf_t, wf_l = validate_combo(train_t, val_t), validate_combo(train_l, val_l)
+    for side in ("train", "validation"):
+        assert wf_t[side].pop("tstat") == pytest.approx(wf_l[side].pop("tstat"), abs=1e-4)
+    assert wf_t == wf_l
+
+
+def test_scalp_engine_returns_a_trade_table():
+    start = datetime(2026, 4, 20, 9, 15, tzinfo=IST)
+    rng = random.Random(11)
+    candles, price = [], 100.0
+    for i in range(300):
+        o = price
+        price = max(1.0, price + rng.uniform(-1.0, 1.0))
+        ts = start + timedelta(days=i // 75, minutes=5 * (i % 75))
+        candles.append({"timestamp": ts.isoformat(), "open": o, "high": max(o, price) + 0.3,
+                        "low": min(o, price) - 0.3, "close": price, "volume": 500})
+    cfg = ScalpSessionConfig(
+        name="tt", session_mode=SessionMode.EQUITY_INTRADAY.value, underlying="T",
+        indicator_timeframe="5m", primary_indicator="ema_crossover",
+        primary_params={"fast": 3, "slow": 8}, squareoff_time="15:15",
+        max_trades=5, cooldown_seconds=0, quantity=10,
+    )
+    result = run_scalp_equity_backtest(candles, cfg, symbol="T", interval="5minute")
+    assert result.trades and result.trade_table.trades == result.trades
+    notional = cfg.quantity * result.trades[0].entry_price
+    assert result.metrics_net == compute_metrics(result.trades, notional)
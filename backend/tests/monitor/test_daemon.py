@@ -107,6 +107,7 @@ def _make_db_rule(rule_id: int = 1, user_id: int = 999, **overrides) -> MagicMoc
     db_rule.max_fires = overrides.get("max_fires", None)
     db_rule.expires_at = overrides.get("expires_at", None)
     db_rule.fired_at = overrides.get("fired_at", None)
+    db_rule.updated_at = overrides.get("updated_at", None)
     return db_rule
 
 
@@ -704,6 +705,7 @@ async def test_poll_rules_stops_user_when_token_expires():
         )
 
         daemon._user_manager = AsyncMock()
+        daemon._user_manager.get_session = MagicMock(return_value=_make_user_session())
 
         await daemon._poll_rules()
 
@@ -714,6 +716,96 @@ async def test_poll_rules_stops_user_when_token_expires():
     daemon._user_manager.start_user.assert_not_awaited()
 
 
+# ── Test: _check_sessions runs the token/session pass between sweeps ──
+
+
+@pytest.mark.asyncio
+async def test_check_sessions_recreates_lost_session_without_reload():
+    """A session dropped by the auth-failure handler is re-created from the
+    in-memory rules on the next poll, without re-reading monitor_rules."""
+    from monitor.daemon import MonitorDaemon
+
+    daemon = MonitorDaemon()
+    rule = _make_rule(rule_id=1, user_id=999)
+    daemon._rules_by_user = {999: [rule]}
+
+    with patch("monitor.daemon.crud") as mock_crud, \
+         patch.object(daemon, "_load_user_configs", new_callable=AsyncMock) as load:
+        load.side_effect = lambda uids: daemon._access_tokens.update({999: "tok"})
+        daemon._user_manager = AsyncMock()
+        daemon._user_manager.get_session = MagicMock(return_value=None)
+
+        await daemon._check_sessions()
+
+    load.assert_awaited_once_with({999})
+    mock_crud.get_active_rules_for_daemon.assert_not_called()
+    daemon._user_manager.start_user.assert_awaited_once_with(
+        999, "tok", [rule], extra_instruments=None,
+    )
+    daemon._user_manager.sync_rules.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_check_sessions_stops_expired_and_rotates_owner_token():
+    from monitor.daemon import MonitorDaemon
+
+    daemon = MonitorDaemon()
+    daemon._rules_by_user = {
+        1: [_make_rule(rule_id=1, user_id=1)],
+        2: [_make_rule(rule_id=2, user_id=2)],
+        3: [_make_rule(rule_id=3, user_id=3)],
+    }
+    daemon._market_pool = AsyncMock()
+    daemon._feed_owner_user_id = 2
+    sessions = {
+        1: MagicMock(access_token="old-1"),
+        2: MagicMock(access_token="old-2"),
+        3: MagicMock(access_token="tok-3"),
+    }
+
+    with patch.object(daemon, "_load_user_configs", new_callable=AsyncMock) as load:
+        # User 1's token expired, user 2's was refreshed, user 3 unchanged.
+        load.side_effect = lambda uids: daemon._access_tokens.update(
+            {2: "new-2", 3: "tok-3"}
+        )
+        daemon._user_manager = AsyncMock()
+        daemon._user_manager.get_session = MagicMock(side_effect=sessions.get)
+
+        await daemon._check_sessions()
+
+    daemon._user_manager.stop_user.assert_awaited_once_with(1)
+    daemon._user_manager.start_user.assert_awaited_once_with(
+        2, "new-2", daemon._rules_by_user[2], extra_instruments=None,
+    )
+    daemon._market_pool.rotate_token.assert_awaited_once()
+    daemon._user_manager.sync_rules.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_main_loop_checks_sessions_between_sweeps():
+    from monitor.daemon import MonitorDaemon
+
+    daemon = MonitorDaemon(poll_interval=0)
+    daemon._rule_feed = None
+    daemon._scalp_manager = AsyncMock()
+    daemon._state_persister = MagicMock()
+    daemon._market_pool = None
+    daemon._sector_flow = None
+
+    async def _check():
+        daemon._running = False
+
+    with patch.object(daemon, "_poll_rules", new_callable=AsyncMock) as poll, \
+         patch.object(daemon, "_check_sessions", side_effect=_check) as check, \
+         patch.object(daemon, "_rule_sweep_due", return_value=False), \
+         patch.object(daemon, "_check_time_rules", new_callable=AsyncMock):
+        await daemon.start()
+
+    # Only the boot load is a full reload; the loop ran the health pass.
+    poll.assert_awaited_once()
+    check.assert_called_once()
+
+
 # ── Test: _on_tick evaluates trailing_stop rules ─────────────────────
 
 
@@ -784,22 +876,26 @@ async def test_evaluate_and_execute_persists_trigger_config_update():
     ctx = EvalContext(market_data={"ltp": 1100.0}, now=datetime.utcnow())
 
     with patch("monitor.daemon.evaluate_rule", return_value=not_fired_result), \
-         patch("monitor.daemon.get_db_context") as mock_ctx, \
-         patch("monitor.daemon.crud") as mock_crud:
+         patch("monitor.state_persister.get_db_context") as mock_ctx, \
+         patch("monitor.state_persister.crud") as mock_crud:
 
         mock_session = AsyncMock()
         mock_ctx.return_value.__aenter__ = AsyncMock(return_value=mock_session)
         mock_ctx.return_value.__aexit__ = AsyncMock(return_value=False)
-        mock_crud.update_rule = AsyncMock()
+        mock_crud.apply_rule_state_batch = AsyncMock()
 
         await daemon._evaluate_and_execute(rule, ctx)
-        # Let background persist task run
-        await asyncio.sleep(0)
+        # Write-behind: nothing hits the DB until the persister flushes
+        mock_crud.apply_rule_state_batch.assert_not_awaited()
+        await daemon._state_persister.flush()
 
     # Should persist the trigger_config_update to DB
-    mock_crud.update_rule.assert_awaited_once_with(
-        mock_session, 5, trigger_config=updated_config
-    )
+    mock_crud.apply_rule_state_batch.assert_awaited_once()
+    session_arg, batch = mock_crud.apply_rule_state_batch.await_args.args
+    assert session_arg is mock_session
+    assert batch.keys() == {5}
+    assert batch[5]["trigger_config"] == updated_config
+    assert set(batch[5]) == {"trigger_config", "updated_at"}   # stamped by the persister
     # Should update in-memory rule
     assert rule.trigger_config == updated_config
 
@@ -823,6 +919,7 @@ async def test_evaluate_and_execute_no_persist_when_no_update():
         await daemon._evaluate_and_execute(rule, ctx)
 
     mock_crud.update_rule.assert_not_awaited()
+    assert daemon._state_persister.pending == 0
 
 
 # ── Test: _load_access_token tries TOTP on expired ────────────────────
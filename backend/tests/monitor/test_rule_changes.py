@@ -0,0 +1,219 @@
+"""Tests for incremental rule sync — RuleChangeFeed + MonitorDaemon deltas.
+
+The feed's SQLite fallback (updated_at high-water mark) must report each
+changed rule exactly once, coalesce bursts into one delta, and the daemon must
+apply those deltas per rule: insert/replace/drop only what changed, skip its
+own persister writes echoing back, and never roll unflushed trailing state back
+to the older DB row. The Postgres LISTEN path feeds the same dispatcher through
+``_on_notify``.
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+import monitor.daemon as daemon_mod
+import monitor.rule_changes as rc
+from database.models import Base
+from monitor.rule_changes import RuleChangeFeed
+
+
+@pytest_asyncio.fixture
+async def maker(monkeypatch):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", echo=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    mk = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    @asynccontextmanager
+    async def _ctx():
+        async with mk() as session:
+            yield session
+
+    monkeypatch.setattr(rc, "get_db_context", _ctx)
+    monkeypatch.setattr(daemon_mod, "get_db_context", _ctx)
+
+    from database.models import User
+    async with mk() as session:
+        session.add(User(id=999, email="t@t.com", name="T"))
+        await session.commit()
+    yield mk
+    await engine.dispose()
+
+
+async def _create(mk, name="r", **overrides):
+    from monitor.crud import create_rule
+    kwargs = dict(
+        user_id=999, name=name, trigger_type="price",
+        trigger_config={"condition": "gte", "price": 100.0, "reference": "ltp"},
+        action_type="place_order",
+        action_config={"symbol": "X", "transaction_type": "BUY", "quantity": 1,
+                       "order_type": "MARKET", "product": "I"},
+        instrument_token="NSE_EQ|X", symbol="X", strategy_name="t",
+    )
+    kwargs.update(overrides)
+    async with mk() as session:
+        return (await create_rule(session, **kwargs)).id
+
+
+async def _update(mk, rule_id, **fields):
+    from monitor.crud import update_rule
+    async with mk() as session:
+        await update_rule(session, rule_id, **fields)
+
+
+@pytest.mark.asyncio
+async def test_hwm_scan_reports_each_version_once(maker):
+    first = await _create(maker, "existing")
+    feed = RuleChangeFeed(AsyncMock(), use_listen=False)
+    await feed._seed_hwm()
+    # The seed row is already loaded by the initial sweep — only the overlap
+    # window re-reports it, once.
+    assert await feed.scan() <= 1
+    assert await feed.scan() == 0
+
+    new = await _create(maker, "new")
+    feed._pending.clear()
+    assert await feed.scan() == 1 and feed._pending == {new}
+    assert await feed.scan() == 0
+
+    await _update(maker, first, name="renamed")
+    feed._pending.clear()
+    assert await feed.scan() == 1 and feed._pending == {first}
+
+
+@pytest.mark.asyncio
+async def test_dispatch_coalesces_burst_and_listen_payloads():
+    batches = []
+
+    async def on_changes(ids):
+        batches.append(set(ids))
+
+    feed = RuleChangeFeed(on_changes, debounce_ms=20, use_listen=False)
+    task = asyncio.create_task(feed._run_dispatch())
+    try:
+        for rid in (1, 2, 2, 3):
+            feed._on_notify(None, 0, rc.CHANNEL, f'{{"id": {rid}, "user_id": 9, "op": "UPDATE"}}')
+        feed._on_notify(None, 0, rc.CHANNEL, "not json")
+        for _ in range(50):
+            if batches:
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        task.cancel()
+    assert batches == [{1, 2, 3}]
+    assert feed.stats()["notifications"] == 5
+
+
+def _daemon():
+    d = daemon_mod.MonitorDaemon()
+    d._user_manager = MagicMock()
+    d._user_manager.get_session.return_value = None
+    d._user_manager.start_user = AsyncMock()
+    d._user_manager.sync_rules = AsyncMock()
+    d._user_manager.stop_user = AsyncMock()
+    d.set_access_token(999, "tok")
+    return d
+
+
+@pytest.mark.asyncio
+async def test_daemon_applies_insert_update_disable_and_delete(maker):
+    d = _daemon()
+    rid = await _create(maker, "entry")
+
+    await d._apply_rule_changes({rid})
+    d._user_manager.start_user.assert_awaited_once()
+    assert [r.id for r in d._rules_by_user[999]] == [rid]
+
+    # Session now exists; an edit replaces the rule and re-syncs the user.
+    d._user_manager.get_session.return_value = MagicMock()
+    await _update(maker, rid, trigger_config={"condition": "gte", "price": 105.0, "reference": "ltp"})
+    await d._apply_rule_changes({rid})
+    assert d._rules_by_user[999][0].trigger_config["price"] == 105.0
+    assert d._user_manager.sync_rules.await_count == 1
+
+    # Unchanged row (e.g. our own write echoing back) — no re-sync.
+    await d._apply_rule_changes({rid})
+    assert d._user_manager.sync_rules.await_count == 1
+
+    await _update(maker, rid, enabled=False)
+    await d._apply_rule_changes({rid})
+    assert 999 not in d._rules_by_user
+    d._user_manager.stop_user.assert_awaited_once_with(999)
+
+    # Delete of a rule the daemon no longer holds is a no-op.
+    await d._apply_rule_changes({rid + 1000})
+    d._user_manager.stop_user.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_delta_keeps_unflushed_trailing_state(maker):
+    d = _daemon()
+    rid = await _create(
+        maker, "trail", trigger_type="trailing_stop",
+        trigger_config={"trail_percent": 1.0, "highest_price": 100.0},
+    )
+    await d._apply_rule_changes({rid})
+    d._user_manager.get_session.return_value = MagicMock()
+
+    # A newer high is queued in the persister but not yet written.
+    d._state_persister.mark_trigger_config(rid, {"trail_percent": 1.0, "highest_price": 120.0})
+    await d._apply_rule_changes({rid})
+    rule = d._rules_by_user[999][0]
+    assert rule.trigger_config["highest_price"] == 120.0
+
+
+def test_sweep_cadence_follows_feed_health():
+    d = daemon_mod.MonitorDaemon()
+    d._rule_sweep_interval = 300.0
+    d._rule_feed = MagicMock(healthy=False)
+    assert d._rule_sweep_due()
+    d._rule_feed = MagicMock(healthy=True)
+    d._last_rule_sweep = daemon_mod.time.monotonic()
+    assert not d._rule_sweep_due()
+    d._rule_feed = None
+    assert d._rule_sweep_due()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("installed, expected", [
+    ([("trg_monitor_rules_notify",)], False),
+    ([(name,) for name in rc.TRIGGERS], True),
+])
+async def test_trigger_check_requires_both_triggers(monkeypatch, installed, expected):
+    # An install with only the older all-ops trigger would notify on state flushes.
+    session = MagicMock()
+    session.execute = AsyncMock(return_value=installed)
+
+    @asynccontextmanager
+    async def _ctx():
+        yield session
+
+    monkeypatch.setattr(rc, "get_db_context", _ctx)
+    feed = RuleChangeFeed(AsyncMock(), use_listen=True)
+    assert await feed._trigger_installed() is expected
+    stmt, params = session.execute.await_args.args
+    assert params == {"names": list(rc.TRIGGERS)}
+
+
+@pytest.mark.asyncio
+async def test_listen_without_trigger_falls_back_to_poll(maker, monkeypatch):
+    feed = RuleChangeFeed(AsyncMock(), poll_interval=0.01, use_listen=True)
+    monkeypatch.setattr(feed, "_run_listen", AsyncMock(side_effect=AssertionError("listened")))
+    # SQLite has no pg_trigger: the check fails closed, like a missing trigger.
+    assert await feed._trigger_installed() is False
+    await feed.start()
+    try:
+        assert feed.stats()["mode"] == "poll"
+        rid = await _create(maker, "late")
+        for _ in range(100):
+            if feed._on_changes.await_count:
+                break
+            await asyncio.sleep(0.01)
+        feed._on_changes.assert_awaited_with({rid})
+        assert feed.healthy
+    finally:
+        await feed.stop()
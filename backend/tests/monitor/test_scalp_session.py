@@ -1791,8 +1791,7 @@ class TestCandleSeedRetry:
     async def test_successful_seed_warms_buffer_and_clears_state(self):
         mgr = _make_manager()
         session = _make_session(session_id=7)
-        with patch.object(mgr, "_space_seed_call", new_callable=AsyncMock), \
-             patch("monitor.scalp_session.seed_candle_buffer",
+        with patch("monitor.scalp_session.seed_candle_buffer",
                    new=AsyncMock(side_effect=self._seed_ok)) as mock_seed:
             await mgr._ensure_seeded(session)
         assert mock_seed.await_count == 1
@@ -1801,8 +1800,7 @@ class TestCandleSeedRetry:
         assert "7" not in mgr._seed_next_attempt
 
         # A warm buffer is a no-op on the next poll — no further API call.
-        with patch.object(mgr, "_space_seed_call", new_callable=AsyncMock), \
-             patch("monitor.scalp_session.seed_candle_buffer",
+        with patch("monitor.scalp_session.seed_candle_buffer",
                    new=AsyncMock(return_value=5)) as mock_seed2:
             await mgr._ensure_seeded(session)
         assert mock_seed2.await_count == 0
@@ -1813,8 +1811,7 @@ class TestCandleSeedRetry:
         session = _make_session(session_id=8)
 
         # Attempt 1: 429 → seeded=0, buffer stays empty, backoff armed.
-        with patch.object(mgr, "_space_seed_call", new_callable=AsyncMock), \
-             patch("monitor.scalp_session.seed_candle_buffer",
+        with patch("monitor.scalp_session.seed_candle_buffer",
                    new=AsyncMock(return_value=0)) as mock_fail:
             await mgr._ensure_seeded(session)
         assert mock_fail.await_count == 1
@@ -1823,8 +1820,7 @@ class TestCandleSeedRetry:
         assert "8" in mgr._seed_next_attempt
 
         # Immediate retry within the backoff window → skipped, no API call.
-        with patch.object(mgr, "_space_seed_call", new_callable=AsyncMock), \
-             patch("monitor.scalp_session.seed_candle_buffer",
+        with patch("monitor.scalp_session.seed_candle_buffer",
                    new=AsyncMock(return_value=0)) as mock_skip:
             await mgr._ensure_seeded(session)
         assert mock_skip.await_count == 0
@@ -1832,8 +1828,7 @@ class TestCandleSeedRetry:
 
         # Backoff window elapses → retry, this time the rate limit has cleared.
         mgr._seed_next_attempt["8"] = datetime.utcnow() - timedelta(seconds=1)
-        with patch.object(mgr, "_space_seed_call", new_callable=AsyncMock), \
-             patch("monitor.scalp_session.seed_candle_buffer",
+        with patch("monitor.scalp_session.seed_candle_buffer",
                    new=AsyncMock(side_effect=self._seed_ok)) as mock_ok:
             await mgr._ensure_seeded(session)
         assert mock_ok.await_count == 1
@@ -1849,8 +1844,7 @@ class TestCandleSeedRetry:
         mgr = _make_manager()
         mgr._get_client = AsyncMock(side_effect=ValueError("No access token for user 1"))
         session = _make_session(session_id=9, user_id=1)
-        with patch.object(mgr, "_space_seed_call", new_callable=AsyncMock), \
-             patch("monitor.scalp_session.seed_candle_buffer",
+        with patch("monitor.scalp_session.seed_candle_buffer",
                    new=AsyncMock(return_value=0)) as mock_seed:
             await mgr._ensure_seeded(session)
         assert mock_seed.await_count == 0  # never reached — client raised first
@@ -1865,24 +1859,11 @@ class TestCandleSeedRetry:
         session = _make_session(session_id=10)
         mgr._candle_buffers["10"] = CandleBuffer(1)  # empty
         mgr._seed_attempts["10"] = _MAX_SEED_ATTEMPTS
-        with patch.object(mgr, "_space_seed_call", new_callable=AsyncMock), \
-             patch("monitor.scalp_session.seed_candle_buffer",
+        with patch("monitor.scalp_session.seed_candle_buffer",
                    new=AsyncMock(return_value=0)) as mock_seed:
             await mgr._ensure_seeded(session)
         assert mock_seed.await_count == 0  # no more attempts
 
-    @pytest.mark.asyncio
-    async def test_space_seed_call_enforces_gap_between_api_calls(self):
-        from monitor.scalp_session import _SEED_API_GAP_SEC
-        mgr = _make_manager()
-        with patch("monitor.scalp_session.asyncio.sleep", new_callable=AsyncMock) as mock_sleep:
-            await mgr._space_seed_call()           # first call: no prior ts → no sleep
-            assert mock_sleep.await_count == 0
-            await mgr._space_seed_call()           # immediate second call → spaced
-            assert mock_sleep.await_count == 1
-            slept = mock_sleep.await_args[0][0]
-            assert 0 < slept <= _SEED_API_GAP_SEC
-
     @pytest.mark.asyncio
     async def test_live_ticks_do_not_cancel_pending_reseed(self):
         """Regression for the readiness-check race: the tick path feeds the
@@ -1895,8 +1876,7 @@ class TestCandleSeedRetry:
         session = _make_session(session_id=11)  # 1m timeframe
 
         # Attempt 1: seed 429s → empty buffer, backoff armed, NOT seeded.
-        with patch.object(mgr, "_space_seed_call", new_callable=AsyncMock), \
-             patch("monitor.scalp_session.seed_candle_buffer",
+        with patch("monitor.scalp_session.seed_candle_buffer",
                    new=AsyncMock(return_value=0)) as mock_fail:
             await mgr._ensure_seeded(session)
         assert mock_fail.await_count == 1
@@ -1911,8 +1891,7 @@ class TestCandleSeedRetry:
 
         # Backoff elapses → the re-seed MUST still fire despite the live candles.
         mgr._seed_next_attempt["11"] = datetime.utcnow() - timedelta(seconds=1)
-        with patch.object(mgr, "_space_seed_call", new_callable=AsyncMock), \
-             patch("monitor.scalp_session.seed_candle_buffer",
+        with patch("monitor.scalp_session.seed_candle_buffer",
                    new=AsyncMock(side_effect=self._seed_ok)) as mock_ok:
             await mgr._ensure_seeded(session)
         assert mock_ok.await_count == 1            # the recovery path actually ran
@@ -1925,15 +1904,13 @@ class TestCandleSeedRetry:
     async def test_seeded_set_makes_warm_buffer_a_noop(self):
         mgr = _make_manager()
         session = _make_session(session_id=12)
-        with patch.object(mgr, "_space_seed_call", new_callable=AsyncMock), \
-             patch("monitor.scalp_session.seed_candle_buffer",
+        with patch("monitor.scalp_session.seed_candle_buffer",
                    new=AsyncMock(side_effect=self._seed_ok)) as mock_seed:
             await mgr._ensure_seeded(session)
         assert mock_seed.await_count == 1
         assert "12" in mgr._seeded
         # Even if live ticks later empty/refill, _seeded short-circuits.
-        with patch.object(mgr, "_space_seed_call", new_callable=AsyncMock), \
-             patch("monitor.scalp_session.seed_candle_buffer",
+        with patch("monitor.scalp_session.seed_candle_buffer",
                    new=AsyncMock(return_value=1)) as mock_seed2:
             await mgr._ensure_seeded(session)
         assert mock_seed2.await_count == 0
@@ -0,0 +1,99 @@
+"""Tests for candle_seeder's SeedCoordinator — shared historical seed fetches.
+
+A 09:00 restart used to issue one multi-day history request per buffer, spaced
+out to dodge 429s; ten users on NIFTY 5m meant ten identical fetches. Now every
+buffer on the same (instrument, timeframe) must share one fetch, distinct keys
+must fetch concurrently, failures must not be cached (callers retry with their
+own backoff), and buffers must not share mutable candle dicts.
+"""
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+import monitor.candle_seeder as cs
+from monitor.candle_buffer import CandleBuffer
+
+
+class _FakeClient:
+    def __init__(self, fail: bool = False):
+        self.calls: list[tuple[str, str]] = []
+        self.fail = fail
+        self.inflight = 0
+        self.max_inflight = 0
+
+    async def get_historical_data(self, symbol, interval, days, instrument_key):
+        self.calls.append((instrument_key, interval))
+        self.inflight += 1
+        self.max_inflight = max(self.max_inflight, self.inflight)
+        try:
+            await asyncio.sleep(0.02)
+            if self.fail:
+                raise RuntimeError("429 Too Many Requests")
+            base = datetime(2026, 6, 29, 4, 0)
+            return [
+                SimpleNamespace(timestamp=base + timedelta(minutes=5 * i),
+                                open=100 + i, high=101 + i, low=99 + i,
+                                close=100.5 + i, volume=10)
+                for i in range(250)
+            ]
+        finally:
+            self.inflight -= 1
+
+
+@pytest.fixture
+def coord(monkeypatch):
+    c = cs.SeedCoordinator(max_inflight=4)
+    monkeypatch.setattr(cs, "SEED_COORDINATOR", c)
+    return c
+
+
+@pytest.mark.asyncio
+async def test_same_key_is_fetched_once_and_fanned_out(coord):
+    client = _FakeClient()
+    bufs = [CandleBuffer(5) for _ in range(10)]
+    counts = await asyncio.gather(*(
+        cs.seed_candle_buffer(b, client, "NSE_INDEX|Nifty 50", 5) for b in bufs
+    ))
+    assert client.calls == [("NSE_INDEX|Nifty 50", "5minute")]
+    assert counts == [200] * 10
+    assert coord.stats()["shared"] == 9
+
+    # Each buffer owns its candles — live ticks mutate the last one in place.
+    bufs[0].get_candles()[-1]["close"] = -1.0
+    assert bufs[1].get_candles()[-1]["close"] != -1.0
+
+    # A later buffer in the same bar is served from cache.
+    late = CandleBuffer(5)
+    assert await cs.seed_candle_buffer(late, client, "NSE_INDEX|Nifty 50", 5) == 200
+    assert len(client.calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_distinct_keys_fetch_concurrently(coord):
+    client = _FakeClient()
+    keys = [(f"NSE_EQ|S{i}", tf) for i in range(3) for tf in (1, 5)]
+    await asyncio.gather(*(
+        cs.seed_candle_buffer(CandleBuffer(tf), client, tok, tf) for tok, tf in keys
+    ))
+    assert len(client.calls) == len(keys)
+    assert 1 < client.max_inflight <= 4
+
+
+@pytest.mark.asyncio
+async def test_failures_are_not_cached(coord):
+    bad = _FakeClient(fail=True)
+    assert await cs.seed_candle_buffer(CandleBuffer(5), bad, "NSE_EQ|X", 5) == 0
+    good = _FakeClient()
+    assert await cs.seed_candle_buffer(CandleBuffer(5), good, "NSE_EQ|X", 5) == 200
+    assert len(good.calls) == 1
+
+
+def test_cache_expires_at_bar_close_on_session_grid():
+    # 09:17 IST = 03:47 UTC → the 5m bar started 09:15 closes at 09:20 IST.
+    assert cs._bar_close_after(datetime(2026, 6, 29, 3, 47, 10), 5) == datetime(2026, 6, 29, 3, 50)
+    # 30m bars are anchored at 09:15 IST, not on the hour.
+    assert cs._bar_close_after(datetime(2026, 6, 29, 4, 20), 30) == datetime(2026, 6, 29, 4, 45)
+    # Pre-open still lands on a grid boundary.
+    assert cs._bar_close_after(datetime(2026, 6, 29, 3, 30), 15) == datetime(2026, 6, 29, 3, 45)
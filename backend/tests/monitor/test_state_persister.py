@@ -0,0 +1,210 @@
+"""Tests for RuleStatePersister — write-behind coalescing of rule state.
+
+A trending market produces a new trailing-stop high on nearly every tick; the
+persister must collapse those into one row write per rule per flush, keep the
+newest value of every field, never let a failed batch clobber newer state, and
+drain on stop. Runs against in-memory SQLite through the real crud batch write.
+"""
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+import monitor.state_persister as sp
+from database.models import Base
+from monitor.state_persister import RuleStatePersister
+
+
+@pytest_asyncio.fixture
+async def db(monkeypatch):
+    """In-memory DB with two rules, wired into the persister's session factory."""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", echo=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    calls = {"sessions": 0}
+
+    @asynccontextmanager
+    async def _ctx():
+        calls["sessions"] += 1
+        async with maker() as session:
+            yield session
+
+    monkeypatch.setattr(sp, "get_db_context", _ctx)
+
+    from database.models import User
+    from monitor.crud import create_rule
+    async with maker() as session:
+        session.add(User(id=999, email="t@t.com", name="T"))
+        await session.commit()
+        ids = []
+        for name in ("trail-a", "trail-b"):
+            r = await create_rule(
+                session, user_id=999, name=name, trigger_type="trailing_stop",
+                trigger_config={"trail_percent": 1.0, "highest_price": 100.0},
+                action_type="place_order",
+                action_config={"symbol": "X", "transaction_type": "SELL", "quantity": 1,
+                               "order_type": "MARKET", "product": "I"},
+                instrument_token=f"NSE_EQ|{name}", symbol=name, strategy_name="t",
+            )
+            ids.append(r.id)
+    yield maker, ids, calls
+    await engine.dispose()
+
+
+async def _get(maker, rule_id):
+    from monitor.crud import get_rule
+    async with maker() as session:
+        return await get_rule(session, rule_id)
+
+
+@pytest.mark.asyncio
+async def test_coalesces_to_latest_value_per_rule(db):
+    maker, (a, b), calls = db
+    p = RuleStatePersister()
+    for px in range(101, 151):
+        p.mark_trigger_config(a, {"trail_percent": 1.0, "highest_price": float(px)})
+    p.mark_trigger_config(b, {"trail_percent": 1.0, "highest_price": 99.0})
+
+    assert await p.flush() == 2
+    assert calls["sessions"] == 1
+    assert (await _get(maker, a)).trigger_config["highest_price"] == 150.0
+    assert (await _get(maker, b)).trigger_config["highest_price"] == 99.0
+
+    stats = p.stats()
+    assert stats["rows_written"] == 2 and stats["updates"] == 51
+    assert stats["coalescing_ratio"] == 25.5
+    assert stats["pending_rules"] == 0
+    assert await p.flush() == 0 and calls["sessions"] == 1
+
+
+@pytest.mark.asyncio
+async def test_fire_state_merges_with_trigger_config(db):
+    maker, (a, _), _ = db
+    p = RuleStatePersister()
+    p.mark_trigger_config(a, {"trail_percent": 1.0, "highest_price": 120.0})
+    p.mark_fire_state(a, fire_count=1, enabled=False)
+    p.mark_fire_state(a, fire_count=1, enabled=True)
+    await p.flush()
+
+    row = await _get(maker, a)
+    assert row.trigger_config["highest_price"] == 120.0
+    assert row.fire_count == 1 and row.enabled is True
+    assert row.fired_at is None     # only the order path stamps fired_at
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_requeues_without_clobbering_newer_state(db, monkeypatch):
+    maker, (a, _), _ = db
+    p = RuleStatePersister()
+    p.mark_trigger_config(a, {"highest_price": 110.0})
+    p.mark_fire_state(a, fire_count=1, enabled=True)
+
+    real = sp.crud.apply_rule_state_batch
+
+    async def _boom(session, updates):
+        # Newer state arrives while the failing batch is in flight.
+        p.mark_trigger_config(a, {"highest_price": 130.0})
+        raise RuntimeError("db down")
+
+    monkeypatch.setattr(sp.crud, "apply_rule_state_batch", _boom)
+    assert await p.flush() == 0
+    assert p.pending == 1 and p.stats()["flush_errors"] == 1
+
+    monkeypatch.setattr(sp.crud, "apply_rule_state_batch", real)
+    assert await p.flush() == 1
+    row = await _get(maker, a)
+    assert row.trigger_config == {"highest_price": 130.0}
+    assert row.fire_count == 1
+
+
+@pytest.mark.asyncio
+async def test_max_pending_wakes_loop_and_stop_drains(db):
+    maker, (a, b), calls = db
+    p = RuleStatePersister(flush_interval_ms=60_000, max_pending=5)
+    p.start()
+    try:
+        for px in range(5):
+            p.mark_trigger_config(a, {"highest_price": 200.0 + px})
+        for _ in range(50):
+            if p.pending == 0:
+                break
+            await asyncio.sleep(0.01)
+        assert p.pending == 0, "max_pending should trigger an early flush"
+        assert (await _get(maker, a)).trigger_config["highest_price"] == 204.0
+
+        p.mark_trigger_config(b, {"highest_price": 300.0})
+    finally:
+        await p.stop()
+    assert p.pending == 0
+    assert (await _get(maker, b)).trigger_config["highest_price"] == 300.0
+    assert p.stats()["last_flush_lag_ms"] >= 0.0
+
+
+@pytest.mark.asyncio
+async def test_batch_write_is_one_statement_per_column_set(db):
+    from sqlalchemy import event
+
+    maker, (a, b), _ = db
+    before = (await _get(maker, a)).updated_at
+    statements = []
+    async with maker() as session:
+        engine = session.bind.sync_engine
+        listen = lambda *args: statements.append(args[2])   # noqa: E731
+        event.listen(engine, "before_cursor_execute", listen)
+        try:
+            await sp.crud.apply_rule_state_batch(session, {
+                a: {"trigger_config": {"highest_price": 140.0}, "fire_count": 2},
+                b: {"trigger_config": {"highest_price": 90.0}, "fire_count": 1},
+                987654: {"enabled": False},          # deleted meanwhile: no row
+            })
+        finally:
+            event.remove(engine, "before_cursor_execute", listen)
+
+    assert sum(s.lstrip().upper().startswith("UPDATE") for s in statements) == 2
+    ra, rb = await _get(maker, a), await _get(maker, b)
+    assert ra.trigger_config["highest_price"] == 140.0 and ra.fire_count == 2
+    assert rb.trigger_config["highest_price"] == 90.0 and rb.fire_count == 1
+    assert ra.updated_at >= before
+
+
+@pytest.mark.asyncio
+async def test_overlay_keeps_pending_state_over_own_writes(db):
+    maker, (a, _), _ = db
+    p = RuleStatePersister()
+    p.mark_trigger_config(a, {"trail_percent": 1.0, "highest_price": 120.0})
+    await p.flush()
+    p.mark_trigger_config(a, {"trail_percent": 1.0, "highest_price": 125.0})
+
+    from monitor.crud import db_rule_to_schema
+    row = await _get(maker, a)                      # our own flush echoing back
+    rule = db_rule_to_schema(row)
+    p.overlay(rule, row.updated_at)
+    assert rule.trigger_config["highest_price"] == 125.0
+    assert p.pending == 1
+
+
+@pytest.mark.asyncio
+async def test_overlay_lets_a_newer_foreign_edit_win(db):
+    from monitor.crud import db_rule_to_schema, update_rule
+
+    maker, (a, b), _ = db
+    p = RuleStatePersister()
+    p.mark_fire_state(a, fire_count=1, enabled=True)
+    p.mark_trigger_config(b, {"trail_percent": 1.0, "highest_price": 130.0})
+    await asyncio.sleep(0.001)
+    async with maker() as session:                  # user disables it meanwhile
+        await update_rule(session, a, enabled=False)
+
+    row = await _get(maker, a)
+    rule = db_rule_to_schema(row)
+    p.overlay(rule, row.updated_at)
+    assert rule.enabled is False and rule.fire_count == 0
+    assert p.pending == 1                           # only b's change is left
+
+    await p.flush()
+    row = await _get(maker, a)
+    assert row.enabled is False, "a stale pending value must not be written back"
+    assert (await _get(maker, b)).trigger_config["highest_price"] == 130.0
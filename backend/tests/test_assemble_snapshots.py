@@ -0,0 +1,261 @@
+"""Tests for the training snapshot assembly (scripts/training/06_assemble_snapshots.py)
+and its month-partitioned output (scripts/training/partitioned_parquet.py).
+
+The news, earnings and label builders used to loop over every (symbol, date)
+pair. The vectorized joins must give the same features row for row: the
+reference functions below are the old per-pair loops, run on a small fixture
+with weekends, multi-symbol and macro headlines, announcements on T itself
+and beyond the 30-day exact-count horizon, and short symbol histories.
+"""
+import bisect
+import importlib.util
+import json
+import os
+import sys
+from datetime import date, timedelta
+from importlib.machinery import SourceFileLoader
+
+import numpy as np
+import pandas as pd
+import pytest
+
+_TRAINING_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             "scripts", "training")
+
+
+@pytest.fixture(scope="module")
+def asm():
+    if _TRAINING_DIR not in sys.path:
+        sys.path.insert(0, _TRAINING_DIR)
+    loader = SourceFileLoader("assemble_snapshots", os.path.join(_TRAINING_DIR, "06_assemble_snapshots.py"))
+    spec = importlib.util.spec_from_loader("assemble_snapshots", loader)
+    mod = importlib.util.module_from_spec(spec)
+    loader.exec_module(mod)
+    return mod
+
+
+# ──────────────────────────────────────────────────────────────────────
+# Fixture data
+# ──────────────────────────────────────────────────────────────────────
+
+def _weekdays(start: date, n: int) -> list[date]:
+    out, d = [], start
+    while len(out) < n:
+        if d.weekday() < 5:
+            out.append(d)
+        d += timedelta(days=1)
+    return out
+
+
+@pytest.fixture(scope="module")
+def spine():
+    rng = np.random.default_rng(7)
+    rows = []
+    for sym, n in (("AAA", 14), ("BBB", 9), ("CCC", 3)):
+        for d in _weekdays(date(2026, 4, 27), n):
+            o = 100 + rng.normal(0, 2)
+            rows.append({"symbol": sym, "date": d, "_orig_open": o,
+                         "_orig_close": o * (1 + rng.normal(0, 0.01))})
+    df = pd.DataFrame(rows)
+    df.loc[3, "_orig_open"] = 0.0                       # a zero open: inf/NaN label
+    return df.sample(frac=1, random_state=1).reset_index(drop=True)
+
+
+@pytest.fixture(scope="module")
+def news():
+    rows = [
+        (date(2026, 4, 25), "AAA weekend note", ["AAA"], False),
+        (date(2026, 4, 28), "AAA and BBB deal", ["AAA", "BBB"], False),
+        (date(2026, 4, 28), "RBI holds rates", [], True),
+        (date(2026, 4, 29), "Macro + AAA", ["AAA"], True),
+        (date(2026, 4, 30), "BBB results", ["BBB"], False),
+        (date(2026, 4, 29), "Crude spikes", [], True),
+        (date(2026, 5, 2), "Saturday macro", [], True),
+        (date(2026, 5, 4), "AAA again", ["AAA"], False),
+        (date(2026, 5, 4), "AAA again", ["AAA"], False),  # duplicate headline
+        (date(2026, 5, 6), "ZZZ unrelated", ["ZZZ"], False),
+        (date(2026, 5, 6), "Nothing", [], False),
+    ]
+    return pd.DataFrame({
+        "date": [r[0] for r in rows],
+        "headline": [r[1] for r in rows],
+        "matched_symbols": [json.dumps(r[2]) for r in rows],
+        "is_macro": [r[3] for r in rows],
+    })
+
+
+@pytest.fixture(scope="module")
+def earnings():
+    return pd.DataFrame({
+        "symbol": ["AAA", "AAA", "AAA", "BBB", "BBB", "DDD"],
+        "announcement_date": [
+            date(2026, 2, 10),    # > 30 days before the window: calendar days
+            date(2026, 4, 30),
+            date(2026, 5, 9),     # a Saturday
+            date(2026, 4, 28),    # on T for BBB's second day: excluded on T
+            date(2026, 4, 28),    # duplicate
+            date(2026, 5, 1),
+        ],
+    })
+
+
+# ──────────────────────────────────────────────────────────────────────
+# The old per-pair implementations (reference)
+# ──────────────────────────────────────────────────────────────────────
+
+def _ref_news(asm, spine, news_df):
+    news_df = news_df.copy()
+    news_df["symbols_list"] = news_df["matched_symbols"].apply(
+        lambda x: json.loads(x) if isinstance(x, str) else x)
+    stock_news = news_df[news_df["symbols_list"].apply(len) > 0]
+    macro_news = news_df[news_df["is_macro"] == True]  # noqa: E712
+    stock_exp = pd.DataFrame(
+        [{"symbol": s, "news_date": r["date"], "headline": r["headline"]}
+         for _, r in stock_news.iterrows() for s in r["symbols_list"]]
+        or None, columns=["symbol", "news_date", "headline"])
+    macro_by_date: dict = {}
+    for _, r in macro_news.iterrows():
+        macro_by_date.setdefault(r["date"], []).append(r["headline"])
+
+    out = []
+    pairs = spine[["symbol", "date"]].drop_duplicates()
+    for symbol, trade_date in zip(pairs["symbol"], pairs["date"]):
+        start = trade_date - timedelta(days=asm.NEWS_LOOKBACK_DAYS)
+        end = trade_date - timedelta(days=1)
+        mask = ((stock_exp["symbol"] == symbol) & (stock_exp["news_date"] >= start)
+                & (stock_exp["news_date"] <= end))
+        stock_hl = stock_exp.loc[mask, "headline"].tolist()
+        macro_hl = []
+        for d in pd.date_range(start, end):
+            macro_hl.extend(macro_by_date.get(d.date(), []))
+        out.append({"symbol": symbol, "date": trade_date,
+                    "news_stock_headlines": "|".join(stock_hl),
+                    "news_macro_headlines": "|".join(macro_hl),
+                    "news_headline_count": len(stock_hl) + len(macro_hl)})
+    return pd.DataFrame(out)
+
+
+def _ref_earnings(asm, spine, earnings_df):
+    by_symbol = {s: sorted(g["announcement_date"].unique()) for s, g in earnings_df.groupby("symbol")}
+    out = []
+    pairs = spine[["symbol", "date"]].drop_duplicates()
+    for symbol, trade_date in zip(pairs["symbol"], pairs["date"]):
+        ann = by_symbol.get(symbol, [])
+        days_since, yesterday = None, False
+        idx = bisect.bisect_left(ann, trade_date)
+        if idx > 0:
+            last = ann[idx - 1]
+            delta = (trade_date - last).days
+            days_since = sum(
+                1 for d in range(delta) if (trade_date - timedelta(days=d + 1)).weekday() < 5
+            ) if delta <= 30 else delta
+            yesterday = last == trade_date - timedelta(days=1)
+        out.append({"symbol": symbol, "date": trade_date,
+                    "days_since_earnings": days_since,
+                    "is_earnings_week": days_since is not None and days_since <= 5,
+                    "earnings_announced_yesterday": yesterday,
+                    "in_earnings_season": trade_date.month in asm.EARNINGS_SEASON_MONTHS})
+    return pd.DataFrame(out)
+
+
+def _ref_labels(df):
+    df = df.sort_values(["symbol", "date"]).reset_index(drop=True)
+    df["target_return_1d"] = np.nan
+    df["target_return_5d"] = np.nan
+    for _, grp in df.groupby("symbol"):
+        opens, closes = grp["_orig_open"].values, grp["_orig_close"].values
+        with np.errstate(divide="ignore", invalid="ignore"):
+            df.loc[grp.index, "target_return_1d"] = (closes - opens) / opens
+            if len(closes) > 4:
+                future = np.full(len(closes), np.nan)
+                future[:-4] = closes[4:]
+                df.loc[grp.index, "target_return_5d"] = (future - opens) / opens
+    df["target_direction_1d"] = np.where(df["target_return_1d"] > 0, "up", "down")
+    df["target_direction_5d"] = np.where(df["target_return_5d"] > 0, "up", "down")
+    df.loc[df["target_return_1d"].isna(), "target_direction_1d"] = None
+    df.loc[df["target_return_5d"].isna(), "target_direction_5d"] = None
+    return df
+
+
+def _by_pair(df):
+    return df.sort_values(["symbol", "date"]).reset_index(drop=True)
+
+
+# ──────────────────────────────────────────────────────────────────────
+# Parity
+# ──────────────────────────────────────────────────────────────────────
+
+def test_news_features_match_per_pair_scan(asm, spine, news):
+    got = _by_pair(asm.build_news_features(spine, news))
+    expected = _by_pair(_ref_news(asm, spine, news))
+    assert (expected["news_headline_count"] > 0).sum() > 5, "vacuous fixture"
+    pd.testing.assert_frame_equal(got, expected[got.columns], check_dtype=False)
+
+
+def test_earnings_features_match_per_pair_scan(asm, spine, earnings):
+    got = _by_pair(asm.build_earnings_features(spine, earnings))
+    expected = _by_pair(_ref_earnings(asm, spine, earnings))
+    expected["days_since_earnings"] = expected["days_since_earnings"].astype(float)
+    assert expected["earnings_announced_yesterday"].any()
+    assert (expected["days_since_earnings"] > 30).any()
+    pd.testing.assert_frame_equal(got, expected[got.columns], check_dtype=False)
+
+
+def test_outcome_labels_match_per_symbol_loop(asm, spine):
+    got = asm.add_outcome_labels(spine.copy())
+    expected = _ref_labels(spine.copy())
+    cols = ["symbol", "date", "target_return_1d", "target_return_5d",
+            "target_direction_1d", "target_direction_5d"]
+    assert expected["target_return_5d"].notna().sum() > 0
+    pd.testing.assert_frame_equal(got[cols], expected[cols], check_dtype=False)
+
+
+# ──────────────────────────────────────────────────────────────────────
+# partitioned_parquet — upsert
+# ──────────────────────────────────────────────────────────────────────
+
+@pytest.fixture
+def pq():
+    if importlib.util.find_spec("pyarrow") is None and importlib.util.find_spec("fastparquet") is None:
+        pytest.skip("no parquet engine installed")
+    if _TRAINING_DIR not in sys.path:
+        sys.path.insert(0, _TRAINING_DIR)
+    import partitioned_parquet
+    return partitioned_parquet
+
+
+def _rows(dates, value, symbols=("AAA", "BBB")):
+    return pd.DataFrame([{"symbol": s, "date": d, "x": value} for d in dates for s in symbols])
+
+
+def test_upsert_replaces_rows_without_duplicating(pq, tmp_path):
+    root = str(tmp_path / "snap")
+    may = _weekdays(date(2026, 5, 25), 5)                # straddles May/June
+    assert pq.write_dataset(_rows(may, 1.0), root) == ["2026-05", "2026-06"]
+
+    # Rewrite the last two days and add one new day
+    fresh = _weekdays(may[-2], 3)
+    written = pq.write_dataset(_rows(fresh, 2.0), root, upsert=True)
+    assert written == sorted({d.strftime("%Y-%m") for d in fresh})
+
+    df = pq.read_dataset(root)
+    assert not df.duplicated(["symbol", "date"]).any()
+    assert len(df) == 2 * len(set(may) | set(fresh))
+    by_date = df.assign(date=pd.to_datetime(df["date"]).dt.date).groupby("date")["x"].unique()
+    for d in may[:-2]:
+        assert list(by_date[d]) == [1.0]
+    for d in fresh:
+        assert list(by_date[d]) == [2.0]
+    assert pq.max_date(root) == fresh[-1]
+
+    # Upserting the same rows again is a no-op
+    pq.write_dataset(_rows(fresh, 2.0), root, upsert=True)
+    assert len(pq.read_dataset(root)) == len(df)
+
+
+def test_full_write_replaces_the_dataset(pq, tmp_path):
+    root = str(tmp_path / "snap")
+    pq.write_dataset(_rows(_weekdays(date(2026, 5, 4), 3), 1.0), root)
+    pq.write_dataset(_rows(_weekdays(date(2026, 6, 1), 2), 3.0), root)
+    assert pq.list_months(root) == ["2026-06"]
+    assert len(pq.read_dataset(root)) == 4
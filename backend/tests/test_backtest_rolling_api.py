@@ -106,7 +106,7 @@ def _user() -> User:
 
 
 @pytest.fixture
-def patched(monkeypatch):
+def patched(monkeypatch, tmp_path):
     """Patch the underlying-candle fetch + engine to deterministic fakes.
 
     Returns a namespace recording what the expired-instruments service was
@@ -192,9 +192,13 @@ def patched(monkeypatch):
                         fake_get_expired_contracts)
     monkeypatch.setattr("services.expired_instruments.fetch_expired_candles",
                         fake_fetch_expired_candles)
+    # The rolling path downloads expired legs through the candle archive.
+    monkeypatch.setattr("services.expired_instruments.download_expired_candles",
+                        fake_fetch_expired_candles)
+    monkeypatch.setattr("services.expired_candle_archive.ARCHIVE_DIR", tmp_path / "archive")
     monkeypatch.setattr("services.expired_instruments.front_expiry_for_date",
                         fake_front_expiry_for_date)
-    monkeypatch.setattr("services.expired_instruments._today_iso", fake_today_iso)
+    monkeypatch.setattr("services.expired_instruments.today_iso", fake_today_iso)
 
     # live-cache fallback for the current-week front weekly
     live_cache_calls = []
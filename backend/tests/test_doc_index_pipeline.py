@@ -0,0 +1,168 @@
+"""Tests for the incremental doc indexing pipeline (services/doc_index_pipeline.py).
+
+A small doc edit used to re-chunk, re-embed and rewrite the whole tree one
+document at a time. The pipeline must skip files whose hash is unchanged,
+re-embed only changed chunks, pack chunks from many files into few concurrent
+API calls, write in bulk batches, delete files that vanished, and leave a file
+whose embedding failed un-stamped so the next run retries it.
+"""
+import asyncio
+import sys
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.doc_index_pipeline import DocWork, IndexPipeline, content_hash  # noqa: E402
+from services.rate_limiter import RateLimiter  # noqa: E402
+
+
+def _chunk(file: Path, content: str):
+    paras = [p for p in content.split("\n\n") if p.strip()]
+    return DocWork(path="", file_hash="", chunks=[{"chunk_text": p} for p in paras])
+
+
+class _Store:
+    """Fake DB: records written files the way the indexers' upserts would."""
+
+    def __init__(self):
+        self.files: dict[str, str] = {}
+        self.chunks: dict[str, dict[int, str]] = {}
+        self.write_batches: list[list[str]] = []
+        self.deleted: list[str] = []
+        self.commits = 0
+
+    @asynccontextmanager
+    async def session(self):
+        yield self
+
+    async def commit(self):
+        self.commits += 1
+
+    async def write(self, session, works):
+        self.write_batches.append([w.path for w in works])
+        for w in works:
+            assert set(w.embeddings) == set(w.changed)
+            self.files[w.path] = w.file_hash
+            self.chunks[w.path] = {i: c["chunk_hash"] for i, c in enumerate(w.chunks)}
+
+    async def delete(self, session, paths):
+        self.deleted.extend(paths)
+        for p in paths:
+            self.files.pop(p, None)
+            self.chunks.pop(p, None)
+
+
+class _Embedder:
+    def __init__(self, fail_on: str | None = None):
+        self.calls: list[list[str]] = []
+        self.fail_on = fail_on
+        self.inflight = 0
+        self.max_inflight = 0
+
+    async def __call__(self, texts):
+        self.calls.append(list(texts))
+        self.inflight += 1
+        self.max_inflight = max(self.max_inflight, self.inflight)
+        try:
+            await asyncio.sleep(0.01)
+            if self.fail_on and any(self.fail_on in t for t in texts):
+                raise RuntimeError("embedding API 500")
+            return [[float(len(t))] for t in texts]
+        finally:
+            self.inflight -= 1
+
+
+def _tree(tmp_path, n=12):
+    files = []
+    for i in range(n):
+        f = tmp_path / f"doc{i}.md"
+        f.write_text(f"# Doc {i}\n\npara a{i}\n\npara b{i}")
+        files.append(f)
+    return files
+
+
+def _pipeline(store, embedder, **kw):
+    kw.setdefault("embed_batch", 4)
+    kw.setdefault("embed_concurrency", 3)
+    return IndexPipeline(
+        _chunk, embedder, store.write, store.delete,
+        limiter=RateLimiter([(1000, 1.0)]), session_factory=store.session, **kw,
+    )
+
+
+def _run(files, store, embedder, **kw):
+    force = kw.pop("force", False)
+    return asyncio.run(_pipeline(store, embedder, **kw).run(
+        [(f, f.name) for f in files], dict(store.files), dict(store.chunks), force=force,
+    ))
+
+
+def test_full_then_noop_then_single_chunk_edit(tmp_path):
+    files = _tree(tmp_path)
+    store = _Store()
+    emb = _Embedder()
+    stats = _run(files, store, emb)
+    assert stats.files_indexed == 12 and stats.chunks_embedded == 36
+    # 36 chunks in batches of 4 across files, never more than 3 calls at once.
+    assert stats.embed_calls == len(emb.calls) < 12 * 3
+    assert 1 < emb.max_inflight <= 3
+    assert store.files["doc3.md"] == content_hash(files[3].read_text())
+
+    emb2 = _Embedder()
+    stats = _run(files, store, emb2)
+    assert stats.files_skipped == 12 and emb2.calls == [] and stats.files_indexed == 0
+
+    files[5].write_text("# Doc 5\n\npara a5\n\npara b5 EDITED")
+    emb3 = _Embedder()
+    stats = _run(files, store, emb3)
+    assert emb3.calls == [["para b5 EDITED"]]
+    assert stats.files_indexed == 1 and stats.chunks_reused == 2
+    assert store.write_batches[-1] == ["doc5.md"]
+
+
+def test_writes_are_batched_and_vanished_files_deleted(tmp_path):
+    files = _tree(tmp_path)
+    store = _Store()
+    _run(files, store, _Embedder(), write_batch=5)
+    assert all(len(b) <= 5 for b in store.write_batches)
+    assert sum(len(b) for b in store.write_batches) == 12
+    assert store.commits == len(store.write_batches)
+
+    files[0].unlink()
+    stats = _run(files[1:], store, _Embedder())
+    assert store.deleted == ["doc0.md"] and stats.files_deleted == 1
+
+
+def test_failed_embedding_leaves_file_for_retry(tmp_path):
+    files = _tree(tmp_path, n=3)
+    store = _Store()
+    stats = _run(files, store, _Embedder(fail_on="b1"), embed_batch=1)
+    assert stats.errors == 1
+    assert set(store.files) == {"doc0.md", "doc2.md"}
+
+    emb = _Embedder()
+    stats = _run(files, store, emb)
+    assert stats.files_indexed == 1 and set(store.files) == {"doc0.md", "doc1.md", "doc2.md"}
+
+
+def test_force_rewrites_everything(tmp_path):
+    files = _tree(tmp_path, n=2)
+    store = _Store()
+    _run(files, store, _Embedder())
+    emb = _Embedder()
+    stats = _run(files, store, emb, force=True)
+    assert stats.files_indexed == 2 and stats.chunks_embedded == 6
+
+
+def test_file_emptied_of_chunks_is_written_to_clear_stale_rows(tmp_path):
+    files = _tree(tmp_path, n=2)
+    store = _Store()
+    _run(files, store, _Embedder())
+    files[1].write_text("\n\n   \n")
+    emb = _Embedder()
+    stats = _run(files, store, emb)
+    assert emb.calls == [] and stats.files_indexed == 1 and stats.files_skipped == 1
+    assert store.write_batches[-1] == ["doc1.md"]
+    assert store.chunks["doc1.md"] == {}
+    assert store.files["doc1.md"] == content_hash(files[1].read_text())
@@ -0,0 +1,111 @@
+"""Tests for the shared embedding cache (memory/embedding_cache.py).
+
+Every embedding call site now resolves through one two-tier cache keyed by
+(model, dims, normalized-text hash). A batch must only send its misses to the
+backend, identical concurrent requests must share one call, vectors must
+survive a restart via the SQLite tier (as float16), and the memory tier must
+stay inside its byte budget. Failed computes must not be cached.
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from memory.embedding_cache import EmbeddingCache, text_hash  # noqa: E402
+
+DIMS = 8
+
+
+class _Backend:
+    def __init__(self):
+        self.calls: list[list[str]] = []
+
+    async def __call__(self, texts):
+        self.calls.append(list(texts))
+        await asyncio.sleep(0.01)
+        return [[float(len(t)) + i / 10 for i in range(DIMS)] for t in texts]
+
+
+@pytest.mark.asyncio
+async def test_batch_only_computes_misses_and_dedupes(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "emb.sqlite3"))
+    backend = _Backend()
+    first = await cache.get_or_compute("m", DIMS, ["a b", "cc", "a  b"], backend)
+    # "a b" and "a  b" share a key: one backend text, same vector back.
+    assert backend.calls == [["a b", "cc"]]
+    assert first[0] == first[2]
+
+    second = await cache.get_or_compute("m", DIMS, ["cc", "ddd", "a b"], backend)
+    assert backend.calls[1] == ["ddd"]
+    assert second[0] == pytest.approx(first[1], rel=1e-3)
+
+    # Model and dims are part of the key.
+    await cache.get_or_compute("other", DIMS, ["cc"], backend)
+    await cache.get_or_compute("m", DIMS * 2, ["cc"], backend)
+    assert len(backend.calls) == 4
+
+
+@pytest.mark.asyncio
+async def test_persists_across_restart_as_float16(tmp_path):
+    path = str(tmp_path / "emb.sqlite3")
+    backend = _Backend()
+    await EmbeddingCache(path).get_or_compute("m", DIMS, ["hello", "world!"], backend, batch_size=1)
+    assert len(backend.calls) == 2
+
+    reopened = EmbeddingCache(path)
+    got = await reopened.get_or_compute("m", DIMS, ["world!", "hello"], backend)
+    assert len(backend.calls) == 2
+    assert got[1] == pytest.approx([5.0 + i / 10 for i in range(DIMS)], rel=1e-3)
+    stats = reopened.stats()
+    assert stats["disk_hits"] == 2 and stats["disk_entries"] == 2
+    # Disk hits are promoted to memory.
+    await reopened.get_or_compute("m", DIMS, ["hello"], backend)
+    assert reopened.stats()["mem_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_requests_share_one_call():
+    cache = EmbeddingCache(None)
+    backend = _Backend()
+    results = await asyncio.gather(*(
+        cache.get_or_compute_one("m", DIMS, "same question", backend) for _ in range(5)
+    ))
+    assert len(backend.calls) == 1
+    assert all(r == results[0] for r in results)
+    assert cache.stats()["shared"] == 4
+
+
+@pytest.mark.asyncio
+async def test_failures_are_not_cached_and_reach_waiters():
+    cache = EmbeddingCache(None)
+
+    async def boom(texts):
+        await asyncio.sleep(0.01)
+        raise RuntimeError("429")
+
+    results = await asyncio.gather(
+        cache.get_or_compute_one("m", DIMS, "q", boom),
+        cache.get_or_compute_one("m", DIMS, "q", boom),
+        return_exceptions=True,
+    )
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+    backend = _Backend()
+    await cache.get_or_compute_one("m", DIMS, "q", backend)
+    assert backend.calls == [["q"]]
+
+
+@pytest.mark.asyncio
+async def test_memory_tier_respects_byte_budget():
+    one = np.zeros(DIMS, dtype=np.float16).nbytes
+    cache = EmbeddingCache(None, max_bytes=3 * one)
+    backend = _Backend()
+    await cache.get_or_compute("m", DIMS, [f"t{i}" for i in range(10)], backend)
+    stats = cache.stats()
+    assert stats["mem_entries"] == 3 and stats["mem_bytes"] <= 3 * one
+    assert ("m", DIMS, text_hash("t9")) in cache._mem
+    assert ("m", DIMS, text_hash("t0")) not in cache._mem
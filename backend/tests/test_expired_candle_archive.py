@@ -0,0 +1,144 @@
+"""Tests for services.expired_candle_archive.
+
+The download is monkeypatched with a fake that serves 5-minute candles for
+any date range and records each (instrument_key, from, to) it was asked for.
+ARCHIVE_DIR is repointed at tmp_path so tests never touch the real .cache/.
+"""
+from __future__ import annotations
+
+import asyncio
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+import services.expired_candle_archive as arc
+import services.expired_instruments as ei
+
+KEY = arc.ContractKey("NIFTY", "2026-05-28", 25000.0, "CE", "5minute")
+IK = "NSE_FO|72172|28-05-2026"
+
+
+def _candles(from_date: str, to_date: str) -> list[dict]:
+    out = []
+    d, end = date.fromisoformat(from_date), date.fromisoformat(to_date)
+    while d <= end:
+        if d.weekday() < 5:
+            for k in range(3):
+                px = 100.0 + d.day + k
+                out.append({"timestamp": f"{d.isoformat()}T09:{15 + 5 * k}:00+05:30",
+                            "open": px, "high": px + 1, "low": px - 1, "close": px,
+                            "volume": 10.0 * (k + 1), "oi": 500.0})
+        d += timedelta(days=1)
+    return out
+
+
+@pytest.fixture
+def downloads(monkeypatch, tmp_path):
+    calls: list[tuple[str, str, str]] = []
+
+    async def fake_download(token, ik, interval, from_date, to_date):
+        calls.append((ik, from_date, to_date))
+        return _candles(from_date, to_date)
+
+    monkeypatch.setattr(arc, "ARCHIVE_DIR", tmp_path / "archive")
+    monkeypatch.setattr(ei, "download_expired_candles", fake_download)
+    monkeypatch.setattr(ei, "today_iso", lambda: "2026-06-01")
+    return calls
+
+
+def _fetch(req: arc.LegRequest, **kw):
+    return asyncio.run(arc.prefetch("tok", [req], **kw))[req.instrument_key]
+
+
+def test_miss_downloads_then_hit_reads_disk(downloads):
+    req = arc.LegRequest(KEY, IK, "2026-05-20", "2026-05-28")
+    first = _fetch(req)
+    assert downloads == [(IK, "2026-05-20", "2026-05-28")]
+    assert len(first) == 7 * 3                       # 7 weekdays × 3 bars
+
+    entry = arc.manifest_entry(KEY)
+    assert entry["instrument_key"] == IK and entry["rows"] == 21
+    assert (arc.ARCHIVE_DIR / arc.MANIFEST_FILE).exists()
+
+    arc._manifest = None                             # fresh process: reload from disk
+    second = _fetch(req)
+    assert len(downloads) == 1
+    np.testing.assert_array_equal(second.ts_ns, first.ts_ns)
+    np.testing.assert_array_equal(second.close, first.close)
+    assert second.labels == first.labels
+
+
+def test_sub_range_is_sliced_from_the_archive(downloads):
+    _fetch(arc.LegRequest(KEY, IK, "2026-05-20", "2026-05-28"))
+    part = _fetch(arc.LegRequest(KEY, IK, "2026-05-25", "2026-05-26"))
+    assert len(downloads) == 1
+    assert len(part) == 6
+    assert [str(d) for d in part.day_dates] == ["2026-05-25", "2026-05-26"]
+
+
+def test_wider_range_downloads_the_union_once(downloads):
+    _fetch(arc.LegRequest(KEY, IK, "2026-05-25", "2026-05-28"))
+    wide = _fetch(arc.LegRequest(KEY, IK, "2026-05-18", "2026-05-28"))
+    assert downloads[-1] == (IK, "2026-05-18", "2026-05-28")
+    assert len(wide) == 9 * 3
+    assert np.all(np.diff(wide.ts_ns) > 0)           # merged without duplicates
+    _fetch(arc.LegRequest(KEY, IK, "2026-05-18", "2026-05-22"))
+    assert len(downloads) == 2
+
+
+def test_range_past_expiry_is_served_from_disk(downloads):
+    _fetch(arc.LegRequest(KEY, IK, "2026-05-20", "2026-05-28"))
+    assert len(_fetch(arc.LegRequest(KEY, IK, "2026-05-20", "2026-06-04"))) == 21
+    assert len(downloads) == 1
+
+
+def test_unexpired_contract_is_not_archived(downloads):
+    live = arc.ContractKey("NIFTY", "2026-06-04", 25000.0, "CE", "5minute")
+    req = arc.LegRequest(live, "NSE_FO|1|04-06-2026", "2026-05-28", "2026-05-29")
+    _fetch(req)
+    _fetch(req)
+    assert len(downloads) == 2
+    assert arc.manifest_entry(live) is None
+    assert not arc._file_path(live).exists()
+
+
+def test_corrupt_file_or_manifest_is_refetched(downloads):
+    req = arc.LegRequest(KEY, IK, "2026-05-20", "2026-05-28")
+    _fetch(req)
+    arc._file_path(KEY).write_bytes(b"not an npz")
+    assert len(_fetch(req)) == 21
+    assert len(downloads) == 2
+
+    (arc.ARCHIVE_DIR / arc.MANIFEST_FILE).write_text("{broken")
+    arc._manifest = None
+    assert len(_fetch(req)) == 21
+    assert len(downloads) == 3
+    assert arc.manifest_entry(KEY) is not None
+
+
+def test_prefetch_bounds_concurrency_and_maps_failures_to_empty(monkeypatch, downloads):
+    in_flight, peak = 0, 0
+
+    async def slow_download(token, ik, interval, from_date, to_date):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        if ik.endswith("|bad"):
+            raise RuntimeError("boom")
+        return _candles(from_date, to_date)
+
+    monkeypatch.setattr(ei, "download_expired_candles", slow_download)
+    reqs = [
+        arc.LegRequest(arc.ContractKey("NIFTY", "2026-05-28", 24900.0 + 50 * i, "PE", "5minute"),
+                       f"NSE_FO|{i}" + ("|bad" if i == 3 else ""), "2026-05-26", "2026-05-28")
+        for i in range(6)
+    ]
+    out = asyncio.run(arc.prefetch("tok", reqs, concurrency=2))
+    assert peak == 2
+    assert set(out) == {r.instrument_key for r in reqs}
+    assert len(out["NSE_FO|3|bad"]) == 0
+    assert all(len(out[r.instrument_key]) == 9 for r in reqs if not r.instrument_key.endswith("bad"))
+    assert arc.manifest_entry(reqs[3].key) is None
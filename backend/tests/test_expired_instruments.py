@@ -195,7 +195,7 @@ async def test_candles_url_encodes_pipe():
 # --------------------------------------------------------------------------- #
 @pytest.mark.asyncio
 async def test_contracts_past_cached(monkeypatch):
-    monkeypatch.setattr(ei, "_today_iso", lambda: "2026-06-11")
+    monkeypatch.setattr(ei, "today_iso", lambda: "2026-06-11")
     _FakeAsyncClient.script = [
         _FakeResponse(json_body={"data": [{"instrument_key": "NSE_FO|1|26-05-2026"}]})
     ]
@@ -210,7 +210,7 @@ async def test_contracts_past_cached(monkeypatch):
 
 @pytest.mark.asyncio
 async def test_contracts_future_not_cached(monkeypatch):
-    monkeypatch.setattr(ei, "_today_iso", lambda: "2026-06-11")
+    monkeypatch.setattr(ei, "today_iso", lambda: "2026-06-11")
     _FakeAsyncClient.script = [
         _FakeResponse(json_body={"data": [{"instrument_key": "fut1"}]}),
         _FakeResponse(json_body={"data": [{"instrument_key": "fut2"}]}),
@@ -0,0 +1,142 @@
+"""Tests for the indexed F&O contract catalogue (strategies/fno_utils.py).
+
+The catalogue replaces per-call linear scans over every option row, so the
+public lookups (``list_expiries`` / ``list_strikes`` / ``resolve_option_instrument``
+/ ``get_lot_size``) must answer exactly as before. Covers the pickled snapshot
+too: reused while the CSVs are unchanged, rebuilt when they're re-downloaded.
+"""
+from __future__ import annotations
+
+import csv
+import os
+
+import pytest
+
+import strategies.fno_utils as fu
+
+_FIELDS = ["instrument_key", "tradingsymbol", "name", "expiry", "strike",
+           "lot_size", "instrument_type", "option_type", "exchange"]
+
+
+def _rows():
+    rows = []
+    for expiry, code in (("2026-07-02", "26702"), ("2026-07-30", "26JUL")):
+        for strike in range(24000, 24501, 50):
+            for ot in ("CE", "PE"):
+                if ot == "PE" and strike == 24500:
+                    continue   # one-sided strike
+                rows.append({
+                    "instrument_key": f"NSE_FO|N{code}{strike}{ot}",
+                    "tradingsymbol": f"NIFTY{code}{strike}{ot}",
+                    "name": "NIFTY", "expiry": expiry, "strike": strike,
+                    "lot_size": 75, "instrument_type": "OPTIDX",
+                    "option_type": ot, "exchange": "NSE_FO",
+                })
+    for expiry, lot in (("2026-07-30", 550), ("2026-08-27", 650)):
+        mon = "JUL" if expiry[5:7] == "07" else "AUG"
+        for strike in (1600.0, 1620.0):
+            rows.append({
+                "instrument_key": f"NSE_FO|H{mon}{strike:.0f}CE",
+                "tradingsymbol": f"HDFCBANK26{mon}{strike:.0f}CE",
+                "name": "HDFC BANK LTD", "expiry": expiry, "strike": strike,
+                "lot_size": lot, "instrument_type": "OPTSTK",
+                "option_type": "CE", "exchange": "NSE_FO",
+            })
+    rows.append({"instrument_key": "NSE_EQ|X", "tradingsymbol": "NIFTYBEES",
+                 "name": "NIFTYBEES", "expiry": "", "strike": 0, "lot_size": 1,
+                 "instrument_type": "EQ", "option_type": "", "exchange": "NSE_EQ"})
+    return rows
+
+
+def _write(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=_FIELDS)
+        w.writeheader()
+        w.writerows(rows)
+
+
+@pytest.fixture
+def catalogue(tmp_path, monkeypatch):
+    csv_path = str(tmp_path / "nse_instruments.csv")
+    _write(csv_path, _rows())
+    monkeypatch.setattr(fu, "_CACHE_PATH", csv_path)
+    monkeypatch.setattr(fu, "_BSE_CACHE_PATH", str(tmp_path / "bse_instruments.csv"))
+    monkeypatch.setattr(fu, "_CATALOGUE_PATH", str(tmp_path / "fno_catalogue.npz"))
+    monkeypatch.setattr(fu, "_catalogue", None)
+    monkeypatch.setattr(fu, "_options_cache", {})
+    monkeypatch.setattr(fu, "_symbol_to_name", {})
+    import services.instruments_cache as ic
+    monkeypatch.setattr(ic, "ensure_loaded", lambda: None)
+    return tmp_path
+
+
+def _reset():
+    fu._catalogue, fu._options_cache, fu._symbol_to_name = None, {}, {}
+
+
+def test_lookups(catalogue):
+    assert fu.list_expiries("nifty") == ["2026-07-02", "2026-07-30"]
+    assert fu.list_expiries("HDFCBANK") == ["2026-07-30", "2026-08-27"]
+    assert fu.list_expiries("UNKNOWN") == []
+
+    all_strikes = fu.list_strikes("NIFTY", "2026-07-02")
+    assert all_strikes == [float(s) for s in range(24000, 24501, 50)]
+    assert fu.list_strikes("NIFTY", "2026-07-02", "pe")[-1] == 24450.0
+    assert fu.list_strikes("NIFTY", "2026-07", "CE") == all_strikes      # partial → union
+    assert fu.list_strikes("NIFTY", "2026-07-03") == []
+
+    inst = fu.resolve_option_instrument("NIFTY", "2026-07-30", 24250, "ce")
+    assert inst["instrument_key"] == "NSE_FO|N26JUL24250CE"
+    assert fu.resolve_option_instrument("NIFTY", "2026-07-02", 24250, "PE")["tradingsymbol"] == "NIFTY2670224250PE"
+    with pytest.raises(ValueError):
+        fu.resolve_option_instrument("NIFTY", "2026-07-02", 24500, "PE")
+    with pytest.raises(ValueError):
+        fu.resolve_option_instrument("NIFTY", "2026-07-02", 24010, "CE")
+
+    assert fu.get_lot_size("HDFCBANK") == 550
+    assert fu.get_lot_size("HDFCBANK", "2026-08-27") == 650
+    assert fu.get_lot_size("HDFCBANK", "2026-12-31") == 550
+    assert fu.get_lot_size("BANKEX") == fu.LOT_SIZES["BANKEX"]
+
+    assert [(u["symbol"], u["lot_size"]) for u in fu.list_fno_underlyings()] == [
+        ("NIFTY", 75), ("HDFCBANK", 550)]
+    assert fu._load_cache()["NIFTY2670224000CE"] == fu.resolve_option_instrument(
+        "NIFTY", "2026-07-02", 24000.0, "CE")
+
+
+def test_atm_and_range_queries(catalogue):
+    assert fu.nearest_strike("NIFTY", "2026-07-02", 24124.0) == 24100.0
+    assert fu.nearest_strike("NIFTY", "2026-07-02", 24125.0) == 24100.0   # tie → lower
+    assert fu.nearest_strike("NIFTY", "2026-07-02", 30000.0, "PE") == 24450.0
+    assert fu.nearest_strike("NIFTY", "2026-07-02", 1.0) == 24000.0
+    assert fu.nearest_strike("NIFTY", "2099-01-01", 24100.0) is None
+    assert fu.strikes_between("NIFTY", "2026-07-02", 24090, 24200) == [24100.0, 24150.0, 24200.0]
+
+
+def test_snapshot_reused_until_csv_changes(catalogue, monkeypatch):
+    fu._load_catalogue()
+    assert os.path.exists(fu._CATALOGUE_PATH)
+    _reset()
+
+    def boom(paths):
+        raise AssertionError("CSV parsed despite a fresh snapshot")
+
+    parse = fu._parse_csvs
+    monkeypatch.setattr(fu, "_parse_csvs", boom)
+    assert fu.list_strikes("NIFTY", "2026-07-30", "CE")[0] == 24000.0
+    assert fu._resolve_symbol("HDFCBANK") == "HDFC BANK LTD"
+
+    # Re-download with a new expiry → snapshot stamp mismatch → rebuild.
+    rows = _rows()
+    rows.append(dict(rows[0], expiry="2026-08-27", tradingsymbol="NIFTY26AUG24000CE"))
+    _write(fu._CACHE_PATH, rows)
+    os.utime(fu._CACHE_PATH, ns=(1, 1))
+    _reset()
+    monkeypatch.setattr(fu, "_parse_csvs", parse)
+    assert fu.list_expiries("NIFTY")[-1] == "2026-08-27"
+
+
+def test_corrupt_snapshot_falls_back_to_csv(catalogue):
+    with open(fu._CATALOGUE_PATH, "wb") as f:
+        f.write(b"not an npz")
+    assert fu.list_expiries("NIFTY") == ["2026-07-02", "2026-07-30"]
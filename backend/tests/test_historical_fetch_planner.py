@@ -0,0 +1,141 @@
+"""Tests for the concurrent chunk fetch in UpstoxClient.get_historical_data.
+
+Multi-month ranges are split by ``plan_history_chunks`` and fetched
+concurrently under the shared token-bucket ``HISTORY_LIMITER``, then
+k-way merged (``merge_candle_runs``). These tests pin the chunk plan to the
+old serial loop, check the merge against sort+dedup, and confirm chunks really
+overlap in flight. The SDK is mocked — no network or token.
+"""
+from __future__ import annotations
+
+import asyncio
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import numpy as np
+import pytest
+
+import services.upstox_client as uc
+from services.rate_limiter import RateLimiter
+
+
+def _serial_plan(days, interval_value, now):
+    max_chunk_days = 25 if interval_value <= 15 else 80
+    out, chunk_to = [], now
+    chunk_from = chunk_to - timedelta(days=days)
+    while chunk_from < chunk_to:
+        chunk_end = min(chunk_from + timedelta(days=max_chunk_days), chunk_to)
+        out.append((chunk_from.strftime("%Y-%m-%d"), chunk_end.strftime("%Y-%m-%d")))
+        chunk_from = chunk_end + timedelta(days=1)
+    return out
+
+
+@pytest.mark.parametrize("days,iv", [(2, 15), (25, 5), (26, 15), (365, 15), (365, 30), (90, 1)])
+def test_plan_matches_serial_loop(days, iv):
+    now = datetime(2026, 7, 1, 11, 30)
+    assert uc.plan_history_chunks(days, iv, now) == _serial_plan(days, iv, now)
+
+
+def _ts(day: datetime, k: int) -> str:
+    return (day + timedelta(minutes=15 * k)).strftime("%Y-%m-%dT%H:%M:00+05:30")
+
+
+def test_merge_runs_matches_sort_and_dedup():
+    rng = random.Random(4)
+    base = datetime(2026, 1, 1, 9, 15)
+    runs, seen, expected = [], set(), []
+    for r in range(6):
+        run = [[_ts(base + timedelta(days=r * 3 + d), k), 1, 2, 0.5, 1.5, 10, 0]
+               for d in range(3) for k in range(rng.randint(1, 25))]
+        runs.append(run[::-1])   # API order: newest first
+    runs.append([list(runs[-1][0]), [_ts(base + timedelta(days=40), 0), 1, 1, 1, 1, 1, 0]])
+    for run in runs:
+        for c in run:
+            if c[0] not in seen:
+                seen.add(c[0])
+                expected.append(c)
+    expected.sort(key=lambda c: c[0])
+    assert [c[0] for c in uc.merge_candle_runs(runs)] == [c[0] for c in expected]
+    # An unsorted run is still merged correctly.
+    shuffled = [c for run in runs for c in run]
+    rng.shuffle(shuffled)
+    assert [c[0] for c in uc.merge_candle_runs([shuffled])] == [c[0] for c in expected]
+
+
+class _SlowHistory:
+    """HistoryV3Api stand-in: each chunk takes 50 ms and returns 1 candle/day."""
+
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def get_historical_candle_data1(self, instrument_key, unit, interval, to_date,
+                                    from_date, _request_timeout):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.05)
+        with self.lock:
+            self.active -= 1
+        d0 = datetime.strptime(from_date, "%Y-%m-%d")
+        d1 = datetime.strptime(to_date, "%Y-%m-%d")
+        today = datetime.now().date()
+        days = [(d0 + timedelta(days=i)) for i in range((d1 - d0).days + 1)]
+        days = [d for d in days if d.date() < today]   # history excludes today
+        candles = [[d.strftime("%Y-%m-%dT09:15:00+05:30"), 1.0, 2.0, 0.5, 1.5, 100, 0]
+                   for d in days]
+        return SimpleNamespace(data=SimpleNamespace(candles=candles[::-1]))
+
+    def get_intra_day_candle_data(self, instrument_key, unit, interval, _request_timeout):
+        today = datetime.now().strftime("%Y-%m-%dT09:15:00+05:30")
+        return SimpleNamespace(data=SimpleNamespace(candles=[[today, 9, 9, 9, 9, 9, 0]]))
+
+
+async def _fetch(api, **kwargs):
+    client = uc.UpstoxClient(access_token="x", user_id=1)
+    with patch("services.upstox_client.upstox_client.ApiClient", MagicMock()), \
+         patch("services.upstox_client.upstox_client.HistoryV3Api", return_value=api), \
+         patch.object(client, "_ensure_valid_token", new=AsyncMock(return_value=None)):
+        return await client.get_historical_data(
+            "TEST", interval="15minute", days=365, instrument_key="NSE_EQ|TEST", **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_chunks_fetched_concurrently(monkeypatch):
+    monkeypatch.setattr(uc, "HISTORY_LIMITER", RateLimiter([(1000, 1.0)]))
+    api = _SlowHistory()
+    t0 = time.perf_counter()
+    candles = await _fetch(api)
+    elapsed = time.perf_counter() - t0
+    n_chunks = len(uc.plan_history_chunks(365, 15))
+    assert n_chunks >= 14
+    assert api.peak > 1 and api.peak <= uc.HISTORY_MAX_INFLIGHT
+    assert elapsed < n_chunks * 0.05 * 0.6      # well under the serial time
+    ts = [c.timestamp for c in candles]
+    assert ts == sorted(ts) and len(ts) == len(set(ts))
+    assert candles[-1].close == 9.0             # today's intraday candle merged last
+
+
+@pytest.mark.asyncio
+async def test_columnar_matches_models(monkeypatch):
+    monkeypatch.setattr(uc, "HISTORY_LIMITER", RateLimiter([(1000, 1.0)]))
+    models = await _fetch(_SlowHistory())
+    cols = await _fetch(_SlowHistory(), columnar=True)
+    assert isinstance(cols, uc.OHLCVColumns) and len(cols) == len(models)
+    assert cols.to_dicts() == [m.model_dump() for m in models]
+    assert cols.volume.dtype == np.int64
+
+
+@pytest.mark.asyncio
+async def test_limiter_paces_requests():
+    limiter = RateLimiter([(5, 1.0)])
+    t0 = time.perf_counter()
+    await asyncio.gather(*[limiter.acquire() for _ in range(8)])
+    # 5 burst tokens, then 3 more at 5/s → ~0.6 s.
+    assert 0.5 < time.perf_counter() - t0 < 1.5
+    assert limiter.waited_s > 0
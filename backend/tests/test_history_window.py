@@ -0,0 +1,125 @@
+"""Tests for the incremental orchestrator history window (agents/history_window.py).
+
+The history processor runs before every model request. It must transform each
+message once per conversation (Pydantic AI feeds our previous output back in,
+followed by the new messages), keep the newest messages that fit the token
+budget, convert thinking-less assistant turns and their tool results into
+context text once truncating, never leave an orphaned tool result at the head
+of the window, and give the same answer as processing the thread from scratch.
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import agents.history_window as hw  # noqa: E402
+from agents.history_window import HistoryWindow, estimate_tokens  # noqa: E402
+from pydantic_ai.messages import (  # noqa: E402
+    ModelRequest,
+    ModelResponse,
+    SystemPromptPart,
+    TextPart,
+    ThinkingPart,
+    ToolCallPart,
+    ToolReturnPart,
+    UserPromptPart,
+)
+
+
+def _turn(i, thinking=False):
+    """user prompt → assistant tool call → tool result → assistant answer."""
+    call = ModelResponse(parts=([ThinkingPart(content="hmm")] if thinking else [])
+                         + [ToolCallPart(tool_name="execute_bash", args={"command": f"nf-quote S{i}"},
+                                         tool_call_id=f"c{i}")])
+    return [
+        ModelRequest(parts=[UserPromptPart(content=f"question {i} " + "x" * 200)]),
+        call,
+        ModelRequest(parts=[ToolReturnPart(tool_name="execute_bash", content=f"quote {i} " + "y" * 400,
+                                           tool_call_id=f"c{i}")]),
+        ModelResponse(parts=[TextPart(content=f"answer {i}")]),
+    ]
+
+
+def _system():
+    return ModelRequest(parts=[SystemPromptPart(content="you are the orchestrator")])
+
+
+def _shape(messages):
+    return [
+        (type(m).__name__, [(type(p).__name__, str(getattr(p, "content", getattr(p, "args", ""))))
+                            for p in m.parts])
+        for m in messages
+    ]
+
+
+def _drive(window, turns, key="t1", thinking=False):
+    """Replay a run the way Pydantic AI does: processed output + new messages."""
+    history = [_system()]
+    raw = list(history)
+    for i in range(turns):
+        for msg in _turn(i, thinking):
+            history = history + [msg]
+            raw.append(msg)
+            if isinstance(msg, ModelRequest):
+                history = window.process(history, key=key)
+    follow_up = ModelRequest(parts=[UserPromptPart(content="and now?")])
+    raw.append(follow_up)
+    return window.process(history + [follow_up], key=key), raw
+
+
+def test_short_history_is_untouched():
+    window = HistoryWindow(token_budget=10_000)
+    messages = [_system()] + _turn(0)
+    assert window.process(messages, key="t") is messages
+
+
+def test_each_message_is_transformed_once(monkeypatch):
+    calls = []
+    real = hw.transform_message
+
+    def counting(msg, removed):
+        calls.append(msg)
+        return real(msg, removed)
+
+    monkeypatch.setattr(hw, "transform_message", counting)
+    window = HistoryWindow(token_budget=600)
+    _, raw = _drive(window, 20)
+    assert len(calls) == len(raw) - 1  # every conversation message, exactly once
+    assert window.stats()["rebuilds"] == 1
+
+
+def test_budget_window_converts_and_matches_fresh_processing():
+    window = HistoryWindow(token_budget=600)
+    history, raw = _drive(window, 20)
+
+    assert isinstance(history[0].parts[0], SystemPromptPart)
+    conversation = history[1:]
+    assert sum(estimate_tokens(m) for m in conversation) <= 600 + 120
+    # Thinking-less assistant turns and their tool results became context text.
+    assert not any(isinstance(p, (ToolCallPart, ToolReturnPart)) for m in conversation for p in m.parts)
+    assert all(isinstance(m, ModelRequest) for m in conversation)
+    assert "answer 19" in str(conversation[-2].parts[0].content)
+
+    fresh = HistoryWindow(token_budget=600).process(list(raw), key="other")
+    assert _shape(fresh) == _shape(history)
+
+
+def test_head_tool_result_is_never_orphaned():
+    window = HistoryWindow(token_budget=450)
+    history, _ = _drive(window, 12, thinking=True)
+    head = history[1]
+    assert not (isinstance(head, ModelRequest)
+                and any(isinstance(p, ToolReturnPart) for p in head.parts))
+    call_ids = {p.tool_call_id for m in history for p in m.parts if isinstance(p, ToolCallPart)}
+    return_ids = {p.tool_call_id for m in history for p in m.parts if isinstance(p, ToolReturnPart)}
+    assert return_ids <= call_ids and call_ids
+
+
+def test_rebuilt_history_resets_state():
+    window = HistoryWindow(token_budget=600)
+    _drive(window, 10)
+    # A new run reloads the thread from the database: new objects, full rebuild.
+    _, raw = _drive(HistoryWindow(token_budget=600), 10)
+    out = window.process(list(raw), key="t1")
+    assert window.stats()["rebuilds"] == 2
+    assert _shape(out) == _shape(HistoryWindow(token_budget=600).process(list(raw)))
@@ -0,0 +1,128 @@
+"""Tests for the instruments snapshot + search index (services/instruments_cache.py).
+
+``search_symbols`` now answers from a prebuilt n-gram index instead of a
+substring scan over every company name, so it must return exactly what the old
+scan-then-sort did — same rows, same ranking, same truncation. The reference
+below is that original implementation, run over a synthetic instruments CSV.
+"""
+from __future__ import annotations
+
+import csv
+import os
+import random
+import string
+
+import pytest
+
+import services.instruments_cache as ic
+
+_GLOBALS = (
+    "_symbol_to_instrument_key", "_symbol_to_name", "_index_alias_to_key",
+    "_index_key_to_name", "_index_key_to_tradingsymbol", "_symbol_search",
+    "_index_search_rows", "_loaded",
+)
+
+
+def _write_csv(path, n=1500, seed=3):
+    rng = random.Random(seed)
+    words = ["BANK", "STEEL", "POWER", "INDIA", "TECH", "PHARMA", "AUTO",
+             "CEMENT", "FIN", "LIFE", "INFRA", "&", "-", "LTD", "LIMITED"]
+    rows = []
+    nifty = sorted(ic.NIFTY_50_SYMBOLS)
+    for i in range(n):
+        if i < 40:
+            sym = nifty[i]
+        else:
+            sym = "".join(rng.choice(string.ascii_uppercase + "&-") for _ in range(rng.randint(2, 10)))
+        name = " ".join(rng.choice(words).title() for _ in range(rng.randint(1, 4)))
+        rows.append(("NSE_EQ", f"NSE_EQ|INE{i:06d}", sym, name if i % 17 else ""))
+    for tsym, name in (("NIFTY 50", "Nifty 50"), ("NIFTY BANK", "Nifty Bank"),
+                       ("NIFTY IT", "Nifty IT"), ("NIFTY MID SELECT", "Nifty Mid Select")):
+        rows.append(("NSE_INDEX", f"NSE_INDEX|{name}", tsym, name))
+    rows.append(("NSE_FO", "NSE_FO|1", "NIFTY26JUL24000CE", "NIFTY"))
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["instrument_key", "exchange", "tradingsymbol", "name"])
+        for exch, key, tsym, name in rows:
+            w.writerow([key, exch, tsym, name])
+
+
+@pytest.fixture
+def loaded(tmp_path, monkeypatch):
+    for name in _GLOBALS:
+        monkeypatch.setattr(ic, name, getattr(ic, name))
+    monkeypatch.setattr(ic, "_CACHE_CSV", str(tmp_path / "nse_instruments.csv"))
+    monkeypatch.setattr(ic, "_CACHE_SNAPSHOT", str(tmp_path / "nse_instruments.snapshot.pkl"))
+    _write_csv(ic._CACHE_CSV)
+    assert ic._load_from_disk()
+    return tmp_path
+
+
+def _reference(term: str, limit: int) -> list[dict]:
+    term_upper = term.upper()
+    results = []
+    for sym, name in ic._symbol_to_name.items():
+        if term_upper in sym or term_upper in name.upper():
+            results.append({"symbol": sym, "name": name, "nifty50": sym in ic.NIFTY_50_SYMBOLS})
+    results.sort(key=lambda r: (
+        0 if r["symbol"] == term_upper else 1,
+        0 if r["symbol"].startswith(term_upper) else 1,
+        0 if r["nifty50"] else 1,
+        r["symbol"],
+    ))
+    return results[:limit]
+
+
+def test_search_symbols_matches_scan(loaded):
+    rng = random.Random(0)
+    syms = list(ic._symbol_to_name)
+    terms = ["", "a", "B", "in", "ban", "bank", "steel ltd", "&", "-", "zzzz",
+             "reliance", "tcs", "infy", "nifty"]
+    terms += [rng.choice(syms)[: rng.randint(1, 4)].lower() for _ in range(40)]
+    terms += [rng.choice(syms) for _ in range(20)]
+    for term in terms:
+        for limit in (1, 5, 20, 10_000, 0, -3):
+            assert ic.search_symbols(term, limit) == _reference(term, limit), (term, limit)
+
+
+def test_results_are_copies(loaded):
+    hit = ic.search_symbols("bank", 1)[0]
+    hit["kind"] = "equity"
+    assert "kind" not in ic.search_symbols("bank", 1)[0]
+
+
+def test_search_indices(loaded):
+    names = [r["name"] for r in ic.search_indices("nifty")]
+    assert names[:4] == ["Nifty 50", "Nifty Bank", "Nifty IT", "Nifty Mid Select"]
+    assert [r["symbol"] for r in ic.search_indices("midselect")] == ["NIFTY MID SELECT"]
+    assert ic.search_indices("SENSEX")[0]["instrument_key"] == "BSE_INDEX|SENSEX"
+
+
+def test_snapshot_reused_then_invalidated(loaded, monkeypatch):
+    assert os.path.exists(ic._CACHE_SNAPSHOT)
+    assert ic.search_stats()["load_source"] == "csv"
+
+    def boom():
+        raise AssertionError("CSV parsed despite a fresh snapshot")
+
+    build = ic._build_tables
+    monkeypatch.setattr(ic, "_build_tables", boom)
+    assert ic._load_from_disk()
+    assert ic.search_stats()["load_source"] == "snapshot"
+    assert ic.get_index_key("BANKNIFTY") == "NSE_INDEX|Nifty Bank"
+
+    # A re-downloaded CSV changes the stamp → the snapshot is ignored.
+    _write_csv(ic._CACHE_CSV, n=50, seed=9)
+    monkeypatch.setattr(ic, "_build_tables", build)
+    assert ic._load_from_disk()
+    assert ic.search_stats()["load_source"] == "csv"
+    assert len(ic._symbol_to_instrument_key) == 50
+
+
+def test_search_stats_report_latency(loaded):
+    for term in ("a", "ba", "ban", "bank"):
+        ic.search_symbols(term)
+    stats = ic.search_stats()
+    assert stats["searches"] >= 4
+    assert stats["p99_us"] >= stats["p50_us"] > 0
+    assert stats["load_ms"] is not None
@@ -0,0 +1,119 @@
+"""Tests for pooled user MCP servers (services/mcp_manager.py).
+
+Users with MCP servers used to get a freshly spawned set of servers (and a
+fresh orchestrator) on every request. Servers now live in MCPConnectionPool:
+an unchanged config must reuse the same connected instance and config hash, a
+changed config must spawn anew and close the stale connection, and
+invalidate_user must notify listeners (the orchestrator cache) and close the
+user's connections.
+"""
+import sys
+from pathlib import Path
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from database.models import Base, User, UserMCPServer  # noqa: E402
+from services.mcp_manager import MCPConnectionPool, MCPManager  # noqa: E402
+
+
+class _FakeServer:
+    def __init__(self, name):
+        self.name = name
+        self.enters = 0
+        self.exits = 0
+
+    async def __aenter__(self):
+        self.enters += 1
+        return self
+
+    async def __aexit__(self, *args):
+        self.exits += 1
+
+
+@pytest_asyncio.fixture
+async def db(monkeypatch):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", echo=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    spawned = []
+
+    def _build(self, config, oauth_token, env_vars=None):
+        server = _FakeServer(config.name)
+        spawned.append(server)
+        return server
+
+    monkeypatch.setattr(MCPManager, "_build_server", _build)
+    async with maker() as s:
+        s.add(User(id=7, email="u@example.com", name="u"))
+        s.add(UserMCPServer(user_id=7, name="docs", transport_type="http",
+                            config={"url": "https://a.example/mcp"}))
+        await s.commit()
+        yield s, spawned
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_unchanged_config_reuses_connected_server(db):
+    session, spawned = db
+    pool = MCPConnectionPool()
+    manager = MCPManager(session)
+    h1, servers1 = await manager.load_user_mcp_servers(7, pool=pool)
+    h2, servers2 = await manager.load_user_mcp_servers(7, pool=pool)
+
+    assert h1 == h2 and servers1[0] is servers2[0]
+    assert len(spawned) == 1 and spawned[0].enters == 1
+    assert pool.stats() == {"servers": 1, "connected": 1, "hits": 1, "spawns": 1}
+
+
+@pytest.mark.asyncio
+async def test_config_change_spawns_new_and_closes_stale(db):
+    session, _ = db
+    pool = MCPConnectionPool()
+    manager = MCPManager(session)
+    h1, (old,) = await manager.load_user_mcp_servers(7, pool=pool)
+
+    server = (await manager.get_user_mcp_servers(7))[0]
+    server.config = {"url": "https://b.example/mcp"}
+    await session.commit()
+
+    h2, (new,) = await manager.load_user_mcp_servers(7, pool=pool)
+    assert h2 != h1 and new is not old
+    assert old.exits == 1 and new.exits == 0
+
+    server.enabled = False
+    await session.commit()
+    assert await manager.load_user_mcp_servers(7, pool=pool) == (None, [])
+    assert new.exits == 1 and pool.stats()["servers"] == 0
+
+
+@pytest.mark.asyncio
+async def test_invalidate_user_notifies_and_closes(db):
+    session, _ = db
+    pool = MCPConnectionPool()
+    invalidated = []
+    pool.add_invalidation_listener(invalidated.append)
+    _, (server,) = await MCPManager(session).load_user_mcp_servers(7, pool=pool)
+
+    assert await pool.invalidate_user(7) == 1
+    assert invalidated == [7] and server.exits == 1
+
+    # Next load respawns, so the config hash (keying orchestrators) changes too.
+    _, (again,) = await MCPManager(session).load_user_mcp_servers(7, pool=pool)
+    assert again is not server
+
+
+@pytest.mark.asyncio
+async def test_idle_servers_are_swept():
+    pool = MCPConnectionPool(idle_seconds=0)
+    server = _FakeServer("x")
+
+    async def factory():
+        return server
+
+    assert await pool.acquire(1, "fp", factory) is server
+    assert await pool.sweep() == 1 and server.exits == 1
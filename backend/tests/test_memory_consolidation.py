@@ -0,0 +1,164 @@
+"""Tests for jobs/memory_consolidation.py — in-memory clustering, batched writes.
+
+find_clusters used to issue one pgvector neighbour query per seed memory. It
+now reads the user's rows once and clusters in NumPy; the greedy rule (seeds
+in created_at DESC order, nearest-first neighbours, unused rows only) must be
+unchanged, including across similarity-matrix block boundaries. The job must
+then write each user's merges as one insert batch + one archive + one commit.
+"""
+import sys
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import jobs.memory_consolidation as mc  # noqa: E402
+from database.models import Base, Memory  # noqa: E402
+
+
+def _reference_greedy(vectors, threshold, min_size):
+    """The old per-seed query loop, row for row."""
+    used: set[int] = set()
+    clusters = []
+    for seed in range(len(vectors)):
+        if seed in used:
+            continue
+        dist = 1.0 - vectors @ vectors[seed]
+        cand = [j for j in range(len(vectors))
+                if j != seed and j not in used and dist[j] < threshold]
+        cand.sort(key=lambda j: dist[j])
+        cluster = [seed] + cand
+        if len(cluster) >= min_size:
+            clusters.append(cluster)
+            used.update(cluster)
+        else:
+            used.add(seed)
+    return clusters
+
+
+def _clustered(n_groups=12, per=(1, 6), dim=32, seed=0):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for _ in range(n_groups):
+        center = rng.normal(size=dim)
+        for _ in range(rng.integers(*per)):
+            rows.append(center + rng.normal(scale=0.25, size=dim))
+    rows = np.array(rows, dtype=np.float32)
+    rng.shuffle(rows)
+    return rows / np.linalg.norm(rows, axis=1, keepdims=True)
+
+
+@pytest.mark.parametrize("block", [1, 7, 1024])
+def test_greedy_clusters_matches_per_seed_queries(block):
+    vecs = _clustered()
+    got = mc.greedy_clusters(vecs, 0.3, 2, block=block)
+    assert got == _reference_greedy(vecs, 0.3, 2)
+    assert got, "fixture should produce clusters"
+    flat = [i for c in got for i in c]
+    assert len(flat) == len(set(flat))
+
+
+@pytest_asyncio.fixture
+async def session():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", echo=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with maker() as s:
+        yield s
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_find_clusters_reads_once_and_skips_inactive(session):
+    base = datetime(2026, 1, 1)
+    a = [1.0, 0.0, 0.0]
+    a2 = [0.98, 0.05, 0.0]
+    b = [0.0, 1.0, 0.0]
+    specs = [
+        ("a-old", a, {}, 0), ("a-new", a2, {}, 2), ("b", b, {}, 1),
+        ("a-archived", a, {"archived": True}, 3),
+        ("a-merged", a, {"is_consolidated": True}, 4),
+        ("no-emb", None, {}, 5),
+    ]
+    for fact, emb, extra, age in specs:
+        session.add(Memory(user_id="u", fact=fact, category="c", embedding=emb,
+                           created_at=base + timedelta(days=age), **extra))
+    await session.commit()
+
+    executes = 0
+    real = session.execute
+
+    async def counting(*args, **kwargs):
+        nonlocal executes
+        executes += 1
+        return await real(*args, **kwargs)
+
+    session.execute = counting
+    clusters = await mc.find_clusters(session, "u")
+    assert executes == 1
+    assert [[m["fact"] for m in c] for c in clusters] == [["a-new", "a-old"]]
+
+
+class _RecordingSession:
+    def __init__(self):
+        self.statements: list[tuple[str, object]] = []
+        self.commits = 0
+
+    async def execute(self, stmt, params=None):
+        self.statements.append((str(stmt).split()[0], params))
+
+    async def commit(self):
+        self.commits += 1
+
+
+@pytest.mark.asyncio
+async def test_run_writes_one_batch_per_user(monkeypatch):
+    rec = _RecordingSession()
+
+    @asynccontextmanager
+    async def _factory():
+        yield rec
+
+    clusters = [
+        [{"id": 1, "fact": "x", "category": "c", "confidence": 0.5},
+         {"id": 2, "fact": "x'", "category": "c", "confidence": 0.9}],
+        [{"id": 3, "fact": "y", "category": "d", "confidence": None},
+         {"id": 4, "fact": "y'", "category": "d", "confidence": 0.4}],
+        [{"id": 5, "fact": "z", "category": "e", "confidence": 1.0},
+         {"id": 6, "fact": "z'", "category": "e", "confidence": 1.0}],
+    ]
+
+    async def _find(session, uid):
+        return clusters
+
+    async def _merge(cluster, category):
+        return None if cluster[0]["id"] == 5 else f"merged {category}"
+
+    embed_calls = []
+
+    async def _embed(facts):
+        embed_calls.append(facts)
+        return [[0.1, 0.2]] * len(facts)
+
+    monkeypatch.setattr(mc, "AsyncSessionLocal", _factory)
+    monkeypatch.setattr(mc, "find_clusters", _find)
+    monkeypatch.setattr(mc, "consolidate_cluster", _merge)
+    monkeypatch.setattr(mc, "_generate_embeddings", _embed)
+
+    stats = await mc.run_consolidation(only_user="u")
+    assert stats["clusters_found"] == 3 and stats["memories_consolidated"] == 4
+    assert embed_calls == [["merged c", "merged d"]]
+
+    kinds = [k for k, _ in rec.statements]
+    assert kinds == ["INSERT", "UPDATE"] and rec.commits == 1
+    inserts = rec.statements[0][1]
+    assert [r["sources"] for r in inserts] == ["[1, 2]", "[3, 4]"]
+    assert [r["conf"] for r in inserts] == [0.9, 1.0]
+    assert rec.statements[1][1] == {"ids": [1, 2, 3, 4]}
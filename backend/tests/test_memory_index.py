@@ -0,0 +1,133 @@
+"""Tests for the per-user memory vector index (database/memory_index.py).
+
+Without pgvector every chat message used to json-decode and score each of the
+user's embeddings one at a time. The index must return exactly what that
+row-by-row path returns (threshold on cosine, rank by cosine * importance),
+stay current through the write hooks, evict under its user/byte budget, and
+defer to the old path when the query dimension doesn't match.
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import database.operations as ops  # noqa: E402
+from database.memory_index import MemoryIndexCache, UserMemoryIndex  # noqa: E402
+from database.models import Base, Memory  # noqa: E402
+from database.operations import MemoryOps  # noqa: E402
+
+DIM = 16
+
+
+def _vecs(n, seed=0):
+    rng = np.random.default_rng(seed)
+    base = rng.normal(size=DIM)
+    # Mostly near `base` so a realistic threshold keeps a good share.
+    return [(base + rng.normal(scale=0.6, size=DIM)).tolist() for _ in range(n)], base.tolist()
+
+
+@pytest_asyncio.fixture
+async def db(monkeypatch):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", echo=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    cache = MemoryIndexCache()
+    monkeypatch.setattr(ops, "MEMORY_INDEX", cache)
+    monkeypatch.setattr(ops, "_pgvector_available", False)
+
+    vecs, _ = _vecs(60)
+    rng = np.random.default_rng(1)
+    async with maker() as s:
+        for i, v in enumerate(vecs):
+            s.add(Memory(
+                user_id="u1", fact=f"fact {i}", embedding=v,
+                importance_score=None if i % 7 == 0 else float(rng.uniform(0.2, 1.0)),
+                archived=(i % 11 == 0),
+            ))
+        await s.commit()
+    async with maker() as s:
+        yield s, cache
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_index_matches_row_by_row_ranking(db):
+    session, _ = db
+    _, query = _vecs(0)
+    expected = await MemoryOps._search_memories_python_fallback(session, "u1", query, 10, 0.5)
+    got = await MemoryOps._search_memories_index(session, "u1", query, 10, 0.5)
+    assert len(expected) == 10
+    assert [m.id for m, _ in got] == [m.id for m, _ in expected]
+    for (_, a), (_, b) in zip(got, expected):
+        assert a == pytest.approx(b, abs=1e-5)
+    assert not any(m.archived for m, _ in got)
+
+
+@pytest.mark.asyncio
+async def test_semantic_search_uses_index_and_hooks_keep_it_current(db):
+    session, cache = db
+    _, query = _vecs(0)
+    first = await MemoryOps.search_memories_semantic(session, "u1", query, limit=5, similarity_threshold=0.5)
+    assert cache.stats()["loads"] == 1
+    top = first[0][0].id
+
+    # Fading the top hit to zero importance drops it from the ranking.
+    cache.note_importance("u1", {top: 0.0})
+    second = await MemoryOps.search_memories_semantic(session, "u1", query, limit=5, similarity_threshold=0.5)
+    assert top not in [m.id for m, _ in second]
+    assert (cache.stats()["loads"], cache.stats()["hits"]) == (1, 1)
+
+    # An exact-match memory added in-process is found without a reload.
+    new = Memory(user_id="u1", fact="exact", embedding=query)
+    session.add(new)
+    await session.commit()
+    cache.note_upsert("u1", new.id, query)
+    third = await MemoryOps.search_memories_semantic(session, "u1", query, limit=5, similarity_threshold=0.5)
+    assert third[0][0].id == new.id and third[0][1] == pytest.approx(1.0)
+
+    cache.note_removed("u1", [new.id])
+    fourth = await MemoryOps.search_memories_semantic(session, "u1", query, limit=5, similarity_threshold=0.5)
+    assert new.id not in [m.id for m, _ in fourth]
+    assert cache.stats()["loads"] == 1
+
+
+@pytest.mark.asyncio
+async def test_dimension_mismatch_falls_back_to_row_path(db):
+    session, cache = db
+    index = await cache.get(session, "u1")
+    assert index.search([1.0] * (DIM + 1), 5, 0.0) is None
+    # A foreign-dimension upsert invalidates rather than corrupting the matrix.
+    cache.note_upsert("u1", 12345, [1.0] * (DIM + 1))
+    assert cache.stats()["users"] == 0
+
+
+def test_from_rows_keeps_majority_dimension_and_maps_null_importance():
+    rows = [(1, [1.0, 0.0, 0.0], None), (2, "[0.0, 2.0, 0.0]", 0.5),
+            (3, [1.0, 1.0], 0.9), (4, None, 1.0), (5, "not json", 1.0)]
+    idx = UserMemoryIndex.from_rows(rows)
+    assert idx.ids.tolist() == [1, 2]
+    assert idx.importance.tolist() == [1.0, 0.5]
+    assert np.allclose(np.linalg.norm(idx.vectors, axis=1), 1.0)
+    assert [m for m, _ in idx.search([0.0, 1.0, 0.0], 5, 0.5)] == [2]
+
+
+def test_lru_eviction_by_users_and_bytes():
+    cache = MemoryIndexCache(max_users=2, max_bytes=10 ** 9)
+    for uid in ("a", "b", "c"):
+        cache._indexes[uid] = UserMemoryIndex.from_rows([(1, [1.0] * 8, 1.0)])
+        cache._evict()
+    assert list(cache._indexes) == ["b", "c"]
+
+    one = UserMemoryIndex.from_rows([(1, [1.0] * 8, 1.0)]).nbytes
+    cache = MemoryIndexCache(max_users=10, max_bytes=2 * one)
+    for uid in ("a", "b", "c"):
+        cache._indexes[uid] = UserMemoryIndex.from_rows([(1, [1.0] * 8, 1.0)])
+        cache._evict()
+    assert list(cache._indexes) == ["b", "c"]
+    assert cache.stats()["evictions"] == 1
@@ -0,0 +1,210 @@
+"""Tests for the in-process candidate scan engine (services/scan_engine.py).
+
+The engine must score exactly like nf-morning-scan — it replaces the scan-cache
+subprocess, and the snapshot can't tell which writer produced a row. So the core
+tests build one synthetic session (20 prior days + today's partial session) and
+check the engine's vectorized phase-1/phase-2 inputs and scores against the CLI's
+own scalar functions (loaded offline, no token). Also covers baseline
+persistence and the streamer → engine tick routing.
+"""
+from __future__ import annotations
+
+import importlib.util
+import os
+import sys
+from datetime import datetime, timedelta
+from importlib.machinery import SourceFileLoader
+
+import numpy as np
+import pytest
+
+from models.analysis import OHLCVData
+from services import scan_engine as se
+
+_CLI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                    "cli-tools", "nf-morning-scan")
+
+
+@pytest.fixture(scope="module")
+def cli():
+    cli_dir = os.path.dirname(_CLI)
+    if cli_dir not in sys.path:
+        sys.path.insert(0, cli_dir)
+    loader = SourceFileLoader("nf_morning_scan", _CLI)
+    spec = importlib.util.spec_from_loader("nf_morning_scan", loader)
+    mod = importlib.util.module_from_spec(spec)
+    loader.exec_module(mod)
+    return mod
+
+
+TODAY = "2026-07-01"
+TODAY_SLOTS = 7  # 09:15 → 10:45 IST
+
+
+def _ist(day: str, slot: int) -> str:
+    m = se.SESSION_OPEN_MIN_IST + slot * se.BAR_MINUTES
+    return f"{day}T{m // 60:02d}:{m % 60:02d}:00+05:30"
+
+
+def _series(seed: int, n_days: int = 20, today_slots: int = TODAY_SLOTS):
+    """Prior-day + today candles with a random walk and lumpy volume."""
+    rng = np.random.default_rng(seed)
+    start = datetime(2026, 6, 1)
+    days = [(start + timedelta(days=d)).strftime("%Y-%m-%d") for d in range(n_days)]
+    price = 100.0 + seed
+    hist, today = [], []
+    for day in days + [TODAY]:
+        slots = today_slots if day == TODAY else se.SESSION_SLOTS
+        for k in range(slots):
+            if day != TODAY and rng.random() < 0.05:
+                continue  # the odd missing bar
+            o = price
+            price = max(1.0, price * (1 + rng.normal(0, 0.004)))
+            c = OHLCVData(timestamp=_ist(day, k), open=o, high=max(o, price) * 1.001,
+                          low=min(o, price) * 0.999, close=price,
+                          volume=int(rng.integers(1_000, 50_000)))
+            (today if day == TODAY else hist).append(c)
+    return hist, today
+
+
+def _engine_for(series: dict[str, tuple], quotes: dict[str, dict], nifty: dict):
+    symbols = sorted(series)
+    engine = se.ScanEngine(symbols)
+    engine.set_baselines(se.baselines_from_candles(
+        symbols, {s: h + t for s, (h, t) in series.items()}, TODAY))
+    for sym, (_h, today) in series.items():
+        for c in today:
+            ist = datetime.fromisoformat(c.timestamp).replace(tzinfo=None)
+            utc = ist - timedelta(hours=5, minutes=30)
+            # Four ticks per bar reproduce its OHLC; volume rides the first.
+            for px, vol in ((c.open, c.volume), (c.high, 0), (c.low, 0), (c.close, 0)):
+                engine.on_tick(sym, {"ltp": px, "ltq": vol}, utc + timedelta(minutes=1))
+    engine.apply_quotes(quotes, nifty)
+    return engine
+
+
+def _quote(today: list[OHLCVData], prev_close: float, ltp: float) -> dict:
+    net = ltp - prev_close
+    return {"ltp": ltp, "open": today[0].open, "high": max(c.high for c in today),
+            "low": min(c.low for c in today), "close": prev_close,
+            "volume": sum(c.volume for c in today), "net_change": net,
+            "pct_change": round(net / prev_close * 100, 2)}
+
+
+def test_rows_match_cli_scoring(cli):
+    series, quotes = {}, {}
+    for i in range(12):
+        hist, today = _series(i)
+        prev_close = hist[-1].close * (1 + (i - 6) * 0.004)   # spread of gaps
+        series[f"S{i:02d}"] = (hist, today)
+        quotes[f"S{i:02d}"] = _quote(today, prev_close, today[-1].close)
+    nifty = {"ltp": 24100.0, "close": 24000.0, "pct_change": 0.42}
+    engine = _engine_for(series, quotes, nifty)
+
+    rows, nifty_pct, elapsed = engine.compute(top_n=len(series))
+    assert nifty_pct == 0.42
+    assert len(rows) == len(series)
+    assert elapsed < 1.0
+
+    for row in rows:
+        hist, today = series[row["symbol"]]
+        q = quotes[row["symbol"]]
+        gap = cli.compute_gap(q)
+        rs = cli.compute_relative_strength(q["pct_change"], nifty_pct)
+        full = hist + today
+        rsi = cli.compute_rsi(full)
+        vwap = cli.compute_vwap(today)
+        rvol = cli.compute_rvol_t(today, full)
+        vexp = cli.compute_volume_expansion(today, full)
+        orng = cli.detect_opening_range(today)
+        assert row["gap_pct"] == gap
+        assert row["rel_strength"] == rs
+        assert row["phase1_score"] == cli.phase1_score(gap, rs, q["pct_change"])
+        assert row["rsi"] == pytest.approx(rsi, abs=0.11)
+        assert row["vwap"] == pytest.approx(vwap, abs=0.011)
+        assert row["rvol_t"] == rvol
+        assert row["vol_expansion"] == vexp
+        assert row["opening_range"]["breakout"] == orng["breakout"]
+        assert row["phase2_score"] == cli.phase2_score(rsi, vwap, q["ltp"], rvol, vexp)
+        assert row["setup"] == cli.detect_setup(q, vwap, orng, gap, rs)
+        assert row["total_score"] == row["phase1_score"] + row["phase2_score"]
+
+    keys = [(r["total_score"], r["phase1_score"], abs(r["rel_strength"])) for r in rows]
+    assert keys == sorted(keys, reverse=True)
+
+
+def test_rsi_state_matches_ta_over_full_series(cli):
+    hist, today = _series(3, today_slots=se.SESSION_SLOTS)
+    engine = _engine_for({"X": (hist, today)},
+                         {"X": _quote(today, hist[-1].close, today[-1].close)}, None)
+    rows, _, _ = engine.compute()
+    assert rows[0]["rsi"] == cli.compute_rsi(hist + today)
+
+
+def test_missing_history_reads_none():
+    engine = se.ScanEngine(["NEW"])
+    engine.set_baselines(se.baselines_from_candles(["NEW"], {}, TODAY))
+    engine.on_tick("NEW", {"ltp": 50.0, "close": 49.0, "ltq": 10},
+                   datetime(2026, 7, 1, 3, 50))
+    (row,), _, _ = engine.compute()
+    assert row["rsi"] is None and row["rvol_t"] is None and row["vol_expansion"] is None
+    assert row["gap_pct"] == pytest.approx(2.04)
+    assert row["setup"] == "Momentum continuation"   # gap and RS both ≥ thresholds
+
+
+def test_baselines_round_trip_and_realign(tmp_path):
+    hist_a, _ = _series(1)
+    hist_b, _ = _series(2)
+    b = se.baselines_from_candles(["A", "B"], {"A": hist_a, "B": hist_b}, TODAY)
+    path = str(tmp_path / "b.npz")
+    b.save(path)
+    loaded = se.ScanBaselines.load(path)
+    assert loaded.as_of == TODAY and loaded.symbols == ["A", "B"]
+    np.testing.assert_array_equal(loaded.cum_vol_profile, b.cum_vol_profile)
+
+    engine = se.ScanEngine(["B", "C"])
+    engine.set_baselines(loaded)
+    assert engine.baselines.rsi_last_close[0] == b.rsi_last_close[1]
+    assert np.isnan(engine.baselines.rsi_last_close[1])        # C unknown
+    assert se.ScanBaselines.load(str(tmp_path / "missing.npz")) is None
+
+
+def test_new_session_resets_bars():
+    engine = se.ScanEngine(["A"])
+    engine.on_tick("A", {"ltp": 10.0, "close": 9.0}, datetime(2026, 7, 1, 4, 0))
+    engine.on_tick("A", {"ltp": 20.0, "close": 19.0}, datetime(2026, 7, 2, 4, 0))
+    assert engine.session_date == "2026-07-02"
+    (row,), _, _ = engine.compute()
+    assert row["quote"]["open"] == 20.0 and row["quote"]["close"] == 19.0
+
+
+@pytest.mark.asyncio
+async def test_streamer_routes_ticks_to_engine(monkeypatch):
+    import monitor.sector_flow_streamer as sfs
+
+    class Pool:
+        interest = {}
+
+        async def set_interest(self, uid, keys):
+            self.interest[uid] = set(keys)
+
+        async def drop_user(self, uid):
+            self.interest.pop(uid, None)
+
+    monkeypatch.setattr(sfs.ic, "ensure_loaded", lambda: None)
+    monkeypatch.setattr(sfs.ic, "get_universe", lambda u: {"AAA", "BBB"})
+    monkeypatch.setattr(sfs.ic, "get_instrument_key", lambda s: f"NSE_EQ|{s}")
+    pool = Pool()
+    streamer = sfs.SectorFlowStreamer(pool, scan_engine=True, scan_interval_s=3600)
+    await streamer.start()
+    try:
+        assert se.NIFTY_KEY in pool.interest[streamer.SENTINEL_UID]
+        ts = datetime(2026, 7, 1, 3, 50)
+        await streamer.on_tick({"NSE_EQ|AAA": {"ltp": 101.0, "close": 100.0}}, ts=ts)
+        await streamer.on_tick({se.NIFTY_KEY: {"ltp": 24240.0, "close": 24000.0}}, ts=ts)
+        rows, nifty_pct, _ = streamer._scan.compute()
+        assert nifty_pct == 1.0
+        assert [r["symbol"] for r in rows] == ["AAA"]
+        assert rows[0]["rel_strength"] == 0.0
+    finally:
+        await streamer.stop()
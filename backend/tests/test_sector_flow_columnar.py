@@ -0,0 +1,134 @@
+"""Parity tests for the columnar sector-flow path (services/sector_flow.py
+``SessionMatrix`` + ``timeline_arrays``; services/sector_flow_cache
+``_shape_snapshot_columnar`` / ``_shape_matrix``).
+
+The columnar path replaces the dict-walking shaper on the live cycle, so it must
+emit the SAME snapshot: every rounded number, every None in the first ``window``
+bars, the sector order, the peaks. These tests generate messy synthetic
+sessions — missing bars, shuffled rows, duplicate slots, names without a prior
+close, sectors straddling MIN_SECTOR_NAMES — and compare the two shapers'
+JSON byte-for-byte.
+"""
+from __future__ import annotations
+
+import json
+import random
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+import monitor.sector_flow_streamer as sfs
+import services.sector_flow_cache as sfc
+from services.sector_flow import forward_fill
+
+
+def _grid(tf_min: int) -> list[str]:
+    out, m = [], 9 * 60 + 15
+    while m < 15 * 60 + 30:
+        out.append(f"{m // 60:02d}:{m % 60:02d}")
+        m += tf_min
+    return out
+
+
+def _universe(seed: int, n: int = 70, tf_min: int = 15):
+    rng = random.Random(seed)
+    labels = ["IT", "Bank", "Pharma", "Auto", "Tiny"]
+    sectors = {}
+    for i in range(n):
+        # "Tiny" gets 5 names — below MIN_SECTOR_NAMES, must be dropped.
+        sectors[f"S{i:03d}"] = "Tiny" if i < 5 else (None if i % 11 == 0 else labels[i % 4])
+    results = {}
+    for i in range(n):
+        sym = f"S{i:03d}"
+        rows = []
+        if i % 6:
+            rows.append(("2026-06-24T15:15:00+05:30", 100.0, 100 + rng.uniform(-3, 3)))
+        op = 100 + rng.uniform(-4, 4)
+        drift = rng.uniform(-0.002, 0.002)
+        px = op
+        for t in _grid(tf_min):
+            if rng.random() < 0.12:
+                continue
+            px *= 1 + drift + rng.gauss(0, 0.003)
+            rows.append((f"2026-06-25T{t}:00+05:30", op, round(px, 2)))
+        if i % 13 == 0 and len(rows) > 3:
+            rows.append(rows[-2])          # duplicate slot
+        rng.shuffle(rows)
+        results[sym] = rows
+    return results, sectors
+
+
+@pytest.mark.parametrize("seed,threshold,window", [
+    (1, 0.3, 2), (2, 0.5, 3), (3, 0.1, 1), (4, 0.3, 4),
+])
+def test_columnar_matches_scalar_snapshot(monkeypatch, seed, threshold, window):
+    results, sectors = _universe(seed)
+    monkeypatch.setattr(sfc.ic, "get_sector", lambda s: sectors.get(s))
+    scalar = sfc._shape_snapshot(results, "u", None, threshold, window)
+    columnar = sfc._shape_snapshot_columnar(results, "u", None, threshold, window)
+    assert "Tiny" not in columnar["sectors"]
+    assert json.dumps(columnar) == json.dumps(scalar)
+
+
+def test_columnar_matches_scalar_on_five_minute_bars(monkeypatch):
+    results, sectors = _universe(7, n=120, tf_min=5)
+    monkeypatch.setattr(sfc.ic, "get_sector", lambda s: sectors.get(s))
+    assert (json.dumps(sfc._shape_snapshot_columnar(results, "u", "2026-06-25", 0.3, 6))
+            == json.dumps(sfc._shape_snapshot(results, "u", "2026-06-25", 0.3, 6)))
+
+
+def test_columnar_error_paths():
+    assert sfc._shape_snapshot_columnar({}, "u", None, 0.3, 2) == {"error": "No candle data."}
+    only_prior = {"A": [("2026-06-24T09:15:00+05:30", 100.0, 101.0)]}
+    assert (sfc._shape_snapshot_columnar(only_prior, "u", "2026-06-25", 0.3, 2)
+            == sfc._shape_snapshot(only_prior, "u", "2026-06-25", 0.3, 2))
+
+
+def test_forward_fill_keeps_leading_gaps():
+    nan = np.nan
+    out = forward_fill(np.array([[nan, 1.0, nan, 3.0], [2.0, nan, nan, nan]]))
+    np.testing.assert_array_equal(out[1], [2.0, 2.0, 2.0, 2.0])
+    assert np.isnan(out[0, 0])
+    np.testing.assert_array_equal(out[0, 1:], [1.0, 1.0, 3.0])
+
+
+class _Pool:
+    async def set_interest(self, uid, keys):
+        pass
+
+    async def drop_user(self, uid):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_streamer_matrix_matches_results_path(monkeypatch):
+    rng = random.Random(5)
+    sectors = {f"S{i}": ("Up" if i < 10 else "Down") for i in range(20)}
+    monkeypatch.setattr(sfs.ic, "ensure_loaded", lambda: None)
+    monkeypatch.setattr(sfs.ic, "get_universe", lambda u: set(sectors))
+    monkeypatch.setattr(sfs.ic, "get_instrument_key", lambda s: f"NSE_EQ|{s}")
+    monkeypatch.setattr(sfs.ic, "get_sector", lambda s: sectors.get(s))
+    s = sfs.SectorFlowStreamer(_Pool(), timeframe_min=5, window=3)
+    await s.start()
+    try:
+        for i in range(20):
+            key = f"NSE_EQ|S{i}"
+            px = 100.0
+            for k in range(12):   # 09:15 → 10:10 IST on 5-min bars
+                if i % 4 == 0 and k % 3 == 1:
+                    continue
+                ts = datetime(2026, 6, 29, 3, 46 + 5 * k) if k < 3 else \
+                    datetime(2026, 6, 29, 4 + (5 * k - 15) // 60, (5 * k - 15) % 60 + 1)
+                px *= 1 + (0.002 if i < 10 else -0.002) + rng.gauss(0, 0.001)
+                tick = {"ltp": px}
+                if k == 0 and i % 5:
+                    tick["close"] = 99.5
+                await s.on_tick({key: tick}, ts=ts)
+        results, today = s._build_results()
+        mat, universe, mat_today = s._build_matrix()
+    finally:
+        await s.stop()
+    assert mat_today == today == "2026-06-29"
+    assert (json.dumps(sfc._shape_matrix(mat, universe, "u", today, 0.3, 3))
+            == json.dumps(sfc._shape_snapshot(results, "u", today, 0.3, 3)))
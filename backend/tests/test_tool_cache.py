@@ -0,0 +1,154 @@
+"""Tests for the shared SQLite tool cache (tools/native/tool_cache.py).
+
+Each thread's cache used to be one JSON file rewritten on every store and
+invalidation. All threads now share a WAL-mode SQLite store: the public
+ToolCache API must behave as before (per-thread isolation, trigger
+invalidation, stats), entries must expire after the TTL, legacy JSON caches
+must be imported once, and ``find_fresh`` must only return identical, valid
+calls inside the freshness window.
+"""
+import json
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import tools.native.tool_cache as tc  # noqa: E402
+from tools.native.tool_cache import ToolCache  # noqa: E402
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(tc, "DATABASE_DIR", str(tmp_path))
+    monkeypatch.setattr(tc, "_stores", {})
+    return str(tmp_path / "tool_cache.sqlite3")
+
+
+def test_store_lookup_get_and_thread_isolation(db_path):
+    a = ToolCache("t1", db_path=db_path)
+    b = ToolCache("t2", db_path=db_path)
+    cid = a.store("nf_quote", {"command": "nf-quote RELIANCE"}, "RELIANCE 2900",
+                  summary="Stock quote data", tokens_saved=40, execution_time_ms=1200)
+    b.store("nf_quote", {"command": "nf-quote TCS"}, "TCS 4100")
+
+    assert [e["cache_id"] for e in a.lookup()] == [cid]
+    assert a.lookup("reliance")[0]["parameters"] == {"command": "nf-quote RELIANCE"}
+    assert a.lookup("tcs") == []
+    assert b.get_entry(cid) is None
+
+    entry = ToolCache("t1", db_path=db_path).get_entry(cid)
+    assert entry["result"] == "RELIANCE 2900"
+    assert entry["metadata"] == {"tokens_saved": 40, "execution_time_ms": 1200,
+                                 "invalidation_triggers": [], "is_valid": True}
+
+    assert a.delete_entry(cid) and not a.delete_entry(cid)
+    assert b.get_stats()["valid_entries"] == 1
+    b.clear()
+    assert b.get_stats()["total_entries"] == 0
+
+
+def test_invalidate_by_trigger_and_stats(db_path):
+    cache = ToolCache("t1", db_path=db_path)
+    portfolio = cache.store("nf_portfolio", {"command": "nf-portfolio"}, {"cash": 1},
+                            invalidation_triggers=["order_placed"], tokens_saved=10,
+                            execution_time_ms=500)
+    cache.store("nf_quote", {"command": "nf-quote INFY"}, "INFY", tokens_saved=5)
+    ToolCache("t2", db_path=db_path).store("nf_portfolio", {}, "x", invalidation_triggers=["order_placed"])
+
+    assert cache.invalidate("order_placed") == 1
+    assert cache.invalidate("order_placed") == 0
+    assert cache.get_entry(portfolio) is None
+    assert ToolCache("t2", db_path=db_path).get_stats()["valid_entries"] == 1
+    assert cache.get_stats() == {
+        "total_entries": 2, "valid_entries": 1, "invalid_entries": 1,
+        "total_tokens_saved": 5, "total_time_saved_ms": 0,
+        "total_time_saved_seconds": 0.0, "invalidation_count": 1,
+    }
+
+
+def test_find_fresh_window_and_identity(db_path, monkeypatch):
+    cache = ToolCache("t1", db_path=db_path)
+    params = {"command": "python cli-tools/nf-quote RELIANCE --json"}
+    cache.store("nf_quote", params, "old")
+    cache.store("nf_quote", params, "new", invalidation_triggers=["tick"])
+
+    assert cache.find_fresh("nf_quote", dict(params), 30)["result"] == "new"
+    assert cache.find_fresh("nf_quote", {"command": "python cli-tools/nf-quote TCS --json"}, 30) is None
+    assert cache.find_fresh("nf_analyze", params, 30) is None
+    assert cache.find_fresh("nf_quote", params, 0) is None
+
+    cache.invalidate("tick")
+    assert cache.find_fresh("nf_quote", params, 30)["result"] == "old"
+
+    later = time.time() + 60
+    monkeypatch.setattr(tc.time, "time", lambda: later)
+    assert cache.find_fresh("nf_quote", params, 30) is None
+
+
+def test_ttl_eviction(db_path, monkeypatch):
+    cache = ToolCache("t1", db_path=db_path)
+    cache.store("nf_quote", {}, "a", invalidation_triggers=["x"])
+    store = cache._store
+    later = time.time() + store.ttl_s + 1
+    monkeypatch.setattr(tc.time, "time", lambda: later)
+
+    # Expired rows are hidden immediately and swept by the next prune.
+    assert cache.lookup() == [] and cache.get_stats()["total_entries"] == 0
+    assert store.prune() == 1
+    assert store.conn.execute("SELECT COUNT(*) FROM tool_cache_triggers").fetchone()[0] == 0
+
+
+def test_legacy_json_is_imported_once(db_path, tmp_path):
+    legacy = tmp_path / "tool_cache_thread_old.json"
+    legacy.write_text(json.dumps({
+        "cache_entries": [{
+            "cache_id": "c1", "timestamp": "2999-01-01T00:00:00+00:00", "tool_name": "nf_gtt",
+            "parameters": {"command": "nf-gtt list"}, "result": "gtts", "summary": "GTT order data",
+            "metadata": {"tokens_saved": 7, "execution_time_ms": 3,
+                         "invalidation_triggers": ["order_placed"], "is_valid": True},
+        }],
+        "invalidation_log": [],
+    }))
+
+    cache = ToolCache("old", db_path=db_path)
+    assert not legacy.exists() and (tmp_path / "tool_cache_thread_old.json.migrated").exists()
+    assert cache.get_entry("c1")["result"] == "gtts"
+    assert cache.invalidate("order_placed") == 1
+
+
+@pytest.mark.parametrize("command", [
+    "nf-quote RELIANCE && nf-order buy RELIANCE 10",
+    "nf-quote RELIANCE; nf-gtt create RELIANCE",
+    "nf-quote RELIANCE || nf-order buy RELIANCE 10",
+    "nf-quote RELIANCE | tee out.txt",
+    "nf-quote RELIANCE > quote.txt",
+    "nf-quote $(nf-order buy RELIANCE 10)",
+    "nf-quote `nf-order buy RELIANCE 10`",
+    "(nf-quote RELIANCE)",
+    "nf-quote RELIANCE\nnf-order buy RELIANCE 10",
+    "nf-order buy RELIANCE 10 --note nf-quote",
+    "nf-gtt list nf-quote",
+    "echo nf-quote",
+])
+def test_composite_or_mutating_commands_always_execute(command, db_path, monkeypatch):
+    import agents.orchestrator as orch
+
+    monkeypatch.setattr(tc, "CACHE_PATH", db_path)
+    ToolCache("t1", db_path=db_path).store("nf_quote", orch._bash_cache_parameters(command), "cached")
+    assert orch._fresh_cache_info(command) is None
+    agent = object.__new__(orch.OrchestratorAgent)
+    assert agent._fresh_cached_result(command, "t1") is None
+
+
+def test_lone_fresh_call_is_served_from_cache(db_path, monkeypatch):
+    import agents.orchestrator as orch
+
+    monkeypatch.setattr(tc, "CACHE_PATH", db_path)
+    command = "nf-quote RELIANCE --json"
+    ToolCache("t1", db_path=db_path).store("nf_quote", orch._bash_cache_parameters(command), "cached")
+    agent = object.__new__(orch.OrchestratorAgent)
+    assert agent._fresh_cached_result(command, "t1") == "cached"
+    assert orch._fresh_cache_info("nf-portfolio holdings") is None       # not marked fresh
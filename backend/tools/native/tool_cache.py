@@ -4,11 +4,27 @@ Tool Call Results Cache
 
 Stores expensive tool call results per-conversation to avoid redundant operations.
 The orchestrator can explicitly browse, retrieve, and store cache entries.
+
+All threads share one embedded SQLite store (WAL mode) at ``TOOL_CACHE_PATH``
+(default ``.cache/tool_cache.sqlite3``). Entries are indexed by
+(thread_id, tool_name, created_at) and by invalidation trigger, so a store is a
+single-row append and an invalidation touches only the matching rows instead
+of rewriting the thread's whole cache file. Entries older than
+``TOOL_CACHE_TTL_HOURS`` are evicted. ``find_fresh`` returns the newest valid
+result for an identical call inside a freshness window, which lets the
+orchestrator short-circuit repeated read-only ``nf-*`` invocations.
+
+Caches from the old per-thread JSON files (``database/tool_cache_thread_{id}.json``)
+are imported the first time their thread is opened.
 """
 
+import hashlib
 import os
 import sys
 import json
+import sqlite3
+import threading
+import time
 import uuid
 from datetime import datetime, timezone
 from typing import List, Dict, Any, Optional
@@ -16,12 +32,132 @@ from typing import List, Dict, Any, Optional
 # Get the directory where this script is located
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 
-# Construct the path to the database directory
+# Legacy per-thread JSON caches lived in the database directory
 DATABASE_DIR = os.path.abspath(os.path.join(SCRIPT_DIR, '..', '..', 'database'))
 
-# Ensure the database directory exists
-if not os.path.exists(DATABASE_DIR):
-    os.makedirs(DATABASE_DIR)
+_CACHE_DIR = os.path.abspath(os.path.join(SCRIPT_DIR, '..', '..', '.cache'))
+CACHE_PATH = os.getenv("TOOL_CACHE_PATH", os.path.join(_CACHE_DIR, "tool_cache.sqlite3"))
+TTL_HOURS = float(os.getenv("TOOL_CACHE_TTL_HOURS", "72"))
+
+# Expired rows are swept at most this often (and always when a store opens)
+_PRUNE_INTERVAL_S = 600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tool_cache_entries (
+    cache_id TEXT PRIMARY KEY,
+    thread_id TEXT NOT NULL,
+    tool_name TEXT NOT NULL,
+    params_key TEXT NOT NULL,
+    parameters TEXT NOT NULL,
+    result TEXT NOT NULL,
+    summary TEXT NOT NULL DEFAULT '',
+    invalidation_triggers TEXT NOT NULL DEFAULT '[]',
+    tokens_saved INTEGER NOT NULL DEFAULT 0,
+    execution_time_ms INTEGER NOT NULL DEFAULT 0,
+    is_valid INTEGER NOT NULL DEFAULT 1,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tool_cache_thread_tool_created
+    ON tool_cache_entries(thread_id, tool_name, created_at);
+CREATE INDEX IF NOT EXISTS idx_tool_cache_thread_created
+    ON tool_cache_entries(thread_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_tool_cache_params
+    ON tool_cache_entries(thread_id, params_key, created_at);
+CREATE INDEX IF NOT EXISTS idx_tool_cache_created
+    ON tool_cache_entries(created_at);
+
+CREATE TABLE IF NOT EXISTS tool_cache_triggers (
+    thread_id TEXT NOT NULL,
+    trigger TEXT NOT NULL,
+    cache_id TEXT NOT NULL,
+    PRIMARY KEY (thread_id, trigger, cache_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_tool_cache_triggers_entry
+    ON tool_cache_triggers(cache_id);
+
+CREATE TABLE IF NOT EXISTS tool_cache_invalidations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    thread_id TEXT NOT NULL,
+    trigger TEXT NOT NULL,
+    invalidated_entries TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tool_cache_invalidations_thread
+    ON tool_cache_invalidations(thread_id);
+"""
+
+
+def params_key(tool_name: str, parameters: Dict[str, Any]) -> str:
+    """Stable hash of a call's identity: tool name + canonical parameters JSON."""
+    canonical = json.dumps(parameters, sort_keys=True, default=str)
+    return hashlib.sha256(f"{tool_name}\x00{canonical}".encode("utf-8")).hexdigest()
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat()
+
+
+class _Store:
+    """Shared SQLite connection. One per database path, safe across threads."""
+
+    def __init__(self, path: str, ttl_hours: float):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.ttl_s = ttl_hours * 3600
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._last_prune = 0.0
+        self._imported: set = set()
+        with self.lock:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.executescript(_SCHEMA)
+        self.prune()
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """Evict entries older than the TTL (and their trigger rows)."""
+        now = now or time.time()
+        self._last_prune = now
+        if self.ttl_s <= 0:
+            return 0
+        cutoff = now - self.ttl_s
+        with self.lock:
+            self.conn.execute("BEGIN")
+            try:
+                self.conn.execute(
+                    "DELETE FROM tool_cache_triggers WHERE cache_id IN "
+                    "(SELECT cache_id FROM tool_cache_entries WHERE created_at < ?)",
+                    (cutoff,),
+                )
+                pruned = self.conn.execute(
+                    "DELETE FROM tool_cache_entries WHERE created_at < ?", (cutoff,)
+                ).rowcount
+                self.conn.execute(
+                    "DELETE FROM tool_cache_invalidations WHERE created_at < ?", (cutoff,)
+                )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return pruned
+
+    def maybe_prune(self) -> None:
+        if time.time() - self._last_prune >= _PRUNE_INTERVAL_S:
+            self.prune()
+
+
+_stores: Dict[str, _Store] = {}
+_stores_lock = threading.Lock()
+
+
+def _get_store(path: Optional[str] = None) -> _Store:
+    path = path or CACHE_PATH
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = _Store(path, TTL_HOURS)
+        return store
 
 
 class ToolCache:
@@ -32,45 +168,92 @@ class ToolCache:
     Supports smart invalidation when related actions occur.
     """
 
-    def __init__(self, thread_id: str):
+    _ENTRY_COLUMNS = (
+        "cache_id, created_at, tool_name, parameters, result, summary, "
+        "invalidation_triggers, tokens_saved, execution_time_ms, is_valid"
+    )
+
+    def __init__(self, thread_id: str, db_path: Optional[str] = None):
         """
         Initialize the tool cache for a specific thread.
 
         Args:
             thread_id: The conversation thread ID
+            db_path: SQLite file to use (defaults to the shared ``TOOL_CACHE_PATH``)
         """
         if not thread_id:
             raise ValueError("A thread_id is required to initialize the tool cache.")
 
-        self.thread_id = thread_id
-        self.cache_file = os.path.join(DATABASE_DIR, f'tool_cache_thread_{self.thread_id}.json')
-        self._data = self._load_cache()
+        self.thread_id = str(thread_id)
+        self._store = _get_store(db_path)
+        self._import_legacy_json()
 
-    def _load_cache(self) -> Dict[str, Any]:
-        """Load cache from JSON file."""
-        if not os.path.exists(self.cache_file):
-            return {
-                "cache_entries": [],
-                "invalidation_log": []
-            }
+    def _import_legacy_json(self):
+        """Move a thread's old JSON cache file into the shared store (once)."""
+        store = self._store
+        if self.thread_id in store._imported:
+            return
+        store._imported.add(self.thread_id)
 
+        legacy_file = os.path.join(DATABASE_DIR, f'tool_cache_thread_{self.thread_id}.json')
+        if not os.path.exists(legacy_file):
+            return
         try:
-            with open(self.cache_file, 'r') as f:
-                return json.load(f)
+            with open(legacy_file, 'r') as f:
+                data = json.load(f)
         except (IOError, json.JSONDecodeError) as e:
-            print(f"Error loading cache: {e}", file=sys.stderr)
-            return {
-                "cache_entries": [],
-                "invalidation_log": []
-            }
-
-    def _save_cache(self):
-        """Save cache to JSON file."""
-        try:
-            with open(self.cache_file, 'w') as f:
-                json.dump(self._data, f, indent=2)
-        except IOError as e:
-            print(f"Error saving cache: {e}", file=sys.stderr)
+            print(f"Error loading legacy cache: {e}", file=sys.stderr)
+            return
+
+        now = time.time()
+        entries, trigger_rows = [], []
+        for e in data.get("cache_entries", []):
+            meta = e.get("metadata", {})
+            try:
+                created = datetime.fromisoformat(e["timestamp"].replace('Z', '+00:00')).timestamp()
+            except (KeyError, ValueError, AttributeError):
+                created = now
+            triggers = meta.get("invalidation_triggers", [])
+            parameters = e.get("parameters", {})
+            entries.append((
+                e["cache_id"], self.thread_id, e.get("tool_name", ""),
+                params_key(e.get("tool_name", ""), parameters),
+                json.dumps(parameters, default=str), json.dumps(e.get("result"), default=str),
+                e.get("summary", ""), json.dumps(triggers), meta.get("tokens_saved", 0),
+                meta.get("execution_time_ms", 0), 1 if meta.get("is_valid", True) else 0, created,
+            ))
+            trigger_rows.extend((self.thread_id, t, e["cache_id"]) for t in triggers)
+        log_rows = []
+        for item in data.get("invalidation_log", []):
+            try:
+                logged = datetime.fromisoformat(item["timestamp"].replace('Z', '+00:00')).timestamp()
+            except (KeyError, ValueError, AttributeError):
+                logged = now
+            log_rows.append((self.thread_id, item.get("trigger", ""),
+                             json.dumps(item.get("invalidated_entries", [])), logged))
+
+        with store.lock:
+            store.conn.execute("BEGIN")
+            try:
+                store.conn.executemany(
+                    "INSERT OR IGNORE INTO tool_cache_entries VALUES (?,?,?,?,?,?,?,?,?,?,?,?)", entries
+                )
+                store.conn.executemany(
+                    "INSERT OR IGNORE INTO tool_cache_triggers VALUES (?,?,?)", trigger_rows
+                )
+                store.conn.executemany(
+                    "INSERT INTO tool_cache_invalidations (thread_id, trigger, invalidated_entries, created_at) "
+                    "VALUES (?,?,?,?)", log_rows
+                )
+                store.conn.execute("COMMIT")
+            except Exception:
+                store.conn.execute("ROLLBACK")
+                raise
+        os.replace(legacy_file, legacy_file + '.migrated')
+
+    def _cutoff(self) -> float:
+        """Oldest created_at still inside the TTL (entries awaiting a sweep are hidden)."""
+        return time.time() - self._store.ttl_s if self._store.ttl_s > 0 else 0.0
 
     def store(
         self,
@@ -98,24 +281,30 @@ class ToolCache:
             cache_id: Unique identifier for this cache entry
         """
         cache_id = str(uuid.uuid4())
-
-        entry = {
-            "cache_id": cache_id,
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-            "tool_name": tool_name,
-            "parameters": parameters,
-            "result": result,
-            "summary": summary,
-            "metadata": {
-                "tokens_saved": tokens_saved,
-                "execution_time_ms": execution_time_ms,
-                "invalidation_triggers": invalidation_triggers or [],
-                "is_valid": True
-            }
-        }
-
-        self._data["cache_entries"].append(entry)
-        self._save_cache()
+        triggers = list(dict.fromkeys(invalidation_triggers or []))
+        store = self._store
+
+        with store.lock:
+            store.conn.execute("BEGIN")
+            try:
+                store.conn.execute(
+                    "INSERT INTO tool_cache_entries VALUES (?,?,?,?,?,?,?,?,?,?,1,?)",
+                    (
+                        cache_id, self.thread_id, tool_name, params_key(tool_name, parameters),
+                        json.dumps(parameters, default=str), json.dumps(result, default=str),
+                        summary, json.dumps(triggers), tokens_saved, execution_time_ms, time.time(),
+                    ),
+                )
+                if triggers:
+                    store.conn.executemany(
+                        "INSERT OR IGNORE INTO tool_cache_triggers VALUES (?,?,?)",
+                        [(self.thread_id, t, cache_id) for t in triggers],
+                    )
+                store.conn.execute("COMMIT")
+            except Exception:
+                store.conn.execute("ROLLBACK")
+                raise
+        store.maybe_prune()
 
         return cache_id
 
@@ -129,35 +318,58 @@ class ToolCache:
         Returns:
             List of cache entry summaries (without full results)
         """
-        valid_entries = [
-            e for e in self._data["cache_entries"]
-            if e.get("metadata", {}).get("is_valid", True)
-        ]
+        with self._store.lock:
+            rows = self._store.conn.execute(
+                "SELECT cache_id, created_at, tool_name, parameters, summary, tokens_saved "
+                "FROM tool_cache_entries "
+                "WHERE thread_id = ? AND is_valid = 1 AND created_at >= ? "
+                "ORDER BY created_at",
+                (self.thread_id, self._cutoff()),
+            ).fetchall()
 
         # Filter by query if provided
         if query:
             query_lower = query.lower()
-            valid_entries = [
-                e for e in valid_entries
-                if query_lower in e.get("tool_name", "").lower()
-                or query_lower in e.get("summary", "").lower()
-                or query_lower in json.dumps(e.get("parameters", {})).lower()
+            rows = [
+                r for r in rows
+                if query_lower in r[2].lower()
+                or query_lower in r[4].lower()
+                or query_lower in r[3].lower()
             ]
 
         # Return summary info only (not full results)
+        now = time.time()
         return [
             {
-                "cache_id": e["cache_id"],
-                "timestamp": e["timestamp"],
-                "tool_name": e["tool_name"],
-                "parameters": e["parameters"],
-                "summary": e.get("summary", ""),
-                "age_minutes": self._calculate_age_minutes(e["timestamp"]),
-                "tokens_saved": e.get("metadata", {}).get("tokens_saved", 0)
+                "cache_id": cache_id,
+                "timestamp": _iso(created_at),
+                "tool_name": tool_name,
+                "parameters": json.loads(parameters),
+                "summary": summary,
+                "age_minutes": int((now - created_at) / 60),
+                "tokens_saved": tokens_saved
             }
-            for e in valid_entries
+            for cache_id, created_at, tool_name, parameters, summary, tokens_saved in rows
         ]
 
+    def _entry_from_row(self, row) -> Dict[str, Any]:
+        (cache_id, created_at, tool_name, parameters, result, summary,
+         triggers, tokens_saved, execution_time_ms, is_valid) = row
+        return {
+            "cache_id": cache_id,
+            "timestamp": _iso(created_at),
+            "tool_name": tool_name,
+            "parameters": json.loads(parameters),
+            "result": json.loads(result),
+            "summary": summary,
+            "metadata": {
+                "tokens_saved": tokens_saved,
+                "execution_time_ms": execution_time_ms,
+                "invalidation_triggers": json.loads(triggers),
+                "is_valid": bool(is_valid)
+            }
+        }
+
     def get_entry(self, cache_id: str) -> Optional[Dict[str, Any]]:
         """
         Get the full cached result by cache_id.
@@ -168,14 +380,41 @@ class ToolCache:
         Returns:
             Full cache entry including result, or None if not found
         """
-        for entry in self._data["cache_entries"]:
-            if entry["cache_id"] == cache_id:
-                if entry.get("metadata", {}).get("is_valid", True):
-                    return entry
-                else:
-                    return None
+        with self._store.lock:
+            row = self._store.conn.execute(
+                f"SELECT {self._ENTRY_COLUMNS} FROM tool_cache_entries "
+                "WHERE cache_id = ? AND thread_id = ? AND is_valid = 1 AND created_at >= ?",
+                (cache_id, self.thread_id, self._cutoff()),
+            ).fetchone()
+
+        return self._entry_from_row(row) if row else None
+
+    def find_fresh(
+        self, tool_name: str, parameters: Dict[str, Any], max_age_s: float
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Get the newest valid result of an identical call made within ``max_age_s``.
 
-        return None
+        Args:
+            tool_name: Name of the tool that was called
+            parameters: Parameters of the call (compared as canonical JSON)
+            max_age_s: Freshness window in seconds
+
+        Returns:
+            Full cache entry including result, or None if there is no fresh hit
+        """
+        if max_age_s <= 0:
+            return None
+        cutoff = max(time.time() - max_age_s, self._cutoff())
+        with self._store.lock:
+            row = self._store.conn.execute(
+                f"SELECT {self._ENTRY_COLUMNS} FROM tool_cache_entries "
+                "WHERE thread_id = ? AND params_key = ? AND is_valid = 1 AND created_at >= ? "
+                "ORDER BY created_at DESC LIMIT 1",
+                (self.thread_id, params_key(tool_name, parameters), cutoff),
+            ).fetchone()
+
+        return self._entry_from_row(row) if row else None
 
     def invalidate(self, trigger: str):
         """
@@ -184,22 +423,32 @@ class ToolCache:
         Args:
             trigger: The invalidation trigger (e.g., "product_create")
         """
-        invalidated_ids = []
-
-        for entry in self._data["cache_entries"]:
-            triggers = entry.get("metadata", {}).get("invalidation_triggers", [])
-            if trigger in triggers and entry.get("metadata", {}).get("is_valid", True):
-                entry["metadata"]["is_valid"] = False
-                invalidated_ids.append(entry["cache_id"])
-
-        if invalidated_ids:
-            self._data["invalidation_log"].append({
-                "timestamp": datetime.now(timezone.utc).isoformat(),
-                "trigger": trigger,
-                "invalidated_entries": invalidated_ids
-            })
-
-            self._save_cache()
+        store = self._store
+        with store.lock:
+            store.conn.execute("BEGIN")
+            try:
+                invalidated_ids = [
+                    r[0] for r in store.conn.execute(
+                        "SELECT e.cache_id FROM tool_cache_triggers t "
+                        "JOIN tool_cache_entries e ON e.cache_id = t.cache_id "
+                        "WHERE t.thread_id = ? AND t.trigger = ? AND e.is_valid = 1",
+                        (self.thread_id, trigger),
+                    ).fetchall()
+                ]
+                if invalidated_ids:
+                    store.conn.executemany(
+                        "UPDATE tool_cache_entries SET is_valid = 0 WHERE cache_id = ?",
+                        [(cid,) for cid in invalidated_ids],
+                    )
+                    store.conn.execute(
+                        "INSERT INTO tool_cache_invalidations (thread_id, trigger, invalidated_entries, created_at) "
+                        "VALUES (?,?,?,?)",
+                        (self.thread_id, trigger, json.dumps(invalidated_ids), time.time()),
+                    )
+                store.conn.execute("COMMIT")
+            except Exception:
+                store.conn.execute("ROLLBACK")
+                raise
 
         return len(invalidated_ids)
 
@@ -213,26 +462,37 @@ class ToolCache:
         Returns:
             True if entry was deleted, False if not found
         """
-        original_length = len(self._data["cache_entries"])
-        self._data["cache_entries"] = [
-            e for e in self._data["cache_entries"]
-            if e["cache_id"] != cache_id
-        ]
-
-        deleted = len(self._data["cache_entries"]) < original_length
-
-        if deleted:
-            self._save_cache()
+        store = self._store
+        with store.lock:
+            store.conn.execute("BEGIN")
+            try:
+                deleted = store.conn.execute(
+                    "DELETE FROM tool_cache_entries WHERE cache_id = ? AND thread_id = ?",
+                    (cache_id, self.thread_id),
+                ).rowcount > 0
+                store.conn.execute(
+                    "DELETE FROM tool_cache_triggers WHERE cache_id = ? AND thread_id = ?",
+                    (cache_id, self.thread_id),
+                )
+                store.conn.execute("COMMIT")
+            except Exception:
+                store.conn.execute("ROLLBACK")
+                raise
 
         return deleted
 
     def clear(self):
         """Clear all cache entries."""
-        self._data = {
-            "cache_entries": [],
-            "invalidation_log": []
-        }
-        self._save_cache()
+        store = self._store
+        with store.lock:
+            store.conn.execute("BEGIN")
+            try:
+                for table in ("tool_cache_entries", "tool_cache_triggers", "tool_cache_invalidations"):
+                    store.conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (self.thread_id,))
+                store.conn.execute("COMMIT")
+            except Exception:
+                store.conn.execute("ROLLBACK")
+                raise
 
     def get_stats(self) -> Dict[str, Any]:
         """
@@ -241,45 +501,30 @@ class ToolCache:
         Returns:
             Dictionary with cache usage statistics
         """
-        valid_entries = [
-            e for e in self._data["cache_entries"]
-            if e.get("metadata", {}).get("is_valid", True)
-        ]
-
-        invalid_entries = [
-            e for e in self._data["cache_entries"]
-            if not e.get("metadata", {}).get("is_valid", True)
-        ]
-
-        total_tokens_saved = sum(
-            e.get("metadata", {}).get("tokens_saved", 0)
-            for e in valid_entries
-        )
-
-        total_time_saved_ms = sum(
-            e.get("metadata", {}).get("execution_time_ms", 0)
-            for e in valid_entries
-        )
+        with self._store.lock:
+            total, valid, total_tokens_saved, total_time_saved_ms = self._store.conn.execute(
+                "SELECT COUNT(*), "
+                "COALESCE(SUM(is_valid), 0), "
+                "COALESCE(SUM(CASE WHEN is_valid = 1 THEN tokens_saved END), 0), "
+                "COALESCE(SUM(CASE WHEN is_valid = 1 THEN execution_time_ms END), 0) "
+                "FROM tool_cache_entries WHERE thread_id = ? AND created_at >= ?",
+                (self.thread_id, self._cutoff()),
+            ).fetchone()
+            invalidation_count = self._store.conn.execute(
+                "SELECT COUNT(*) FROM tool_cache_invalidations WHERE thread_id = ?",
+                (self.thread_id,),
+            ).fetchone()[0]
 
         return {
-            "total_entries": len(self._data["cache_entries"]),
-            "valid_entries": len(valid_entries),
-            "invalid_entries": len(invalid_entries),
+            "total_entries": total,
+            "valid_entries": valid,
+            "invalid_entries": total - valid,
             "total_tokens_saved": total_tokens_saved,
             "total_time_saved_ms": total_time_saved_ms,
             "total_time_saved_seconds": round(total_time_saved_ms / 1000, 2),
-            "invalidation_count": len(self._data["invalidation_log"])
+            "invalidation_count": invalidation_count
         }
 
-    def _calculate_age_minutes(self, timestamp_iso: str) -> int:
-        """Calculate age in minutes from ISO timestamp."""
-        try:
-            cached_time = datetime.fromisoformat(timestamp_iso.replace('Z', '+00:00'))
-            age = datetime.now(timezone.utc) - cached_time
-            return int(age.total_seconds() / 60)
-        except (ValueError, AttributeError):
-            return 0
-
 
 def print_json(data):
     """Print data in JSON format."""